@@ -0,0 +1,267 @@
+// Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+//
+// Permission is hereby granted, free of charge, to any person obtaining a
+// copy of this software and associated documentation files (the "Software"),
+// to deal in the Software without restriction, including without limitation
+// the rights to use, copy, modify, merge, publish, distribute, sublicense,
+// and/or sell copies of the Software, and to permit persons to whom the
+// Software is furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in
+// all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+// THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+// DEALINGS IN THE SOFTWARE.
+
+// Reusable Audio2Face 2D client.
+//
+// One A2F2DClient holds one gRPC channel, so every request made through it
+// shares the same HTTP/2 connection instead of paying a new connection each
+// time. Audio is streamed into the call as it is read and video is written
+// out as it arrives, with backpressure in both directions, so neither the
+// input nor the output is ever held in memory as a whole.
+
+const grpc = require('@grpc/grpc-js');
+const messages = require('../interfaces/audio2face2d_pb');
+const services = require('../interfaces/audio2face2d_grpc_pb');
+
+/**
+ * Counting semaphore bounding the number of calls in flight
+ */
+class Semaphore {
+  constructor(limit) {
+    this.limit = limit;
+    this.active = 0;
+    this.waiting = [];
+  }
+
+  acquire() {
+    if (this.active < this.limit) {
+      this.active++;
+      return Promise.resolve();
+    }
+    return new Promise((resolve) => this.waiting.push(resolve));
+  }
+
+  release() {
+    const next = this.waiting.shift();
+    if (next) {
+      next(); // the slot passes straight to the next waiting call
+    } else {
+      this.active--;
+    }
+  }
+}
+
+/**
+ * Returns the milliseconds elapsed since start, a process.hrtime.bigint() value
+ */
+function elapsedMs(start) {
+  return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+/**
+ * Returns the value at quantile q of sorted values, null when empty
+ */
+function percentile(sorted, q) {
+  if (sorted.length === 0) {
+    return null;
+  }
+  return sorted[Math.min(sorted.length - 1, Math.round(q * (sorted.length - 1)))];
+}
+
+class A2F2DClient {
+  /**
+   * Creates a client holding one channel to the Audio2Face 2D service.
+   *
+   * @param {string} target - IP:port of the gRPC service
+   * @param {object} credentials - gRPC channel credentials
+   * @param {object} options - Optional settings:
+   *   - maxConcurrentStreams {number}: Maximum number of calls in flight, further calls wait for a slot, default 32
+   *   - channelOptions {object}: Additional gRPC channel options
+   *   - statsWindow {number}: Number of recent calls the latency percentiles are computed over, default 1000
+   */
+  constructor(target, credentials, options = {}) {
+    this.target = target;
+    this.client = new services.Audio2Face2DServiceClient(target, credentials, {
+      // Keep the idle connection open between requests
+      'grpc.keepalive_time_ms': 30000,
+      'grpc.keepalive_permit_without_calls': 1,
+      'grpc.max_receive_message_length': -1,
+      'grpc.max_send_message_length': -1,
+      ...options.channelOptions,
+    });
+    this.slots = new Semaphore(options.maxConcurrentStreams || 32);
+    this.statsWindow = options.statsWindow || 1000;
+    this.completed = 0;
+    this.failed = 0;
+    this.inFlight = 0;
+    this.recent = [];
+  }
+
+  /**
+   * Connects the channel ahead of the first call.
+   *
+   * @param {number} timeoutMs - Time to wait for the connection
+   * @returns {Promise<number>} Milliseconds spent establishing the connection
+   */
+  waitForReady(timeoutMs = 10000) {
+    const start = process.hrtime.bigint();
+    return new Promise((resolve, reject) => {
+      this.client.waitForReady(Date.now() + timeoutMs, (error) => {
+        if (error) {
+          reject(error);
+        } else {
+          resolve(elapsedMs(start));
+        }
+      });
+    });
+  }
+
+  /**
+   * Streams audio through the service and writes the video to output.
+   *
+   * @param {messages.AnimateConfig} config - Feature configuration sent first
+   * @param {stream.Readable} audio - Audio bytes, for example a file or an HTTP request body
+   * @param {stream.Writable} output - Receives the MP4 chunks as they arrive, ended when the call completes
+   * @param {object} options - Optional settings:
+   *   - deadlineMs {number}: Deadline of the call in milliseconds
+   *   - signal {AbortSignal}: Cancels the call when aborted, for example when the browser disconnects
+   * @returns {Promise<object>} Timings and sizes of the call in milliseconds and bytes
+   */
+  async animate(config, audio, output, options = {}) {
+    const submitted = process.hrtime.bigint();
+    await this.slots.acquire();
+    const queueWaitMs = elapsedMs(submitted);
+    this.inFlight++;
+    try {
+      const timing = await this._call(config, audio, output, options);
+      timing.queueWaitMs = queueWaitMs;
+      this.completed++;
+      this.recent.push(timing);
+      if (this.recent.length > this.statsWindow) {
+        this.recent.shift();
+      }
+      return timing;
+    } catch (error) {
+      this.failed++;
+      throw error;
+    } finally {
+      this.inFlight--;
+      this.slots.release();
+    }
+  }
+
+  _call(config, audio, output, { deadlineMs, signal } = {}) {
+    return new Promise((resolve, reject) => {
+      const start = process.hrtime.bigint();
+      const timing = { inputBytes: 0, outputBytes: 0, firstOutputMs: null, latencyMs: null };
+      if (signal && signal.aborted) {
+        reject(new Error('Request aborted'));
+        return;
+      }
+      const call = this.client.animate(deadlineMs ? { deadline: Date.now() + deadlineMs } : {});
+      let settled = false;
+
+      const fail = (error) => {
+        if (!settled) {
+          settled = true;
+          audio.destroy();
+          call.cancel();
+          reject(error);
+        }
+      };
+
+      call.on('data', (response) => {
+        if (!response.hasVideoFileData()) {
+          return; // config echo or keepalive
+        }
+        const data = response.getVideoFileData_asU8();
+        if (timing.firstOutputMs === null) {
+          timing.firstOutputMs = elapsedMs(start);
+        }
+        timing.outputBytes += data.length;
+        if (!output.write(data)) {
+          // Stop reading from the server until the consumer catches up
+          call.pause();
+          output.once('drain', () => call.resume());
+        }
+      });
+      // The call succeeded once all output has been read and the status is OK
+      let ended = false;
+      let succeeded = false;
+      const finish = () => {
+        if (ended && succeeded && !settled) {
+          settled = true;
+          timing.latencyMs = elapsedMs(start);
+          output.end();
+          resolve(timing);
+        }
+      };
+      call.on('end', () => {
+        ended = true;
+        finish();
+      });
+      call.on('status', (status) => {
+        succeeded = status.code === grpc.status.OK;
+        finish();
+      });
+      call.on('error', fail);
+      audio.on('error', fail);
+      output.on('error', fail);
+      if (signal) {
+        signal.addEventListener('abort', () => fail(new Error('Request aborted')), { once: true });
+      }
+
+      const request = new messages.AnimateRequest();
+      request.setConfig(config);
+      call.write(request);
+
+      audio.on('data', (chunk) => {
+        timing.inputBytes += chunk.length;
+        const message = new messages.AnimateRequest();
+        message.setAudioFileData(chunk);
+        if (!call.write(message)) {
+          // Stop reading the audio until the call has sent what it holds
+          audio.pause();
+          call.once('drain', () => audio.resume());
+        }
+      });
+      audio.on('end', () => call.end());
+    });
+  }
+
+  /**
+   * Returns counters and latency percentiles of the recent calls.
+   */
+  stats() {
+    const latencies = this.recent.map((t) => t.latencyMs).sort((a, b) => a - b);
+    const firstOutputs = this.recent.map((t) => t.firstOutputMs).filter((t) => t !== null);
+    return {
+      target: this.target,
+      inFlight: this.inFlight,
+      queued: this.slots.waiting.length,
+      completed: this.completed,
+      failed: this.failed,
+      latencyP50Ms: percentile(latencies, 0.5),
+      latencyP95Ms: percentile(latencies, 0.95),
+      firstOutputMeanMs: firstOutputs.length
+        ? firstOutputs.reduce((a, b) => a + b, 0) / firstOutputs.length
+        : null,
+    };
+  }
+
+  /**
+   * Closes the channel, calls in flight are cancelled.
+   */
+  close() {
+    this.client.close();
+  }
+}
+
+module.exports = { A2F2DClient, percentile };
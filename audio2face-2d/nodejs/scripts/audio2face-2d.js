@@ -26,22 +26,91 @@ const http = require('http');
 const messages = require('../interfaces/audio2face2d_pb')
 const memoryStream = require('memorystream');
 const path=require("path");
-const services = require('../interfaces/audio2face2d_grpc_pb');
 const writer = require('wav').Writer;
+const { A2F2DClient } = require('./a2f2d_client');
 const { Command } = require('commander');
 const { parse } = require('csv-parse/sync')
+const { PassThrough, Writable } = require('stream');
 
 // Set parameters
 const chunkSize = 1024 * 1024 // Size of audio chunk to stream
 const memStream = new memoryStream(); // To stream video output from server to the browser
 const A2F2D_BROWSER_PORT = process.env.A2F2D_BROWSER_PORT || 3000; // check if system has env variable for browser streaming PORT, otherwise use 3000
  
+/**
+ * Writable sending the output video as the HTTP response, the headers are sent with the first chunk
+ * so that a call failing before any output can still answer with an error status
+ *
+ * @param res - HTTP response object
+ * @returns {Writable} stream the video chunks are written to
+ */
+function videoResponse(res) {
+  const sendHeaders = () => {
+    if (!res.headersSent) {
+      res.writeHead(200, { 'Content-Type': 'video/mp4' });
+    }
+  };
+  return new Writable({
+    write(chunk, encoding, callback) {
+      sendHeaders();
+      if (res.write(chunk)) {
+        callback();
+      } else {
+        res.once('drain', callback);
+      }
+    },
+    final(callback) {
+      sendHeaders();
+      res.end(callback);
+    },
+  });
+}
+
+/**
+ * Animates the audio uploaded in the request body and streams the video back in the response.
+ * The upload is passed to the NIM as it arrives, so the audio is never held in memory as a whole.
+ *
+ * @param {A2F2DClient} client - Shared client, all uploads use its connection
+ * @param config - Audio2Face 2D config sent with every upload
+ * @param req - HTTP request, its body is the WAV audio
+ * @param res - HTTP response
+ */
+function animateUpload(client, config, req, res) {
+  // Cancel the call when the browser goes away before the video is complete
+  const controller = new AbortController();
+  res.on('close', () => {
+    if (!res.writableFinished) {
+      controller.abort();
+    }
+  });
+
+  client.animate(config, req, videoResponse(res), { signal: controller.signal })
+    .then((timing) => {
+      console.log(
+        `Animated ${timing.inputBytes} bytes of uploaded audio in ${timing.latencyMs.toFixed(1)} ms ` +
+        `(queued ${timing.queueWaitMs.toFixed(1)} ms, first output ${timing.firstOutputMs?.toFixed(1)} ms, ` +
+        `${timing.outputBytes} bytes of video)`
+      );
+    })
+    .catch((error) => {
+      console.error('Upload failed:', error.message);
+      if (!res.headersSent) {
+        res.writeHead(502, { 'Content-Type': 'text/plain' });
+        res.end(error.message);
+      } else {
+        res.destroy(); // the browser sees a truncated response
+      }
+    });
+}
+
 /**
  * Sets up the video streaming server for streaming output video to browser
  *
+ * @param {A2F2DClient} client - Client used for uploads from the browser, uploads are disabled when null
+ * @param config - Audio2Face 2D config sent with every upload
  * @returns {handle} handle for the server object
  */
-function setupVideoStreamingServer() {
+function setupVideoStreamingServer(client = null, config = null) {
   // Create the server
   const server = http.createServer((req, res)=>{
     if(req.method === 'GET' && req.url === "/"){
@@ -51,6 +120,19 @@ function setupVideoStreamingServer() {
       return;
     }
 
+    // Audio uploaded from the browser, animated concurrently over the shared client
+    if(client && req.method === 'POST' && req.url === "/animate"){
+      animateUpload(client, config, req, res);
+      return;
+    }
+
+    // Counters and latency percentiles of the client
+    if(client && req.method === 'GET' && req.url === "/stats"){
+      res.writeHead(200, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify(client.stats()));
+      return;
+    }
+
     //if video content is requested
     if(req.method === 'GET' && req.url === "/video"){
       const head = {
@@ -145,14 +227,14 @@ function processHeadPoseModeAnimationInput(headRotationAnimationFilepath, headTr
 }
 
 /**
- * Sends the input config like portrait image, mode, model etc
+ * Builds the input config like portrait image, mode, model etc
  *
- * @param rpcCall - RPC call object
  * @param {string} portraitInputFile - Path to the portrait input file
  * @param {string} headRotationAnimationFilepath - Path to the rotation animation data file
  * @param {string} headTranslationAnimationFilepath - Path to the translation animation data file
+ * @returns {messages.AnimateConfig} config sent as the first message of each call
  */
-function sendInputConfig(rpcCall, portraitInputFile, headRotationAnimationFilepath, headTranslationAnimationFilepath) {
+function buildInputConfig(portraitInputFile, headRotationAnimationFilepath, headTranslationAnimationFilepath) {
   // Open and read the portrait image in binary format
   const config = new messages.AnimateConfig();
   const imgData = fs.readFileSync(portraitInputFile);
@@ -187,27 +269,17 @@ function sendInputConfig(rpcCall, portraitInputFile, headRotationAnimationFilepa
     config.setInputHeadTranslation(animationData.translationDataStream);
   }
 
-  var msg = new messages.AnimateRequest();
-  msg.setConfig(config);
-
-  // Write the config to the stream
-  try {
-    rpcCall.write(msg);
-    console.log("Input config sent");
-  } catch (writeError) {
-    console.error('Write Error:', writeError.message);
-    process.exit(1); // Exit the process with a non-zero status code
-  }
+  return config;
 }
 
 /**
- * Sends input audio chunks
+ * Opens the input audio as a stream of WAV chunks
  *
- * @param rpcCall - RPC call object
  * @param format - type of audio format (pcm or wav)
  * @param {string} audioInputFile - Path to audio input file
+ * @returns {stream.Readable} stream of the audio chunks
  */
-function sendInputAudioChunks(rpcCall, format, audioInputFile) {
+function openInputAudio(format, audioInputFile) {
   // Read audio file
   let readStream;
   if (format === 'wav') {
@@ -226,70 +298,24 @@ function sendInputAudioChunks(rpcCall, format, audioInputFile) {
     pcm.pipe(readStream);
   }
 
-  readStream.on('data', (chunk) => {
-    // Process the chunk here
-    var msg = new messages.AnimateRequest();
-    msg.setAudioFileData(chunk);
-
-    // Write the audio chunk to the stream
-    rpcCall.write(msg);
-  });
-
-  readStream.on('end', () => {
-    rpcCall.end();
-    console.log('Input audio sent');
-    console.log('Receiving and writing the video chunks from server to the output file');
-  });
-
-  readStream.on('error', (err) => {
-    console.error('Error reading the audio file:', err);
-    process.exit(1); // Exit the process with a non-zero status code
-  });
+  return readStream;
 }
 
 /**
- * Sets up the infra to receive response(video chunks) from the server
+ * Opens the output video, written to the output file and, if enabled, streamed to the browser
  *
- * @param rpcCall - RPC call object
  * @param {string} outputFile - Path to video output file
  * @param {bool} browser - Specifies if the browser is enabled
+ * @returns {stream.Writable} stream the video chunks are written to
  */
-function receiveServerResponse(rpcCall, outputFile, browser) {
+function openOutputVideo(outputFile, browser) {
   // Open the mp4 file to write the video frames from the server
-  const writeStream = fs.createWriteStream(outputFile);
-  
-  // Set up processing for the response
-  rpcCall.on('data', function(response) {
-    if (response.hasVideoFileData()) {
-      const data = response.getVideoFileData();
-      writeStream.write(data);
-
-      if (browser) {
-        memStream.write(data);
-      }
-    }
-  });
-
-  rpcCall.on('end', () => {
-    writeStream.end();
-
-    if (browser) {
-      memStream.end();
-    }
-
-    // Log the elapsed time
-    console.timeEnd('Function invocation completed in ');
-    console.log(`video written to ${outputFile}`);
-
-    if (browser) {
-      console.log("Press Ctrl+C to stop the browser streaming server");
-    }
-  });
-
-  rpcCall.on('error', (err) => {
-    console.error('Error:', err);
-    process.exit(1); // Exit the process with a non-zero status code
-  });
+  const output = new PassThrough();
+  output.pipe(fs.createWriteStream(outputFile));
+  if (browser) {
+    output.pipe(memStream);
+  }
+  return output;
 }
 
 function readFileContent(filePath) {
@@ -329,6 +355,9 @@ function parseArguments() {
     .option('--portrait-input <type>', 'The path to the input portrait file.', '../../assets/sample_portrait_image.png')
     .option('--format <type>', 'Audio format - wav or pcm', 'wav')
     .option('--browser', 'Specifies whether to enable browser streaming')
+    .option('--serve', 'Serve index.html and animate audio uploaded from the browser, until stopped')
+    .option('--max-concurrent-streams <number>', 'Maximum number of uploads animated at the same time with --serve', '8')
+    .option('--timeout <seconds>', 'Deadline of each request in seconds')
     .option('--output <type>', 'The path for the output video file.', 'output.mp4')
     .helpOption('-h, --help', 'Display help for command');
 
@@ -337,7 +366,7 @@ function parseArguments() {
 }
 
 /**
- * Creates a gRPC client instance based on the provided options.
+ * Creates a reusable client based on the provided options.
  * 
  * @param {object} options - The options object containing the following properties:
  *   - sslMode {string}: The SSL mode to use for the connection. Can be one of 'DISABLED', 'TLS', or 'MTLS'.
@@ -346,12 +375,11 @@ function parseArguments() {
  *   - sslCert {string}: The path to the certificate chain file (required for 'MTLS' mode).
  *   - target {string}: The target URL for the gRPC client.
  * 
- * @returns {object} The created gRPC client instance.
+ * @returns {A2F2DClient} The created client, holding one connection shared by all its requests.
  * 
  * @throws {Error} If the provided SSL mode is invalid or if required certificate/key files are missing.
  */
 function createGrpcClient(options) {
-  let client;
   let credentials;
 
   switch (options.sslMode) {
@@ -390,8 +418,9 @@ function createGrpcClient(options) {
   }
 
   // Create the gRPC client
-  client = new services.Audio2Face2DServiceClient(options.target, credentials);
-  return client;
+  return new A2F2DClient(options.target, credentials, {
+    maxConcurrentStreams: parseInt(options.maxConcurrentStreams, 10),
+  });
 }
 
 function main() {
@@ -422,7 +451,7 @@ function main() {
   }
 
   // Check if required input files exist
-  if (!fs.existsSync(options['audioInput'])) {
+  if (!options['serve'] && !fs.existsSync(options['audioInput'])) {
     console.error('Audio input file %s does not exist', options['audioInput']);
     process.exit(1); // Exit the process with a non-zero status code
   }
@@ -431,6 +460,23 @@ function main() {
     process.exit(1); // Exit the process with a non-zero status code
   }
 
+  // Set up the connection with the server, shared by all requests of this process
+  const client = createGrpcClient(options);
+  const config = buildInputConfig(options['portraitInput'], options['headRotationAnimationFilepath'], options['headTranslationAnimationFilepath']);
+  const deadlineMs = options['timeout'] ? parseFloat(options['timeout']) * 1000 : undefined;
+
+  if (options['serve']) {
+    // Serve the page, uploads from any number of browsers share the client's connection
+    const server = setupVideoStreamingServer(client, config);
+    client.waitForReady()
+      .then((connectMs) => console.log(`Connected to ${options['target']} in ${connectMs.toFixed(1)} ms`))
+      .catch((error) => console.error('Connection failed:', error.message));
+    server.listen(A2F2D_BROWSER_PORT, () => {
+      console.log(`Open http://127.0.0.1:${A2F2D_BROWSER_PORT}/ to animate audio files, press Ctrl+C to stop`);
+    });
+    return;
+  }
+
   // Setup and start the video streaming server, if enabled
   if (options['browser']) {
     const server = setupVideoStreamingServer();
@@ -439,34 +485,24 @@ function main() {
     });
   }
 
-  // Set up the connection with the server
-  var client = createGrpcClient(options);
-  
-  // Start the timer
-  console.time('Function invocation completed in ');
-
-  // Setup call to the remote function (animate is the remote procedure for A2F2D)
-  const rpcCall = client.animate((error) => {
-    if (error) {
+  // Stream the audio chunks of the audio file through the service into the output file
+  client.animate(config, openInputAudio(options['format'], options['audioInput']), openOutputVideo(options['output'], options['browser']), { deadlineMs })
+    .then((timing) => {
+      console.log(
+        `Function invocation completed in ${timing.latencyMs.toFixed(1)} ms ` +
+        `(first output after ${timing.firstOutputMs?.toFixed(1)} ms, ` +
+        `${timing.inputBytes} bytes sent, ${timing.outputBytes} bytes received)`
+      );
+      console.log(`video written to ${options['output']}`);
+      client.close();
+      if (options['browser']) {
+        console.log("Press Ctrl+C to stop the browser streaming server");
+      }
+    })
+    .catch((error) => {
       console.error('RPC call error ', error.message);
       process.exit(1); // Exit the process with a non-zero status code
-    }
-  });
-
-  // Check for connection error
-  rpcCall.on('error', (error) => {
-    console.error('Connection failed:', error.message);
-    process.exit(1); // Exit the process with a non-zero status code
-  });
-
-  // Write the Audio2face 2D config
-  sendInputConfig(rpcCall, options['portraitInput'], options['headRotationAnimationFilepath'], options['headTranslationAnimationFilepath']);
-
-  // Write the audio chunks of size chunkSize from the audio file
-  sendInputAudioChunks(rpcCall, options['format'], options['audioInput']);
-  
-  // Sets up receiving response from server and writing to a file
-  receiveServerResponse(rpcCall, options['output'], options['browser']);
+    });
 }
 
 main()
@@ -0,0 +1,152 @@
+// Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+//
+// Permission is hereby granted, free of charge, to any person obtaining a
+// copy of this software and associated documentation files (the "Software"),
+// to deal in the Software without restriction, including without limitation
+// the rights to use, copy, modify, merge, publish, distribute, sublicense,
+// and/or sell copies of the Software, and to permit persons to whom the
+// Software is furnished to do so, subject to the following conditions:
+//
+// The above copyright notice and this permission notice shall be included in
+// all copies or substantial portions of the Software.
+//
+// THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+// IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+// FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+// THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+// LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+// FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+// DEALINGS IN THE SOFTWARE.
+
+// Throughput benchmark of the Node.js client.
+//
+// Sends the same audio file many times with a bounded number of requests in
+// flight and compares one reused client, whose requests share one connection,
+// with a new client and connection per request as the single-call script does.
+// Run it against a NIM or the local stand-in server from the common folder:
+//
+//   python -m nim_common.standin --service audio2face-2d --port 8001
+//   node benchmark.js --target 127.0.0.1:8001 --requests 64 --concurrency 8
+
+const fs = require('fs');
+const grpc = require('@grpc/grpc-js');
+const messages = require('../interfaces/audio2face2d_pb');
+const { A2F2DClient, percentile } = require('./a2f2d_client');
+const { Command } = require('commander');
+const { Writable } = require('stream');
+
+/**
+ * Writable discarding the video, so that only the client path is measured
+ */
+function nullOutput() {
+  return new Writable({
+    write(chunk, encoding, callback) {
+      callback();
+    },
+  });
+}
+
+/**
+ * Runs requests calls with at most concurrency in flight.
+ *
+ * @param {function} animate - Function making one call, returns its timing
+ * @returns {Promise<object>} summary of the run
+ */
+async function run(animate, requests, concurrency) {
+  const timings = [];
+  let next = 0;
+  let failed = 0;
+  const start = process.hrtime.bigint();
+  const worker = async () => {
+    while (next < requests) {
+      next++;
+      try {
+        timings.push(await animate());
+      } catch (error) {
+        failed++;
+        console.error('Request failed:', error.message);
+      }
+    }
+  };
+  await Promise.all(Array.from({ length: concurrency }, worker));
+  const wallMs = Number(process.hrtime.bigint() - start) / 1e6;
+  const latencies = timings.map((t) => t.latencyMs).sort((a, b) => a - b);
+  const mean = (values) => values.reduce((a, b) => a + b, 0) / Math.max(1, values.length);
+  return {
+    requests,
+    failed,
+    wallMs,
+    requestsPerS: (timings.length * 1000) / wallMs,
+    latencyMeanMs: mean(latencies),
+    latencyP50Ms: percentile(latencies, 0.5),
+    latencyP95Ms: percentile(latencies, 0.95),
+    firstOutputMeanMs: mean(timings.map((t) => t.firstOutputMs || 0)),
+  };
+}
+
+function parseArguments() {
+  const program = new Command();
+  program
+    .description('Throughput benchmark of the Node JS client for A2F2D NIM')
+    .option('--target <type>', 'IP:port of gRPC service.', '127.0.0.1:8001')
+    .option('--audio-input <type>', 'The path to the input audio file.', '../../assets/sample_audio.wav')
+    .option('--portrait-input <type>', 'The path to the input portrait file.', '../../assets/sample_portrait_image.png')
+    .option('--requests <number>', 'Number of requests per mode.', '64')
+    .option('--concurrency <number>', 'Number of requests in flight.', '8')
+    .option('--mode <type>', 'reuse, per-call or both', 'both')
+    .option('--json', 'Print the results as JSON')
+    .helpOption('-h, --help', 'Display help for command');
+  program.parse(process.argv);
+  return program.opts();
+}
+
+async function main() {
+  const options = parseArguments();
+  const requests = parseInt(options.requests, 10);
+  const concurrency = parseInt(options.concurrency, 10);
+  const credentials = grpc.credentials.createInsecure();
+  const config = new messages.AnimateConfig();
+  config.setPortraitImage(fs.readFileSync(options.portraitInput));
+  const audio = () => fs.createReadStream(options.audioInput, { highWaterMark: 1024 * 1024 });
+  const results = {};
+
+  if (options.mode === 'reuse' || options.mode === 'both') {
+    const client = new A2F2DClient(options.target, credentials, { maxConcurrentStreams: concurrency });
+    const connectMs = await client.waitForReady();
+    results.reuse = await run(() => client.animate(config, audio(), nullOutput()), requests, concurrency);
+    results.reuse.connectMs = connectMs;
+    client.close();
+  }
+  if (options.mode === 'per-call' || options.mode === 'both') {
+    results.perCall = await run(async () => {
+      // A local subchannel pool stops grpc-js from sharing the connection between clients
+      const client = new A2F2DClient(options.target, credentials, {
+        channelOptions: { 'grpc.use_local_subchannel_pool': 1 },
+      });
+      try {
+        return await client.animate(config, audio(), nullOutput());
+      } finally {
+        client.close();
+      }
+    }, requests, concurrency);
+  }
+
+  if (options.json) {
+    console.log(JSON.stringify(results, null, 2));
+    return;
+  }
+  const fmt = (value) => (value === null || value === undefined ? '-' : value.toFixed(1));
+  console.log('mode        req/s   mean ms    p50 ms    p95 ms  first ms  failed');
+  for (const [mode, r] of Object.entries(results)) {
+    console.log(
+      `${mode.padEnd(8)} ${fmt(r.requestsPerS).padStart(8)} ${fmt(r.latencyMeanMs).padStart(9)} ` +
+      `${fmt(r.latencyP50Ms).padStart(9)} ${fmt(r.latencyP95Ms).padStart(9)} ` +
+      `${fmt(r.firstOutputMeanMs).padStart(9)} ${String(r.failed).padStart(7)}`
+    );
+  }
+}
+
+main().catch((error) => {
+  console.error(error.message);
+  process.exit(1);
+});
@@ -19,25 +19,44 @@
 # DEALINGS IN THE SOFTWARE.
 
 import argparse
+import contextlib
 import os
 import sys
 import time
-import io
-import grpc
-
-sys.path.append(os.path.join(os.getcwd(), "../interfaces"))
-# Importing gRPC compiler auto-generated maxine audio2face-2d library
-import audio2face2d_pb2  # noqa: E402
-import audio2face2d_pb2_grpc  # noqa: E402
-from audio2face2d_pb2 import (  # noqa: E402
-    QuaternionStream,
-    Quaternion,
-    Vector3fStream,
-    Vector3f,
-    ModelSelection,
-    AnimationCroppingMode,
-    HeadPoseMode,
-)
+from typing import Callable
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INTERFACES_DIR = os.path.join(SCRIPT_DIR, "../interfaces")
+sys.path.append(os.path.join(SCRIPT_DIR, "../../../common"))
+
+# grpc and the generated modules are imported by load_dependencies() on first use, so that
+# --help and argument errors return without paying for them.
+grpc = None
+audio2face2d_pb2 = None
+audio2face2d_pb2_grpc = None
+
+
+def load_dependencies() -> None:
+    """Function to import grpc and the gRPC compiler auto-generated maxine audio2face-2d library."""
+    global grpc, audio2face2d_pb2, audio2face2d_pb2_grpc
+    global QuaternionStream, Quaternion, Vector3fStream, Vector3f
+    global ModelSelection, AnimationCroppingMode, HeadPoseMode
+    if audio2face2d_pb2_grpc is not None:
+        return
+    if INTERFACES_DIR not in sys.path:
+        sys.path.append(INTERFACES_DIR)
+    import grpc
+    import audio2face2d_pb2
+    import audio2face2d_pb2_grpc
+    from audio2face2d_pb2 import (
+        QuaternionStream,
+        Quaternion,
+        Vector3fStream,
+        Vector3f,
+        ModelSelection,
+        AnimationCroppingMode,
+        HeadPoseMode,
+    )
 
 
 def parse_args() -> None:
@@ -58,19 +77,19 @@ def parse_args() -> None:
     parser.add_argument(
         "--ssl-key",
         type=str,
-        default="../ssl_key/ssl_key_client.pem",
+        default=os.path.join(SCRIPT_DIR, "../ssl_key/ssl_key_client.pem"),
         help="The path to ssl private key.",
     )
     parser.add_argument(
         "--ssl-cert",
         type=str,
-        default="../ssl_key/ssl_cert_client.pem",
+        default=os.path.join(SCRIPT_DIR, "../ssl_key/ssl_cert_client.pem"),
         help="The path to ssl certificate chain.",
     )
     parser.add_argument(
         "--ssl-root-cert",
         type=str,
-        default="../ssl_key/ssl_ca_cert.pem",
+        default=os.path.join(SCRIPT_DIR, "../ssl_key/ssl_ca_cert.pem"),
         help="The path to ssl root certificate.",
     )
     parser.add_argument(
@@ -82,13 +101,13 @@ def parse_args() -> None:
     parser.add_argument(
         "--audio-input",
         type=str,
-        default="../../assets/sample_audio.wav",
+        default=os.path.join(SCRIPT_DIR, "../../assets/sample_audio.wav"),
         help="The path to the input audio file.",
     )
     parser.add_argument(
         "--portrait-input",
         type=str,
-        default="../../assets/sample_portrait_image.png",
+        default=os.path.join(SCRIPT_DIR, "../../assets/sample_portrait_image.png"),
         help="The path to the input portrait file.",
     )
     parser.add_argument(
@@ -100,30 +119,100 @@ def parse_args() -> None:
     parser.add_argument(
         "--head-rotation-animation-filepath",
         type=str,
-        default="../../assets/head_rotation_animation.csv",
+        default=os.path.join(SCRIPT_DIR, "../../assets/head_rotation_animation.csv"),
         help="The path for the head_rotation_animation.csv file. "
         "Only required for HEAD_POSE_MODE_USER_DEFINED_ANIMATION",
     )
     parser.add_argument(
         "--head-translation-animation-filepath",
         type=str,
-        default="../../assets/head_translation_animation.csv",
+        default=os.path.join(SCRIPT_DIR, "../../assets/head_translation_animation.csv"),
         help="The path for the head_translation_animation.csv file. "
         "Only required for HEAD_POSE_MODE_USER_DEFINED_ANIMATION",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Deadline of the request in seconds, the request is cancelled when it expires.",
+    )
+    parser.add_argument(
+        "--deadline-rtf",
+        type=float,
+        help="Expected real-time factor of the NIM. The deadline is set to the audio duration "
+        "times this factor plus slack, bounded by --timeout.",
+    )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        default="auto",
+        choices=["none", "auto", "sample", "gzip", "deflate"],
+        help="Compression of the upload. auto, the default, uses gzip for PCM WAV and none for "
+        "MP4, sample compresses the start of the input and uses gzip when it saves enough, none "
+        "saves the CPU on a local network.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Number of times the request is restarted when the NIM is unavailable.",
+    )
+    parser.add_argument(
+        "--progressive-port",
+        type=int,
+        help="Serve the output over local HTTP on this port while it is written, so playback "
+        "of a fragmented or faststart MP4 starts before the render completes. 0 picks a free "
+        "port.",
+    )
+    parser.add_argument(
+        "--progressive-linger",
+        type=float,
+        default=5.0,
+        help="Seconds the progressive server keeps running after the output is complete and "
+        "the last request ended.",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        help="Split the audio into segments of about this many seconds at silences, render "
+        "them concurrently and splice the outputs without re-encoding. Requires ffmpeg.",
+    )
+    parser.add_argument(
+        "--segment-search",
+        type=float,
+        default=10.0,
+        help="Seconds before and after each nominal cut searched for a silence, used with "
+        "--segment-seconds.",
+    )
+    parser.add_argument(
+        "--segment-concurrency",
+        type=int,
+        default=4,
+        help="Number of segments rendered at the same time, used with --segment-seconds.",
+    )
+    parser.add_argument(
+        "--replica-target",
+        action="append",
+        default=[],
+        help="IP:port of a further replica the segments are spread over, used with "
+        "--segment-seconds. May be repeated.",
+    )
+    parser.add_argument(
+        "--animation-fps",
+        type=int,
+        default=30,
+        help="Frame rate of the output video and of the head pose animation, segments are cut "
+        "at its frames.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Record the phases of the requests as spans into this OTLP/JSON lines file, or post "
+        "them to this OTLP/HTTP collector URL. The trace context is sent to the NIM as "
+        "traceparent metadata.",
+    )
     return parser.parse_args()
 
 
-def read_file_content(file_path: os.PathLike) -> None:
-    """Function to read file content as bytes.
-
-    Args:
-      file_path: Path to input file
-    """
-    with open(file_path, "rb") as file:
-        return file.read()
-
-
 def generate_request_for_inference(audio_filepath: str, params: dict):
     """Generator to produce the request data stream
 
@@ -132,12 +221,12 @@ def generate_request_for_inference(audio_filepath: str, params: dict):
       params: Parameters for the feature
     """
     yield audio2face2d_pb2.AnimateRequest(config=audio2face2d_pb2.AnimateConfig(**params))
-    file = open(audio_filepath, "rb")
-    while True:
-        buffer = file.read(1024 * 1024)
-        if buffer == b"":
-            break
-        yield audio2face2d_pb2.AnimateRequest(audio_file_data=buffer)
+    with open(audio_filepath, "rb") as file:
+        while True:
+            buffer = file.read(1024 * 1024)
+            if buffer == b"":
+                break
+            yield audio2face2d_pb2.AnimateRequest(audio_file_data=buffer)
     print("Data sending done")
 
 
@@ -152,8 +241,9 @@ def process_head_pose_data(head_rotation_path, head_translation_path):
     Returns:
         Tuple[QuaternionStream, Vector3fStream]: Processed rotation and translation data streams.
     """
+    load_dependencies()
     # Read the head rotation data
-    with io.StringIO(open(head_rotation_path, "rb").read().decode("utf-8")) as file:
+    with open(head_rotation_path, "r", encoding="utf-8") as file:
         head_rotation_data = []
         for line in file:
             values = line.strip().split(",")
@@ -172,7 +262,7 @@ def process_head_pose_data(head_rotation_path, head_translation_path):
         rotation_data_stream.values.append(q)
 
     # Read the head translation data
-    with io.StringIO(open(head_translation_path, "rb").read().decode("utf-8")) as file:
+    with open(head_translation_path, "r", encoding="utf-8") as file:
         head_translation_data = []
         for line in file:
             values = line.strip().split(",")
@@ -198,6 +288,13 @@ def process_request(
     audio_filepath: os.PathLike,
     params: dict,
     output_filepath: os.PathLike,
+    timeout: float = None,
+    deadline_rtf: float = None,
+    compression: str = "auto",
+    retries: int = 2,
+    output: any = None,
+    scope: any = None,
+    trace: any = None,
 ) -> None:
     """Function to process gRPC request
 
@@ -207,26 +304,137 @@ def process_request(
       params: Parameters to control the feature
       output_filepath: Path to output file
       request_metadata: Credentials to process preview request
+      timeout: Deadline of the request in seconds
+      deadline_rtf: Expected real-time factor, bounds the deadline to duration * RTF plus slack
+      compression: Compression mode of the upload, see nim_common.compression
+      retries: Number of times the request is restarted when the NIM is unavailable
+      output: nim_common.progressive.GrowingOutput of output_filepath, for progressive playback
+      scope: Parent CancelScope, cancelling it cancels the request
+      trace: nim_common.tracing.Span the request is traced under, not traced when None
     """
-    try:
+    load_dependencies()
+    from nim_common.compression import choose_compression
+    from nim_common.deadlines import (
+        CancelScope,
+        call_timeout,
+        cancel_on_signals,
+        cancellation_summary,
+        expected_processing_time,
+    )
+    from nim_common.integrity import OutputVerifier
+    from nim_common.retries import call_with_retries
+    from nim_common.throughput import describe_rates
+
+    # SIGINT and SIGTERM cancel the call, so the NIM stops rendering an abandoned request
+    scope = CancelScope(call_timeout(audio_filepath, deadline_rtf, timeout), parent=scope)
+    spans = None
+    if trace is not None:
+        from nim_common.services import get_service
+        from nim_common.tracing import StreamSpans
+
+        spans = StreamSpans(trace.tracer, get_service("audio2face-2d"), trace)
+    decision = choose_compression(audio_filepath, compression)
+    if decision.algorithm:
+        print(f"Compressing the upload with {decision.algorithm} ({decision.reason}).")
+    start_time = time.time()
+
+    def attempt() -> None:
+        # A retry restarts the upload and rewrites the output from the beginning
         stub = audio2face2d_pb2_grpc.Audio2Face2DServiceStub(channel)
-        start_time = time.time()
+        requests = generate_request_for_inference(audio_filepath=audio_filepath, params=params)
+        metadata = None
+        if spans is not None:
+            # Sends the traceparent of the request so that the server's spans join the trace
+            spans.connect(channel, scope.remaining())
+            requests = spans.requests(requests, config=True)
+            metadata = spans.metadata()
         responses = stub.Animate(
-            generate_request_for_inference(audio_filepath=audio_filepath, params=params)
+            scope.guard(requests),
+            metadata=metadata,
+            timeout=scope.remaining(),
+            compression=decision.grpc_compression(),
         )
-        next(responses)
-        file = open(output_filepath, "wb")
-        print(f"Writing output in {output_filepath}")
-        for response in responses:
-            if response.HasField("video_file_data"):
-                file.write(response.video_file_data)
+        received = responses
+        if spans is not None:
+            received = spans.responses(responses, lambda r: r.HasField("video_file_data"))
+        # A stream the NIM ended early still completes with OK, only the container tells
+        verifier = OutputVerifier(hashes=(), container="auto")
+        try:
+            file = open(output_filepath, "wb") if output is None else output
+            with scope.attach(responses), file:
+                print(f"Writing output in {output_filepath}")
+                # The config echo and keepalives carry no video data and are skipped
+                for response in received:
+                    if response.HasField("video_file_data"):
+                        file.write(response.video_file_data)
+                        verifier.write(response.video_file_data)
+                if spans is not None:
+                    spans.flush(file)
+        finally:
+            # Releases the call at once when the output could not be written
+            responses.cancel()
+        verifier.verify()
+
+    def on_retry(number: int, error: grpc.RpcError, delay: float) -> None:
+        print(f"{error.code().name}: {error.details()}, retry {number}/{retries} in {delay:.1f}s.")
+
+    try:
+        with cancel_on_signals(scope), spans or contextlib.nullcontext():
+            call_with_retries(attempt, retries, scope=scope, on_retry=on_retry)
         end_time = time.time()
         print(
             f"Function invocation completed in {end_time-start_time:.2f}s, "
             f"{output_filepath} file is generated."
         )
+        rates = describe_rates(audio_filepath, end_time - start_time)
+        if rates is not None:
+            print(rates)
+        if decision.algorithm:
+            saved = decision.estimated_saving(os.path.getsize(audio_filepath)) or 0
+            print(f"Compression saved about {saved / 1e6:.2f} MB of upload.")
+    except grpc.RpcError as e:
+        message = cancellation_summary(
+            scope,
+            e.code().name,
+            time.time() - start_time,
+            expected_processing_time(audio_filepath, deadline_rtf),
+        )
+        print(f"An error occurred: {e}" if message is None else message)
+        raise SystemExit(1)
     except Exception as e:
         print(f"An error occurred: {e}")
+        raise SystemExit(1)
+
+
+def run_progressive(
+    render: Callable, output_filepath: os.PathLike, port: int, linger: float
+) -> None:
+    """Function to run the request while serving the growing output over local HTTP.
+
+    Args:
+      render: Function running the request, called with the output to write to
+      output_filepath: Path to output file
+      port: Port of the progressive playback server, 0 picks a free port
+      linger: Seconds to keep serving once the output is complete and the last request ended
+    """
+    from nim_common.progressive import GrowingOutput, ProgressiveServer
+
+    def on_layout(layout: str) -> None:
+        if layout == "moov-at-end":
+            print("The output has its moov box at the end, playback starts once it completes.")
+        else:
+            print(f"The output is a {layout} MP4, playback can start now.")
+
+    output = GrowingOutput(output_filepath, on_layout=on_layout)
+    with ProgressiveServer(output, port=port) as server:
+        print(f"Serving the output for progressive playback at {server.url}")
+        render(output)
+        if output.first_write is not None:
+            print(
+                f"First output after {output.first_write:.2f}s, "
+                f"playable after {output.playable:.2f}s."
+            )
+        server.wait_idle(linger)
 
 
 def main():
@@ -248,7 +456,10 @@ def main():
     else:
         raise FileNotFoundError(f"The audio file '{audio_filepath}' does not exist. Exiting.")
 
-    portrait_image_encoded = open(portrait_filepath, "rb").read()
+    load_dependencies()
+
+    with open(portrait_filepath, "rb") as file:
+        portrait_image_encoded = file.read()
 
     # Configure head pose mode
     head_pose_mode = HeadPoseMode.HEAD_POSE_MODE_RETAIN_FROM_PORTRAIT_IMAGE
@@ -278,46 +489,117 @@ def main():
         # "input_head_translation": translation_data_stream, # HEAD_POSE_MODE_USER_DEFINED_ANIMATION
     }
 
-    # Check ssl-mode and create channel_credentials for that mode
-    if args.ssl_mode != "DISABLED":
-        channel_credentials = ""
-        if args.ssl_mode == "MTLS":
-            if not (args.ssl_key and args.ssl_cert and args.ssl_root_cert):
-                raise RuntimeError(
-                    "If --ssl-mode is MTLS, --ssl-key, --ssl-cert and --ssl-root-cert are required."
-                )
-            private_key = read_file_content(args.ssl_key)
-            certificate_chain = read_file_content(args.ssl_cert)
-            root_certificates = read_file_content(args.ssl_root_cert)
-            channel_credentials = grpc.ssl_channel_credentials(
-                root_certificates=root_certificates,
-                private_key=private_key,
-                certificate_chain=certificate_chain,
-            )
-        else:
-            if not (args.ssl_root_cert):
-                raise RuntimeError("If --ssl-mode is TLS, --ssl-root-cert is required.")
-            root_certificates = read_file_content(args.ssl_root_cert)
-            channel_credentials = grpc.ssl_channel_credentials(root_certificates=root_certificates)
+    if args.segment_seconds is not None and args.progressive_port is not None:
+        raise RuntimeError("--progressive-port cannot be combined with --segment-seconds.")
 
-        # Establish secure channel when ssl-mode is MTLS/TLS
-        with grpc.secure_channel(target=args.target, credentials=channel_credentials) as channel:
+    def run_segmented(channels: list, trace: any = None) -> None:
+        """Render segments of the audio concurrently, spread over the channels of the replicas."""
+        from nim_common.deadlines import CancelScope, cancel_on_signals
+        from nim_common.segments import render_segmented
+        from nim_common.throughput import describe_rates
+
+        # Cancelled when a segment fails, so the other segments stop rendering
+        scope = CancelScope(args.timeout)
+
+        def render(segment_filepath: str, params: dict, segment_output: str, segment) -> None:
             process_request(
-                channel=channel,
-                audio_filepath=audio_filepath,
+                channel=channels[segment.index % len(channels)],
+                audio_filepath=segment_filepath,
+                params=params,
+                output_filepath=segment_output,
+                deadline_rtf=args.deadline_rtf,
+                compression=args.compression,
+                retries=args.retries,
+                scope=scope,
+                trace=trace,
+            )
+
+        start_time = time.time()
+        with cancel_on_signals(scope):
+            segments = render_segmented(
+                audio_filepath,
+                output_filepath,
+                render,
+                args.segment_seconds,
+                concurrency=args.segment_concurrency,
                 params=feature_params,
-                output_filepath=output_filepath,
+                search_seconds=args.segment_search,
+                fps=args.animation_fps,
+                scope=scope,
             )
-    else:
-        # Establish insecure channel when ssl-mode is DISABLED
-        with grpc.insecure_channel(target=args.target) as channel:
+        elapsed = time.time() - start_time
+        print(
+            f"Rendered {len(segments)} segments, {sum(s.at_silence for s in segments)} cut at "
+            f"silences, over {len(channels)} replicas in {elapsed:.2f}s, "
+            f"{output_filepath} file is generated."
+        )
+        rates = describe_rates(audio_filepath, elapsed)
+        if rates is not None:
+            print(rates)
+
+    def run(channels: list, trace: any = None) -> None:
+        """Render over the channels, serving the output while it grows with --progressive-port."""
+        if args.segment_seconds is not None:
+            run_segmented(channels, trace)
+            return
+
+        def render(output: any = None) -> None:
             process_request(
-                channel=channel,
+                channel=channels[0],
                 audio_filepath=audio_filepath,
                 params=feature_params,
                 output_filepath=output_filepath,
+                timeout=args.timeout,
+                deadline_rtf=args.deadline_rtf,
+                compression=args.compression,
+                retries=args.retries,
+                output=output,
+                trace=trace,
             )
 
+        if args.progressive_port is None:
+            render()
+        else:
+            run_progressive(render, output_filepath, args.progressive_port, args.progressive_linger)
+
+    # Check ssl-mode and create the channel credentials for that mode
+    if args.ssl_mode != "DISABLED":
+        from nim_common.channels import ChannelConfig, channel_credentials
+
+        if args.ssl_mode == "MTLS":
+            if not (args.ssl_key and args.ssl_cert and args.ssl_root_cert):
+                raise RuntimeError(
+                    "If --ssl-mode is MTLS, --ssl-key, --ssl-cert and --ssl-root-cert are required."
+                )
+        elif not (args.ssl_root_cert):
+            raise RuntimeError("If --ssl-mode is TLS, --ssl-root-cert is required.")
+        # Credentials are read and built once per set of PEM files, see nim_common.channels
+        credentials = channel_credentials(
+            ChannelConfig(
+                args.target, args.ssl_mode, args.ssl_root_cert, args.ssl_cert, args.ssl_key
+            )
+        )
+
+        # Establish secure channels when ssl-mode is MTLS/TLS
+        channels = [
+            grpc.secure_channel(target=target, credentials=credentials)
+            for target in [args.target, *args.replica_target]
+        ]
+    else:
+        # Establish insecure channels when ssl-mode is DISABLED
+        channels = [
+            grpc.insecure_channel(target=target) for target in [args.target, *args.replica_target]
+        ]
+    from nim_common.tracing import traced_run
+
+    job = {"nim.input": audio_filepath, "nim.replicas": len(channels)}
+    try:
+        with traced_run(args.trace, "audio2face-2d", job) as trace:
+            run(channels, trace)
+    finally:
+        for channel in channels:
+            channel.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,82 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Shared building blocks for the Maxine NIM sample clients.
+
+Attributes are imported on first access, so that light-weight tools such as
+nim_common.submit do not pay for importing grpc.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "SERVICES": "services",
+    "ServiceSpec": "services",
+    "get_service": "services",
+    "PreparedInput": "streaming",
+    "StreamResult": "streaming",
+    "generate_requests": "streaming",
+    "stream_file": "streaming",
+    "stream_into": "streaming",
+    "StreamDispatcher": "dispatcher",
+    "summarize": "dispatcher",
+    "ChannelConfig": "channels",
+    "ChannelPool": "channels",
+    "CredentialCache": "channels",
+    "create_channel": "channels",
+    "RawCodec": "codec",
+    "OutputVerifier": "integrity",
+    "CancelScope": "deadlines",
+    "call_timeout": "deadlines",
+    "media_duration": "media",
+    "ThroughputReport": "throughput",
+    "AimdLimiter": "limits",
+    "ConcurrencyLimits": "limits",
+    "GradientLimiter": "limits",
+    "Diagnostics": "diagnostics",
+    "HedgePolicy": "hedging",
+    "hedged_stream": "hedging",
+    "StreamSpans": "tracing",
+    "Tracer": "tracing",
+    "TrafficRecorder": "traffic",
+    "load_trace": "traffic",
+    "GrowingOutput": "progressive",
+    "ProgressiveServer": "progressive",
+    "FairScheduler": "scheduling",
+    "TokenBucket": "scheduling",
+    "TrafficClass": "scheduling",
+    "Stage": "pipeline",
+    "run_pipeline": "pipeline",
+    "run_sweep": "sweep",
+    "JobQueue": "jobqueue",
+    "QueueWorker": "jobqueue",
+    "process_live": "live",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,429 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Creating and pooling gRPC channels to Maxine NIM targets.
+
+TLS and MTLS credentials are read and built once per set of PEM files and
+shared by every channel of the process, see CredentialCache. The files are
+checked for changes at most once per check interval, so a rotated certificate
+is picked up by the next channel opened, and pooled channels are reopened with
+the new credentials.
+
+Every pooled channel counts its connection handshakes, the TCP and, for TLS
+and MTLS, TLS handshakes that take it from CONNECTING to READY, with their
+latency, reported by ChannelPool.stats(). Long-lived pooled channels, such as
+the daemon's, handshake once and reuse the connection for every job.
+"""
+
+import itertools
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import grpc
+
+SSL_MODES = ("DISABLED", "TLS", "MTLS")
+
+
+class ChannelConfig(NamedTuple):
+    """How to reach a NIM target.
+
+    Attributes:
+      target: IP:port of the gRPC service
+      ssl_mode: DISABLED, TLS or MTLS. TLS without a root certificate uses the
+        system roots, as needed for NVCF
+      ssl_root_cert: Path to the root certificate
+      ssl_cert: Path to the client certificate chain, MTLS only
+      ssl_key: Path to the client private key, MTLS only
+    """
+
+    target: str
+    ssl_mode: str = "DISABLED"
+    ssl_root_cert: Optional[str] = None
+    ssl_cert: Optional[str] = None
+    ssl_key: Optional[str] = None
+
+
+def read_file_content(file_path: os.PathLike) -> bytes:
+    """Function to read file content as bytes.
+
+    Args:
+      file_path: Path to input file
+    """
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def _credential_files(config: ChannelConfig) -> Tuple[Optional[str], ...]:
+    """Function to return the root certificate, private key and certificate chain paths."""
+    if config.ssl_mode == "MTLS":
+        if not (config.ssl_key and config.ssl_cert and config.ssl_root_cert):
+            raise RuntimeError(
+                "If --ssl-mode is MTLS, --ssl-key, --ssl-cert and --ssl-root-cert are required."
+            )
+        return (config.ssl_root_cert, config.ssl_key, config.ssl_cert)
+    if config.ssl_mode == "TLS":
+        return (config.ssl_root_cert, None, None)
+    raise ValueError(f"Unknown ssl mode '{config.ssl_mode}', expected one of {SSL_MODES}.")
+
+
+def _signature(paths: Tuple[Optional[str], ...]) -> tuple:
+    """Function to identify the version of the files, changed by a rewrite or a rename over them."""
+    signature = []
+    for path in paths:
+        if path is None:
+            signature.append(None)
+        else:
+            stat = os.stat(path)
+            signature.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+class _CachedCredentials:
+    def __init__(self, credentials: grpc.ChannelCredentials, signature: tuple) -> None:
+        self.credentials = credentials
+        self.signature = signature
+        self.generation = 0
+        self.checked = time.monotonic()
+
+
+class CredentialCache:
+    """Thread-safe cache of channel credentials per set of PEM files.
+
+    The files are read and the credentials built on first use. Later lookups
+    return the same credentials, checking the files' inode, size and
+    modification time at most once per check_interval and rebuilding the
+    credentials when one of them changed, so that certificate rotation does not
+    require a restart. A file that cannot be read during a rotation keeps the
+    previous credentials until the next check.
+
+    Args:
+      check_interval: Seconds between two checks of the files for changes
+    """
+
+    def __init__(self, check_interval: float = 1.0) -> None:
+        self.check_interval = check_interval
+        self.loads = 0  # credentials built from the files, including reloads
+        self.reloads = 0  # credentials rebuilt because a file changed
+        self.hits = 0  # lookups answered from the cache
+        self._lock = threading.Lock()
+        self._entries: Dict[tuple, _CachedCredentials] = {}
+
+    @staticmethod
+    def _build(paths: Tuple[Optional[str], ...]) -> grpc.ChannelCredentials:
+        root_cert, key, cert = (None if path is None else read_file_content(path) for path in paths)
+        return grpc.ssl_channel_credentials(
+            root_certificates=root_cert, private_key=key, certificate_chain=cert
+        )
+
+    def _lookup(self, config: ChannelConfig) -> _CachedCredentials:
+        paths = _credential_files(config)
+        with self._lock:
+            entry = self._entries.get(paths)
+            if entry is None:
+                entry = _CachedCredentials(self._build(paths), _signature(paths))
+                self._entries[paths] = entry
+                self.loads += 1
+                return entry
+            self.hits += 1
+            now = time.monotonic()
+            if now - entry.checked >= self.check_interval:
+                entry.checked = now
+                try:
+                    signature = _signature(paths)
+                    if signature != entry.signature:
+                        entry.credentials = self._build(paths)
+                        entry.signature = signature
+                        entry.generation += 1
+                        self.loads += 1
+                        self.reloads += 1
+                except OSError:
+                    pass  # mid-rotation, the previous credentials stay in use
+            return entry
+
+    def get(self, config: ChannelConfig) -> grpc.ChannelCredentials:
+        """Function to return the channel credentials of a TLS or MTLS config."""
+        return self._lookup(config).credentials
+
+    def generation(self, config: ChannelConfig) -> int:
+        """Function to return how many times the credentials of config were rebuilt."""
+        return self._lookup(config).generation
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached": len(self._entries),
+                "loads": self.loads,
+                "reloads": self.reloads,
+                "hits": self.hits,
+            }
+
+
+CREDENTIALS = CredentialCache()
+
+
+def channel_credentials(config: ChannelConfig) -> grpc.ChannelCredentials:
+    """Function to return the channel credentials of a TLS or MTLS config, see CredentialCache."""
+    return CREDENTIALS.get(config)
+
+
+def create_channel(
+    config: ChannelConfig, options: tuple = (), credentials: Optional[CredentialCache] = None
+) -> grpc.Channel:
+    """Function to open a channel for config.
+
+    Args:
+      config: Target and credentials
+      options: gRPC channel options
+      credentials: Cache the TLS and MTLS credentials are taken from, the process-wide one when None
+    """
+    if config.ssl_mode == "DISABLED":
+        return grpc.insecure_channel(config.target, options=options)
+    cache = CREDENTIALS if credentials is None else credentials
+    return grpc.secure_channel(config.target, cache.get(config), options=options)
+
+
+class HandshakeMeter:
+    """Connection handshakes of channels, counted from their connectivity changes.
+
+    A channel becoming READY completed a handshake, TCP and for TLS and MTLS the
+    TLS handshake, and one going to TRANSIENT_FAILURE failed one. Reconnects
+    after the server closed an idle connection count as well. The latency is
+    measured from the checkout of a channel that was not READY, see start, or
+    from the CONNECTING state when that comes first, to the channel becoming
+    READY. gRPC does not report CONNECTING for connections made faster than
+    the state can be polled, such as local ones.
+
+    Args:
+      keep: Number of recent handshake latencies kept for the statistics
+    """
+
+    def __init__(self, keep: int = 1024) -> None:
+        self.keep = keep
+        self.handshakes = 0
+        self.failed = 0
+        self._latencies: List[float] = []
+        self._states: Dict[int, grpc.ChannelConnectivity] = {}
+        self._started: Dict[int, float] = {}
+        self._callbacks: Dict[int, callable] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, channel: grpc.Channel) -> None:
+        """Function to start counting the handshakes of channel, without connecting it."""
+        key = id(channel)
+
+        def on_state(state: grpc.ChannelConnectivity) -> None:
+            now = time.perf_counter()
+            with self._lock:
+                previous = self._states.get(key)
+                self._states[key] = state
+                if state is grpc.ChannelConnectivity.CONNECTING:
+                    self._started.setdefault(key, now)
+                    return
+                if state is grpc.ChannelConnectivity.IDLE:
+                    # The first IDLE is often reported after the checkout that connects
+                    return
+                started = self._started.pop(key, None)
+                if state is grpc.ChannelConnectivity.READY and previous is not state:
+                    self.handshakes += 1
+                    if started is not None:
+                        self._latencies.append(now - started)
+                        del self._latencies[: -self.keep]
+                elif state is grpc.ChannelConnectivity.TRANSIENT_FAILURE and previous is not state:
+                    self.failed += 1
+
+        with self._lock:
+            self._callbacks[key] = on_state
+        channel.subscribe(on_state, try_to_connect=False)
+
+    def start(self, channel: grpc.Channel) -> None:
+        """Function to mark that channel is about to be used, starting the handshake latency
+        when it is not READY."""
+        with self._lock:
+            key = id(channel)
+            if (
+                key in self._callbacks
+                and self._states.get(key) is not grpc.ChannelConnectivity.READY
+            ):
+                self._started.setdefault(key, time.perf_counter())
+
+    def state(self, channel: grpc.Channel) -> Optional[grpc.ChannelConnectivity]:
+        """Function to return the last connectivity state seen for channel."""
+        with self._lock:
+            return self._states.get(id(channel))
+
+    def unwatch(self, channel: grpc.Channel) -> None:
+        """Function to stop watching channel, required before closing it."""
+        with self._lock:
+            self._states.pop(id(channel), None)
+            self._started.pop(id(channel), None)
+            callback = self._callbacks.pop(id(channel), None)
+        if callback is not None:
+            channel.unsubscribe(callback)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        return {
+            "handshakes": self.handshakes,
+            "failed_handshakes": self.failed,
+            "handshake_last_s": self._latencies[-1] if self._latencies else None,
+            "handshake_p50_s": latencies[len(latencies) // 2] if latencies else None,
+            "handshake_max_s": latencies[-1] if latencies else None,
+        }
+
+
+class ChannelPool:
+    """Long-lived channels shared by all jobs going to the same target.
+
+    Channels are created on first use and handed out round-robin. Each channel is
+    its own HTTP/2 connection, so more than one channel per target only helps when
+    a single connection's concurrent stream limit is the bottleneck.
+
+    When the PEM files of a TLS or MTLS target change, the target's channels are
+    replaced by new ones built from the new credentials. The replaced channels
+    are retired rather than closed, so that calls still running on them finish,
+    and closed once they went idle.
+
+    Args:
+      channels_per_target: Number of channels opened per target
+      options: gRPC channel options
+      credentials: Cache the TLS and MTLS credentials are taken from, the process-wide one when None
+    """
+
+    def __init__(
+        self,
+        channels_per_target: int = 1,
+        options: tuple = (),
+        credentials: Optional[CredentialCache] = None,
+    ) -> None:
+        self.channels_per_target = channels_per_target
+        self.options = options
+        self.credentials = CREDENTIALS if credentials is None else credentials
+        self._lock = threading.Lock()
+        self._channels: Dict[ChannelConfig, List[grpc.Channel]] = {}
+        self._cycles: Dict[ChannelConfig, itertools.cycle] = {}
+        self._checkouts: Dict[ChannelConfig, int] = {}
+        self._generations: Dict[ChannelConfig, int] = {}
+        self._rotations: Dict[ChannelConfig, int] = {}
+        self._meters: Dict[ChannelConfig, HandshakeMeter] = {}
+        self._retired: List[Tuple[grpc.Channel, HandshakeMeter]] = []
+
+    def _open(self, config: ChannelConfig) -> List[grpc.Channel]:
+        # Must be called with the lock held
+        generation = None
+        if config.ssl_mode != "DISABLED":
+            generation = self.credentials.generation(config)
+        if config in self._channels and generation != self._generations[config]:
+            meter = self._meters[config]
+            self._retired.extend((channel, meter) for channel in self._channels.pop(config))
+            self._rotations[config] += 1
+        if config not in self._channels:
+            meter = self._meters.setdefault(config, HandshakeMeter())
+            channels = []
+            for _ in range(self.channels_per_target):
+                channel = create_channel(config, self.options, self.credentials)
+                meter.watch(channel)
+                channels.append(channel)
+            self._channels[config] = channels
+            self._cycles[config] = itertools.cycle(channels)
+            self._checkouts.setdefault(config, 0)
+            self._rotations.setdefault(config, 0)
+            self._generations[config] = generation
+        self._close_idle_retired()
+        return self._channels[config]
+
+    def _close_idle_retired(self) -> None:
+        # Must be called with the lock held
+        busy = []
+        for channel, meter in self._retired:
+            if meter.state(channel) in (
+                grpc.ChannelConnectivity.IDLE,
+                grpc.ChannelConnectivity.TRANSIENT_FAILURE,
+            ):
+                meter.unwatch(channel)
+                channel.close()
+            else:
+                busy.append((channel, meter))
+        self._retired = busy
+
+    def get(self, config: ChannelConfig) -> grpc.Channel:
+        """Function to return a pooled channel for config, opening the pool on first use."""
+        with self._lock:
+            self._open(config)
+            self._checkouts[config] += 1
+            channel = next(self._cycles[config])
+            self._meters[config].start(channel)
+            return channel
+
+    def warm(self, config: ChannelConfig, timeout: Optional[float] = None) -> float:
+        """Function to connect every channel of the target ahead of the first job.
+
+        Returns:
+          Seconds spent connecting.
+        """
+        with self._lock:
+            channels = self._open(config)
+            for channel in channels:
+                self._meters[config].start(channel)
+        start_time = time.perf_counter()
+        for channel in channels:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+        return time.perf_counter() - start_time
+
+    def stats(self) -> dict:
+        """Function to report the pooled targets, how often their channels were used and
+        the handshakes they made."""
+        with self._lock:
+            return {
+                config.target: {
+                    "ssl_mode": config.ssl_mode,
+                    "channels": len(channels),
+                    "checkouts": self._checkouts[config],
+                    "rotations": self._rotations[config],
+                    "retired": sum(meter is self._meters[config] for _, meter in self._retired),
+                    **self._meters[config].stats(),
+                }
+                for config, channels in self._channels.items()
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for config, channels in self._channels.items():
+                for channel in channels:
+                    self._meters[config].unwatch(channel)
+                    channel.close()
+            for channel, meter in self._retired:
+                meter.unwatch(channel)
+                channel.close()
+            self._channels.clear()
+            self._cycles.clear()
+            self._checkouts.clear()
+            self._generations.clear()
+            self._rotations.clear()
+            self._meters.clear()
+            self._retired.clear()
+
+    def __enter__(self) -> "ChannelPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,133 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Low-allocation encoding of the data chunks of the streaming calls.
+
+Data chunks make up almost all messages of a call, and each request and
+response message wraps a single bytes field of a oneof. RawCodec encodes a
+chunk as the pre-serialized field tag, the length varint and the chunk itself,
+and decodes an output chunk into a memoryview of the received buffer, so no
+protobuf message is built or parsed per chunk. The bytes on the wire are the
+same as with the generated messages. Config and keepalive messages still go
+through the generated classes.
+
+    codec = RawCodec(get_service("studio-voice"))
+    responses = codec.call(channel)(codec.encode_data(chunk) for chunk in chunks)
+    for response in responses:
+        if is_data(response):
+            sink.write(response)
+"""
+
+from typing import Tuple, Union
+
+from .services import ServiceSpec
+
+_LENGTH_DELIMITED = 2
+
+
+def encode_varint(value: int) -> bytes:
+    """Function to encode a non-negative integer as a protobuf varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(buffer: bytes, offset: int) -> Tuple[int, int]:
+    """Function to decode the varint at offset, returns (value, offset after it)."""
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def is_data(response: any) -> bool:
+    """Function to tell output chunks decoded by RawCodec apart from response messages."""
+    return isinstance(response, (bytes, memoryview))
+
+
+class RawCodec:
+    """Request serializer and response deserializer bypassing messages for data chunks.
+
+    Args:
+      spec: Service whose request and response messages are encoded
+    """
+
+    def __init__(self, spec: ServiceSpec) -> None:
+        self.spec = spec
+        request_class = getattr(spec.pb2, spec.request)
+        self._response_class = getattr(spec.pb2, spec.response)
+        input_number = request_class.DESCRIPTOR.fields_by_name[spec.input_field].number
+        output_number = self._response_class.DESCRIPTOR.fields_by_name[spec.output_field].number
+        self._input_tag = encode_varint(input_number << 3 | _LENGTH_DELIMITED)
+        self._output_tag = encode_varint(output_number << 3 | _LENGTH_DELIMITED)
+        # Length varints of the usual chunk sizes, computed once
+        self._lengths = {}
+
+    def encode_data(self, chunk: Union[bytes, memoryview]) -> bytes:
+        """Function to encode an input chunk as a serialized request message."""
+        size = len(chunk)
+        length = self._lengths.get(size)
+        if length is None:
+            length = encode_varint(size)
+            if len(self._lengths) < 64:
+                self._lengths[size] = length
+        return b"".join((self._input_tag, length, chunk))
+
+    def encode_message(self, message: any) -> bytes:
+        """Function to serialize a request message, such as a config request."""
+        return message.SerializeToString()
+
+    def serialize(self, request: Union[bytes, any]) -> bytes:
+        """Request serializer passing pre-encoded requests through."""
+        if isinstance(request, bytes):
+            return request
+        return request.SerializeToString()
+
+    def deserialize(self, raw: bytes) -> Union[memoryview, any]:
+        """Response deserializer returning output chunks as a memoryview of raw.
+
+        Other responses, such as the config echo and keepalives, are parsed into
+        the generated response message.
+        """
+        tag = self._output_tag
+        if raw[: len(tag)] == tag:
+            length, offset = decode_varint(raw, len(tag))
+            if offset + length == len(raw):
+                return memoryview(raw)[offset:]
+        message = self._response_class.FromString(raw)
+        if message.HasField(self.spec.output_field):
+            return getattr(message, self.spec.output_field)
+        return message
+
+    def call(self, channel: any):
+        """Function to return the streaming multi-callable of the service using the codec."""
+        return channel.stream_stream(
+            self.spec.full_method,
+            request_serializer=self.serialize,
+            response_deserializer=self.deserialize,
+        )
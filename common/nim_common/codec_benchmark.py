@@ -0,0 +1,213 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Microbenchmark of the CPU cost per GB of building messages versus RawCodec.
+
+Three measurements are made for a service, each with the generated messages
+("messages", as in the single-file clients) and with RawCodec ("raw"):
+
+  encode   Request generation and serialization of the input chunks
+  decode   Deserialization of output chunks and extraction of their bytes
+  stream   Client process CPU of stream_file calls against a local stand-in
+           running in a separate process
+
+Run it with:
+
+    python -m nim_common.codec_benchmark --service eye-contact --gigabytes 1
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from .services import REPO_ROOT, SERVICES, get_service
+from .streaming import DATA_CHUNKS, stream_file
+
+GIGABYTE = 1024**3
+
+
+def cpu_per_gigabyte(run: Callable[[], int]) -> float:
+    """Function to return the CPU seconds per GB of run, which returns the bytes it processed."""
+    start = time.process_time()
+    processed = run()
+    return (time.process_time() - start) * GIGABYTE / processed
+
+
+def bench_encode(spec: any, chunk: bytes, count: int, raw: bool) -> float:
+    """Function to measure encoding count request messages carrying chunk."""
+    if raw:
+        serialize = spec.codec.serialize
+        encode = spec.codec.encode_data
+    else:
+        serialize = getattr(spec.pb2, spec.request).SerializeToString
+        encode = spec.data_request
+
+    def run() -> int:
+        for _ in range(count):
+            serialize(encode(chunk))
+        return count * len(chunk)
+
+    return cpu_per_gigabyte(run)
+
+
+def bench_decode(spec: any, chunk: bytes, count: int, raw: bool) -> float:
+    """Function to measure decoding count response messages carrying chunk."""
+    serialized = spec.data_response(chunk).SerializeToString()
+    output_field = spec.output_field
+    if raw:
+        deserialize = spec.codec.deserialize
+    else:
+        deserialize = getattr(spec.pb2, spec.response).FromString
+
+    def run() -> int:
+        total = 0
+        for _ in range(count):
+            response = deserialize(serialized)
+            if not raw and response.HasField(output_field):
+                response = getattr(response, output_field)
+            total += len(response)
+        return total
+
+    return cpu_per_gigabyte(run)
+
+
+def start_standin(service: str, *args: str) -> tuple:
+    """Function to run a stand-in server in its own process, so its CPU is not counted.
+
+    Args:
+      service: Service to stand in for
+      args: Further nim_common.standin arguments, such as --capacity
+    """
+    import grpc
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "nim_common.standin",
+            "--service",
+            service,
+            "--port",
+            str(port),
+            *args,
+        ],
+        cwd=os.path.join(REPO_ROOT, "common"),
+        stdout=subprocess.DEVNULL,
+    )
+    target = f"127.0.0.1:{port}"
+    with grpc.insecure_channel(target) as channel:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    return server, target
+
+
+def bench_stream(spec: any, input_filepath: str, repeats: int, target: str, raw: bool) -> float:
+    """Function to measure the client CPU of streaming input_filepath repeats times."""
+    import grpc
+
+    with grpc.insecure_channel(target) as channel, tempfile.TemporaryDirectory() as tmp:
+        output_filepath = os.path.join(tmp, "output")
+        # Warm up the connection outside of the measurement
+        stream_file(channel, spec, input_filepath, output_filepath, raw=raw)
+
+        def run() -> int:
+            total = 0
+            for _ in range(repeats):
+                result = stream_file(
+                    channel, spec, input_filepath, output_filepath, single_message_limit=0, raw=raw
+                )
+                total += result.input_bytes + result.output_bytes
+            return total
+
+        return cpu_per_gigabyte(run)
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare the CPU per GB of protobuf messages and RawCodec."
+    )
+    parser.add_argument("--service", choices=sorted(SERVICES), default="studio-voice")
+    parser.add_argument(
+        "--gigabytes",
+        type=float,
+        default=1.0,
+        help="Amount of data encoded and decoded by the codec measurements.",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DATA_CHUNKS, help="Size in bytes of the data chunks."
+    )
+    parser.add_argument(
+        "--stream-megabytes",
+        type=float,
+        default=256.0,
+        help="Amount of data uploaded to the stand-in by the stream measurement, 0 to skip it.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Benchmark entry point
+    """
+    args = parse_args()
+    spec = get_service(args.service)
+    chunk = os.urandom(args.chunk_size)
+    count = max(1, int(args.gigabytes * GIGABYTE / args.chunk_size))
+
+    rows = [
+        ("encode", lambda raw: bench_encode(spec, chunk, count, raw)),
+        ("decode", lambda raw: bench_decode(spec, chunk, count, raw)),
+    ]
+    server = None
+    if args.stream_megabytes > 0:
+        server, target = start_standin(spec.name)
+        handle, input_filepath = tempfile.mkstemp()
+        with os.fdopen(handle, "wb") as fd:
+            fd.write(os.urandom(16 * 1024 * 1024))
+        repeats = max(1, int(args.stream_megabytes / 16))
+        rows.append(
+            ("stream", lambda raw: bench_stream(spec, input_filepath, repeats, target, raw))
+        )
+    print(f"{spec.name}, {args.chunk_size} byte chunks, CPU seconds per GB")
+    print(f"{'':<10}{'messages':>10}{'raw':>10}{'saved':>8}")
+    try:
+        for name, bench in rows:
+            messages = bench(False)
+            raw = bench(True)
+            print(f"{name:<10}{messages:>10.3f}{raw:>10.3f}{1 - raw / messages:>8.0%}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            os.unlink(input_filepath)
+
+
+if __name__ == "__main__":
+    main()
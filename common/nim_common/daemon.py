@@ -0,0 +1,919 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Resident client daemon keeping warm channels to the Maxine NIM targets.
+
+Every invocation of the single-file clients pays interpreter start-up, the grpc
+and generated stub imports, and a new connection to the NIM. The daemon pays
+those once and then accepts jobs over a Unix domain socket or localhost HTTP,
+so that many tools on the host can share its connection pool.
+
+API:
+  POST /v1/jobs    Run a job described by a JSON body:
+                     service  "studio-voice", "eye-contact" or "audio2face-2d"
+                     input    Absolute path of the input file
+                     output   Absolute path of the output file, or null to
+                              receive the output bytes in the response body
+                     target   Optional IP:port overriding the daemon's target,
+                              one of the targets configured for the service
+                              or allowed with --allow-target. The daemon's
+                              request metadata, such as NVCF credentials,
+                              is only sent to the configured target
+                     params   Optional feature parameters
+                     files    Optional {field: path} of bytes parameters, such
+                              as the audio2face-2d portrait_image
+                     traffic_class
+                              Optional tenant or priority class, see
+                              nim_common.scheduling
+                     timeout_s
+                              Optional deadline of the call in seconds
+                     deadline_rtf
+                              Optional expected real-time factor, bounds
+                              the deadline to input duration * RTF
+                     compression
+                              Optional compression mode of the upload, see
+                              nim_common.compression
+                     hashes   Optional hash algorithms computed over the
+                              output as it is written, see
+                              nim_common.integrity
+                     verify   Optional, check the WAV or MP4 structure of
+                              the output as it is written
+                     traceparent
+                              Optional W3C trace context of the caller, the
+                              job's spans join its trace, see
+                              nim_common.tracing
+                   The body must be sent as application/json.
+                   A job is cancelled when its client disconnects before
+                   the response, so abandoned jobs stop rendering.
+                   With an output path the response is the JSON job result.
+                   With --trace, the result has the trace_id of the job.
+  GET  /v1/status  Uptime, job counters, pooled channels and, with a
+                   scheduler, queue depth and wait times per traffic class.
+                   With --diagnostics-interval, the latest memory, file
+                   descriptor and thread sample, see nim_common.diagnostics.
+                   With --adaptive-concurrency, the limit and in-flight
+                   jobs per service and target, see nim_common.limits.
+                   With --record, the number of jobs recorded, see
+                   nim_common.traffic.
+                   The jobs, media seconds, real-time factor and media
+                   seconds per second per service, target and config, see
+                   nim_common.throughput.
+                   With --hedge-target, the hedge rate, win rate and
+                   latency per hedged service, see nim_common.hedging.
+
+The daemon listens on a Unix domain socket only its user can open, by
+default nim_common.submit.DEFAULT_SOCKET, in a directory no other user can
+write to. With --tcp it listens on localhost HTTP instead, which every user
+of the host can reach, so requests must carry the --token as
+"Authorization: Bearer <token>". Without a token, as create_server allows on
+localhost, requests must carry a localhost Host header so that pages in a
+browser cannot reach it through DNS rebinding. Run the daemon with:
+
+    python -m nim_common.daemon --target studio-voice=127.0.0.1:8001 --warm
+
+and submit jobs with nim_common.submit.
+"""
+
+import argparse
+import hmac
+import json
+import os
+import select
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Tuple
+
+import grpc
+
+from .channels import SSL_MODES, ChannelConfig, ChannelPool, read_file_content
+from .compression import COMPRESSION_MODES
+from .deadlines import CancelScope
+from .diagnostics import Diagnostics
+from .hedging import HedgePolicy, hedged_stream
+from .integrity import new_hash
+from .limits import LIMITERS, ConcurrencyLimits, classify, input_megabytes
+from .scheduling import FairScheduler, parse_traffic_class
+from .services import SERVICES, get_service
+from .streaming import StreamResult, stream_file, stream_into
+from .submit import DEFAULT_SOCKET, check_socket_directory
+from .throughput import ThroughputReport, config_label
+from .tracing import StreamSpans, Tracer, create_exporter, parse_traceparent
+from .traffic import TrafficRecorder
+
+
+class JobError(Exception):
+    """Job rejected before it reached the NIM, reported with an HTTP status code."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+JOB_FIELD_TYPES = {
+    "service": str,
+    "input": str,
+    "output": str,
+    "target": str,
+    "params": dict,
+    "files": dict,
+}
+
+
+def check_job_fields(job: dict) -> None:
+    """Function to raise a JobError when a field of job has the wrong JSON type."""
+    if not isinstance(job, dict):
+        raise JobError("Job must be a JSON object.")
+    for field, kind in JOB_FIELD_TYPES.items():
+        value = job.get(field)
+        if value is not None and not isinstance(value, kind):
+            raise JobError(f"Job {field} must be a {'string' if kind is str else 'JSON object'}.")
+    for field, path in (job.get("files") or {}).items():
+        if not isinstance(path, str):
+            raise JobError(f"Job file '{field}' must be a path.")
+
+
+class NimDaemon:
+    """Job runner backed by a shared ChannelPool.
+
+    Args:
+      pool: Channel pool the jobs are run on
+      targets: Default channel config per service name
+      metadata: Request metadata per service name, such as NVCF credentials
+      scheduler: Fair queue and rate limits the jobs are admitted through
+      deadline_rtf: Expected real-time factor per service name, for jobs without one
+      compression: Compression mode for jobs without one
+      diagnostics: Started Diagnostics the finished jobs are reported to
+      hashes: Hash algorithms computed over the output of jobs without hashes
+      verify: Check the output structure of jobs without a verify setting
+      limits: Adaptive limits on the jobs in flight per service and target
+      recorder: TrafficRecorder the finished jobs are appended to
+      tracer: Tracer recording the phases of every job, see nim_common.tracing
+      hedges: Second target and HedgePolicy per service whose slow jobs are hedged, see
+        nim_common.hedging. Jobs with their own target are not hedged
+      allowed_targets: Targets jobs may choose besides the configured and hedge targets of
+        their service
+    """
+
+    def __init__(
+        self,
+        pool: ChannelPool,
+        targets: Dict[str, ChannelConfig],
+        metadata: Optional[Dict[str, tuple]] = None,
+        scheduler: Optional[FairScheduler] = None,
+        deadline_rtf: Optional[Dict[str, float]] = None,
+        compression: str = "auto",
+        diagnostics: Optional[Diagnostics] = None,
+        hashes: tuple = (),
+        verify: bool = False,
+        limits: Optional[ConcurrencyLimits] = None,
+        recorder: Optional[TrafficRecorder] = None,
+        tracer: Optional[Tracer] = None,
+        hedges: Optional[Dict[str, Tuple[ChannelConfig, HedgePolicy]]] = None,
+        allowed_targets: Iterable[str] = (),
+    ) -> None:
+        self.pool = pool
+        self.targets = targets
+        self.metadata = metadata or {}
+        self.scheduler = scheduler
+        self.deadline_rtf = deadline_rtf or {}
+        self.compression = compression
+        self.diagnostics = diagnostics
+        self.hashes = tuple(hashes)
+        self.verify = verify
+        self.limits = limits
+        self.recorder = recorder
+        self.tracer = tracer
+        self.hedges = hedges or {}
+        self.allowed_targets = frozenset(allowed_targets)
+        self.throughput = ThroughputReport()
+        self.scope = CancelScope()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.deadline_exceeded = 0
+        self.reclaimed = 0.0
+        self.bytes_saved = 0
+
+    def _prepare(self, job: dict):
+        check_job_fields(job)
+        try:
+            spec = get_service(job["service"])
+        except KeyError:
+            raise JobError("Job has no service.") from None
+        except ValueError as e:
+            raise JobError(str(e)) from None
+        input_filepath = job.get("input")
+        if not input_filepath or not os.path.isabs(input_filepath):
+            raise JobError("Job input must be an absolute path.")
+        if not os.path.isfile(input_filepath):
+            raise JobError(f"The file '{input_filepath}' does not exist.", status=404)
+        output_filepath = job.get("output")
+        if output_filepath is not None and not os.path.isabs(output_filepath):
+            raise JobError("Job output must be an absolute path.")
+
+        config = self.targets.get(spec.name)
+        metadata = self.metadata.get(spec.name)
+        target = job.get("target")
+        if target:
+            allowed = set(self.allowed_targets)
+            if config is not None:
+                allowed.add(config.target)
+            if spec.name in self.hedges:
+                allowed.add(self.hedges[spec.name][0].target)
+            if target not in allowed:
+                raise JobError(f"Target {target} is not allowed for {spec.name}.", status=403)
+            if config is None or target != config.target:
+                # The daemon's credentials are only sent to the target they are configured for
+                metadata = None
+                config = (config or ChannelConfig(target))._replace(target=target)
+        if config is None:
+            raise JobError(f"No target configured for {spec.name}.")
+
+        params = dict(job.get("params") or {})
+        for field, path in (job.get("files") or {}).items():
+            if not os.path.isabs(path) or not os.path.isfile(path):
+                raise JobError(f"Job file '{field}' must be an existing absolute path.")
+            params[field] = read_file_content(path)
+        if params and spec.config is None:
+            raise JobError(f"{spec.name} does not take parameters.")
+        for option in ("timeout_s", "deadline_rtf"):
+            value = job.get(option)
+            if value is not None and (not isinstance(value, (int, float)) or value <= 0):
+                raise JobError(f"Job {option} must be a positive number.")
+        if job.get("compression", self.compression) not in COMPRESSION_MODES:
+            raise JobError(f"Job compression must be one of {', '.join(COMPRESSION_MODES)}.")
+        hashes = job.get("hashes", self.hashes)
+        if not isinstance(hashes, (list, tuple)) or not all(isinstance(h, str) for h in hashes):
+            raise JobError("Job hashes must be a list of hash algorithm names.")
+        for name in hashes:
+            try:
+                new_hash(name)
+            except ValueError as e:
+                raise JobError(str(e)) from None
+        traceparent = job.get("traceparent")
+        if traceparent is not None and (
+            not isinstance(traceparent, str) or parse_traceparent(traceparent) is None
+        ):
+            raise JobError("Job traceparent must be a W3C traceparent value.")
+        return spec, config, metadata, input_filepath, output_filepath, params or None
+
+    def run_job(
+        self, job: dict, sink: any = None, scope: Optional[CancelScope] = None
+    ) -> StreamResult:
+        """Function to run a job on a pooled channel.
+
+        Args:
+          job: Job description, see the module documentation
+          sink: Writable binary object receiving the output when job has no output path
+          scope: CancelScope of the job, a child of the daemon's scope is used when None
+        """
+        spec, config, metadata, input_filepath, output_filepath, params = self._prepare(job)
+        traffic_class = str(job.get("traffic_class") or "default")
+        result = StreamResult(spec.name, input_filepath, output_filepath)
+        result.traffic_class = traffic_class
+        ticket = limiter = slot = None
+        with self._lock:
+            self.in_flight += 1
+        if scope is None:
+            scope = self.scope.child()
+        dropped = None
+        spans = None
+        try:
+            # Inside the try, so that a failure after admission still releases the ticket and slot
+            if self.scheduler is not None:
+                ticket = self.scheduler.acquire(traffic_class, os.path.getsize(input_filepath))
+                result.queue_wait = ticket.wait
+            if self.limits is not None:
+                limiter = self.limits.get(spec.name, config.target)
+                slot = limiter.acquire()
+                result.queue_wait = (result.queue_wait or 0.0) + slot.wait
+            channel = self.pool.get(config)
+            options = dict(
+                params=params,
+                metadata=metadata,
+                result=result,
+                timeout=job.get("timeout_s"),
+                deadline_rtf=job.get("deadline_rtf") or self.deadline_rtf.get(spec.name),
+                scope=scope,
+                compression=job.get("compression", self.compression),
+                hashes=tuple(job.get("hashes", self.hashes)),
+                verify=bool(job.get("verify", self.verify)),
+            )
+            hedge = None if job.get("target") else self.hedges.get(spec.name)
+            if hedge is not None:
+                hedge_config, policy = hedge
+                channels = [channel, self.pool.get(hedge_config)]
+                if output_filepath is not None:
+                    with open(output_filepath, "wb") as output:
+                        hedged_stream(channels, spec, input_filepath, output, policy, **options)
+                else:
+                    hedged_stream(channels, spec, input_filepath, sink, policy, **options)
+            elif output_filepath is not None:
+                stream_file(
+                    channel,
+                    spec,
+                    input_filepath,
+                    output_filepath,
+                    tracer=self.tracer,
+                    trace_parent=job.get("traceparent"),
+                    **options,
+                )
+            else:
+                if self.tracer is not None:
+                    spans = StreamSpans(self.tracer, spec, job.get("traceparent"))
+                stream_into(channel, spec, input_filepath, sink, spans=spans, **options)
+            dropped = classify(result)
+        except grpc.RpcError as e:
+            result.error = f"{e.code().name}: {e.details()}"
+            dropped = classify(result)
+        except (OSError, TypeError, ValueError) as e:
+            result.error = str(e)
+        finally:
+            scope.close()
+            if spans is not None:
+                spans.end(result.error, {"nim.output_bytes": result.output_bytes})
+            if slot is not None:
+                limiter.release(slot, dropped, input_megabytes(input_filepath))
+            if ticket is not None:
+                self.scheduler.release(ticket)
+            with self._lock:
+                self.in_flight -= 1
+                if result.error is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                if result.cancelled == "deadline":
+                    self.deadline_exceeded += 1
+                elif result.cancelled is not None:
+                    self.cancelled += 1
+                self.reclaimed += result.reclaimed or 0.0
+                self.bytes_saved += result.bytes_saved or 0
+            if self.diagnostics is not None:
+                self.diagnostics.observe(result)
+            self.throughput.add(result, config.target, config_label(spec, params))
+            if self.recorder is not None:
+                self.recorder.record(result, target=config.target, params=params)
+        return result
+
+    def status(self) -> dict:
+        with self._lock:
+            counters = {
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "deadline_exceeded": self.deadline_exceeded,
+                "reclaimed_s": self.reclaimed,
+                "bytes_saved": self.bytes_saved,
+            }
+        return {
+            "uptime_s": time.time() - self.started,
+            **counters,
+            "targets": {name: config.target for name, config in self.targets.items()},
+            "channels": self.pool.stats(),
+            "credentials": self.pool.credentials.stats(),
+            "scheduler": None if self.scheduler is None else self.scheduler.stats(),
+            "diagnostics": None if self.diagnostics is None else self.diagnostics.latest,
+            "concurrency": None if self.limits is None else self.limits.stats(),
+            "recorded": None if self.recorder is None else self.recorder.recorded,
+            "throughput": self.throughput.stats(),
+            "hedging": {name: policy.stats() for name, (_, policy) in self.hedges.items()} or None,
+        }
+
+
+class _ChunkedWriter:
+    """Writable object sending the job output as an HTTP/1.1 chunked response body."""
+
+    def __init__(self, handler: BaseHTTPRequestHandler) -> None:
+        self.handler = handler
+        self.started = False
+
+    def write(self, data: bytes) -> None:
+        if not self.started:
+            self.handler.send_response(200)
+            self.handler.send_header("Content-Type", "application/octet-stream")
+            self.handler.send_header("Transfer-Encoding", "chunked")
+            self.handler.end_headers()
+            self.started = True
+        if data:
+            self.handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def finish(self) -> None:
+        self.write(b"")
+        self.handler.wfile.write(b"0\r\n\r\n")
+
+
+def _cancel_on_disconnect(
+    connection: socket.socket, scope: CancelScope, done: threading.Event
+) -> None:
+    # The job body has been read, so the socket becomes readable only when the client
+    # closes it, or when it sends its next request on a kept-alive connection
+    while not done.is_set():
+        readable, _, _ = select.select([connection], [], [], 0.2)
+        if not readable:
+            continue
+        try:
+            if connection.recv(1, socket.MSG_PEEK) == b"":
+                scope.cancel("client disconnected")
+        except OSError:
+            scope.cancel("client disconnected")
+        return
+
+
+def _host_name(host: str) -> str:
+    # Drops the port of a Host header, IPv6 addresses are in brackets
+    if host.startswith("["):
+        return host.partition("]")[0] + "]"
+    return host.partition(":")[0]
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "nim-clients-daemon"
+
+    def address_string(self) -> str:
+        # Unix domain socket peers have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _refused(self) -> bool:
+        """Function to answer requests that are not from a local client, returns whether it did."""
+        token = self.server.token
+        if token is not None:
+            authorization = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+                self._send_json(401, {"error": "Missing or wrong daemon token."})
+                return True
+        elif self.server.check_host:
+            # A page that resolved its own host name to 127.0.0.1 still sends that name
+            if _host_name(self.headers.get("Host") or "") not in LOCAL_HOSTS:
+                self._send_json(403, {"error": "Requests must be addressed to localhost."})
+                return True
+        return False
+
+    def do_GET(self) -> None:
+        if self._refused():
+            return
+        if self.path == "/v1/status":
+            self._send_json(200, self.server.nim_daemon.status())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        if self._refused():
+            return
+        if self.path != "/v1/jobs":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        # Browsers send cross-site text/plain and form posts without a preflight, not JSON
+        if self.headers.get_content_type() != "application/json":
+            self._send_json(415, {"error": "Jobs must be sent as application/json."})
+            return
+        received = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"{}")
+            check_job_fields(job)
+            sink = _ChunkedWriter(self) if job.get("output") is None else None
+            scope = self.server.nim_daemon.scope.child()
+            done = threading.Event()
+            threading.Thread(
+                target=_cancel_on_disconnect, args=(self.connection, scope, done), daemon=True
+            ).start()
+            try:
+                result = self.server.nim_daemon.run_job(job, sink, scope)
+            finally:
+                done.set()
+        except JobError as e:
+            self._send_json(e.status, {"error": str(e)})
+            return
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid job: {e}"})
+            return
+
+        if sink is None:
+            body = result.as_dict()
+            body["daemon_overhead_s"] = (
+                time.perf_counter() - received - (result.latency or 0.0) - result.queue_wait
+            )
+            self._send_json(200 if result.ok else 502, body)
+        elif result.ok:
+            sink.finish()
+        elif not sink.started:
+            self._send_json(502, result.as_dict())
+        else:
+            # Output already partially sent, drop the connection so the client sees truncation
+            self.close_connection = True
+
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "[::1]")
+
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        check_socket_directory(self.server_address, create=True)
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        # Created with mode 0600, so no other user can connect in between bind and chmod
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+
+def create_server(
+    daemon: NimDaemon,
+    socket_path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    verbose: bool = False,
+    token: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """Function to create the HTTP server exposing daemon.
+
+    Args:
+      daemon: Job runner
+      socket_path: Path of a Unix domain socket, TCP on host:port is used when None
+      host: Address to listen on for TCP
+      port: Port to listen on for TCP, 0 picks a free port
+      verbose: Log every HTTP request
+      token: Shared secret requests must send as "Authorization: Bearer <token>". Without
+        one, requests over TCP must have a localhost Host header, and any user of the host
+        can run jobs, reading and writing files as the daemon's user
+
+    Raises:
+      ValueError: When listening on TCP on another address than localhost without a token
+    """
+    if socket_path:
+        server = _UnixServer(socket_path, _RequestHandler)
+    else:
+        if token is None and host not in ("localhost", "127.0.0.1", "::1"):
+            raise ValueError(f"Listening on {host} requires a token.")
+        server = _TCPServer((host, port), _RequestHandler)
+    server.nim_daemon = daemon
+    server.verbose = verbose
+    server.token = token
+    # The Unix domain socket is only open to the daemon's user
+    server.check_host = not socket_path
+    return server
+
+
+def _parse_mapping(values: list, option: str) -> Dict[str, str]:
+    mapping = {}
+    for value in values or []:
+        name, sep, setting = value.partition("=")
+        if not sep or name not in SERVICES:
+            raise RuntimeError(
+                f"{option} expects SERVICE=VALUE with SERVICE in {sorted(SERVICES)}."
+            )
+        mapping[name] = setting
+    return mapping
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a resident Maxine NIM client daemon with warm gRPC channels."
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=DEFAULT_SOCKET,
+        help="Path of the Unix domain socket to listen on, defaults to NIM_CLIENTS_SOCKET or "
+        "nim-clients.sock in XDG_RUNTIME_DIR or /tmp/nim-clients-<uid>. Its directory must "
+        "not be writable by other users.",
+    )
+    parser.add_argument(
+        "--tcp",
+        action="store_true",
+        help="Listen on localhost HTTP at --host and --port instead of the Unix domain socket, "
+        "requires --token.",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Address to listen on with --tcp."
+    )
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on with --tcp.")
+    parser.add_argument(
+        "--token",
+        type=str,
+        default=os.environ.get("NIM_CLIENTS_TOKEN"),
+        help="Shared secret requests must send as a bearer token, defaults to the "
+        "NIM_CLIENTS_TOKEN environment variable. Required with --tcp.",
+    )
+    parser.add_argument(
+        "--allow-target",
+        action="append",
+        default=[],
+        help="IP:port jobs may choose as their target besides the configured targets, may be "
+        "repeated. The daemon's request metadata is never sent to it.",
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        help="SERVICE=IP:port of a NIM, may be repeated for each service.",
+    )
+    parser.add_argument(
+        "--ssl-mode",
+        type=str,
+        default="DISABLED",
+        choices=SSL_MODES,
+        help="SSL mode of the channels, TLS without --ssl-root-cert uses the system roots.",
+    )
+    parser.add_argument("--ssl-key", type=str, help="The path to ssl private key.")
+    parser.add_argument("--ssl-cert", type=str, help="The path to ssl certificate chain.")
+    parser.add_argument("--ssl-root-cert", type=str, help="The path to ssl root certificate.")
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        default=os.environ.get("NGC_API_KEY"),
+        help="NGC API key for NVCF, defaults to the NGC_API_KEY environment variable.",
+    )
+    parser.add_argument(
+        "--function-id",
+        action="append",
+        help="SERVICE=NVCF function ID, may be repeated for each service.",
+    )
+    parser.add_argument(
+        "--channels-per-target",
+        type=int,
+        default=1,
+        help="Number of connections opened to each target.",
+    )
+    parser.add_argument(
+        "--warm", action="store_true", help="Connect to the targets before accepting jobs."
+    )
+    parser.add_argument(
+        "--traffic-class",
+        action="append",
+        default=[],
+        help="NAME:WEIGHT[:REQUESTS_PER_S[:BYTES_PER_S]] of a tenant or priority class, "
+        "may be repeated. Jobs of unlisted classes get weight 1.",
+    )
+    parser.add_argument(
+        "--requests-per-s", type=float, help="Jobs started per second over all classes."
+    )
+    parser.add_argument(
+        "--bytes-per-s", type=float, help="Input bytes admitted per second over all classes."
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, help="Maximum number of jobs running at the same time."
+    )
+    parser.add_argument(
+        "--adaptive-concurrency",
+        choices=sorted(LIMITERS),
+        help="Adapt the jobs in flight to each service and target to the latency and errors "
+        "of the fleet, with additive increase and multiplicative decrease or the latency "
+        "gradient. Not limited when not set.",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=64,
+        help="Highest limit of --adaptive-concurrency per service and target.",
+    )
+    parser.add_argument(
+        "--deadline-rtf",
+        action="append",
+        help="SERVICE=RTF expected real-time factor, jobs get a deadline of input duration * "
+        "RTF plus slack. May be repeated for each service.",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=COMPRESSION_MODES,
+        default="auto",
+        help="Compression mode of the uploads for jobs without one. auto, the default, "
+        "compresses PCM WAV and leaves MP4 alone, none saves the CPU on a local network.",
+    )
+    parser.add_argument(
+        "--hash",
+        action="append",
+        default=[],
+        help="Hash algorithm computed over the output of jobs without hashes, e.g. sha256. "
+        "Can be repeated.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the WAV or MP4 structure of the output of jobs without a verify setting.",
+    )
+    parser.add_argument(
+        "--diagnostics-interval",
+        type=float,
+        help="Seconds between samples of memory, open file descriptors and threads, reported "
+        "in /v1/status. Diagnostics are off when not set.",
+    )
+    parser.add_argument(
+        "--diagnostics-log",
+        type=str,
+        help="File the diagnostics samples are appended to as JSON lines.",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="Trace allocations and report the sites that grew the most in the diagnostics.",
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        help="File the arrival, size, parameters and timings of every job are appended to as "
+        "JSON lines, for replay with nim_common.replay.",
+    )
+    parser.add_argument(
+        "--record-payloads",
+        type=str,
+        help="Directory the inputs and files of the recorded jobs are copied to, so that the "
+        "replay sends the same payloads. Only sizes and digests are recorded when not set.",
+    )
+    parser.add_argument(
+        "--record-sample",
+        type=float,
+        default=1.0,
+        help="Fraction of the jobs recorded with --record.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Record the phases of every job as spans into this OTLP/JSON lines file, or post "
+        "them to this OTLP/HTTP collector URL, e.g. http://127.0.0.1:4318/v1/traces.",
+    )
+    parser.add_argument(
+        "--trace-sample", type=float, default=1.0, help="Fraction of the jobs traced with --trace."
+    )
+    parser.add_argument(
+        "--hedge-target",
+        action="append",
+        help="SERVICE=IP:port of a second target of the service, may be repeated for each "
+        "service. Jobs without output after the hedge delay are also sent there and the first "
+        "copy to complete wins.",
+    )
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        help="Seconds without output before a job is hedged. Learned per service from the "
+        "recent first output times when not set.",
+    )
+    parser.add_argument(
+        "--hedge-quantile",
+        type=float,
+        default=0.95,
+        help="Quantile of the recent first output times used as the learned hedge delay.",
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=0.05,
+        help="Largest fraction of the jobs of a service that are hedged.",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Log every HTTP request.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Daemon entry point
+    """
+    args = parse_args()
+    targets = {
+        name: ChannelConfig(
+            target,
+            ssl_mode=args.ssl_mode,
+            ssl_root_cert=args.ssl_root_cert,
+            ssl_cert=args.ssl_cert,
+            ssl_key=args.ssl_key,
+        )
+        for name, target in _parse_mapping(args.target, "--target").items()
+    }
+    metadata = {}
+    for name, function_id in _parse_mapping(args.function_id, "--function-id").items():
+        if not args.api_key:
+            raise RuntimeError("--function-id requires --api-key or NGC_API_KEY.")
+        metadata[name] = (
+            ("authorization", "Bearer {}".format(args.api_key)),
+            ("function-id", function_id),
+        )
+
+    pool = ChannelPool(channels_per_target=args.channels_per_target)
+    if args.warm:
+        for name, config in targets.items():
+            print(f"Connected to {name} at {config.target} in {pool.warm(config):.3f}s")
+    scheduler = None
+    if args.traffic_class or args.requests_per_s or args.bytes_per_s or args.max_in_flight:
+        scheduler = FairScheduler(
+            [parse_traffic_class(value) for value in args.traffic_class],
+            requests_per_s=args.requests_per_s,
+            bytes_per_s=args.bytes_per_s,
+            max_in_flight=args.max_in_flight,
+        )
+    deadline_rtf = {
+        name: float(rtf)
+        for name, rtf in _parse_mapping(args.deadline_rtf, "--deadline-rtf").items()
+    }
+    limits = None
+    if args.adaptive_concurrency:
+        limiter = LIMITERS[args.adaptive_concurrency]
+        initial = min(4, args.max_concurrency)
+        limits = ConcurrencyLimits(lambda: limiter(initial=initial, maximum=args.max_concurrency))
+    diagnostics = None
+    if args.diagnostics_interval:
+        diagnostics = Diagnostics(
+            args.diagnostics_interval, path=args.diagnostics_log, trace=args.tracemalloc
+        ).start()
+    recorder = None
+    if args.record:
+        recorder = TrafficRecorder(args.record, args.record_payloads, args.record_sample)
+    tracer = None
+    if args.trace:
+        tracer = Tracer(create_exporter(args.trace), "nim-daemon", args.trace_sample)
+    daemon = NimDaemon(
+        pool,
+        targets,
+        metadata,
+        scheduler,
+        deadline_rtf,
+        args.compression,
+        diagnostics,
+        hashes=args.hash,
+        verify=args.verify,
+        limits=limits,
+        recorder=recorder,
+        tracer=tracer,
+        hedges={
+            name: (
+                ChannelConfig(
+                    target, args.ssl_mode, args.ssl_root_cert, args.ssl_cert, args.ssl_key
+                ),
+                HedgePolicy(args.hedge_delay, args.hedge_quantile, args.hedge_budget),
+            )
+            for name, target in _parse_mapping(args.hedge_target, "--hedge-target").items()
+        },
+        allowed_targets=args.allow_target,
+    )
+    if args.tcp and not args.token:
+        # Any local user can reach a TCP port, and jobs read and write files as the daemon's user
+        raise RuntimeError("--tcp requires --token or NIM_CLIENTS_TOKEN.")
+    socket_path = None if args.tcp else args.socket
+    server = create_server(daemon, socket_path, args.host, args.port, args.verbose, args.token)
+    print(f"Listening on {socket_path or f'{args.host}:{server.server_address[1]}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.scope.cancel("daemon shutdown")
+        server.server_close()
+        pool.close()
+        if diagnostics is not None:
+            diagnostics.stop()
+        if recorder is not None:
+            recorder.close()
+        if tracer is not None:
+            tracer.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Per-call deadlines and cancellation scopes for streaming calls.
+
+A streaming call without a deadline keeps uploading, and the NIM keeps
+rendering, after whoever asked for the job has given up on it. The helpers
+below derive a deadline from the input duration and an expected real-time
+factor (RTF, processing seconds per second of media), and tie calls to a
+CancelScope. Cancelling the scope, from a parent scope, a signal or the code
+giving up on the job, cancels every attached call and stops its request
+generator, so the server frees the stream right away.
+
+Reclaimed GPU time is estimated as the expected processing time of the input
+minus the time the call already ran when it was cancelled.
+"""
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+from .media import media_duration
+
+DEADLINE_SLACK = 10.0  # seconds added to duration * RTF for connection setup and queueing
+
+
+def expected_processing_time(input_filepath, rtf: Optional[float]) -> Optional[float]:
+    """Function to return duration * rtf of the input, None when either is unknown."""
+    if rtf is None:
+        return None
+    duration = media_duration(input_filepath)
+    return None if duration is None else duration * rtf
+
+
+def call_timeout(
+    input_filepath,
+    rtf: Optional[float] = None,
+    timeout: Optional[float] = None,
+    slack: float = DEADLINE_SLACK,
+) -> Optional[float]:
+    """Function to derive the timeout of a call from the duration of its input.
+
+    Args:
+      input_filepath: Path to the WAV or MP4 input
+      rtf: Expected real-time factor of the service, no derived deadline when None
+      timeout: Fixed upper bound in seconds, used alone when the duration is unknown
+      slack: Seconds added to the derived deadline
+
+    Returns:
+      The timeout in seconds, or None for no deadline.
+    """
+    expected = expected_processing_time(input_filepath, rtf)
+    if expected is None:
+        return timeout
+    derived = expected + slack
+    return derived if timeout is None else min(timeout, derived)
+
+
+def reclaimed_time(expected: Optional[float], elapsed: float) -> Optional[float]:
+    """Function to estimate the processing seconds saved by cancelling a call after elapsed."""
+    if expected is None:
+        return None
+    return max(0.0, expected - elapsed)
+
+
+def cancellation_summary(
+    scope: "CancelScope", code: str, elapsed: float, expected: Optional[float] = None
+) -> Optional[str]:
+    """Function to describe a call that ended with the status code name code.
+
+    Args:
+      scope: Scope the call was attached to
+      code: Name of the gRPC status code of the call, e.g. "CANCELLED"
+      elapsed: Seconds the call ran
+      expected: Expected processing seconds of the input, see expected_processing_time
+
+    Returns:
+      A message when the call was cancelled through scope or hit its deadline, None otherwise.
+    """
+    if code == "DEADLINE_EXCEEDED":
+        return f"Deadline exceeded after {elapsed:.2f}s, the request was cancelled."
+    if code != "CANCELLED" or scope.reason is None:
+        return None
+    message = f"Request cancelled after {elapsed:.2f}s ({scope.reason})"
+    reclaimed = reclaimed_time(expected, elapsed)
+    if reclaimed is not None:
+        message += f", about {reclaimed:.1f}s of expected processing time reclaimed"
+    return message + "."
+
+
+class CancelScope:
+    """Cancellation and deadline shared by the calls of a job.
+
+    Scopes form a tree: cancelling a scope cancels its children, and a child's
+    deadline never exceeds its parent's.
+
+    Args:
+      timeout: Seconds from now until the deadline of the scope, None for none
+      parent: Enclosing scope
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: "CancelScope" = None) -> None:
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        if parent is not None and parent.deadline is not None:
+            self.deadline = (
+                parent.deadline if self.deadline is None else min(self.deadline, parent.deadline)
+            )
+        self.parent = parent
+        self.reason = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._calls = []
+        self._children = []
+        if parent is not None:
+            parent._add_child(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _add_child(self, child: "CancelScope") -> None:
+        with self._lock:
+            if self.reason is None:
+                self._children.append(child)
+                return
+        child.cancel(self.reason)
+
+    def child(self, timeout: Optional[float] = None) -> "CancelScope":
+        """Function to create a scope cancelled together with this one."""
+        return CancelScope(timeout, parent=self)
+
+    def close(self) -> None:
+        """Function to detach the scope from its parent once its job is done."""
+        if self.parent is not None:
+            with self.parent._lock:
+                if self in self.parent._children:
+                    self.parent._children.remove(self)
+
+    def remaining(self) -> Optional[float]:
+        """Function to return the seconds left until the deadline, None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Function to return the smaller of timeout and the time left in the scope."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Function to cancel the attached calls, then the child scopes."""
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            calls = list(self._calls)
+            children = list(self._children)
+        # Calls are cancelled before the flag is set, so that a guarded request generator
+        # never half-closes a stream the server would then go on to process
+        for call in calls:
+            call.cancel()
+        self._cancelled.set()
+        for child in children:
+            child.cancel(reason)
+
+    @contextmanager
+    def attach(self, call: any) -> Iterator[any]:
+        """Context manager cancelling call when the scope is cancelled while it is open."""
+        with self._lock:
+            self._calls.append(call)
+            cancelled = self.reason is not None
+        if cancelled:
+            call.cancel()
+        try:
+            yield call
+        finally:
+            with self._lock:
+                self._calls.remove(call)
+
+    def guard(self, requests: Iterable) -> Iterator:
+        """Generator forwarding requests until the scope is cancelled."""
+        for request in requests:
+            if self.cancelled:
+                return
+            yield request
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Function to block until the scope is cancelled, returns whether it was."""
+        return self._cancelled.wait(timeout)
+
+
+@contextmanager
+def cancel_on_signals(
+    scope: CancelScope, signals: Iterable[int] = (signal.SIGINT, signal.SIGTERM)
+) -> Iterator[CancelScope]:
+    """Context manager cancelling scope on the given signals instead of killing the process.
+
+    Handlers can only be installed from the main thread, elsewhere the scope is
+    yielded unchanged.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield scope
+        return
+    previous = {}
+
+    def handler(signum: int, frame: any) -> None:
+        scope.cancel(f"signal {signal.Signals(signum).name}")
+
+    for signum in signals:
+        previous[signum] = signal.signal(signum, handler)
+    try:
+        yield scope
+    finally:
+        for signum, old in previous.items():
+            signal.signal(signum, old)
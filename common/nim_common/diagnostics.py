@@ -0,0 +1,187 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Opt-in memory, file descriptor and thread diagnostics for long-running clients.
+
+A Diagnostics object samples the process every interval seconds: resident
+memory, open file descriptors, threads, and with tracemalloc enabled the
+traced memory and the allocation sites that grew the most since the first
+sample. Streams reported with observe() add their peak buffered bytes.
+Samples are kept as the latest metrics and optionally appended to a file as
+JSON lines, so a multi-day worker can be checked for growth over time.
+
+    with Diagnostics(interval=60, path="diagnostics.jsonl", trace=True) as diagnostics:
+        for result in run_batch():
+            diagnostics.observe(result)
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_bytes() -> Optional[int]:
+    """Function to return the resident memory of the process, None where unknown."""
+    try:
+        with open("/proc/self/statm") as fd:
+            return int(fd.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Function to return the peak resident memory of the process, None where unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def open_fds() -> Optional[int]:
+    """Function to return the number of open file descriptors, None where unknown."""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir)) - 1  # minus the descriptor listing the directory
+        except OSError:
+            continue
+    return None
+
+
+class Diagnostics:
+    """Periodic sampler of the process's memory, file descriptors and threads.
+
+    Args:
+      interval: Seconds between samples
+      path: File the samples are appended to as JSON lines, None to keep only the latest
+      trace: Start tracemalloc and report the allocation sites that grew the most
+      top: Number of allocation sites reported
+      frames: Number of frames tracemalloc records per allocation
+    """
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        path: Optional[os.PathLike] = None,
+        trace: bool = False,
+        top: int = 10,
+        frames: int = 1,
+    ) -> None:
+        self.interval = interval
+        self.path = path
+        self.trace = trace
+        self.top = top
+        self.frames = frames
+        self.latest = None
+        self._started_tracing = False
+        self._baseline = None
+        self._lock = threading.Lock()
+        self._streams = 0
+        self._peak_buffered = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def observe(self, result: any) -> None:
+        """Function to account a finished nim_common.streaming.StreamResult."""
+        with self._lock:
+            self._streams += 1
+            self._peak_buffered = max(self._peak_buffered, result.peak_buffered)
+
+    def _allocations(self) -> dict:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        if self._baseline is None:
+            self._baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        top = [
+            {
+                "site": str(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+            }
+            for stat in snapshot.compare_to(self._baseline, "lineno")[: self.top]
+        ]
+        return {"current_bytes": current, "peak_bytes": peak, "top": top}
+
+    def sample(self) -> dict:
+        """Function to take a sample, store it as the latest one and append it to path."""
+        with self._lock:
+            streams = self._streams
+            peak_buffered = self._peak_buffered
+            self._peak_buffered = 0
+        metrics = {
+            "time": time.time(),
+            "rss_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "open_fds": open_fds(),
+            "threads": threading.active_count(),
+            "streams": streams,
+            # Largest payload held for one stream since the previous sample
+            "stream_peak_buffered_bytes": peak_buffered,
+            "tracemalloc": self._allocations() if tracemalloc.is_tracing() else None,
+        }
+        self.latest = metrics
+        if self.path is not None:
+            with open(self.path, "a") as fd:
+                fd.write(json.dumps(metrics) + "\n")
+        return metrics
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> "Diagnostics":
+        """Function to take a first sample and start sampling in a background thread."""
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self.sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="diagnostics", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Function to take a last sample and stop sampling."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.sample()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> "Diagnostics":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,348 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Running many concurrent streams of a service over one long-lived channel."""
+
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Tuple
+
+import grpc
+
+from .deadlines import CancelScope
+from .hedging import HedgePolicy, hedged_stream
+from .limits import AdaptiveLimiter, classify, input_megabytes
+from .scheduling import FairScheduler
+from .services import ServiceSpec
+from .streaming import DATA_CHUNKS, StreamResult, stream_file
+from .throughput import percentile
+from .tracing import Tracer
+
+if TYPE_CHECKING:
+    from .traffic import TrafficRecorder
+
+
+class StreamDispatcher:
+    """Micro-batch dispatcher multiplexing streaming calls over a shared channel.
+
+    All calls share the channel, and therefore its HTTP/2 connection, so the
+    connection setup is paid once for the whole batch. At most
+    max_concurrent_streams calls are in flight; further calls wait for a slot.
+    Keep the limit at or below the server's HTTP/2 max concurrent streams
+    setting, calls above it are queued inside gRPC instead.
+
+    With a scheduler, submitted calls wait in its fair queue rather than in
+    submission order, and the scheduler may be shared with other dispatchers
+    and the daemon to apply one set of rate limits to all of them.
+
+    With an adaptive limiter, calls also wait for a slot of the limiter, whose
+    limit follows the latency and errors of the calls, see nim_common.limits.
+    max_concurrent_streams then only bounds it, so set it to the limiter's
+    maximum.
+
+    With a hedge channel and policy, a call slow to produce its first output
+    is also started on the hedge channel's target and the first copy to
+    complete wins, see nim_common.hedging. Hedged calls are not retried or
+    traced.
+
+    Args:
+      channel: gRPC channel for server client communication
+      spec: Service to call
+      max_concurrent_streams: Maximum number of calls in flight
+      metadata: Request metadata such as NVCF credentials
+      chunk_size: Size in bytes of the input chunks
+      single_message_limit: Largest input in bytes sent as a single message, 0 to always chunk
+      scheduler: Fair queue and rate limits the calls are admitted through
+      timeout: Deadline of each call in seconds
+      deadline_rtf: Expected real-time factor, bounds each deadline to duration * RTF plus slack
+      scope: Parent CancelScope, cancelling it cancels all queued and running calls
+      compression: Compression mode of the uploads, see nim_common.compression
+      retries: Number of times a call failing with a retryable error is restarted
+      hashes: Names of the hash algorithms computed over each output
+      verify: Check the WAV or MP4 structure of each output
+      limiter: Adaptive limit on the calls in flight to the service at this channel's target
+      recorder: TrafficRecorder the finished calls are appended to, see nim_common.traffic
+      tracer: Tracer recording the phases of every call, see nim_common.tracing
+      hedge_channel: Channel to a second target that slow calls are hedged on
+      hedging: HedgePolicy of the hedged calls, required with hedge_channel
+    """
+
+    def __init__(
+        self,
+        channel: grpc.Channel,
+        spec: ServiceSpec,
+        max_concurrent_streams: int = 32,
+        metadata: Optional[tuple] = None,
+        chunk_size: int = DATA_CHUNKS,
+        single_message_limit: int = 0,
+        scheduler: Optional[FairScheduler] = None,
+        timeout: Optional[float] = None,
+        deadline_rtf: Optional[float] = None,
+        scope: Optional[CancelScope] = None,
+        compression: str = "auto",
+        retries: int = 0,
+        hashes: Sequence[str] = (),
+        verify: bool = False,
+        limiter: Optional[AdaptiveLimiter] = None,
+        recorder: Optional["TrafficRecorder"] = None,
+        tracer: Optional[Tracer] = None,
+        hedge_channel: Optional[grpc.Channel] = None,
+        hedging: Optional[HedgePolicy] = None,
+    ) -> None:
+        if (hedge_channel is None) != (hedging is None):
+            raise ValueError("hedge_channel and hedging are required together.")
+        self.channel = channel
+        self.spec = spec
+        self.max_concurrent_streams = max_concurrent_streams
+        self.metadata = metadata
+        self.chunk_size = chunk_size
+        self.single_message_limit = single_message_limit
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.deadline_rtf = deadline_rtf
+        self.scope = CancelScope(parent=scope)
+        self.compression = compression
+        self.retries = retries
+        self.hashes = hashes
+        self.verify = verify
+        self.limiter = limiter
+        self.recorder = recorder
+        self.tracer = tracer
+        self.hedge_channel = hedge_channel
+        self.hedging = hedging
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_streams, thread_name_prefix=f"{spec.name}-stream"
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def wait_for_ready(self, timeout: Optional[float] = None) -> float:
+        """Function to connect the channel ahead of the first call.
+
+        Returns:
+          Seconds spent establishing the connection.
+        """
+        start_time = time.perf_counter()
+        grpc.channel_ready_future(self.channel).result(timeout=timeout)
+        return time.perf_counter() - start_time
+
+    def _run(
+        self,
+        input_filepath: os.PathLike,
+        output_filepath: os.PathLike,
+        params: Optional[dict],
+        submitted: float,
+        traffic_class: Optional[str] = None,
+    ) -> StreamResult:
+        result = StreamResult(self.spec.name, input_filepath, output_filepath)
+        result.traffic_class = traffic_class
+        scope = self.scope.child()
+        slot = None
+        if self.limiter is not None and scope.reason is None:
+            slot = self.limiter.acquire()
+        result.queue_wait = time.perf_counter() - submitted
+        if scope.reason is not None:
+            # Cancelled while queued, the call is never started
+            scope.close()
+            if slot is not None:
+                self.limiter.release(slot, None)
+            result.cancelled = scope.reason
+            result.error = f"CANCELLED: {scope.reason}"
+            return result
+        with self._lock:
+            self.in_flight += 1
+        dropped = None  # stays None when the call fails unexpectedly, the limit is not adapted
+        try:
+            if self.hedging is not None:
+                with open(output_filepath, "wb") as output:
+                    hedged_stream(
+                        [self.channel, self.hedge_channel],
+                        self.spec,
+                        input_filepath,
+                        output,
+                        self.hedging,
+                        params=params,
+                        metadata=self.metadata,
+                        chunk_size=self.chunk_size,
+                        single_message_limit=self.single_message_limit,
+                        result=result,
+                        timeout=self.timeout,
+                        deadline_rtf=self.deadline_rtf,
+                        scope=scope,
+                        compression=self.compression,
+                        hashes=self.hashes,
+                        verify=self.verify,
+                    )
+            else:
+                stream_file(
+                    self.channel,
+                    self.spec,
+                    input_filepath,
+                    output_filepath,
+                    params=params,
+                    metadata=self.metadata,
+                    chunk_size=self.chunk_size,
+                    single_message_limit=self.single_message_limit,
+                    result=result,
+                    timeout=self.timeout,
+                    deadline_rtf=self.deadline_rtf,
+                    scope=scope,
+                    compression=self.compression,
+                    retries=self.retries,
+                    hashes=self.hashes,
+                    verify=self.verify,
+                    tracer=self.tracer,
+                )
+            dropped = classify(result)
+        except grpc.RpcError as e:
+            result.error = f"{e.code().name}: {e.details()}"
+            dropped = classify(result)
+        except (OSError, ValueError) as e:
+            result.error = str(e)
+        finally:
+            scope.close()
+            if slot is not None:
+                self.limiter.release(slot, dropped, input_megabytes(input_filepath))
+            with self._lock:
+                self.in_flight -= 1
+        if self.recorder is not None:
+            self.recorder.record(result, params=params, chunk_size=self.chunk_size)
+        return result
+
+    def _run_next(self) -> None:
+        # Runs whichever call the scheduler admits next, one per submitted call
+        ticket = self.scheduler.next()
+        future, run = ticket.payload
+        try:
+            if future.set_running_or_notify_cancel():
+                # Fails the future rather than leaving it pending when run() raises
+                try:
+                    result = run()
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            self.scheduler.release(ticket)
+
+    def submit(
+        self,
+        input_filepath: os.PathLike,
+        output_filepath: os.PathLike,
+        params: Optional[dict] = None,
+        traffic_class: str = "default",
+    ) -> "Future[StreamResult]":
+        """Function to queue a call and return a future of its StreamResult.
+
+        Args:
+          input_filepath: Path to input file
+          output_filepath: Path to output file
+          params: Parameters for the feature, sent as the first message when given
+          traffic_class: Tenant or priority class of the call, used with a scheduler
+        """
+        submitted = time.perf_counter()
+        if self.scheduler is None:
+            return self._executor.submit(
+                self._run, input_filepath, output_filepath, params, submitted, traffic_class
+            )
+
+        def run() -> StreamResult:
+            return self._run(input_filepath, output_filepath, params, submitted, traffic_class)
+
+        try:
+            cost = os.path.getsize(input_filepath)
+        except OSError:
+            cost = 0
+        future = Future()
+        self.scheduler.enqueue(traffic_class, cost, payload=(future, run))
+        self._executor.submit(self._run_next)
+        return future
+
+    def run(
+        self,
+        jobs: Iterable[Tuple[os.PathLike, os.PathLike]],
+        params: Optional[dict] = None,
+        traffic_class: str = "default",
+    ) -> List[StreamResult]:
+        """Function to run (input, output) jobs and return their results in order."""
+        futures = [
+            self.submit(input_filepath, output_filepath, params, traffic_class)
+            for input_filepath, output_filepath in jobs
+        ]
+        return [future.result() for future in futures]
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Function to cancel all running calls and fail the queued ones."""
+        self.scope.cancel(reason)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.scope.close()
+
+    def __enter__(self) -> "StreamDispatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def summarize(results: List[StreamResult], wall_time: float) -> dict:
+    """Function to aggregate the results of a batch.
+
+    The rtf is the processing seconds per second of media of the calls, and
+    media_s_per_s and bytes_per_s the media seconds and input bytes processed
+    per second of wall_time, over all concurrent calls.
+
+    Args:
+      results: Results returned by the dispatcher
+      wall_time: Seconds from the first submission to the last completion
+    """
+    done = [result for result in results if result.ok]
+    latencies = sorted(result.latency for result in done)
+    first_outputs = [result.first_output for result in done if result.first_output is not None]
+    timed = [result for result in done if result.media_duration]
+    media = sum(result.media_duration for result in timed)
+    input_bytes = sum(result.input_bytes for result in done)
+    return {
+        "clips": len(results),
+        "failed": len(results) - len(done),
+        "wall_s": wall_time,
+        "clips_per_s": len(done) / wall_time if wall_time > 0 else None,
+        "latency_mean_s": statistics.fmean(latencies) if latencies else None,
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p95_s": percentile(latencies, 0.95),
+        "first_output_mean_s": statistics.fmean(first_outputs) if first_outputs else None,
+        "queue_wait_mean_s": statistics.fmean(r.queue_wait for r in done) if done else None,
+        "cancelled": sum(1 for result in results if result.cancelled not in (None, "deadline")),
+        "deadline_exceeded": sum(1 for result in results if result.cancelled == "deadline"),
+        "reclaimed_s": sum(result.reclaimed or 0.0 for result in results),
+        "bytes_saved": sum(result.bytes_saved or 0 for result in done),
+        "retries": sum(result.retries for result in results),
+        "media_s": media,
+        "rtf": sum(result.latency for result in timed) / media if media else None,
+        "media_s_per_s": media / wall_time if wall_time > 0 else None,
+        "bytes_per_s": input_bytes / wall_time if wall_time > 0 else None,
+        "input_bytes": input_bytes,
+        "output_bytes": sum(result.output_bytes for result in done),
+        "peak_buffered_bytes": max((result.peak_buffered for result in results), default=0),
+    }
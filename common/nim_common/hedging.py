@@ -0,0 +1,277 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Hedged calls: a second copy of a slow call sent to another target.
+
+A call that has not produced its first output chunk after the hedge delay
+is started again on a second target. The first of the two to complete wins
+and the other is cancelled, so one slow replica no longer sets the tail
+latency. The delay is fixed, or learned as a percentile of recent first
+output times so that only the slowest calls are hedged, and a budget caps the
+hedges at a fraction of the calls, so that a slow fleet is not sent twice
+its load.
+
+Both copies buffer their output in memory until the winner is known, which
+suits the short interactive calls hedging is meant for.
+"""
+
+import io
+import queue
+import threading
+import time
+from collections import deque
+from typing import BinaryIO, Optional, Sequence
+
+import grpc
+
+from .deadlines import CancelScope, call_timeout
+from .services import ServiceSpec
+from .streaming import DATA_CHUNKS, PreparedInput, StreamResult, stream_into
+from .throughput import percentile
+
+
+class HedgePolicy:
+    """When calls are hedged and how many hedges may be sent, with the hedge statistics.
+
+    Args:
+      delay: Seconds without a first output chunk after which a call is hedged, learned
+        from the recent first output times when None
+      quantile: Quantile of the recent first output times used as the learned delay
+      budget: Largest fraction of the calls that are hedged
+      min_samples: First output times needed before calls are hedged with a learned delay
+      window: Number of recent first output times the delay is learned from
+    """
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        quantile: float = 0.95,
+        budget: float = 0.05,
+        min_samples: int = 20,
+        window: int = 500,
+    ) -> None:
+        self.fixed_delay = delay
+        self.quantile = quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0  # calls past the delay that the budget did not allow to hedge
+        self._first_outputs = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def delay(self) -> Optional[float]:
+        """Function to return the current hedge delay, None while it is not learned yet."""
+        if self.fixed_delay is not None:
+            return self.fixed_delay
+        with self._lock:
+            if len(self._first_outputs) < self.min_samples:
+                return None
+            return percentile(sorted(self._first_outputs), self.quantile)
+
+    def start(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def allow(self) -> bool:
+        """Function to take a hedge from the budget, False when it is used up."""
+        with self._lock:
+            if self.hedged + 1 > self.budget * self.calls:
+                self.denied += 1
+                return False
+            self.hedged += 1
+            return True
+
+    def observe(self, first_output: float) -> None:
+        """Function to add the first output time of a call, or a lower bound of it for a
+        call cancelled before its first output."""
+        with self._lock:
+            self._first_outputs.append(first_output)
+
+    def finish(self, latency: Optional[float], hedge_won: bool) -> None:
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / self.calls if self.calls else None,
+                "hedge_wins": self.hedge_wins,
+                "win_rate": self.hedge_wins / self.hedged if self.hedged else None,
+                "budget_denied": self.denied,
+                "delay_s": delay,
+                "latency_p50_s": percentile(latencies, 0.5),
+                "latency_p99_s": percentile(latencies, 0.99),
+            }
+
+
+class _Attempt:
+    """One copy of a hedged call, buffering its output."""
+
+    def __init__(self, number: int, channel: grpc.Channel, result: StreamResult, scope) -> None:
+        self.number = number
+        self.channel = channel
+        self.result = result
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.output = io.BytesIO()
+        self.progress = threading.Event()  # set on the first output chunk or the end of the call
+        self.error = None
+        self.thread = None
+
+    def write(self, data: bytes) -> None:
+        self.progress.set()
+        self.output.write(data)
+
+
+def hedged_stream(
+    channels: Sequence[grpc.Channel],
+    spec: ServiceSpec,
+    input_filepath,
+    sink: BinaryIO,
+    policy: HedgePolicy,
+    params: Optional[dict] = None,
+    metadata: Optional[tuple] = None,
+    chunk_size: int = DATA_CHUNKS,
+    single_message_limit: int = 0,
+    result: Optional[StreamResult] = None,
+    timeout: Optional[float] = None,
+    deadline_rtf: Optional[float] = None,
+    scope: Optional[CancelScope] = None,
+    compression: str = "auto",
+    hashes: Sequence[str] = (),
+    verify: bool = False,
+    prepared: Optional[PreparedInput] = None,
+) -> StreamResult:
+    """Function to stream input_filepath through the service into sink, hedged on a second
+    channel when the first is slow to produce output.
+
+    The input is read and chunked once for both copies. The winner's output is
+    written to sink, its timings are kept in result with the latency and first
+    output measured from the start of the first copy, and result.hedge is
+    "won" or "lost" when a hedge was sent. When both copies fail, the first
+    copy's error is raised.
+
+    Args:
+      channels: Channel of the first copy and channel of the hedge, to different targets
+      spec: Service to call
+      input_filepath: Path to input file
+      sink: Binary file-like object the winner's output is written to
+      policy: HedgePolicy deciding the hedge delay and budget
+      params: Parameters for the feature, sent as the first message when given
+      metadata: Request metadata such as NVCF credentials
+      chunk_size: Size in bytes of the input chunks
+      single_message_limit: Largest input in bytes sent as a single message, 0 to always chunk
+      result: StreamResult to fill in, a new one is created when None
+      timeout: Deadline of the hedged call in seconds, shared by both copies
+      deadline_rtf: Expected real-time factor, bounds the deadline to duration * RTF plus slack
+      scope: CancelScope the call is attached to
+      compression: Compression mode of the upload, see nim_common.compression
+      hashes: Names of the hash algorithms computed over the output
+      verify: Check the WAV or MP4 structure of the output
+      prepared: PreparedInput of input_filepath, read once here when None
+    """
+    if result is None:
+        result = StreamResult(spec.name, input_filepath, None)
+    if prepared is None:
+        prepared = PreparedInput(spec, input_filepath, chunk_size, single_message_limit)
+    call_scope = CancelScope(call_timeout(input_filepath, deadline_rtf, timeout), parent=scope)
+    finished = queue.Queue()
+
+    def run(attempt: _Attempt) -> None:
+        try:
+            stream_into(
+                attempt.channel,
+                spec,
+                input_filepath,
+                attempt,
+                params=params,
+                metadata=metadata,
+                result=attempt.result,
+                scope=attempt.scope,
+                compression=compression,
+                hashes=hashes,
+                verify=verify,
+                prepared=prepared,
+            )
+        except Exception as e:
+            attempt.error = e
+        finally:
+            attempt.progress.set()
+            finished.put(attempt)
+
+    def launch(number: int) -> _Attempt:
+        attempt = _Attempt(
+            number,
+            channels[number],
+            StreamResult(spec.name, input_filepath, result.output_filepath),
+            call_scope.child(),
+        )
+        attempt.thread = threading.Thread(target=run, args=(attempt,), daemon=True)
+        attempt.thread.start()
+        return attempt
+
+    policy.start()
+    attempts = [launch(0)]
+    delay = policy.delay() if len(channels) > 1 else None
+    if delay is not None and not attempts[0].progress.wait(delay) and policy.allow():
+        attempts.append(launch(1))
+    winner = None
+    for _ in attempts:
+        attempt = finished.get()
+        if attempt.error is None:
+            winner = attempt
+            break
+    for attempt in attempts:
+        if attempt is not winner:
+            attempt.scope.cancel("hedge lost")
+    for attempt in attempts:
+        attempt.thread.join()
+        attempt.scope.close()
+        # A copy cancelled before its first output still bounds the first output time
+        first_output = attempt.result.first_output or attempt.result.latency
+        if first_output is not None:
+            policy.observe(first_output)
+    call_scope.close()
+
+    if winner is None:
+        policy.finish(None, False)
+        raise attempts[0].error
+    offset = winner.started - attempts[0].started
+    for key, value in vars(winner.result).items():
+        if key not in ("traffic_class", "queue_wait", "output_filepath"):
+            setattr(result, key, value)
+    result.started = attempts[0].result.started
+    result.latency += offset
+    result.first_output = None if result.first_output is None else result.first_output + offset
+    if len(attempts) > 1:
+        result.hedge = "won" if winner.number == 1 else "lost"
+    policy.finish(result.latency, winner.number == 1)
+    sink.write(winner.output.getvalue())
+    return result
@@ -0,0 +1,301 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Checksums and container checks of output files computed while they are written.
+
+OutputVerifier is fed the output chunks as they arrive from the NIM. It
+updates the configured hashes and walks the container structure, so a
+truncated or malformed output is caught without reading the file again:
+
+- MP4: the top level boxes must tile the file exactly, start with ftyp and
+  include moov and mdat.
+- WAV: the RIFF size must match the file, the fmt and data chunks must be
+  present, complete and the data a whole number of frames.
+
+Hashes are any hashlib algorithm, or xxh64, xxh3_64, xxh3_128 and xxh128
+when the optional xxhash package is installed.
+"""
+
+import hashlib
+import struct
+from typing import List, Optional, Sequence
+
+XXHASH_ALGORITHMS = ("xxh64", "xxh3_64", "xxh3_128", "xxh128")
+CONTAINERS = ("auto", "mp4", "wav", "none")
+WAV_PLACEHOLDER_SIZES = (0, 0xFFFFFFFF)  # sizes left in the headers of streamed WAVs
+
+
+class OutputVerificationError(ValueError):
+    """Output that failed its container check."""
+
+
+def new_hash(name: str):
+    """Function to create a hash object from its name."""
+    if name in XXHASH_ALGORITHMS:
+        try:
+            import xxhash
+        except ImportError:
+            raise ValueError(f"The {name} hash requires the xxhash package.") from None
+        return getattr(xxhash, name)()
+    try:
+        return hashlib.new(name)
+    except ValueError:
+        raise ValueError(f"Unknown hash algorithm {name!r}.") from None
+
+
+class _ChunkWalker:
+    """Streaming walker over size-prefixed chunks, the common shape of MP4 and RIFF."""
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.chunks = []  # (type, size) of the chunks seen, size None when open-ended
+        self.problems = []
+        self._header = bytearray()
+        self._skip = 0  # bytes left in the body of the current chunk
+        self._open_ended = False
+        self._broken = False
+
+    def _header_size(self) -> int:
+        raise NotImplementedError
+
+    def _start_chunk(self, header: bytes) -> Optional[int]:
+        """Function to parse a chunk header, returns the body size or None when open-ended."""
+        raise NotImplementedError
+
+    def _body(self, data: memoryview) -> None:
+        """Function receiving the body bytes of the current chunk."""
+
+    def feed(self, data: bytes) -> None:
+        """Function to walk the next bytes of the file."""
+        self.size += len(data)
+        view = memoryview(data)
+        i = 0
+        while i < len(view) and not self._broken:
+            if self._skip or self._open_ended:
+                step = len(view) - i if self._open_ended else min(self._skip, len(view) - i)
+                self._body(view[i : i + step])
+                self._skip -= 0 if self._open_ended else step
+                i += step
+                continue
+            take = min(self._header_size() - len(self._header), len(view) - i)
+            self._header += view[i : i + take]
+            i += take
+            if len(self._header) == self._header_size():
+                header = bytes(self._header)
+                self._header.clear()
+                body = self._start_chunk(header)
+                if body is None:
+                    self._open_ended = True
+                else:
+                    self._skip = body
+
+    def finish(self) -> List[str]:
+        """Function to return the problems found once the whole file has been fed."""
+        problems = list(self.problems)
+        if self._broken:
+            return problems
+        if self._skip:
+            name = self.chunks[-1][0].strip()
+            problems.append(f"Truncated: the {name} chunk is missing {self._skip} bytes.")
+        elif self._header:
+            problems.append("Truncated: the file ends inside a chunk header.")
+        return problems
+
+
+class Mp4Checker(_ChunkWalker):
+    """Streaming walk of the top level boxes of an MP4 file."""
+
+    def _header_size(self) -> int:
+        # 64-bit sizes follow the type when the 32-bit size is 1
+        if len(self._header) >= 4 and self._header[:4] == b"\x00\x00\x00\x01":
+            return 16
+        return 8
+
+    def _start_chunk(self, header: bytes) -> Optional[int]:
+        size, box_type = struct.unpack_from(">I4s", header)
+        name = box_type.decode("latin-1")
+        if not all(32 <= c < 127 for c in box_type):
+            self.problems.append(f"Invalid box type {box_type!r} at offset {self._offset()}.")
+            self._broken = True
+            return 0
+        if size == 1:
+            size = struct.unpack_from(">Q", header, 8)[0]
+        if size == 0:
+            # The last box extends to the end of the file
+            self.chunks.append((name, None))
+            return None
+        if size < len(header):
+            self.problems.append(f"Invalid size {size} of box {name} at offset {self._offset()}.")
+            self._broken = True
+            return 0
+        self.chunks.append((name, size))
+        return size - len(header)
+
+    def _offset(self) -> int:
+        return sum(size for _, size in self.chunks if size is not None)
+
+    def finish(self) -> List[str]:
+        problems = super().finish()
+        if self._broken:
+            return problems
+        names = [name for name, _ in self.chunks]
+        if not names or names[0] != "ftyp":
+            problems.append("The file does not start with an ftyp box.")
+        for required in ("moov", "mdat"):
+            if required not in names:
+                problems.append(f"The file has no {required} box.")
+        return problems
+
+
+class WavChecker(_ChunkWalker):
+    """Streaming walk of the RIFF chunks of a WAV file."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.riff_size = None
+        self.block_align = None
+        self.data_size = None  # bytes of sample data present
+        self._fmt = None  # body of the fmt chunk, collected while it streams by
+        self._in_data = False
+
+    def _header_size(self) -> int:
+        return 12 if self.riff_size is None else 8
+
+    def _start_chunk(self, header: bytes) -> Optional[int]:
+        if self.riff_size is None:
+            riff, self.riff_size, wave = struct.unpack("<4sI4s", header)
+            if riff != b"RIFF" or wave != b"WAVE":
+                self.problems.append("The file does not start with a RIFF WAVE header.")
+                self._broken = True
+            return 0
+        chunk_id, size = struct.unpack("<4sI", header)
+        name = chunk_id.decode("latin-1")
+        self._in_data = chunk_id == b"data"
+        self._fmt = bytearray() if chunk_id == b"fmt " else None
+        if self._in_data:
+            self.data_size = 0
+            if size in WAV_PLACEHOLDER_SIZES:
+                # Streamed WAVs leave the size open, the data runs to the end of the file
+                self.chunks.append((name, None))
+                return None
+        self.chunks.append((name, size))
+        return size + size % 2
+
+    def _body(self, data: memoryview) -> None:
+        if self._in_data:
+            self.data_size += len(data)
+        elif self._fmt is not None and len(self._fmt) < 16:
+            self._fmt += data[: 16 - len(self._fmt)]
+            if len(self._fmt) >= 14:
+                self.block_align = struct.unpack_from("<H", self._fmt, 12)[0]
+
+    def finish(self) -> List[str]:
+        if self._skip == 1 and self.chunks[-1][1] % 2:
+            self._skip = 0  # the pad byte of an odd sized last chunk is often left out
+        problems = super().finish()
+        if self._broken or self.riff_size is None:
+            return problems or ["The file is too short for a WAV header."]
+        if self.riff_size not in WAV_PLACEHOLDER_SIZES and self.riff_size + 8 != self.size:
+            problems.append(
+                f"The RIFF header declares {self.riff_size + 8} bytes, the file has {self.size}."
+            )
+        names = [name for name, _ in self.chunks]
+        if "fmt " not in names:
+            problems.append("The file has no fmt chunk.")
+        if "data" not in names:
+            problems.append("The file has no data chunk.")
+        elif self.block_align and self.data_size % self.block_align:
+            problems.append(
+                f"The data chunk holds {self.data_size} bytes, "
+                f"not a whole number of {self.block_align} byte frames."
+            )
+        return problems
+
+
+def detect_container(head: bytes) -> Optional[str]:
+    """Function to return "wav" or "mp4" from the first 12 bytes of a file, None otherwise."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    return None
+
+
+class OutputVerifier:
+    """Hashes and container check of an output file, fed chunk by chunk.
+
+    Args:
+      hashes: Names of the hash algorithms computed over the output
+      container: "mp4" or "wav" to check the output as one, "auto" to detect
+        it from the first bytes, "none" to only compute the hashes
+    """
+
+    def __init__(self, hashes: Sequence[str] = ("sha256",), container: str = "auto") -> None:
+        if container not in CONTAINERS:
+            raise ValueError(f"Container must be one of {', '.join(CONTAINERS)}.")
+        self.hashes = {name: new_hash(name) for name in hashes}
+        self.check = container != "none"
+        self.container = None if container in ("auto", "none") else container
+        self.checker = None
+        self.size = 0
+        self._head = bytearray() if container == "auto" else None
+        if self.container is not None:
+            self.checker = Mp4Checker() if self.container == "mp4" else WavChecker()
+
+    def write(self, data: bytes) -> None:
+        """Function to account the next output chunk."""
+        self.size += len(data)
+        for digest in self.hashes.values():
+            digest.update(data)
+        if self._head is not None:
+            # The container is detected once the first 12 bytes have arrived
+            self._head += data
+            if len(self._head) < 12:
+                return
+            data, self._head = bytes(self._head), None
+            self.container = detect_container(data)
+            if self.container is not None:
+                self.checker = Mp4Checker() if self.container == "mp4" else WavChecker()
+        if self.checker is not None:
+            self.checker.feed(data)
+
+    def summary(self) -> dict:
+        """Function to return the hex digests and the outcome of the container check."""
+        problems = None
+        if self.checker is not None:
+            problems = self.checker.finish()
+        elif self.check:
+            problems = ["The output is neither a WAV nor an MP4 file."]
+        return {
+            "bytes": self.size,
+            "hashes": {name: digest.hexdigest() for name, digest in self.hashes.items()},
+            "container": self.container,
+            "valid": None if problems is None else not problems,
+            "problems": problems or [],
+        }
+
+    def verify(self) -> dict:
+        """Function to return the summary, raises OutputVerificationError when the check failed."""
+        summary = self.summary()
+        if summary["valid"] is False:
+            raise OutputVerificationError(
+                "Output failed verification: " + " ".join(summary["problems"])
+            )
+        return summary
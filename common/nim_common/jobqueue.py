@@ -0,0 +1,695 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Durable job queue on a shared filesystem, for batch runs spread over client hosts.
+
+Layout of the queue directory:
+
+    pending/<id>~<attempts>.json        jobs waiting for a worker
+    leased/<id>~<attempt>~<token>.json  jobs a worker is running under a lease
+    done/<id>.json                      completion records
+    failed/<id>.json                    jobs that failed on every attempt
+    workers/<name>.json                 heartbeat and counters of every worker
+
+Every state change is an atomic rename within the queue directory, so the
+queue needs no lock server and works on NFS and other shared filesystems on
+which SQLite's file locking is unreliable. A worker claims a job by renaming
+it from pending/ to leased/ under its own lease token, and when several hosts
+race for the same job only one rename succeeds. While the job runs, the
+worker touches the leased file as its heartbeat. Any worker renames a lease
+whose file was not touched for the lease duration back to pending/, comparing
+the file's modification time with that of its own freshly written worker
+file, so that the clocks of the client hosts do not need to agree.
+
+A worker whose leased file is gone lost its lease: it cancels the call and
+drops the result. Outputs are written next to the final path and renamed
+into place once complete, and the completion record holds the output's
+SHA-256, size and timings. A job that was completed right before its worker
+died is recognized by its record and not run again.
+
+Run a backfill with:
+
+    python -m nim_common.jobqueue enqueue --queue /shared/queue \
+        --service studio-voice --input-dir /shared/in --output-dir /shared/out
+    python -m nim_common.jobqueue work --queue /shared/queue \
+        --target studio-voice=127.0.0.1:8001 --concurrency 8 --until-empty
+
+on as many client hosts as needed, and follow it with the status command.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .channels import SSL_MODES, ChannelConfig, ChannelPool
+from .daemon import JobError, NimDaemon, check_job_fields
+from .services import SERVICES
+from .streaming import StreamResult
+
+STATES = ("pending", "leased", "done", "failed")
+# Extension of the output file of each service, the input's for studio-voice
+OUTPUT_EXTENSIONS = {"studio-voice": ".wav", "eye-contact": ".mp4", "audio2face-2d": ".mp4"}
+INPUT_PATTERNS = {"studio-voice": "*.wav", "eye-contact": "*.mp4", "audio2face-2d": "*.wav"}
+
+
+def job_id(job: dict) -> str:
+    """Function to identify a job by its service, input and output, so that enqueueing
+    the same backfill twice adds no job."""
+    key = "\0".join((job["service"], job["input"], job["output"]))
+    return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+def _write_json(path: str, entry: dict) -> None:
+    """Function to replace path with entry, atomically for readers on other hosts."""
+    directory, name = os.path.split(path)
+    temporary = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}")
+    with open(temporary, "w") as file:
+        json.dump(entry, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def _read_json(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def _entries(directory: str) -> List[str]:
+    """Function to list the entry files of a state directory, without temporary files."""
+    return [name for name in os.listdir(directory) if name.endswith(".json") and name[0] != "."]
+
+
+class Lease:
+    """A job claimed by a worker.
+
+    Attributes:
+      id: Job ID
+      job: Job description, see nim_common.daemon
+      attempt: Number of this attempt, from 1
+      errors: Errors of the previous attempts
+      lost: True once the lease was reclaimed by another worker
+      scope: CancelScope of the running call, cancelled when the lease is lost
+    """
+
+    def __init__(self, queue: "JobQueue", id: str, token: str, attempt: int, entry: dict) -> None:
+        self.queue = queue
+        self.id = id
+        self.token = token
+        self.attempt = attempt
+        self.job = entry["job"]
+        self.errors = entry.get("errors", [])
+        self.enqueued = entry.get("enqueued")
+        self.path = os.path.join(queue.path, "leased", f"{id}~{attempt}~{token}.json")
+        self.lost = False
+        self.scope = None
+
+    def heartbeat(self) -> bool:
+        """Function to extend the lease.
+
+        Returns:
+          False when the lease was lost, the job must then be dropped.
+        """
+        if self.lost:
+            return False
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            self.lost = True
+            if self.scope is not None:
+                self.scope.cancel("lease lost")
+        return not self.lost
+
+    def complete(self, record: dict) -> bool:
+        """Function to record the job as done and end the lease.
+
+        Returns:
+          False when the lease was lost, the record is then not written.
+        """
+        if not self.heartbeat():
+            return False
+        _write_json(os.path.join(self.queue.path, "done", f"{self.id}.json"), record)
+        self._end()
+        return True
+
+    def fail(self, error: str, retry: bool = True) -> None:
+        """Function to return the job to the queue with error, or fail it for good when
+        retry is False or it used up its attempts."""
+        if not self.heartbeat():
+            return
+        entry = {"job": self.job, "enqueued": self.enqueued, "errors": self.errors + [error]}
+        if retry and self.attempt < self.queue.max_attempts:
+            path = os.path.join(self.queue.path, "pending", f"{self.id}~{self.attempt}.json")
+        else:
+            entry["attempts"] = self.attempt
+            path = os.path.join(self.queue.path, "failed", f"{self.id}.json")
+        _write_json(path, entry)
+        self._end()
+
+    def release(self) -> None:
+        """Function to return the job to the queue without counting the attempt."""
+        pending = os.path.join(self.queue.path, "pending", f"{self.id}~{self.attempt - 1}.json")
+        try:
+            os.rename(self.path, pending)
+        except FileNotFoundError:
+            self.lost = True
+
+    def _end(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class JobQueue:
+    """Job queue in a directory shared by the client hosts, see the module documentation.
+
+    Args:
+      path: Queue directory, created when missing
+      lease: Seconds without heartbeat after which a running job is reclaimed
+      max_attempts: Attempts of a job before it is failed for good
+    """
+
+    def __init__(self, path: os.PathLike, lease: float = 60.0, max_attempts: int = 3) -> None:
+        self.path = os.fspath(path)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        for directory in (*STATES, "workers"):
+            os.makedirs(os.path.join(self.path, directory), exist_ok=True)
+        self._candidates: List[str] = []
+        self._lock = threading.Lock()
+
+    def _ids(self, state: str) -> set:
+        return {name[:-5].split("~")[0] for name in _entries(os.path.join(self.path, state))}
+
+    def enqueue(self, jobs: Iterable[dict]) -> Tuple[int, int]:
+        """Function to add jobs, skipping the ones already queued, running, done or failed.
+
+        Args:
+          jobs: Job descriptions with absolute input and output paths
+
+        Returns:
+          The number of jobs added and skipped.
+        """
+        known = set().union(*(self._ids(state) for state in STATES))
+        added = skipped = 0
+        for job in jobs:
+            check_job_fields(job)
+            for field in ("input", "output"):
+                if not job.get(field) or not os.path.isabs(job[field]):
+                    raise JobError(f"Job {field} must be an absolute path.")
+            id = job_id(job)
+            if id in known:
+                skipped += 1
+                continue
+            entry = {"job": job, "enqueued": time.time(), "errors": []}
+            _write_json(os.path.join(self.path, "pending", f"{id}~0.json"), entry)
+            known.add(id)
+            added += 1
+        return added, skipped
+
+    def clock(self, worker: str, state: Optional[dict] = None) -> float:
+        """Function to write the worker file and return its modification time, the
+        current time of the shared filesystem."""
+        path = os.path.join(self.path, "workers", f"{worker}.json")
+        _write_json(path, state or {})
+        return os.stat(path).st_mtime
+
+    def reclaim(self, now: float) -> int:
+        """Function to return the jobs whose lease expired at now to the queue.
+
+        A job whose worker died on its last attempt, for example killed by a crash in a
+        codec, is failed for good instead so that it is not retried forever.
+
+        Returns:
+          The number of jobs reclaimed, including the ones failed.
+        """
+        leased_dir = os.path.join(self.path, "leased")
+        reclaimed = 0
+        for name in _entries(leased_dir):
+            path = os.path.join(leased_dir, name)
+            try:
+                if now - os.stat(path).st_mtime < self.lease:
+                    continue
+                id, attempt, _ = name[:-5].split("~")
+                if int(attempt) < self.max_attempts:
+                    os.rename(path, os.path.join(self.path, "pending", f"{id}~{attempt}.json"))
+                else:
+                    entry = _read_json(path)
+                    entry["errors"] = entry.get("errors", []) + ["lease expired"]
+                    entry["attempts"] = int(attempt)
+                    _write_json(os.path.join(self.path, "failed", f"{id}.json"), entry)
+                    os.remove(path)
+                reclaimed += 1
+            except (FileNotFoundError, ValueError):
+                continue
+        return reclaimed
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        """Function to lease the next pending job.
+
+        Pending jobs are tried in random order so that workers on different hosts rarely
+        race for the same one.
+
+        Returns:
+          The lease, None when no job is pending.
+        """
+        pending_dir = os.path.join(self.path, "pending")
+        done_dir = os.path.join(self.path, "done")
+        while True:
+            with self._lock:
+                if not self._candidates:
+                    self._candidates = _entries(pending_dir)
+                    random.shuffle(self._candidates)
+                    if not self._candidates:
+                        return None
+                name = self._candidates.pop()
+            id, attempts = name[:-5].split("~")
+            attempt = int(attempts) + 1
+            token = f"{worker}-{uuid.uuid4().hex[:8]}"
+            pending = os.path.join(pending_dir, name)
+            leased = os.path.join(self.path, "leased", f"{id}~{attempt}~{token}.json")
+            try:
+                # The rename keeps the modification time, which starts the lease
+                os.utime(pending)
+                os.rename(pending, leased)
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            lease = Lease(self, id, token, attempt, _read_json(leased))
+            if os.path.exists(os.path.join(done_dir, f"{id}.json")):
+                lease._end()  # completed by a worker that died before ending its lease
+                continue
+            return lease
+
+    def records(self) -> Iterable[dict]:
+        """Function to iterate the completion records."""
+        done_dir = os.path.join(self.path, "done")
+        for name in _entries(done_dir):
+            yield _read_json(os.path.join(done_dir, name))
+
+    def status(self) -> dict:
+        """Function to report the jobs per state, the leases, failures and workers."""
+        probe = f".status-{uuid.uuid4().hex[:8]}"
+        now = self.clock(probe)
+        os.remove(os.path.join(self.path, "workers", f"{probe}.json"))
+        leases = []
+        for name in _entries(os.path.join(self.path, "leased")):
+            try:
+                age = now - os.stat(os.path.join(self.path, "leased", name)).st_mtime
+            except FileNotFoundError:
+                continue
+            id, attempt, token = name[:-5].split("~")
+            leases.append({"id": id, "attempt": int(attempt), "token": token, "age_s": age})
+        failed = {}
+        for name in _entries(os.path.join(self.path, "failed")):
+            entry = _read_json(os.path.join(self.path, "failed", name))
+            failed[name[:-5]] = entry["errors"][-1] if entry["errors"] else None
+        workers = {}
+        for name in _entries(os.path.join(self.path, "workers")):
+            path = os.path.join(self.path, "workers", name)
+            try:
+                state = _read_json(path)
+                state["heartbeat_age_s"] = now - os.stat(path).st_mtime
+            except (FileNotFoundError, ValueError):
+                continue
+            workers[name[:-5]] = state
+        latencies = [record["latency"] for record in self.records() if record.get("latency")]
+        return {
+            **{state: len(_entries(os.path.join(self.path, state))) for state in STATES},
+            "mean_latency_s": sum(latencies) / len(latencies) if latencies else None,
+            "leases": leases,
+            "failures": failed,
+            "workers": workers,
+        }
+
+
+def completion_record(lease: Lease, result: StreamResult, worker: str, started: float) -> dict:
+    """Function to build the completion record of a job from its result."""
+    return {
+        "id": lease.id,
+        "job": lease.job,
+        "output": lease.job["output"],
+        "sha256": (result.hashes or {}).get("sha256"),
+        "output_bytes": result.output_bytes,
+        "attempt": lease.attempt,
+        "worker": worker,
+        "host": socket.gethostname(),
+        "enqueued": lease.enqueued,
+        "started": started,
+        "finished": time.time(),
+        "latency": result.latency,
+        "first_output": result.first_output,
+        "media_duration": result.media_duration,
+        "retries": result.retries,
+    }
+
+
+class QueueWorker:
+    """Worker running the jobs of a queue on a NimDaemon's pooled channels.
+
+    Args:
+      queue: Queue to take the jobs from
+      daemon: Daemon the jobs are run by, without its HTTP server
+      concurrency: Jobs run at the same time
+      name: Name of the worker, unique across hosts, host and process ID when None
+      poll: Seconds between two looks for work when the queue is empty
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        daemon: NimDaemon,
+        concurrency: int = 4,
+        name: Optional[str] = None,
+        poll: float = 2.0,
+    ) -> None:
+        self.queue = queue
+        self.daemon = daemon
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll = poll
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+        self.reclaimed = 0
+        self._leases: Dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Function to stop taking jobs, running jobs are returned to the queue."""
+        self._stop.set()
+        self.daemon.scope.cancel("worker stopped")
+
+    def _state(self) -> dict:
+        with self._lock:
+            running = sorted(self._leases)
+        return {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "running": running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "lost": self.lost,
+        }
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.queue.lease / 3):
+            with self._lock:
+                leases = list(self._leases.values())
+            for lease in leases:
+                lease.heartbeat()
+            self.reclaimed += self.queue.reclaim(self.queue.clock(self.name, self._state()))
+
+    def _run(self, lease: Lease) -> None:
+        job = dict(lease.job)
+        output = job.get("output")
+        try:
+            check_job_fields(job)
+            if not output or not os.path.isabs(output):
+                raise JobError("Job output must be an absolute path.")
+            directory, name = os.path.split(output)
+            os.makedirs(directory, exist_ok=True)
+        except (JobError, OSError) as e:
+            lease.fail(str(e), retry=False)
+            with self._lock:
+                self.failed += 1
+            return
+        job["output"] = os.path.join(directory, f".{name}.{lease.token}.partial")
+        job["hashes"] = sorted(set(job.get("hashes") or self.daemon.hashes) | {"sha256"})
+        lease.scope = self.daemon.scope.child()
+        with self._lock:
+            self._leases[lease.id] = lease
+        started = time.time()
+        try:
+            result = self.daemon.run_job(job, scope=lease.scope)
+            error = result.error
+        except JobError as e:
+            result, error = None, str(e)
+        except Exception as e:
+            # A job the daemon cannot run fails for good instead of ending the worker thread
+            result, error = None, f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                del self._leases[lease.id]
+        if self._stop.is_set() and error is not None:
+            lease.release()
+        elif error is not None:
+            lease.fail(error, retry=result is not None)
+        elif lease.heartbeat():
+            os.replace(job["output"], output)
+            result.output_filepath = output
+            # Partial outputs of attempts whose worker died
+            for partial in glob.glob(os.path.join(directory, f".{glob.escape(name)}.*.partial")):
+                os.remove(partial)
+            lease.complete(completion_record(lease, result, self.name, started))
+        if error is not None or lease.lost:
+            try:
+                os.remove(job["output"])
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            if lease.lost:
+                self.lost += 1
+            elif error is None:
+                self.completed += 1
+            elif not self._stop.is_set():
+                self.failed += 1
+
+    def _loop(self, until_empty: bool) -> None:
+        while not self._stop.is_set():
+            lease = self.queue.claim(self.name)
+            if lease is not None:
+                self._run(lease)
+                continue
+            if until_empty and not _entries(os.path.join(self.queue.path, "leased")):
+                return
+            self._stop.wait(self.poll)
+
+    def run(self, until_empty: bool = False) -> dict:
+        """Function to run jobs until stopped.
+
+        Args:
+          until_empty: Return once no job is pending or running on any host
+
+        Returns:
+          The worker's counters.
+        """
+        self.reclaimed += self.queue.reclaim(self.queue.clock(self.name, self._state()))
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        threads = [
+            threading.Thread(target=self._loop, args=(until_empty,), daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.queue.clock(self.name, self._state())
+        return {**self._state(), "reclaimed": self.reclaimed}
+
+
+def directory_jobs(
+    service: str,
+    input_dir: str,
+    output_dir: str,
+    pattern: Optional[str] = None,
+    params: Optional[dict] = None,
+    files: Optional[dict] = None,
+) -> List[dict]:
+    """Function to create a job per input file of a directory tree, with the output at the
+    same relative path under output_dir."""
+    input_dir, output_dir = os.path.abspath(input_dir), os.path.abspath(output_dir)
+    pattern = pattern or INPUT_PATTERNS[service]
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(input_dir, "**", pattern), recursive=True)):
+        relative = os.path.relpath(path, input_dir)
+        output = os.path.join(
+            output_dir, os.path.splitext(relative)[0] + OUTPUT_EXTENSIONS[service]
+        )
+        job = {"service": service, "input": path, "output": output}
+        if params:
+            job["params"] = params
+        if files:
+            job["files"] = files
+        jobs.append(job)
+    return jobs
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Durable job queue on a shared filesystem for batch runs over client hosts."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add a job per input file of a directory.")
+    enqueue.add_argument("--queue", type=str, required=True, help="Shared queue directory.")
+    enqueue.add_argument("--service", choices=sorted(SERVICES), required=True)
+    enqueue.add_argument("--input-dir", type=str, required=True, help="Directory of the inputs.")
+    enqueue.add_argument(
+        "--output-dir", type=str, required=True, help="Directory of the outputs, same layout."
+    )
+    enqueue.add_argument(
+        "--pattern", type=str, help="Glob of the input files, *.wav or *.mp4 by default."
+    )
+    enqueue.add_argument(
+        "--params", type=str, default="{}", help="Feature parameters of every job as JSON."
+    )
+    enqueue.add_argument(
+        "--file",
+        action="append",
+        default=[],
+        help="FIELD=path of a bytes parameter of every job, e.g. portrait_image=portrait.png.",
+    )
+
+    work = commands.add_parser("work", help="Run jobs of the queue on this host.")
+    work.add_argument("--queue", type=str, required=True, help="Shared queue directory.")
+    work.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="SERVICE=IP:port of a NIM, may be repeated for each service.",
+    )
+    work.add_argument("--concurrency", type=int, default=4, help="Jobs run at the same time.")
+    work.add_argument(
+        "--lease",
+        type=float,
+        default=60.0,
+        help="Seconds without heartbeat after which another worker reclaims a job.",
+    )
+    work.add_argument(
+        "--max-attempts", type=int, default=3, help="Attempts of a job before it fails for good."
+    )
+    work.add_argument("--name", type=str, help="Worker name, host and process ID by default.")
+    work.add_argument(
+        "--until-empty",
+        action="store_true",
+        help="Exit once no job is pending or running, instead of waiting for more jobs.",
+    )
+    work.add_argument(
+        "--ssl-mode",
+        type=str,
+        default="DISABLED",
+        choices=SSL_MODES,
+        help="SSL mode of the channels, TLS without --ssl-root-cert uses the system roots.",
+    )
+    work.add_argument("--ssl-key", type=str, help="The path to ssl private key.")
+    work.add_argument("--ssl-cert", type=str, help="The path to ssl certificate chain.")
+    work.add_argument("--ssl-root-cert", type=str, help="The path to ssl root certificate.")
+    work.add_argument(
+        "--api-key",
+        type=str,
+        default=os.environ.get("NGC_API_KEY"),
+        help="NGC API key for NVCF, defaults to the NGC_API_KEY environment variable.",
+    )
+    work.add_argument(
+        "--function-id",
+        action="append",
+        default=[],
+        help="SERVICE=NVCF function ID, may be repeated for each service.",
+    )
+
+    status = commands.add_parser("status", help="Print the state of the queue as JSON.")
+    status.add_argument("--queue", type=str, required=True, help="Shared queue directory.")
+    return parser.parse_args()
+
+
+def _parse_mapping(values: List[str], option: str) -> Dict[str, str]:
+    mapping = {}
+    for value in values:
+        name, separator, setting = value.partition("=")
+        if not separator or name not in SERVICES:
+            raise RuntimeError(
+                f"{option} must be SERVICE=VALUE with SERVICE in {sorted(SERVICES)}."
+            )
+        mapping[name] = setting
+    return mapping
+
+
+def main():
+    """
+    Job queue entry point
+    """
+    args = _parse_args()
+    if args.command == "enqueue":
+        files = {}
+        for value in args.file:
+            field, _, path = value.partition("=")
+            files[field] = os.path.abspath(path)
+        jobs = directory_jobs(
+            args.service,
+            args.input_dir,
+            args.output_dir,
+            args.pattern,
+            json.loads(args.params),
+            files,
+        )
+        added, skipped = JobQueue(args.queue).enqueue(jobs)
+        print(f"Added {added} jobs, skipped {skipped} already in the queue")
+        return
+    if args.command == "status":
+        print(json.dumps(JobQueue(args.queue).status(), indent=2))
+        return
+
+    targets = {
+        name: ChannelConfig(target, args.ssl_mode, args.ssl_root_cert, args.ssl_cert, args.ssl_key)
+        for name, target in _parse_mapping(args.target, "--target").items()
+    }
+    metadata = {}
+    for name, function_id in _parse_mapping(args.function_id, "--function-id").items():
+        if not args.api_key:
+            raise RuntimeError("--function-id requires --api-key or NGC_API_KEY.")
+        metadata[name] = (
+            ("authorization", "Bearer {}".format(args.api_key)),
+            ("function-id", function_id),
+        )
+    queue = JobQueue(args.queue, lease=args.lease, max_attempts=args.max_attempts)
+    with ChannelPool() as pool:
+        worker = QueueWorker(
+            queue, NimDaemon(pool, targets, metadata), args.concurrency, name=args.name
+        )
+        try:
+            summary = worker.run(until_empty=args.until_empty)
+        except KeyboardInterrupt:
+            worker.stop()
+            summary = worker._state()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Adaptive limits on the number of calls in flight to a NIM fleet.
+
+A fixed max_concurrent_streams is either too low, leaving GPUs idle, or too
+high, queueing calls inside the NIM where they time out. A limiter instead
+measures the latency of the calls it admits and adapts its limit, in the manner
+of TCP congestion control: the limit grows while latency stays flat and shrinks
+when latency grows or the fleet sheds load with RESOURCE_EXHAUSTED, UNAVAILABLE
+or DEADLINE_EXCEEDED.
+
+Streaming calls of different input sizes take different times, so the latency
+samples are normalized by the cost of each call, such as its input megabytes.
+
+Two algorithms are provided:
+  aimd      Additive increase, multiplicative decrease on drops and on latency
+            above tolerance times the lowest recent latency
+  gradient  Limit scaled by the ratio of the long-term to the current latency,
+            plus a queue allowance, as in Netflix's Gradient2 limit
+
+Keep one limiter per service and target, see ConcurrencyLimits, since each
+fleet has its own capacity.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# gRPC codes of a fleet shedding load, a call failing with one lowers the limit
+DROP_CODES = frozenset({"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED"})
+
+
+def classify(result: any) -> Optional[bool]:
+    """Function to tell whether a finished StreamResult signals overload.
+
+    Returns:
+      True when the call was dropped or retried after a drop, False when it
+      completed, and None when it says nothing about capacity, such as a call
+      cancelled by the client or rejected for its arguments.
+    """
+    if result.cancelled == "deadline":
+        return True
+    if result.cancelled is not None:
+        return None
+    if result.error is not None:
+        return True if result.error.split(":", 1)[0] in DROP_CODES else None
+    return result.retries > 0
+
+
+def input_megabytes(path: os.PathLike) -> float:
+    """Function to return the input size in megabytes, the usual cost of a streaming call."""
+    try:
+        return max(os.path.getsize(path), 1) / 1e6
+    except OSError:
+        return 1.0
+
+
+class Slot:
+    """In-flight slot of one admitted call.
+
+    Attributes:
+      started: time.perf_counter() at admission
+      in_flight: Calls in flight including this one at admission
+      epoch: Limit epoch at admission, drops of calls from an older epoch are ignored
+      wait: Seconds the call waited for its slot
+    """
+
+    def __init__(self, in_flight: int, epoch: int, wait: float) -> None:
+        self.started = time.perf_counter()
+        self.in_flight = in_flight
+        self.epoch = epoch
+        self.wait = wait
+
+
+class AdaptiveLimiter:
+    """Limit on calls in flight adapted from the latency and outcome of each call.
+
+    The baseline latency is the lowest normalized latency seen. While the limit
+    is saturated every call may queue at the NIM, so after window samples
+    without a new lowest latency the limiter probes: it halves the limit for
+    one round of calls, takes the lowest latency of that round as the new
+    baseline and restores the limit, like the RTT probe of TCP BBR. The baseline
+    so follows a fleet that became slower without drifting up with the queue.
+
+    Every slot returned by acquire must be passed to release once the call
+    finished. Subclasses implement _adapt.
+
+    Args:
+      initial: Limit before the first sample
+      minimum: Lowest limit
+      maximum: Highest limit
+      backoff_ratio: Factor applied to the limit on a drop
+      window: Number of samples without a new lowest latency before a probe
+    """
+
+    name = None
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff_ratio: float = 0.9,
+        window: int = 1000,
+    ) -> None:
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("Limits must satisfy 1 <= minimum <= initial <= maximum.")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff_ratio = backoff_ratio
+        self.window = window
+        self.estimate = float(initial)
+        self.baseline = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.samples = 0
+        self.drops = 0
+        self.epoch = 0
+        self.probes = 0
+        self._stale = 0  # samples since the lowest latency
+        self._probe = None  # (epoch, limit to restore, samples) while probing
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self.estimate))
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[Slot]:
+        """Function to wait for an in-flight slot.
+
+        Returns:
+          The slot, or None when timeout expired first.
+        """
+        start_time = time.perf_counter()
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < self.limit, timeout):
+                return None
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return Slot(self.in_flight, self.epoch, time.perf_counter() - start_time)
+
+    def release(self, slot: Slot, dropped: Optional[bool] = False, cost: float = 1.0) -> None:
+        """Function to return a slot and adapt the limit to the call it held.
+
+        Args:
+          slot: Slot returned by acquire
+          dropped: Whether the call signalled overload, None to not adapt, see classify
+          cost: Size of the call the latency is normalized by, such as input megabytes
+        """
+        latency = time.perf_counter() - slot.started
+        with self._condition:
+            self.in_flight -= 1
+            if dropped is not None:
+                self.samples += 1
+                if dropped:
+                    self.drops += 1
+                    self._decrease(slot)
+                else:
+                    self._update(latency / max(cost, 1e-9), slot)
+            self._condition.notify_all()
+
+    def _update(self, sample: float, slot: Slot) -> None:
+        if self._probe is not None:
+            epoch, restore, samples = self._probe
+            if slot.epoch >= epoch:
+                samples.append(sample)
+                if len(samples) >= self.limit:
+                    self.baseline = min(samples)
+                    self.estimate = restore
+                    self._probe = None
+                    self._stale = 0
+            return
+        if self.baseline is None or sample <= self.baseline:
+            self.baseline = sample
+            self._stale = 0
+        else:
+            self._stale += 1
+            if self._stale >= self.window:
+                self.probes += 1
+                self._probe = (self.epoch + 1, self.estimate, [])
+                self.estimate = max(float(self.minimum), self.estimate / 2)
+                self.epoch += 1
+                return
+        self._adapt(sample, slot)
+
+    def _decrease(self, slot: Slot) -> None:
+        # One decrease per epoch, so calls that were in flight together when the
+        # fleet became overloaded lower the limit once rather than each
+        if slot.epoch != self.epoch:
+            return
+        self.estimate = max(float(self.minimum), self.estimate * self.backoff_ratio)
+        if self._probe is not None:
+            epoch, restore, samples = self._probe
+            self._probe = (epoch, max(float(self.minimum), restore * self.backoff_ratio), samples)
+        self.epoch += 1
+
+    def _adapt(self, sample: float, slot: Slot) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "algorithm": self.name,
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "samples": self.samples,
+                "drops": self.drops,
+                "probes": self.probes,
+                "baseline_s": self.baseline,
+            }
+
+
+class AimdLimiter(AdaptiveLimiter):
+    """Additive increase, multiplicative decrease limiter.
+
+    Until the first decrease or probe the limit grows by one per completed call,
+    doubling every round trip, and afterwards by one per limit calls. It is
+    multiplied by backoff_ratio on a drop or when the normalized latency exceeds
+    tolerance times the baseline. Only calls that used at least half of the
+    limit let it grow.
+
+    Args:
+      initial: Limit before the first sample
+      minimum: Lowest limit
+      maximum: Highest limit
+      backoff_ratio: Factor applied to the limit on a decrease
+      tolerance: Latency growth over the baseline treated as overload
+      window: Number of samples without a new lowest latency before a probe
+    """
+
+    name = "aimd"
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff_ratio: float = 0.9,
+        tolerance: float = 1.5,
+        window: int = 1000,
+    ) -> None:
+        super().__init__(initial, minimum, maximum, backoff_ratio, window)
+        self.tolerance = tolerance
+
+    def _adapt(self, sample: float, slot: Slot) -> None:
+        if sample > self.tolerance * self.baseline:
+            self._decrease(slot)
+        elif slot.in_flight * 2 >= self.limit:
+            step = 1.0 if self.epoch == 0 else 1.0 / self.estimate
+            self.estimate = min(float(self.maximum), self.estimate + step)
+
+
+class GradientLimiter(AdaptiveLimiter):
+    """Limiter following the gradient between the baseline and current latency.
+
+    Each sample sets the limit to limit * gradient + sqrt(limit), where the
+    gradient is tolerance times the baseline over the sample, clamped to
+    [0.5, 1], and smooths the result, as in Netflix's gradient limit. The square
+    root term is the queue allowed at the NIM, it keeps probing for capacity
+    while latency is flat.
+
+    Args:
+      initial: Limit before the first sample
+      minimum: Lowest limit
+      maximum: Highest limit
+      backoff_ratio: Factor applied to the limit on a drop
+      tolerance: Latency growth over the baseline tolerated without decrease
+      smoothing: Weight of the new limit against the current one
+      window: Number of samples without a new lowest latency before a probe
+    """
+
+    name = "gradient"
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff_ratio: float = 0.9,
+        tolerance: float = 1.2,
+        smoothing: float = 0.2,
+        window: int = 1000,
+    ) -> None:
+        super().__init__(initial, minimum, maximum, backoff_ratio, window)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+
+    def _adapt(self, sample: float, slot: Slot) -> None:
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline / sample))
+        if gradient == 1.0 and slot.in_flight * 2 < self.limit:
+            # Calls that left most of the limit unused do not show it can grow
+            return
+        target = self.estimate * gradient + math.sqrt(self.estimate)
+        estimate = self.estimate * (1 - self.smoothing) + target * self.smoothing
+        self.estimate = max(float(self.minimum), min(float(self.maximum), estimate))
+
+
+LIMITERS = {"aimd": AimdLimiter, "gradient": GradientLimiter}
+
+
+class ConcurrencyLimits:
+    """Adaptive limiters kept per service and target.
+
+    Args:
+      factory: Function returning a new AdaptiveLimiter
+    """
+
+    def __init__(self, factory: Callable[[], AdaptiveLimiter]) -> None:
+        self.factory = factory
+        self._limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str, target: str) -> AdaptiveLimiter:
+        """Function to return the limiter of service at target, creating it on first use."""
+        with self._lock:
+            limiter = self._limiters.get((service, target))
+            if limiter is None:
+                limiter = self._limiters[(service, target)] = self.factory()
+            return limiter
+
+    def stats(self) -> dict:
+        with self._lock:
+            limiters = list(self._limiters.items())
+        return {f"{service}@{target}": limiter.stats() for (service, target), limiter in limiters}
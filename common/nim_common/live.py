@@ -0,0 +1,396 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Near-real-time processing of a live recording in closed segments.
+
+The input is a fragmented MP4 recording that is still being written, followed
+like tail -f, or a fragmented MP4 stream read from a pipe. ffmpeg cuts it with
+stream copy into segments of about segment_seconds, each starting at a
+keyframe, and reports every segment as it closes. process_live sends each
+closed segment through the service right away, with several segments in
+flight, and publishes the processed segments in order to an HLS playlist of
+MPEG-TS segments, remuxed without re-encoding onto the timeline of the
+recording, so that a player follows the processed stream a few segment
+lengths behind live. When the recording ends, the processed segments can be
+spliced into one MP4 file.
+
+A segment that fails, or whose processed output cannot be published, is
+published unprocessed, so that one failed call does not stall the stream.
+When the service falls behind, at most concurrency segments wait to be
+published and the recording is held back until they are. A recording that is not fragmented keeps its moov box
+at the end and cannot be read while it is written; record with, e.g.,
+ffmpeg -movflags frag_keyframe+empty_moov. Requires the ffmpeg executable on
+PATH.
+"""
+
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .deadlines import CancelScope
+from .segments import splice
+
+FOLLOW_BLOCK = 256 * 1024  # bytes read at a time from a growing recording or pipe
+
+
+class LiveSegment(NamedTuple):
+    """A closed segment of the live recording.
+
+    Attributes:
+      index: Position of the segment in the recording, from 0
+      path: Path of the segment's MP4 file
+      start: Seconds from the start of the recording to the first frame of the segment
+      end: Seconds from the start of the recording to the end of the segment
+      closed: time.perf_counter() when ffmpeg closed the segment
+    """
+
+    index: int
+    path: str
+    start: float
+    end: float
+    closed: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def follow(
+    path: os.PathLike,
+    scope: Optional[CancelScope] = None,
+    idle_timeout: float = 10.0,
+    poll: float = 0.2,
+) -> Iterator[bytes]:
+    """Function to read a file that is still being written, like tail -f.
+
+    Args:
+      path: Path of the growing file
+      scope: CancelScope ending the read when cancelled
+      idle_timeout: Seconds without growth after which the recording is taken to have ended
+      poll: Seconds between two looks for new data
+
+    Yields:
+      The data appended to the file, from its start.
+    """
+    idle_since = time.monotonic()
+    with open(path, "rb") as file:
+        while scope is None or not scope.cancelled:
+            data = file.read(FOLLOW_BLOCK)
+            if data:
+                idle_since = time.monotonic()
+                yield data
+                continue
+            if time.monotonic() - idle_since >= idle_timeout:
+                return
+            if scope is None:
+                time.sleep(poll)
+            elif scope.wait(poll):
+                return
+
+
+def read_pipe(pipe: BinaryIO) -> Iterator[bytes]:
+    """Function to read a stream, such as standard input, until it ends."""
+    while True:
+        data = pipe.read1(FOLLOW_BLOCK) if hasattr(pipe, "read1") else pipe.read(FOLLOW_BLOCK)
+        if not data:
+            return
+        yield data
+
+
+def cut_segments(
+    source: Iterable[bytes],
+    workdir: str,
+    segment_seconds: float,
+    scope: Optional[CancelScope] = None,
+) -> Iterator[LiveSegment]:
+    """Function to cut a fragmented MP4 stream into segments at keyframes with ffmpeg.
+
+    Args:
+      source: Chunks of the fragmented MP4 stream
+      workdir: Directory the segment files are written to
+      segment_seconds: Nominal duration in seconds of a segment, segments end at the
+        first keyframe after it
+      scope: CancelScope ending the cut when cancelled
+
+    Yields:
+      Every segment as soon as ffmpeg closed it.
+    """
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("Live segmenting requires ffmpeg on PATH.")
+    # ffmpeg writes each segment's name, start and end to the CSV list once it closes
+    command = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "mp4",
+        "-i",
+        "pipe:0",
+        "-map",
+        "0",
+        "-c",
+        "copy",
+        "-f",
+        "segment",
+        "-segment_time",
+        str(segment_seconds),
+        "-reset_timestamps",
+        "1",
+        "-segment_format",
+        "mp4",
+        "-segment_list_type",
+        "csv",
+        "-segment_list",
+        "pipe:1",
+        os.path.join(workdir, "input_%05d.mp4"),
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def feed() -> None:
+        try:
+            for data in source:
+                if scope is not None and scope.cancelled:
+                    break
+                process.stdin.write(data)
+        except (BrokenPipeError, ValueError):
+            pass  # ffmpeg exited, its status is checked below
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+    feeder = threading.Thread(target=feed, name="live-feed", daemon=True)
+    feeder.start()
+    try:
+        for index, line in enumerate(process.stdout):
+            name, start, end = line.decode().strip().rsplit(",", 2)
+            yield LiveSegment(
+                index, os.path.join(workdir, name), float(start), float(end), time.perf_counter()
+            )
+    finally:
+        if process.poll() is None and scope is not None and scope.cancelled:
+            process.kill()
+        status = process.wait()
+        feeder.join()
+    if status != 0 and not (scope is not None and scope.cancelled):
+        raise RuntimeError(f"ffmpeg failed to cut the live recording, exit status {status}.")
+
+
+class HlsPlaylist:
+    """HLS event playlist of MPEG-TS segments, growing as segments are published.
+
+    Args:
+      directory: Directory of the playlist and its segments, created when missing
+      segment_seconds: Nominal segment duration, the playlist's target duration
+      name: File name of the playlist
+    """
+
+    def __init__(self, directory: os.PathLike, segment_seconds: float, name: str = "live.m3u8"):
+        self.directory = os.fspath(directory)
+        self.path = os.path.join(self.directory, name)
+        self.target_duration = max(1, math.ceil(segment_seconds))
+        self.entries: List[tuple] = []
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(ended=False)
+
+    def publish(self, segment_filepath: str, start: float, duration: float) -> str:
+        """Function to remux an MP4 segment to MPEG-TS at its place in the recording's
+        timeline and append it to the playlist.
+
+        Returns:
+          Path of the published segment.
+        """
+        name = f"segment_{len(self.entries):05d}.ts"
+        path = os.path.join(self.directory, name)
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-y",
+                "-i",
+                segment_filepath,
+                "-map",
+                "0",
+                "-c",
+                "copy",
+                "-output_ts_offset",
+                f"{start:.6f}",
+                "-f",
+                "mpegts",
+                path,
+            ],
+            check=True,
+        )
+        self.entries.append((name, duration))
+        self.target_duration = max(self.target_duration, math.ceil(duration))
+        self._write(ended=False)
+        return path
+
+    def close(self) -> None:
+        """Function to mark the playlist as complete."""
+        self._write(ended=True)
+
+    def _write(self, ended: bool) -> None:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for name, duration in self.entries:
+            lines.extend((f"#EXTINF:{duration:.6f},", name))
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+        # Players reread the playlist while it grows, so it is replaced rather than rewritten
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(temporary, self.path)
+
+
+def process_live(
+    source: Iterable[bytes],
+    render: Callable[[str, str, LiveSegment], None],
+    playlist_dir: os.PathLike,
+    segment_seconds: float = 2.0,
+    concurrency: int = 4,
+    output_filepath: Optional[os.PathLike] = None,
+    scope: Optional[CancelScope] = None,
+    on_publish: Optional[Callable[[LiveSegment, dict], None]] = None,
+) -> dict:
+    """Function to process a live recording segment by segment, publishing them in order.
+
+    Args:
+      source: Chunks of the fragmented MP4 recording, see follow and read_pipe
+      render: Callable processing one segment, called with the path of its MP4 input,
+        the path of its MP4 output and the LiveSegment
+      playlist_dir: Directory of the HLS playlist live.m3u8 and its segments
+      segment_seconds: Nominal duration in seconds of a segment
+      concurrency: Number of segments processed at the same time, and the most segments
+        waiting to be published before the recording is held back
+      output_filepath: Path of an MP4 file the processed segments are spliced into at the end
+      scope: CancelScope stopping the ingest and the calls when cancelled
+      on_publish: Callable called with each published segment and its timings
+
+    Returns:
+      The number of segments, how many were published unprocessed or left out because
+      they could not be published at all, and the delay of the published segments
+      behind live.
+    """
+    if scope is None:
+        scope = CancelScope()
+    # Cancelled on its own when a segment fails unexpectedly, to stop cutting the recording
+    ingest = scope.child()
+    playlist = HlsPlaylist(playlist_dir, segment_seconds)
+    condition = threading.Condition()
+    finished: Dict[int, tuple] = {}
+    published: List[str] = []
+    delays: List[float] = []
+    counters = {"segments": 0, "passthrough": 0, "dropped": 0}
+    state = {"next": 0, "failed": False}
+
+    with tempfile.TemporaryDirectory(prefix="live-") as workdir:
+
+        def publish_ready() -> None:
+            # Must be called with the condition held, publishes the segments that are next in order
+            while state["next"] in finished:
+                segment, output, error = finished.pop(state["next"])
+                state["next"] += 1
+                condition.notify_all()
+                # Falls back to the unprocessed segment when the processed one cannot be
+                # remuxed, and leaves the segment out when that fails too
+                for path in dict.fromkeys((output, segment.path)):
+                    try:
+                        playlist.publish(path, segment.start, segment.duration)
+                        break
+                    except (OSError, subprocess.CalledProcessError) as e:
+                        error = error or f"publishing failed: {e}"
+                else:
+                    counters["dropped"] += 1
+                    continue
+                published.append(path)
+                # The segment's first frame was recorded about its duration before it closed
+                delay = time.perf_counter() - segment.closed + segment.duration
+                delays.append(delay)
+                if path == segment.path:
+                    counters["passthrough"] += 1
+                if on_publish is not None:
+                    on_publish(segment, {"behind_live_s": delay, "error": error})
+
+        def run(segment: LiveSegment) -> None:
+            output = os.path.join(workdir, f"output_{segment.index:05d}.mp4")
+            error = None
+            try:
+                render(segment.path, output, segment)
+                if not os.path.isfile(output):
+                    raise RuntimeError("no output")
+            except Exception as e:
+                # Published unprocessed, so the stream goes on
+                error = str(e) or type(e).__name__
+                output = segment.path
+            with condition:
+                finished[segment.index] = (segment, output, error)
+                try:
+                    publish_ready()
+                except BaseException:
+                    state["failed"] = True
+                    ingest.cancel("publishing failed")
+                    condition.notify_all()
+                    raise
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="live") as executor:
+            futures = []
+            for segment in cut_segments(source, workdir, segment_seconds, ingest):
+                with condition:
+                    # A service slower than live holds back the recording instead of queueing
+                    # an unbounded backlog of segments
+                    condition.wait_for(
+                        lambda: counters["segments"] - state["next"] < concurrency
+                        or state["failed"]
+                    )
+                    if state["failed"]:
+                        break
+                counters["segments"] += 1
+                futures.append(executor.submit(run, segment))
+            for future in futures:
+                future.result()
+            ingest.close()
+        playlist.close()
+        if output_filepath is not None and published:
+            splice(published, output_filepath)
+
+    return {
+        **counters,
+        "duration_s": sum(duration for _, duration in playlist.entries),
+        "behind_live_mean_s": sum(delays) / len(delays) if delays else None,
+        "behind_live_max_s": max(delays) if delays else None,
+        "playlist": playlist.path,
+    }
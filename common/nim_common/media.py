@@ -0,0 +1,127 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Reading the duration of WAV and MP4 inputs from their headers.
+
+Only the RIFF chunk headers and the MP4 box headers are read, so the duration
+of a large video is available without decoding or loading the file.
+"""
+
+import os
+import struct
+from typing import BinaryIO, Optional
+
+
+def wav_duration(input_filepath: os.PathLike) -> Optional[float]:
+    """Function to return the duration in seconds of a WAV file, None when it is not one.
+
+    Streamed WAVs often carry a placeholder data size, the size is therefore
+    capped at the bytes actually present in the file.
+    """
+    with open(input_filepath, "rb") as fd:
+        header = fd.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        file_size = os.fstat(fd.fileno()).st_size
+        byte_rate = None
+        while True:
+            chunk = fd.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = fd.read(size)
+                if len(fmt) < 12:
+                    return None
+                byte_rate = struct.unpack_from("<I", fmt, 8)[0]
+                if size % 2:
+                    fd.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if not byte_rate:
+                    return None
+                size = min(size, file_size - fd.tell())
+                return size / byte_rate
+            else:
+                fd.seek(size + size % 2, os.SEEK_CUR)
+
+
+def _box_header(fd: BinaryIO, end: int) -> Optional[tuple]:
+    start = fd.tell()
+    if end - start < 8:
+        return None
+    size, box_type = struct.unpack(">I4s", fd.read(8))
+    header_size = 8
+    if size == 1:
+        size = struct.unpack(">Q", fd.read(8))[0]
+        header_size = 16
+    elif size == 0:
+        size = end - start
+    if size < header_size or start + size > end:
+        return None
+    return box_type, start, size, header_size
+
+
+def mp4_duration(input_filepath: os.PathLike) -> Optional[float]:
+    """Function to return the mvhd duration in seconds of an MP4 file, None when it has none.
+
+    Fragmented and live MP4s leave the mvhd duration at 0, their duration is
+    only known from the fragments and is reported as None.
+    """
+    with open(input_filepath, "rb") as fd:
+        end = os.fstat(fd.fileno()).st_size
+        position = 0
+        while position < end:
+            fd.seek(position)
+            box = _box_header(fd, end)
+            if box is None:
+                return None
+            box_type, start, size, header_size = box
+            if box_type == b"moov":
+                moov_end = start + size
+                fd.seek(start + header_size)
+                while fd.tell() < moov_end:
+                    child = _box_header(fd, moov_end)
+                    if child is None:
+                        return None
+                    child_type, child_start, child_size, child_header = child
+                    if child_type == b"mvhd":
+                        version = fd.read(1)[0]
+                        if version == 1:
+                            fd.seek(child_start + child_header + 20)
+                            timescale, duration = struct.unpack(">IQ", fd.read(12))
+                        else:
+                            fd.seek(child_start + child_header + 12)
+                            timescale, duration = struct.unpack(">II", fd.read(8))
+                        return duration / timescale if timescale and duration else None
+                    fd.seek(child_start + child_size)
+                return None
+            position = start + size
+    return None
+
+
+def media_duration(input_filepath: os.PathLike) -> Optional[float]:
+    """Function to return the duration in seconds of a WAV or MP4 file, None otherwise."""
+    with open(input_filepath, "rb") as fd:
+        magic = fd.read(12)
+    if magic[:4] == b"RIFF":
+        return wav_duration(input_filepath)
+    if magic[4:8] == b"ftyp":
+        return mp4_duration(input_filepath)
+    return None
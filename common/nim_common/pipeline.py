@@ -0,0 +1,358 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Chaining Maxine NIM services so that one stage's output streams into the next.
+
+A narration can be enhanced by studio-voice and animated by audio2face-2d
+without waiting for the enhanced WAV to be complete or writing it to disk: each
+output chunk of a stage is handed to the request generator of the next stage
+through a bounded buffer. End-to-end latency approaches that of the slowest
+stage instead of the sum of all stages.
+
+    python -m nim_common.pipeline --input narration.wav --output avatar.mp4 \
+        --stage studio-voice=127.0.0.1:8001 --stage audio2face-2d=127.0.0.1:8002 \
+        --file audio2face-2d.portrait_image=portrait.png
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import grpc
+
+from .channels import SSL_MODES, ChannelConfig, ChannelPool, read_file_content
+from .codec import is_data
+from .services import SERVICES, ServiceSpec, get_service
+from .streaming import DATA_CHUNKS
+
+_END = object()
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage of the pipeline failed."""
+
+
+class IncompleteStage(Exception):
+    """Raised when a stage ended its output stream before reading all of its input."""
+
+
+class ChunkBuffer:
+    """Bounded hand-off of output chunks from one stage to the next.
+
+    The producer blocks once max_chunks chunks are waiting, which applies
+    back-pressure to the upstream response stream instead of buffering the
+    whole intermediate file.
+
+    Args:
+      max_chunks: Maximum number of chunks waiting for the consumer
+      aborted: Event set when the pipeline fails, unblocks producer and consumer
+    """
+
+    def __init__(self, max_chunks: int, aborted: threading.Event) -> None:
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._aborted = aborted
+        self.peak_chunks = 0
+        self.drained = False  # the consumer read the end of the stream
+
+    def put(self, item: any) -> None:
+        while True:
+            if self._aborted.is_set():
+                raise PipelineAborted()
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.peak_chunks = max(self.peak_chunks, self._queue.qsize())
+
+    def close(self) -> None:
+        self.put(_END)
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            if self._aborted.is_set():
+                raise PipelineAborted()
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                self.drained = True
+                return
+            yield item
+
+
+class Stage:
+    """One service call of a pipeline.
+
+    Args:
+      spec: Service to call
+      channel: gRPC channel to the service
+      params: Parameters for the feature, sent as the first message when given
+      metadata: Request metadata such as NVCF credentials
+    """
+
+    def __init__(
+        self,
+        spec: ServiceSpec,
+        channel: grpc.Channel,
+        params: Optional[dict] = None,
+        metadata: Optional[tuple] = None,
+    ) -> None:
+        self.spec = spec
+        self.channel = channel
+        self.params = params
+        self.metadata = metadata
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.first_output = None  # seconds from pipeline start to the first output chunk
+        self.finished = None  # seconds from pipeline start to the end of the output stream
+        self.peak_buffered_chunks = 0
+        self.error = None
+        self._call = None
+
+    def as_dict(self) -> dict:
+        return {
+            "service": self.spec.name,
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "first_output_s": self.first_output,
+            "finished_s": self.finished,
+            "peak_buffered_chunks": self.peak_buffered_chunks,
+            "error": self.error,
+        }
+
+
+def _file_chunks(input_filepath: os.PathLike, chunk_size: int) -> Iterator[bytes]:
+    with open(input_filepath, "rb") as fd:
+        while True:
+            buffer = fd.read(chunk_size)
+            if buffer == b"":
+                break
+            yield buffer
+
+
+def _requests(stage: Stage, source: Iterator[bytes]) -> Iterator:
+    if stage.params is not None:
+        yield stage.spec.config_request(stage.params)
+    encode = stage.spec.codec.encode_data
+    for data in source:
+        stage.input_bytes += len(data)
+        yield encode(data)
+
+
+def run_pipeline(
+    stages: List[Stage],
+    input_filepath: os.PathLike,
+    output_filepath: os.PathLike,
+    buffer_chunks: int = 16,
+    chunk_size: int = DATA_CHUNKS,
+) -> List[Stage]:
+    """Function to stream input_filepath through all stages into output_filepath.
+
+    Every stage runs in its own thread. When a stage fails, or ends its stream
+    before reading all of its input, the calls of all other stages are
+    cancelled and the first error is raised.
+
+    Args:
+      stages: Stages in processing order
+      input_filepath: Path to the input file of the first stage
+      output_filepath: Path to the output file of the last stage
+      buffer_chunks: Maximum number of chunks buffered between two stages
+      chunk_size: Size in bytes of the input chunks of the first stage
+
+    Returns:
+      The stages with their byte counts and timings filled in.
+    """
+    aborted = threading.Event()
+    buffers = [ChunkBuffer(buffer_chunks, aborted) for _ in stages[:-1]]
+    errors = []
+    start_time = time.perf_counter()
+
+    def run(index: int) -> None:
+        stage = stages[index]
+        if index == 0:
+            source = _file_chunks(input_filepath, chunk_size)
+        else:
+            source = iter(buffers[index - 1])
+        last = index == len(stages) - 1
+        sink = None
+        try:
+            if last:
+                sink = open(output_filepath, "wb")
+            stage._call = stage.spec.codec.call(stage.channel)(
+                _requests(stage, source), metadata=stage.metadata
+            )
+            for data in stage._call:
+                if not is_data(data):
+                    continue
+                if stage.first_output is None:
+                    stage.first_output = time.perf_counter() - start_time
+                stage.output_bytes += len(data)
+                if last:
+                    sink.write(data)
+                else:
+                    buffers[index].put(data)
+            if index > 0 and not buffers[index - 1].drained:
+                # The upstream stage would block on the full buffer forever
+                raise IncompleteStage("the stream ended before all of its input was read")
+            if not last:
+                buffers[index].close()
+            stage.finished = time.perf_counter() - start_time
+        except PipelineAborted:
+            stage.error = "aborted"
+        except grpc.RpcError as e:
+            if not aborted.is_set():
+                stage.error = f"{e.code().name}: {e.details()}"
+                errors.append(e)
+            else:
+                stage.error = "aborted"
+        except Exception as e:
+            stage.error = str(e)
+            errors.append(e)
+        finally:
+            if sink is not None:
+                sink.close()
+            if stage.error is not None and not aborted.is_set():
+                aborted.set()
+                for other in stages:
+                    if other._call is not None:
+                        other._call.cancel()
+            if not last:
+                stage.peak_buffered_chunks = buffers[index].peak_chunks
+
+    threads = [
+        threading.Thread(target=run, args=(index,), name=f"pipeline-{stage.spec.name}")
+        for index, stage in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return stages
+
+
+def _seconds(value: Optional[float]) -> str:
+    return "never" if value is None else f"after {value:.2f}s"
+
+
+def _parse_args() -> None:
+    parser = argparse.ArgumentParser(
+        description="Stream the output of one Maxine NIM directly into the next one."
+    )
+    parser.add_argument("--input", type=str, required=True, help="Input file of the first stage.")
+    parser.add_argument("--output", type=str, required=True, help="Output file of the last stage.")
+    parser.add_argument(
+        "--stage",
+        action="append",
+        required=True,
+        help="SERVICE=IP:port of a stage, repeated in processing order.",
+    )
+    parser.add_argument(
+        "--params",
+        action="append",
+        default=[],
+        help="SERVICE=JSON object of feature parameters of a stage.",
+    )
+    parser.add_argument(
+        "--file",
+        action="append",
+        default=[],
+        help="SERVICE.FIELD=PATH of a bytes parameter, e.g. audio2face-2d.portrait_image=a.png",
+    )
+    parser.add_argument(
+        "--buffer-chunks",
+        type=int,
+        default=16,
+        help="Maximum number of chunks buffered between two stages.",
+    )
+    parser.add_argument(
+        "--ssl-mode",
+        type=str,
+        default="DISABLED",
+        choices=SSL_MODES,
+        help="SSL mode of the channels, TLS without --ssl-root-cert uses the system roots.",
+    )
+    parser.add_argument("--ssl-key", type=str, help="The path to ssl private key.")
+    parser.add_argument("--ssl-cert", type=str, help="The path to ssl certificate chain.")
+    parser.add_argument("--ssl-root-cert", type=str, help="The path to ssl root certificate.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Pipeline entry point
+    """
+    args = _parse_args()
+    if not os.path.isfile(args.input):
+        raise FileNotFoundError(f"The file '{args.input}' does not exist. Exiting.")
+    params = {}
+    try:
+        for value in args.params:
+            name, _, payload = value.partition("=")
+            params.setdefault(name, {}).update(json.loads(payload))
+        for value in args.file:
+            key, _, path = value.partition("=")
+            name, _, field = key.partition(".")
+            params.setdefault(name, {})[field] = read_file_content(path)
+    except (OSError, ValueError) as e:
+        print(f"An error occurred: {e}")
+        raise SystemExit(1)
+    unknown = set(params) - set(SERVICES)
+    if unknown:
+        raise RuntimeError(f"Unknown services in --params/--file: {', '.join(sorted(unknown))}")
+
+    with ChannelPool() as pool:
+        stages = []
+        for value in args.stage:
+            name, _, target = value.partition("=")
+            config = ChannelConfig(
+                target,
+                ssl_mode=args.ssl_mode,
+                ssl_root_cert=args.ssl_root_cert,
+                ssl_cert=args.ssl_cert,
+                ssl_key=args.ssl_key,
+            )
+            stages.append(Stage(get_service(name), pool.get(config), params.get(name)))
+        start_time = time.perf_counter()
+        try:
+            run_pipeline(stages, args.input, args.output, buffer_chunks=args.buffer_chunks)
+        except (grpc.RpcError, IncompleteStage, OSError, ValueError) as e:
+            failed = [f"{stage.spec.name} ({stage.error})" for stage in stages if stage.error]
+            print(f"Pipeline failed: {', '.join(failed) or e}")
+            raise SystemExit(1) from e
+        total = time.perf_counter() - start_time
+    for stage in stages:
+        print(
+            f"{stage.spec.name}: first output {_seconds(stage.first_output)}, finished "
+            f"{_seconds(stage.finished)}, {stage.input_bytes} bytes in, {stage.output_bytes} "
+            f"bytes out, peak {stage.peak_buffered_chunks} chunks buffered downstream"
+        )
+    print(f"Pipeline completed in {total:.2f}s, the output file {args.output} is generated.")
+
+
+if __name__ == "__main__":
+    main()
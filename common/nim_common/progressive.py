@@ -0,0 +1,445 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Progressive playback of MP4 outputs while they are still being streamed.
+
+RedirectGaze and Animate return the output video in chunks over the whole
+render, so a client that only writes a file makes the user wait for the last
+chunk. A GrowingOutput is written like a file, and meanwhile:
+
+- detects the layout of the MP4 from its top level boxes: "fragmented" (moov
+  with mvex followed by moof/mdat fragments), "faststart" (moov before mdat),
+  or "moov-at-end", which no player can start before the output is complete,
+- hands the init segment (ftyp and moov) and each fragment of a fragmented MP4
+  to an on_fragment callback as they complete, e.g. for Media Source Extensions,
+- lets readers follow the written bytes, which ProgressiveServer serves over
+  local HTTP with byte range support, so a browser or ffplay starts playing
+  a fragmented or faststart output after its first chunks.
+
+Serve an output with:
+
+    output = GrowingOutput("output.mp4")
+    with ProgressiveServer(output, port=8080) as server:
+        print(f"Watch at {server.url}")
+        with output:
+            for chunk in chunks:
+                output.write(chunk)
+        server.wait_idle()
+"""
+
+import mimetypes
+import os
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+from .integrity import Mp4Checker
+
+LAYOUTS = ("fragmented", "faststart", "moov-at-end")
+READ_CHUNK = 256 * 1024  # bytes, largest read served at once
+
+
+def _has_child(box: bytes, name: bytes) -> bool:
+    """Function to return whether a container box has a direct child box of type name."""
+    offset = 16 if struct.unpack_from(">I", box)[0] == 1 else 8
+    while offset + 8 <= len(box):
+        size, box_type = struct.unpack_from(">I4s", box, offset)
+        if box_type == name:
+            return True
+        if size == 1 and offset + 16 <= len(box):
+            size = struct.unpack_from(">Q", box, offset + 8)[0]
+        if size < 8:
+            return False
+        offset += size
+    return False
+
+
+class FragmentSplitter:
+    """Streaming split of an MP4 into its init segment and fragments.
+
+    Bytes are only kept until the layout is known and, for a fragmented MP4,
+    until the current fragment completes, so memory stays bounded by the
+    largest fragment.
+
+    Args:
+      on_fragment: Function called with ("init", bytes) once and ("fragment", bytes)
+        for each moof/mdat fragment of a fragmented MP4
+    """
+
+    def __init__(self, on_fragment: Optional[Callable[[str, bytes], None]] = None) -> None:
+        self.on_fragment = on_fragment
+        self.layout = None
+        self.fragments = 0
+        self._walker = Mp4Checker()
+        self._buffer = bytearray()  # bytes from the file offset _start on
+        self._start = 0
+        self._handled = 0  # top level boxes already handled
+        self._end = 0  # file offset of the end of the handled boxes
+        self._done = False
+
+    def feed(self, data: bytes) -> None:
+        if self._done:
+            return
+        self._walker.feed(data)
+        if self._walker.problems:
+            self._stop()
+            return
+        self._buffer += data
+        chunks = self._walker.chunks
+        while self._handled < len(chunks) and not self._done:
+            name, size = chunks[self._handled]
+            if name == "mdat" and self.layout is None:
+                # Media data before the movie header, nothing plays until the end
+                self.layout = "moov-at-end"
+                self._stop()
+                return
+            if size is None or self._end + size > self._walker.size:
+                return
+            self._handled += 1
+            self._end += size
+            if name == "moov":
+                box = self._buffer[self._end - size - self._start : self._end - self._start]
+                fragmented = _has_child(bytes(box), b"mvex")
+                self.layout = "fragmented" if fragmented else "faststart"
+                self._emit("init")
+                if not fragmented:
+                    self._stop()
+            elif name == "mdat" and self.layout == "fragmented":
+                self.fragments += 1
+                self._emit("fragment")
+
+    def _emit(self, kind: str) -> None:
+        # Hands out the buffered bytes up to the end of the last handled box
+        segment = bytes(self._buffer[: self._end - self._start])
+        del self._buffer[: self._end - self._start]
+        self._start = self._end
+        if self.on_fragment is not None:
+            self.on_fragment(kind, segment)
+
+    def _stop(self) -> None:
+        self._done = True
+        self._buffer = bytearray()
+
+
+class GrowingOutput:
+    """Output file that can be read while it is being written.
+
+    Use it as a context manager around each attempt at writing the output: entering
+    truncates the file and starts a new generation, so readers of a failed
+    attempt stop instead of mixing two outputs, and leaving marks the output
+    complete when no exception was raised.
+
+    Args:
+      path: Path of the output file
+      on_fragment: Function receiving the init segment and fragments, see FragmentSplitter
+      on_layout: Function called with the MP4 layout once it is detected
+    """
+
+    def __init__(
+        self,
+        path: os.PathLike,
+        on_fragment: Optional[Callable[[str, bytes], None]] = None,
+        on_layout: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.on_fragment = on_fragment
+        self.on_layout = on_layout
+        self.content_type = mimetypes.guess_type(self.path)[0] or "application/octet-stream"
+        self.generation = 0
+        self.written = 0
+        self.writing = False
+        self.complete = False
+        self.layout = None
+        self.started = None  # time.perf_counter() when the current generation started
+        self.first_write = None  # seconds from the start to the first output bytes
+        self.playable = None  # seconds from the start until playback can begin
+        self._fd = None
+        self._splitter = None
+        self._condition = threading.Condition()
+
+    def __enter__(self) -> "GrowingOutput":
+        fd = open(self.path, "wb")
+        with self._condition:
+            self._fd = fd
+            self.generation += 1
+            self.written = 0
+            self.writing = True
+            self.complete = False
+            self.layout = None
+            self.started = time.perf_counter()
+            self.first_write = self.playable = None
+            self._splitter = FragmentSplitter(self.on_fragment)
+            self._condition.notify_all()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._fd.close()
+        with self._condition:
+            self.writing = False
+            self.complete = exc_type is None
+            if self.complete and self.playable is None:
+                self.playable = time.perf_counter() - self.started
+            self._condition.notify_all()
+
+    def write(self, data: bytes) -> None:
+        """Function to append output bytes and make them visible to the readers."""
+        self._fd.write(data)
+        # Readers open the file separately, so the bytes must leave the write buffer
+        self._fd.flush()
+        self._splitter.feed(data)
+        layout = self._splitter.layout
+        with self._condition:
+            if self.first_write is None:
+                self.first_write = time.perf_counter() - self.started
+            self.written += len(data)
+            new_layout = layout is not None and self.layout is None
+            if new_layout:
+                self.layout = layout
+                if layout != "moov-at-end":
+                    self.playable = time.perf_counter() - self.started
+            self._condition.notify_all()
+        if new_layout and self.on_layout is not None:
+            self.on_layout(layout)
+
+    def wait(self, offset: int, timeout: Optional[float] = None) -> tuple:
+        """Function to wait until the byte at offset is written or writing stopped.
+
+        Returns:
+          (generation, written, writing) once the condition holds or timeout expired.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.written > offset or (not self.writing and self.generation), timeout
+            )
+            return self.generation, self.written, self.writing
+
+    def wait_closed(self, timeout: Optional[float] = None) -> tuple:
+        """Function to wait until writing stopped, returns (generation, written, complete)."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self.writing and self.generation, timeout)
+            return self.generation, self.written, self.complete
+
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class _ProgressiveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "nim-clients-progressive"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        with self.server.activity:
+            self.server.active += 1
+        try:
+            if self.path == "/":
+                self._send_page()
+            else:
+                self._send_output()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the player closed the connection, e.g. to seek elsewhere
+        finally:
+            with self.server.activity:
+                self.server.active -= 1
+                self.server.last_active = time.monotonic()
+
+    def _send_page(self) -> None:
+        name = os.path.basename(self.server.output.path)
+        page = (
+            (
+                "<!DOCTYPE html><html><head><title>{0}</title></head><body>"
+                '<video src="/{0}" controls autoplay muted style="max-width: 100%"></video>'
+                "</body></html>"
+            )
+            .format(name)
+            .encode()
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def _send_output(self) -> None:
+        output = self.server.output
+        header = self.headers.get("Range")
+        match = None if header is None else _RANGE.match(header.strip())
+        if match is None or match.group(1) == match.group(2) == "":
+            # No range, or one this server does not support, which may be ignored
+            self._send_stream()
+            return
+        first, last = match.group(1), match.group(2)
+        if first == "":
+            # A suffix range needs the final size, e.g. a player looking for a trailing moov
+            generation, total, _ = output.wait_closed()
+            first, last = max(0, total - int(last)), total - 1
+        else:
+            first = int(first)
+            last = None if last == "" else int(last)
+            if last is not None and last < first:
+                self._send_unsatisfiable(None)
+                return
+            generation, written, writing = output.wait(first if last is None else last)
+            total = None if writing else written
+            if total is not None and first >= total:
+                self._send_unsatisfiable(total)
+                return
+            available = written if total is None else total
+            last = available - 1 if last is None else min(last, available - 1)
+        if first > last:
+            # An empty suffix, bytes=-0, or a suffix of an empty output
+            self._send_unsatisfiable(total)
+            return
+        self.send_response(206)
+        self.send_header("Content-Type", output.content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        # The size of a growing output is unknown, players request the next range later
+        self.send_header("Content-Range", f"bytes {first}-{last}/{'*' if total is None else total}")
+        self.send_header("Content-Length", str(last - first + 1))
+        self.end_headers()
+        self._copy(generation, first, last + 1)
+
+    def _send_unsatisfiable(self, total: Optional[int]) -> None:
+        self.send_response(416)
+        if total is not None:
+            self.send_header("Content-Range", f"bytes */{total}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_stream(self) -> None:
+        # Whole output, streamed with chunked encoding while it grows
+        output = self.server.output
+        generation, written, writing = output.wait(0)
+        self.send_response(200)
+        self.send_header("Content-Type", output.content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        if not writing:
+            self.send_header("Content-Length", str(written))
+            self.end_headers()
+            self._copy(generation, 0, written)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        offset = 0
+        with open(output.path, "rb") as fd:
+            while True:
+                current, written, writing = output.wait(offset)
+                if current != generation or offset >= written and not writing:
+                    break
+                fd.seek(offset)
+                data = fd.read(min(written - offset, READ_CHUNK))
+                offset += len(data)
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _copy(self, generation: int, start: int, end: int) -> None:
+        with open(self.server.output.path, "rb") as fd:
+            fd.seek(start)
+            while start < end:
+                if self.server.output.generation != generation:
+                    # The output was restarted, drop the connection rather than mix outputs
+                    self.close_connection = True
+                    return
+                data = fd.read(min(end - start, READ_CHUNK))
+                if not data:
+                    self.close_connection = True
+                    return
+                self.wfile.write(data)
+                start += len(data)
+
+
+class ProgressiveServer(ThreadingHTTPServer):
+    """Local HTTP server of a GrowingOutput.
+
+    GET / returns a page playing the output, any other path the output itself:
+    streamed whole while it grows, or the requested byte range. Ranges past the
+    written bytes wait for them, and open-ended ranges of a growing output return
+    what has been written with an unknown total size.
+
+    Args:
+      output: Output to serve
+      host: Address to listen on
+      port: Port to listen on, 0 picks a free port
+      verbose: Log every HTTP request
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, output: GrowingOutput, host: str = "127.0.0.1", port: int = 0, verbose: bool = False
+    ) -> None:
+        super().__init__((host, port), _ProgressiveHandler)
+        self.output = output
+        self.verbose = verbose
+        self.activity = threading.Condition()
+        self.active = 0
+        self.last_active = time.monotonic()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "ProgressiveServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="progressive-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def wait_idle(self, linger: float = 5.0, timeout: Optional[float] = None) -> bool:
+        """Function to wait until no request has been active for linger seconds.
+
+        Call it once the output is complete, so players still downloading it can finish.
+
+        Returns:
+          False when timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.activity:
+            while True:
+                now = time.monotonic()
+                if self.active == 0 and now - self.last_active >= linger:
+                    return True
+                if deadline is not None and now >= deadline:
+                    return False
+                delay = linger if self.active else linger - (now - self.last_active)
+                if deadline is not None:
+                    delay = min(delay, deadline - now)
+                self.activity.wait(max(delay, 0.01))
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+        self.server_close()
+
+    def __enter__(self) -> "ProgressiveServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
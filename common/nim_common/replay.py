@@ -0,0 +1,481 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Open-loop replay of a recorded call trace against the Maxine NIMs.
+
+The calls of a trace written by nim_common.traffic are started at their
+recorded arrival times divided by the speed, whether or not earlier calls have
+finished, so a slow target builds up a queue the way production traffic would
+rather than slowing the load down. Each speed is replayed in turn and reported
+with its offered and achieved throughput, response time percentiles, measured
+from the scheduled arrival to the end of the response stream, and errors.
+
+The saturation point is the lowest speed at which the target stops keeping up:
+its p99 response time exceeds twice the p99 of the lowest speed, more than 1%
+of the calls fail, or it completes calls at less than 90% of the offered rate.
+
+Each call uploads, in order of preference, its recorded payload, the --sample
+input of its service, or for the audio services a silent WAV of the recorded
+size. The outputs are discarded.
+
+Replay a trace at 1x, 2x and 4x with:
+
+    python -m nim_common.replay --trace calls.jsonl --payloads payloads/ \\
+        --target studio-voice=127.0.0.1:8001 --speeds 1 2 4 --report replay.json
+
+or against local stand-ins with a simulated capacity:
+
+    python -m nim_common.replay --trace calls.jsonl --standin \\
+        --capacity '{"slots": 4, "chunk_seconds": 0.02}' --speeds 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import grpc
+
+from .dispatcher import summarize
+from .services import SERVICES, get_service
+from .streaming import DATA_CHUNKS, StreamResult, stream_into
+from .throughput import percentile
+from .traffic import load_trace
+
+AUDIO_SERVICES = ("studio-voice", "audio2face-2d")  # services whose input can be synthesized
+SATURATION_LATENCY = 2.0  # p99 response time, relative to the lowest speed's
+SATURATION_ERRORS = 0.01  # fraction of failed calls
+SATURATION_THROUGHPUT = 0.9  # achieved throughput, relative to the offered throughput
+
+
+class ReplayCall(NamedTuple):
+    """A recorded call prepared for replay.
+
+    Attributes:
+      offset: Seconds from the first recorded arrival to the arrival of the call
+      service: Name of the service
+      input_filepath: Input uploaded by the call
+      params: Feature parameters, with the bytes parameters loaded
+      chunk_size: Size in bytes of the input chunks
+      upload_rate: Upload rate in bytes per second, None for as fast as possible
+      timeout: Deadline of the call in seconds, None without one
+      compression: Compression mode of the upload
+      traffic_class: Tenant or priority class the call was recorded under
+    """
+
+    offset: float
+    service: str
+    input_filepath: str
+    params: Optional[dict] = None
+    chunk_size: int = DATA_CHUNKS
+    upload_rate: Optional[float] = None
+    timeout: Optional[float] = None
+    compression: str = "none"
+    traffic_class: Optional[str] = None
+
+
+class _Discard:
+    """Writable object dropping the output chunks of the replayed calls."""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+
+def synthesize_wav(path: os.PathLike, size: int, sample_rate: int = 16000) -> None:
+    """Function to write a silent 16-bit mono WAV file of about size bytes."""
+    data_size = max(0, size - 44) // 2 * 2
+    with open(path, "wb") as fd:
+        fd.write(b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE")
+        fd.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16))
+        fd.write(b"data" + struct.pack("<I", data_size))
+        block = bytes(1024 * 1024)
+        while data_size > 0:
+            data_size -= fd.write(block[:data_size])
+
+
+def prepare_calls(
+    trace: List[dict],
+    scratch_dir: os.PathLike,
+    payloads: Optional[os.PathLike] = None,
+    samples: Optional[Dict[str, str]] = None,
+    param_files: Optional[Dict[str, str]] = None,
+    pace_uploads: bool = False,
+    timeout: Optional[float] = None,
+) -> List[ReplayCall]:
+    """Function to resolve the inputs and parameters of the calls of a trace.
+
+    Args:
+      trace: Calls returned by load_trace
+      scratch_dir: Directory the synthesized inputs are written to
+      payloads: Directory of the recorded payloads, None when they were not kept
+      samples: Input file per service name, for the calls without a payload
+      param_files: File per bytes parameter name, for the parameters without a payload
+      pace_uploads: Upload each input at its recorded rate instead of as fast as possible
+      timeout: Deadline of each call in seconds, the recorded deadline when None
+
+    Raises:
+      ValueError: When a call has neither a payload nor a sample input to upload.
+    """
+    samples = samples or {}
+    param_files = param_files or {}
+    loaded = {}
+
+    def recorded(name: Optional[str]) -> Optional[str]:
+        if payloads is None or not name:
+            return None
+        path = os.path.join(payloads, name)
+        return path if os.path.isfile(path) else None
+
+    def load(path: str) -> bytes:
+        if path not in loaded:
+            with open(path, "rb") as fd:
+                loaded[path] = fd.read()
+        return loaded[path]
+
+    calls = []
+    first_arrival = trace[0]["arrival"] if trace else 0.0
+    for number, call in enumerate(trace, 1):
+        service = get_service(call["service"]).name
+        input_filepath = recorded(call.get("payload")) or samples.get(service)
+        if input_filepath is None:
+            if service not in AUDIO_SERVICES:
+                raise ValueError(
+                    f"Call {number} to {service} has no recorded payload, "
+                    f"pass --payloads or --sample {service}=PATH."
+                )
+            input_filepath = os.path.join(scratch_dir, f"synthetic-{call['input_bytes']}.wav")
+            if not os.path.exists(input_filepath):
+                synthesize_wav(input_filepath, call["input_bytes"])
+
+        params = None
+        if call.get("params") is not None:
+            params = {}
+            for name, value in call["params"].items():
+                if isinstance(value, dict) and "bytes" in value:
+                    path = recorded(value.get("payload")) or param_files.get(name)
+                    if path is None:
+                        raise ValueError(
+                            f"Call {number} to {service} has no recorded {name}, "
+                            f"pass --payloads or --param-file {name}=PATH."
+                        )
+                    value = load(path)
+                params[name] = value
+
+        upload_rate = None
+        if pace_uploads and call.get("upload_s") and call.get("input_bytes"):
+            upload_rate = call["input_bytes"] / call["upload_s"]
+        calls.append(
+            ReplayCall(
+                offset=call["arrival"] - first_arrival,
+                service=service,
+                input_filepath=input_filepath,
+                params=params,
+                chunk_size=call.get("chunk_size") or DATA_CHUNKS,
+                upload_rate=upload_rate,
+                timeout=timeout if timeout is not None else call.get("timeout_s"),
+                compression=call.get("compression") or "none",
+                traffic_class=call.get("traffic_class"),
+            )
+        )
+    return calls
+
+
+def replay(
+    calls: Sequence[ReplayCall],
+    channels: Dict[str, grpc.Channel],
+    speed: float = 1.0,
+    max_in_flight: int = 256,
+) -> dict:
+    """Function to replay calls once at speed and report how the target kept up.
+
+    Args:
+      calls: Calls returned by prepare_calls
+      channels: Channel per service name the calls are made on
+      speed: Factor the arrival rate is scaled by, 2 replays the trace in half the time
+      max_in_flight: Calls running at once, further arrivals wait and count as response time
+
+    Returns:
+      The dispatcher.summarize report of the run, with the speed, the offered and
+      achieved calls per second, the error rate, response time percentiles and the
+      largest lag of the load generator behind the schedule.
+    """
+    results: List[Optional[StreamResult]] = [None] * len(calls)
+    finished = [0.0] * len(calls)
+    lags = []
+    lock = threading.Lock()
+    sink = _Discard()
+
+    def run(index: int, call: ReplayCall, scheduled: float) -> None:
+        spec = get_service(call.service)
+        result = StreamResult(spec.name, call.input_filepath, None)
+        result.traffic_class = call.traffic_class
+        result.queue_wait = time.perf_counter() - scheduled
+        try:
+            stream_into(
+                channels[spec.name],
+                spec,
+                call.input_filepath,
+                sink,
+                params=call.params,
+                chunk_size=call.chunk_size,
+                result=result,
+                timeout=call.timeout,
+                compression=call.compression,
+                upload_rate=call.upload_rate,
+            )
+        except grpc.RpcError as e:
+            result.error = f"{e.code().name}: {e.details()}"
+        except (OSError, ValueError) as e:
+            result.error = str(e)
+        with lock:
+            results[index] = result
+            finished[index] = time.perf_counter()
+
+    scheduled = []
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="replay") as executor:
+        start_time = time.perf_counter()
+        for index, call in enumerate(calls):
+            scheduled.append(start_time + call.offset / speed)
+            delay = scheduled[index] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            lags.append(time.perf_counter() - scheduled[index])
+            executor.submit(run, index, call, scheduled[index])
+    wall_time = time.perf_counter() - start_time
+
+    report = summarize(results, wall_time)
+    done = [index for index, result in enumerate(results) if result.ok]
+    responses = sorted(finished[index] - scheduled[index] for index in done)
+    completions = sorted(finished[index] for index in done)
+    span = calls[-1].offset / speed if calls else 0.0
+    completion_span = completions[-1] - completions[0] if completions else 0.0
+    report.update(
+        speed=speed,
+        offered_per_s=(len(calls) - 1) / span if span > 0 else None,
+        achieved_per_s=(len(done) - 1) / completion_span if completion_span > 0 else None,
+        error_rate=report["failed"] / len(calls) if calls else 0.0,
+        response_p50_s=percentile(responses, 0.5),
+        response_p90_s=percentile(responses, 0.9),
+        response_p99_s=percentile(responses, 0.99),
+        response_max_s=responses[-1] if responses else None,
+        client_lag_max_s=max(lags, default=0.0),
+    )
+    return report
+
+
+def saturation_speed(runs: List[dict]) -> Optional[float]:
+    """Function to return the lowest speed at which the target saturated, None when it kept up."""
+    runs = sorted(runs, key=lambda run: run["speed"])
+    baseline = runs[0]["response_p99_s"] if runs else None
+    for run in runs:
+        p99 = run["response_p99_s"]
+        offered, achieved = run["offered_per_s"], run["achieved_per_s"]
+        if (
+            p99 is None
+            or run["error_rate"] > SATURATION_ERRORS
+            or (baseline is not None and p99 > SATURATION_LATENCY * baseline)
+            or (offered and (achieved or 0.0) < SATURATION_THROUGHPUT * offered)
+        ):
+            return run["speed"]
+    return None
+
+
+def run_replay(
+    calls: Sequence[ReplayCall],
+    channels: Dict[str, grpc.Channel],
+    speeds: Sequence[float] = (1.0,),
+    max_in_flight: int = 256,
+    verbose: bool = False,
+) -> dict:
+    """Function to replay calls at each of speeds, slowest first, and find the saturation point."""
+    # One untimed call per service, so the first run does not pay for connecting and warm-up
+    warm_up = {call.service: call._replace(offset=0.0) for call in calls}
+    replay(list(warm_up.values()), channels, max_in_flight=max_in_flight)
+    runs = []
+    for speed in sorted(speeds):
+        run = replay(calls, channels, speed, max_in_flight)
+        runs.append(run)
+        if verbose:
+            print(
+                f"{speed:g}x: offered {run['offered_per_s'] or 0:.1f} calls/s, achieved "
+                f"{run['achieved_per_s'] or 0:.1f} calls/s, response p50/p90/p99/max "
+                + "/".join(
+                    f"{(run[f'response_{q}_s'] or 0) * 1000:.0f}"
+                    for q in ("p50", "p90", "p99", "max")
+                )
+                + f" ms, {run['failed']} failed, client lag {run['client_lag_max_s'] * 1000:.1f} ms"
+            )
+    return {"calls": len(calls), "runs": runs, "saturation_speed": saturation_speed(runs)}
+
+
+def _parse_pairs(values: list, option: str) -> Dict[str, str]:
+    pairs = {}
+    for value in values or []:
+        name, sep, setting = value.partition("=")
+        if not sep or not name:
+            raise RuntimeError(f"{option} expects NAME=VALUE.")
+        pairs[name] = setting
+    return pairs
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded call trace against the Maxine NIMs at scaled speeds."
+    )
+    parser.add_argument(
+        "--trace", type=str, required=True, help="Call trace written with nim_common.traffic."
+    )
+    parser.add_argument(
+        "--payloads", type=str, help="Directory of the payloads recorded with the trace."
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        default=[],
+        help="SERVICE=IP:port of the plaintext gRPC service the calls to SERVICE are replayed "
+        "against, the recorded target when not set. May be repeated for each service.",
+    )
+    parser.add_argument(
+        "--standin",
+        action="store_true",
+        help="Replay against local stand-in servers, started for each service of the trace.",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=str,
+        help="Simulated capacity of the --standin servers as a JSON object of "
+        'nim_common.standin Capacity fields, e.g. \'{"slots": 4, "chunk_seconds": 0.02}\'.',
+    )
+    parser.add_argument(
+        "--speeds",
+        type=float,
+        nargs="+",
+        default=[1.0],
+        help="Factors the recorded arrival rate is scaled by, each replayed in turn.",
+    )
+    parser.add_argument(
+        "--sample",
+        action="append",
+        default=[],
+        help="SERVICE=PATH of the input uploaded by the calls without a recorded payload.",
+    )
+    parser.add_argument(
+        "--param-file",
+        action="append",
+        default=[],
+        help="FIELD=PATH of a bytes parameter, such as portrait_image, for the calls without "
+        "a recorded payload.",
+    )
+    parser.add_argument(
+        "--pace-uploads",
+        action="store_true",
+        help="Upload each input at its recorded rate, as a live source would.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Deadline of each call in seconds, the recorded one if not set.",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=256,
+        help="Maximum number of calls running at once, later arrivals wait for a free one.",
+    )
+    parser.add_argument("--report", type=str, help="Optional path of a JSON report.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Replay entry point
+    """
+    args = parse_args()
+    trace = load_trace(args.trace)
+    if not trace:
+        raise RuntimeError(f"{args.trace} has no recorded calls.")
+    targets = _parse_pairs(args.target, "--target")
+    services = sorted({get_service(call["service"]).name for call in trace})
+    standins = []
+    if args.standin:
+        from .codec_benchmark import start_standin
+
+        extra = ["--capacity", args.capacity] if args.capacity else []
+        for service in services:
+            server, targets[service] = start_standin(service, *extra)
+            standins.append(server)
+    for service in services:
+        if service not in targets:
+            recorded = [call["target"] for call in trace if call["service"] == service]
+            if not recorded[0]:
+                raise RuntimeError(f"No target recorded for {service}, pass --target or --standin.")
+            targets[service] = recorded[0]
+    for name in targets:
+        if name not in SERVICES:
+            raise RuntimeError(
+                f"--target expects SERVICE=IP:port with SERVICE in {sorted(SERVICES)}."
+            )
+
+    channels = {service: grpc.insecure_channel(targets[service]) for service in services}
+    try:
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            calls = prepare_calls(
+                trace,
+                scratch_dir,
+                payloads=args.payloads,
+                samples=_parse_pairs(args.sample, "--sample"),
+                param_files=_parse_pairs(args.param_file, "--param-file"),
+                pace_uploads=args.pace_uploads,
+                timeout=args.timeout,
+            )
+            for service, channel in channels.items():
+                grpc.channel_ready_future(channel).result(timeout=30)
+            print(
+                f"Replaying {len(calls)} calls over {calls[-1].offset:.1f}s to "
+                + ", ".join(f"{service} at {targets[service]}" for service in services)
+            )
+            report = run_replay(calls, channels, args.speeds, args.max_in_flight, verbose=True)
+    finally:
+        for channel in channels.values():
+            channel.close()
+        for server in standins:
+            server.terminate()
+            server.wait()
+    saturation = report["saturation_speed"]
+    if saturation is None:
+        print(f"The targets kept up with every speed up to {max(args.speeds):g}x.")
+    else:
+        print(f"The targets saturated at {saturation:g}x.")
+    report["targets"] = {service: targets[service] for service in services}
+    if args.report:
+        with open(args.report, "w") as fd:
+            json.dump(report, fd, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Retrying streaming calls that failed on a transient error.
+
+A streaming call cannot be resumed half-way, since the NIM keeps no state
+between calls, so a retry restarts the whole upload and rewrites the output
+from the beginning. Only UNAVAILABLE is retried: it is what a restarting or
+overloaded NIM, a dropped connection or a failed load balancer hop report,
+while the other codes point at the request itself.
+"""
+
+import random
+from typing import Callable, Optional, TypeVar
+
+import grpc
+
+from .deadlines import CancelScope
+
+RETRYABLE_CODES = frozenset({"UNAVAILABLE"})
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled for each further retry
+RETRY_BACKOFF_MAX = 8.0  # seconds, upper bound of the backoff
+
+T = TypeVar("T")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Function to return whether error is a gRPC error worth retrying."""
+    return isinstance(error, grpc.RpcError) and error.code().name in RETRYABLE_CODES
+
+
+def backoff_delay(
+    attempt: int, base: float = RETRY_BACKOFF, maximum: float = RETRY_BACKOFF_MAX
+) -> float:
+    """Function to return the seconds to wait before retry number attempt + 1.
+
+    The delay doubles with each attempt and is jittered between half and the
+    full value, so that clients failed by the same outage do not retry in step.
+    """
+    delay = min(maximum, base * 2**attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def call_with_retries(
+    call: Callable[[], T],
+    retries: int,
+    scope: Optional[CancelScope] = None,
+    on_retry: Optional[Callable[[int, grpc.RpcError, float], None]] = None,
+    backoff: float = RETRY_BACKOFF,
+) -> T:
+    """Function to run call, running it again when it fails with a retryable gRPC error.
+
+    Retries stop when the scope is cancelled or its deadline would pass during
+    the backoff, the last error is then raised.
+
+    Args:
+      call: Function making the whole streaming call, run once per attempt
+      retries: Number of retries after the first attempt
+      scope: CancelScope of the job, cancelling it interrupts the backoff
+      on_retry: Function called with the retry number, the error and the backoff
+      backoff: Seconds before the first retry
+    """
+    if scope is None:
+        scope = CancelScope()
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except grpc.RpcError as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt, base=backoff)
+            remaining = scope.remaining()
+            if scope.cancelled or (remaining is not None and remaining <= delay):
+                raise
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            if scope.wait(delay):
+                raise
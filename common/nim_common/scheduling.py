@@ -0,0 +1,330 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Rate limiting and weighted fair queuing of calls shared by several tenants.
+
+A FairScheduler sits in front of the calls to a NIM fleet. Each call is
+enqueued under a traffic class (a tenant or priority class) and admitted in
+start-time fair queuing order, where a class with weight w receives w times the
+share of an idle class with weight 1, measured in input bytes. Token buckets
+cap the admitted requests per second and bytes per second, both for the whole
+scheduler and per class. A class that is over its own limit is skipped, so bulk
+traffic uses whatever capacity interactive traffic leaves over.
+"""
+
+import collections
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from .throughput import percentile
+
+
+class TokenBucket:
+    """Token bucket refilled at rate tokens per second, holding at most burst tokens.
+
+    An amount larger than burst is admitted once the bucket is full and leaves
+    the bucket in debt, so large inputs are delayed rather than rejected.
+
+    Args:
+      rate: Tokens added per second
+      burst: Bucket capacity, defaults to one second worth of tokens
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive.")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: Optional[float] = None) -> float:
+        """Function to return the seconds until amount can be taken, 0 when it can now."""
+        self._refill(time.monotonic() if now is None else now)
+        missing = min(amount, self.burst) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+
+class TrafficClass(NamedTuple):
+    """Share and limits of a tenant or priority class."""
+
+    name: str
+    weight: float = 1.0
+    requests_per_s: Optional[float] = None
+    bytes_per_s: Optional[float] = None
+
+
+def parse_traffic_class(value: str) -> TrafficClass:
+    """Function to parse NAME:WEIGHT[:REQUESTS_PER_S[:BYTES_PER_S]] into a TrafficClass.
+
+    Empty fields keep their default, e.g. bulk:1::50000000 only limits bytes.
+    """
+    fields = value.split(":")
+    if not fields[0] or len(fields) > 4:
+        raise ValueError(f"Invalid traffic class '{value}'.")
+    numbers = [float(field) if field else None for field in fields[1:]]
+    numbers += [None] * (3 - len(numbers))
+    weight, requests_per_s, bytes_per_s = numbers
+    return TrafficClass(fields[0], weight or 1.0, requests_per_s, bytes_per_s)
+
+
+class Ticket:
+    """Place of one call in the scheduler queues.
+
+    Attributes:
+      traffic_class: Name of the class the call was enqueued under
+      cost: Input size in bytes
+      payload: Object passed to enqueue, returned to the caller of next
+      wait: Seconds from enqueue to admission, once admitted
+    """
+
+    def __init__(self, traffic_class: str, cost: int, tag: float, payload: Any) -> None:
+        self.traffic_class = traffic_class
+        self.cost = cost
+        self.tag = tag
+        self.payload = payload
+        self.enqueued = time.perf_counter()
+        self.wait = None
+        self.admitted = False
+        self.released = False
+
+
+class _ClassState:
+    def __init__(self, traffic_class: TrafficClass, wait_samples: int) -> None:
+        self.config = traffic_class
+        self.queue = collections.deque()
+        self.last_finish = 0.0
+        self.in_flight = 0
+        self.admitted = 0
+        self.admitted_bytes = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits = collections.deque(maxlen=wait_samples)
+        self.buckets = []
+        if traffic_class.requests_per_s:
+            self.buckets.append(("requests", TokenBucket(traffic_class.requests_per_s)))
+        if traffic_class.bytes_per_s:
+            self.buckets.append(("bytes", TokenBucket(traffic_class.bytes_per_s)))
+
+
+def _bucket_delay(buckets: list, cost: int, now: float) -> float:
+    return max(
+        (bucket.delay(1 if kind == "requests" else cost, now) for kind, bucket in buckets),
+        default=0.0,
+    )
+
+
+class FairScheduler:
+    """Weighted fair queue with token bucket rate limits.
+
+    Calls are either admitted through acquire (or the admit context manager),
+    which blocks the calling thread until its turn, or enqueued with a payload
+    and handed to worker threads calling next. Every admitted ticket must be
+    passed to release once the call finished.
+
+    Args:
+      classes: Traffic classes with their weights and limits, unknown classes get weight 1
+      requests_per_s: Requests admitted per second over all classes
+      bytes_per_s: Input bytes admitted per second over all classes
+      max_in_flight: Maximum number of admitted calls not yet released
+      wait_samples: Number of recent wait times kept per class for percentiles
+    """
+
+    def __init__(
+        self,
+        classes: Optional[List[TrafficClass]] = None,
+        requests_per_s: Optional[float] = None,
+        bytes_per_s: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        wait_samples: int = 1024,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.wait_samples = wait_samples
+        self._classes: Dict[str, _ClassState] = {}
+        for traffic_class in classes or []:
+            if traffic_class.weight <= 0:
+                raise ValueError(f"Traffic class '{traffic_class.name}' needs a positive weight.")
+            self._classes[traffic_class.name] = _ClassState(traffic_class, wait_samples)
+        self._buckets = []
+        if requests_per_s:
+            self._buckets.append(("requests", TokenBucket(requests_per_s)))
+        if bytes_per_s:
+            self._buckets.append(("bytes", TokenBucket(bytes_per_s)))
+        self._condition = threading.Condition()
+        self._virtual_time = 0.0
+        self._order = itertools.count()
+        self.in_flight = 0
+
+    def _state(self, name: str) -> _ClassState:
+        state = self._classes.get(name)
+        if state is None:
+            state = self._classes[name] = _ClassState(TrafficClass(name), self.wait_samples)
+        return state
+
+    def enqueue(self, traffic_class: str = "default", cost: int = 0, payload: Any = None) -> Ticket:
+        """Function to queue a call without waiting for its admission.
+
+        Args:
+          traffic_class: Tenant or priority class of the call
+          cost: Input size in bytes, used for fairness and the bytes per second limits
+          payload: Object returned with the ticket by next
+        """
+        with self._condition:
+            state = self._state(traffic_class)
+            start = max(self._virtual_time, state.last_finish)
+            state.last_finish = start + max(cost, 1) / state.config.weight
+            ticket = Ticket(traffic_class, cost, (start, next(self._order)), payload)
+            state.queue.append(ticket)
+            self._condition.notify_all()
+        return ticket
+
+    def _select(self) -> tuple:
+        """Function to return (ticket, delay) of the next admissible ticket, under the lock."""
+        if self.max_in_flight is not None and self.in_flight >= self.max_in_flight:
+            return None, None
+        now = time.monotonic()
+        best, delay = None, None
+        for state in self._classes.values():
+            if not state.queue:
+                continue
+            head = state.queue[0]
+            class_delay = _bucket_delay(state.buckets, head.cost, now)
+            if class_delay > 0:
+                delay = class_delay if delay is None else min(delay, class_delay)
+                continue
+            if best is None or head.tag < best.tag:
+                best = head
+        if best is None:
+            return None, delay
+        global_delay = _bucket_delay(self._buckets, best.cost, now)
+        if global_delay > 0:
+            return None, global_delay
+        return best, None
+
+    def _admit(self, ticket: Ticket) -> None:
+        state = self._classes[ticket.traffic_class]
+        state.queue.popleft()
+        for kind, bucket in itertools.chain(state.buckets, self._buckets):
+            bucket.take(1 if kind == "requests" else ticket.cost)
+        self._virtual_time = max(self._virtual_time, ticket.tag[0])
+        ticket.admitted = True
+        ticket.wait = time.perf_counter() - ticket.enqueued
+        state.in_flight += 1
+        state.admitted += 1
+        state.admitted_bytes += ticket.cost
+        state.wait_total += ticket.wait
+        state.wait_max = max(state.wait_max, ticket.wait)
+        state.waits.append(ticket.wait)
+        self.in_flight += 1
+        self._condition.notify_all()
+
+    def next(self, timeout: Optional[float] = None) -> Optional[Ticket]:
+        """Function to admit the next ticket in fair order, waiting for it if needed.
+
+        Returns:
+          The admitted ticket, or None when timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                ticket, delay = self._select()
+                if ticket is not None:
+                    self._admit(ticket)
+                    return ticket
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    delay = remaining if delay is None else min(delay, remaining)
+                self._condition.wait(delay)
+
+    def acquire(self, traffic_class: str = "default", cost: int = 0) -> Ticket:
+        """Function to queue a call and block until it is admitted."""
+        ticket = self.enqueue(traffic_class, cost)
+        try:
+            with self._condition:
+                while not ticket.admitted:
+                    selected, delay = self._select()
+                    if selected is ticket:
+                        self._admit(ticket)
+                        break
+                    self._condition.wait(delay)
+        except BaseException:
+            # An interrupted wait must not leave the ticket queued ahead of the others
+            self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        """Function to return the in-flight slot of an admitted ticket.
+
+        A ticket that was not admitted yet is withdrawn from its queue instead,
+        and releasing a ticket twice has no effect.
+        """
+        with self._condition:
+            if ticket.released:
+                return
+            ticket.released = True
+            state = self._classes[ticket.traffic_class]
+            if ticket.admitted:
+                state.in_flight -= 1
+                self.in_flight -= 1
+            else:
+                state.queue.remove(ticket)
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, traffic_class: str = "default", cost: int = 0) -> Iterator[Ticket]:
+        """Context manager holding an admitted slot for the duration of a call."""
+        ticket = self.acquire(traffic_class, cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        """Function to return the queue depth, in-flight calls and wait times per class."""
+        with self._condition:
+            classes = {}
+            for name, state in self._classes.items():
+                waits = sorted(state.waits)
+                classes[name] = {
+                    "weight": state.config.weight,
+                    "queued": len(state.queue),
+                    "queued_bytes": sum(ticket.cost for ticket in state.queue),
+                    "in_flight": state.in_flight,
+                    "admitted": state.admitted,
+                    "admitted_bytes": state.admitted_bytes,
+                    "wait_mean_s": state.wait_total / state.admitted if state.admitted else None,
+                    "wait_p50_s": percentile(waits, 0.5),
+                    "wait_p99_s": percentile(waits, 0.99),
+                    "wait_max_s": state.wait_max if state.admitted else None,
+                }
+            return {"in_flight": self.in_flight, "classes": classes}
@@ -0,0 +1,318 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Rendering a long audio input as concurrent segments split at silences.
+
+A long narration sent through one audio2face-2d Animate stream renders on a
+single GPU from start to end. plan_segments cuts the WAV into segments of about
+segment_seconds, moving each cut to the longest quiet stretch within
+search_seconds of it so that cuts fall between words. render_segmented renders
+the segments concurrently, on as many replicas as the caller spreads them over,
+and splices the MP4 outputs in order with ffmpeg stream copy, without
+re-encoding.
+
+Cuts are aligned to video frames. Per-frame tracks, such as the head pose
+animation of HEAD_POSE_MODE_USER_DEFINED_ANIMATION, are taken to hold one value
+per video frame and to loop when shorter than the audio; slice_track gives each
+segment the values from where the previous segment ended, so the motion is
+continuous across cuts.
+
+Splicing requires the ffmpeg executable on PATH. Quiet stretches are only
+searched in 16-bit PCM input, other inputs are cut at the nominal boundaries.
+"""
+
+import array
+import math
+import operator
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .deadlines import CancelScope
+
+ANIMATION_FPS = 30  # frames per second of the rendered video and of per-frame tracks
+HEAD_POSE_TRACKS = ("input_head_rotation", "input_head_translation")
+WAV_BLOCK_FRAMES = 64 * 1024  # audio frames copied at a time when writing a segment
+
+
+class Segment(NamedTuple):
+    """A segment of the input audio.
+
+    Attributes:
+      index: Position of the segment in the output
+      start: First audio frame of the segment
+      end: Audio frame following the last one of the segment
+      first_video_frame: Index in the whole output of the segment's first video frame
+      video_frames: Number of video frames of the segment
+      at_silence: Whether the cut at the start of the segment falls in a quiet stretch
+    """
+
+    index: int
+    start: int
+    end: int
+    first_video_frame: int
+    video_frames: int
+    at_silence: bool = False
+
+
+def _levels(data: bytes, channels: int, frame_samples: int) -> List[float]:
+    """Function to return the RMS level, relative to full scale, of each analysis frame."""
+    samples = array.array("h")
+    samples.frombytes(data[: len(data) - len(data) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    step = frame_samples * channels
+    levels = []
+    for offset in range(0, len(samples) - step + 1, step):
+        block = samples[offset : offset + step]
+        levels.append(math.sqrt(sum(map(operator.mul, block, block)) / step) / 32768.0)
+    return levels
+
+
+def _quietest(levels: List[float], threshold: float) -> Tuple[int, bool]:
+    """Function to return the middle of the longest run below threshold, or the quietest frame.
+
+    Returns:
+      The frame index and whether it lies in a run below threshold.
+    """
+    best_start = best_length = 0
+    run_start = None
+    for index, level in enumerate(levels + [math.inf]):
+        if level < threshold:
+            if run_start is None:
+                run_start = index
+        elif run_start is not None:
+            if index - run_start > best_length:
+                best_start, best_length = run_start, index - run_start
+            run_start = None
+    if best_length:
+        return best_start + best_length // 2, True
+    return min(range(len(levels)), key=levels.__getitem__), False
+
+
+def _open_wav(audio_filepath: os.PathLike) -> wave.Wave_read:
+    try:
+        return wave.open(os.fspath(audio_filepath), "rb")
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Segmented rendering needs a PCM WAV input: {e}") from None
+
+
+def plan_segments(
+    audio_filepath: os.PathLike,
+    segment_seconds: float,
+    search_seconds: float = 10.0,
+    fps: int = ANIMATION_FPS,
+    threshold_db: float = -40.0,
+) -> List[Segment]:
+    """Function to cut a WAV file into segments of about segment_seconds at quiet points.
+
+    Args:
+      audio_filepath: Path to input WAV file
+      segment_seconds: Nominal duration in seconds of a segment
+      search_seconds: Seconds before and after each nominal cut searched for a quiet stretch
+      fps: Frame rate of the rendered video, cuts are aligned to its frames
+      threshold_db: Level in dBFS below which the audio counts as quiet
+
+    Returns:
+      The segments in order, covering the whole input. A final segment shorter than
+      half of segment_seconds is merged into the one before it.
+    """
+    if segment_seconds <= 0:
+        raise ValueError("The segment duration must be positive.")
+    with _open_wav(audio_filepath) as wav:
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        sample_width, total = wav.getsampwidth(), wav.getnframes()
+        total_video = math.ceil(total * fps / rate)
+        segment_frames = max(1, round(segment_seconds * fps))
+        search = min(round(search_seconds * fps), segment_frames // 2)
+        frame_samples = max(1, rate // fps)
+        threshold = 10.0 ** (threshold_db / 20.0)
+
+        cuts, quiet = [0], [False]
+        target = segment_frames
+        while total_video - target > segment_frames / 2:
+            cut, at_silence = target, False
+            low = max(cuts[-1] + 1, target - search)
+            high = min(target + search, total_video - 1)
+            if sample_width == 2 and high > low:
+                wav.setpos(low * rate // fps)
+                data = wav.readframes(high * rate // fps - low * rate // fps)
+                levels = _levels(data, channels, frame_samples)
+                if levels:
+                    index, at_silence = _quietest(levels, threshold)
+                    cut = low + index
+            cuts.append(cut)
+            quiet.append(at_silence)
+            target = cut + segment_frames
+
+    segments = []
+    for index, first in enumerate(cuts):
+        last = index == len(cuts) - 1
+        following = total_video if last else cuts[index + 1]
+        segments.append(
+            Segment(
+                index=index,
+                start=first * rate // fps,
+                end=total if last else following * rate // fps,
+                first_video_frame=first,
+                video_frames=following - first,
+                at_silence=quiet[index],
+            )
+        )
+    return segments
+
+
+def write_segment(
+    audio_filepath: os.PathLike, segment: Segment, output_filepath: os.PathLike
+) -> None:
+    """Function to copy the audio frames of a segment into a WAV file of their own."""
+    with _open_wav(audio_filepath) as source, wave.open(os.fspath(output_filepath), "wb") as out:
+        out.setparams(source.getparams())
+        source.setpos(segment.start)
+        remaining = segment.end - segment.start
+        while remaining > 0:
+            data = source.readframes(min(remaining, WAV_BLOCK_FRAMES))
+            if not data:
+                break
+            out.writeframes(data)
+            remaining -= len(data) // (source.getsampwidth() * source.getnchannels())
+
+
+def slice_track(track: any, first_frame: int, frames: int) -> any:
+    """Function to return frames values of a looping per-frame track, from first_frame on.
+
+    Args:
+      track: Message with a repeated values field, such as a QuaternionStream
+      first_frame: Index of the first video frame of the segment in the whole output
+      frames: Number of video frames of the segment
+    """
+    values = track.values
+    sliced = type(track)()
+    if values:
+        sliced.values.extend(values[(first_frame + i) % len(values)] for i in range(frames))
+    return sliced
+
+
+def splice(segment_filepaths: List[str], output_filepath: os.PathLike) -> None:
+    """Function to concatenate MP4 segments in order without re-encoding."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as playlist:
+        for path in segment_filepaths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            playlist.write(f"file '{escaped}'\n")
+    try:
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                playlist.name,
+                "-c",
+                "copy",
+                os.fspath(output_filepath),
+            ],
+            check=True,
+        )
+    finally:
+        os.unlink(playlist.name)
+
+
+def render_segmented(
+    audio_filepath: os.PathLike,
+    output_filepath: os.PathLike,
+    render: Callable[[str, dict, str, Segment], None],
+    segment_seconds: float,
+    concurrency: int = 4,
+    params: Optional[dict] = None,
+    tracks: Sequence[str] = HEAD_POSE_TRACKS,
+    search_seconds: float = 10.0,
+    fps: int = ANIMATION_FPS,
+    scope: Optional[CancelScope] = None,
+) -> List[Segment]:
+    """Function to render segments of the audio concurrently and splice their outputs.
+
+    Args:
+      audio_filepath: Path to input WAV file
+      output_filepath: Path to output MP4 file
+      render: Callable rendering one segment, called with the path of its WAV file,
+        its parameters, the path of its MP4 output and the Segment
+      segment_seconds: Nominal duration in seconds of a segment
+      concurrency: Number of segments rendered at the same time
+      params: Parameters of the feature, the same for every segment but for tracks
+      tracks: Names of the per-frame track parameters sliced per segment
+      search_seconds: Seconds around each nominal cut searched for a quiet stretch
+      fps: Frame rate of the rendered video and of the tracks
+      scope: CancelScope of the renders, cancelled when a segment fails
+
+    Returns:
+      The rendered segments.
+    """
+    params = params or {}
+    segments = plan_segments(audio_filepath, segment_seconds, search_seconds, fps)
+    if len(segments) > 1 and shutil.which("ffmpeg") is None:
+        raise RuntimeError("Segmented rendering requires ffmpeg on PATH.")
+
+    with tempfile.TemporaryDirectory(prefix="audio2face-2d-") as workdir:
+
+        def run(segment: Segment) -> str:
+            segment_params = dict(params)
+            for name in tracks:
+                if params.get(name) is not None:
+                    segment_params[name] = slice_track(
+                        params[name], segment.first_video_frame, segment.video_frames
+                    )
+            if len(segments) == 1:
+                render(os.fspath(audio_filepath), segment_params, output_filepath, segment)
+                return os.fspath(output_filepath)
+            segment_input = os.path.join(workdir, f"segment_{segment.index:05d}.wav")
+            segment_output = os.path.join(workdir, f"segment_{segment.index:05d}.mp4")
+            write_segment(audio_filepath, segment, segment_input)
+            render(segment_input, segment_params, segment_output, segment)
+            if not os.path.isfile(segment_output):
+                raise RuntimeError(f"Animate produced no output for segment {segment.index}.")
+            os.unlink(segment_input)
+            return segment_output
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="segment") as executor:
+            futures = [executor.submit(run, segment) for segment in segments]
+            wait(futures, return_when=FIRST_EXCEPTION)
+            failed = [future for future in futures if future.done() and future.exception()]
+            if failed:
+                # Queued segments are dropped and the running ones cancelled
+                for future in futures:
+                    future.cancel()
+                if scope is not None:
+                    scope.cancel("segment failed")
+                raise failed[0].exception()
+            outputs = [future.result() for future in futures]
+        if len(segments) > 1:
+            splice(outputs, output_filepath)
+    return segments
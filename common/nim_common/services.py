@@ -0,0 +1,201 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Service descriptions shared by the Maxine NIM client tools.
+
+Each service of this repository is a bidirectional stream of request messages
+carrying an optional config followed by input file chunks, answered by response
+messages carrying an optional config echo, keepalives and output file chunks.
+ServiceSpec captures the names that differ between the services so that the
+tools in this package can drive any of them.
+"""
+
+import importlib
+import os
+import sys
+from typing import Dict, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ServiceSpec:
+    """Description of a Maxine NIM streaming service and its generated stubs.
+
+    Args:
+      name: Name of the client directory, e.g. "studio-voice"
+      interfaces_dir: Directory holding the generated *_pb2 and *_pb2_grpc modules
+      module: Base name of the generated modules, e.g. "studiovoice"
+      service: Name of the gRPC service, e.g. "MaxineStudioVoice"
+      method: Name of the streaming RPC, e.g. "EnhanceAudio"
+      request: Name of the request message
+      response: Name of the response message
+      input_field: Request field carrying input file chunks
+      output_field: Response field carrying output file chunks
+      config: Name of the config message, None when the service takes no config
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interfaces_dir: str,
+        module: str,
+        service: str,
+        method: str,
+        request: str,
+        response: str,
+        input_field: str,
+        output_field: str,
+        config: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.interfaces_dir = interfaces_dir
+        self.module = module
+        self.service = service
+        self.method = method
+        self.request = request
+        self.response = response
+        self.input_field = input_field
+        self.output_field = output_field
+        self.config = config
+        self._pb2 = None
+        self._pb2_grpc = None
+        self._codec = None
+
+    def _load(self) -> None:
+        if self._pb2 is None:
+            # The generated grpc module imports its message module as a top level module
+            if self.interfaces_dir not in sys.path:
+                sys.path.append(self.interfaces_dir)
+            self._pb2 = importlib.import_module(f"{self.module}_pb2")
+            self._pb2_grpc = importlib.import_module(f"{self.module}_pb2_grpc")
+
+    @property
+    def pb2(self):
+        """Generated message module of the service."""
+        self._load()
+        return self._pb2
+
+    @property
+    def pb2_grpc(self):
+        """Generated gRPC module of the service."""
+        self._load()
+        return self._pb2_grpc
+
+    @property
+    def full_method(self) -> str:
+        """Fully qualified method path as sent on the wire."""
+        package = self.pb2.DESCRIPTOR.package
+        return f"/{package}.{self.service}/{self.method}"
+
+    def stub(self, channel):
+        """Function to create the generated client stub for channel."""
+        return getattr(self.pb2_grpc, f"{self.service}Stub")(channel)
+
+    def call(self, channel):
+        """Function to return the streaming multi-callable of the service on channel."""
+        return getattr(self.stub(channel), self.method)
+
+    @property
+    def codec(self):
+        """RawCodec encoding the data chunks of the service, see nim_common.codec."""
+        if self._codec is None:
+            from .codec import RawCodec
+
+            self._codec = RawCodec(self)
+        return self._codec
+
+    def add_servicer(self, servicer, server) -> None:
+        """Function to register servicer with a grpc.Server."""
+        getattr(self.pb2_grpc, f"add_{self.service}Servicer_to_server")(servicer, server)
+
+    def servicer_base(self):
+        """Generated servicer base class of the service."""
+        return getattr(self.pb2_grpc, f"{self.service}Servicer")
+
+    def data_request(self, data: bytes):
+        """Function to wrap an input file chunk into a request message."""
+        return getattr(self.pb2, self.request)(**{self.input_field: data})
+
+    def config_request(self, params: dict):
+        """Function to wrap feature parameters into a config request message."""
+        if self.config is None:
+            raise ValueError(f"{self.name} does not take a config.")
+        config = getattr(self.pb2, self.config)(**params)
+        return getattr(self.pb2, self.request)(config=config)
+
+    def data_response(self, data: bytes):
+        """Function to wrap an output file chunk into a response message."""
+        return getattr(self.pb2, self.response)(**{self.output_field: data})
+
+    def __repr__(self) -> str:
+        return f"ServiceSpec({self.name!r})"
+
+
+SERVICES: Dict[str, ServiceSpec] = {
+    "studio-voice": ServiceSpec(
+        name="studio-voice",
+        interfaces_dir=os.path.join(REPO_ROOT, "studio-voice", "interfaces", "studio_voice"),
+        module="studiovoice",
+        service="MaxineStudioVoice",
+        method="EnhanceAudio",
+        request="EnhanceAudioRequest",
+        response="EnhanceAudioResponse",
+        input_field="audio_stream_data",
+        output_field="audio_stream_data",
+    ),
+    "eye-contact": ServiceSpec(
+        name="eye-contact",
+        interfaces_dir=os.path.join(REPO_ROOT, "eye-contact", "interfaces"),
+        module="eyecontact",
+        service="MaxineEyeContactService",
+        method="RedirectGaze",
+        request="RedirectGazeRequest",
+        response="RedirectGazeResponse",
+        input_field="video_file_data",
+        output_field="video_file_data",
+        config="RedirectGazeConfig",
+    ),
+    "audio2face-2d": ServiceSpec(
+        name="audio2face-2d",
+        interfaces_dir=os.path.join(REPO_ROOT, "audio2face-2d", "python", "interfaces"),
+        module="audio2face2d",
+        service="Audio2Face2DService",
+        method="Animate",
+        request="AnimateRequest",
+        response="AnimateResponse",
+        input_field="audio_file_data",
+        output_field="video_file_data",
+        config="AnimateConfig",
+    ),
+}
+
+
+def get_service(name: str) -> ServiceSpec:
+    """Function to look up a service by its client directory name.
+
+    Args:
+      name: One of "studio-voice", "eye-contact" or "audio2face-2d"
+    """
+    try:
+        return SERVICES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown service '{name}', expected one of {', '.join(sorted(SERVICES))}."
+        ) from None
@@ -0,0 +1,393 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Local stand-in servers for the Maxine NIM services.
+
+The stand-ins implement the generated servicers of each service and echo the
+uploaded input file back as the output, honouring the config echo protocol.
+They make it possible to exercise and benchmark the clients without a GPU.
+
+Faults can be injected to test how the clients behave when a NIM misbehaves:
+calls aborted part-way through, a missing config echo, keepalives between
+output chunks or an output stream ending early. A simulated capacity makes a
+stand-in behave like a GPU fleet with a fixed number of slots, queueing calls
+above it and rejecting calls above its queue with RESOURCE_EXHAUSTED. With a
+tracer, each call is recorded as a server span, child of the client span whose
+traceparent metadata it received, see nim_common.tracing.
+
+Run a stand-in from the command line with:
+
+    python -m nim_common.standin --service studio-voice --port 8001
+"""
+
+import argparse
+import json
+import threading
+from concurrent import futures
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+import grpc
+from google.protobuf import empty_pb2
+
+from .channels import read_file_content
+from .services import SERVICES, ServiceSpec, get_service
+from .tracing import SPAN_KIND_SERVER, Tracer, create_exporter, error_message, extract
+
+
+class Faults(NamedTuple):
+    """Faults injected by an EchoServicer.
+
+    Attributes:
+      fail_after: Output chunks sent before the call is aborted, None to never abort
+      fail_code: Name of the grpc.StatusCode the call is aborted with
+      fail_calls: Number of calls, counted from the first, the abort applies to, None for all
+      skip_config_echo: Do not echo the config back
+      keepalives: Keepalives sent before each output chunk, for services that have them
+      keepalive_interval: Seconds to wait before each keepalive
+      truncate_after: Output chunks sent before the response stream ends early with OK
+    """
+
+    fail_after: Optional[int] = None
+    fail_code: str = "UNAVAILABLE"
+    fail_calls: Optional[int] = None
+    skip_config_echo: bool = False
+    keepalives: int = 0
+    keepalive_interval: float = 0.0
+    truncate_after: Optional[int] = None
+
+
+class Capacity(NamedTuple):
+    """Simulated processing capacity of an EchoServicer.
+
+    Attributes:
+      slots: Calls processed at the same time, further calls wait for a slot
+      chunk_seconds: Seconds of processing per output chunk while holding a slot
+      queue: Calls waiting for a slot before further calls fail, None for no limit
+    """
+
+    slots: int
+    chunk_seconds: float = 0.0
+    queue: Optional[int] = None
+
+
+def _keepalive_field(spec: ServiceSpec) -> Optional[str]:
+    """Function to return the keepalive field of the response message, None without one."""
+    fields = getattr(spec.pb2, spec.response).DESCRIPTOR.fields_by_name
+    for name in ("keepalive", "keep_alive"):
+        if name in fields:
+            return name
+    return None
+
+
+class EchoServicer:
+    """Servicer behaviour echoing the input file back in output chunks.
+
+    Args:
+      spec: Service to stand in for
+      first_output_delay: Seconds to wait before sending the first output chunk
+      faults: Faults to inject, none when None
+      capacity: Simulated processing capacity, unlimited when None
+      tracer: Tracer recording a server span per call, no spans when None
+    """
+
+    def __init__(
+        self,
+        spec: ServiceSpec,
+        first_output_delay: float = 0.0,
+        faults: Optional[Faults] = None,
+        capacity: Optional[Capacity] = None,
+        tracer: Optional[Tracer] = None,
+    ) -> None:
+        self.spec = spec
+        self.first_output_delay = first_output_delay
+        self.faults = faults or Faults()
+        self.capacity = capacity
+        self.tracer = tracer
+        self.calls = 0
+        self.cancelled = 0  # calls that ended because the client cancelled or timed out
+        self.failed = 0  # calls aborted by an injected fault
+        self.rejected = 0  # calls failed with RESOURCE_EXHAUSTED above the simulated capacity
+        self.active = 0  # calls holding a simulated slot
+        self.waiting = 0  # calls waiting for a simulated slot
+        self.peak_active = 0
+        self.metadata = None  # invocation metadata of the latest call
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+
+    def _keepalive(self):
+        field = _keepalive_field(self.spec)
+        if field is None:
+            return None
+        return getattr(self.spec.pb2, self.spec.response)(**{field: empty_pb2.Empty()})
+
+    def _take_slot(self, context: grpc.ServicerContext, terminated: threading.Event) -> bool:
+        """Function to wait for a simulated slot, False when the call terminated first."""
+        capacity = self.capacity
+        with self._lock:
+            full = self.active >= capacity.slots
+            if full and capacity.queue is not None and self.waiting >= capacity.queue:
+                self.rejected += 1
+                rejected = True
+            else:
+                rejected = False
+                self.waiting += 1
+                while self.active >= capacity.slots and not terminated.is_set():
+                    self._slot_free.wait(0.05)
+                self.waiting -= 1
+                if terminated.is_set():
+                    return False
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+        if rejected:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Simulated capacity exceeded")
+        return True
+
+    def _free_slot(self) -> None:
+        with self._lock:
+            self.active -= 1
+            self._slot_free.notify()
+
+    def handle(self, request_iterator: Iterator, context: grpc.ServicerContext) -> Iterator:
+        """Function implementing the streaming RPC of the service."""
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+            self.metadata = dict(context.invocation_metadata())
+        faults = self.faults
+        failing = faults.fail_after is not None and (
+            faults.fail_calls is None or call_number <= faults.fail_calls
+        )
+        keepalive = self._keepalive() if faults.keepalives else None
+        pb2 = self.spec.pb2
+        # Set when the call terminates, so simulated processing stops on cancellation
+        terminated = threading.Event()
+        context.add_callback(terminated.set)
+        delayed = False
+        holding = False
+        sent = 0
+        span = None
+        if self.tracer is not None:
+            span = self.tracer.start_span(
+                self.spec.full_method.lstrip("/"),
+                extract(context.invocation_metadata()),
+                SPAN_KIND_SERVER,
+                {"rpc.system": "grpc", "nim.service": self.spec.name},
+            )
+        try:
+            if self.capacity is not None:
+                if span is None:
+                    holding = self._take_slot(context, terminated)
+                else:
+                    with self.tracer.span("queue", span):
+                        holding = self._take_slot(context, terminated)
+                if not holding:
+                    return
+            for request in request_iterator:
+                kind = request.WhichOneof("stream_input")
+                if kind == "config":
+                    if not faults.skip_config_echo:
+                        yield getattr(pb2, self.spec.response)(config=request.config)
+                    continue
+                if not delayed and self.first_output_delay:
+                    if terminated.wait(self.first_output_delay):
+                        return
+                delayed = True
+                if failing and sent >= faults.fail_after:
+                    with self._lock:
+                        self.failed += 1
+                    context.abort(getattr(grpc.StatusCode, faults.fail_code), "Injected fault")
+                if faults.truncate_after is not None and sent >= faults.truncate_after:
+                    return
+                if keepalive is not None:
+                    for _ in range(faults.keepalives):
+                        if terminated.wait(faults.keepalive_interval):
+                            return
+                        yield keepalive
+                if holding and self.capacity.chunk_seconds:
+                    if terminated.wait(self.capacity.chunk_seconds):
+                        return
+                yield self.spec.data_response(getattr(request, self.spec.input_field))
+                sent += 1
+        except Exception as e:
+            if span is not None:
+                # context.abort raises a bare exception, the status is kept by the context
+                code = context.code()
+                if code is None:
+                    span.set_error(error_message(e))
+                else:
+                    details = context.details()
+                    if isinstance(details, bytes):
+                        details = details.decode(errors="replace")
+                    span.set_error(f"{code.name}: {details}")
+            raise
+        finally:
+            if holding:
+                self._free_slot()
+            if not context.is_active():
+                with self._lock:
+                    self.cancelled += 1
+            if span is not None:
+                if not context.is_active() and span.status_message is None:
+                    span.set_error("Cancelled by the client")
+                span.set_attribute("nim.output_chunks", sent)
+                span.end()
+
+    def servicer(self):
+        """Function to build an instance of the generated servicer class backed by handle."""
+        base = self.spec.servicer_base()
+        servicer_class = type(f"Echo{base.__name__}", (base,), {self.spec.method: _method(self)})
+        return servicer_class()
+
+
+def _method(echo: EchoServicer):
+    def method(self, request_iterator, context):
+        return echo.handle(request_iterator, context)
+
+    return method
+
+
+def create_server(
+    spec: ServiceSpec,
+    servicer: any = None,
+    address: str = "127.0.0.1:0",
+    max_workers: int = 64,
+    options: tuple = (),
+    credentials: Optional[grpc.ServerCredentials] = None,
+) -> Tuple[grpc.Server, int]:
+    """Function to create and start a stand-in server.
+
+    Args:
+      spec: Service to stand in for
+      servicer: Generated servicer instance, an echo servicer when None
+      address: Address to bind, port 0 picks a free port
+      max_workers: Size of the server thread pool, bounds the concurrent streams
+      options: Additional grpc.server channel options
+      credentials: Server credentials to serve TLS or MTLS with, plaintext when None
+
+    Returns:
+      The started server and the port it listens on.
+    """
+    if servicer is None:
+        servicer = EchoServicer(spec).servicer()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        options=(("grpc.max_concurrent_streams", max_workers),) + tuple(options),
+    )
+    spec.add_servicer(servicer, server)
+    if credentials is None:
+        port = server.add_insecure_port(address)
+    else:
+        port = server.add_secure_port(address, credentials)
+    server.start()
+    return server, port
+
+
+def main():
+    """
+    Stand-in server entry point
+    """
+    parser = argparse.ArgumentParser(description="Run a local stand-in for a Maxine NIM.")
+    parser.add_argument("--service", choices=sorted(SERVICES), required=True)
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8001, help="Port to listen on.")
+    parser.add_argument(
+        "--first-output-delay",
+        type=float,
+        default=0.0,
+        help="Seconds to wait before sending the first output chunk of a call.",
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=64, help="Maximum number of concurrent streams."
+    )
+    parser.add_argument(
+        "--faults",
+        type=str,
+        default=None,
+        help="Faults to inject as a JSON object of Faults fields, "
+        'e.g. \'{"fail_after": 3, "fail_calls": 1}\'.',
+    )
+    parser.add_argument(
+        "--capacity",
+        type=str,
+        default=None,
+        help="Simulated capacity as a JSON object of Capacity fields, "
+        'e.g. \'{"slots": 4, "chunk_seconds": 0.05, "queue": 4}\'.',
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Record a server span per call into this OTLP/JSON lines file, or post them to "
+        "this OTLP/HTTP collector URL, e.g. http://127.0.0.1:4318/v1/traces.",
+    )
+    parser.add_argument(
+        "--ssl-cert",
+        type=str,
+        default=None,
+        help="Serve TLS with this server certificate chain, requires --ssl-key.",
+    )
+    parser.add_argument("--ssl-key", type=str, default=None, help="Server private key.")
+    parser.add_argument(
+        "--ssl-root-cert",
+        type=str,
+        default=None,
+        help="Serve MTLS, requiring client certificates signed by this root certificate.",
+    )
+    args = parser.parse_args()
+    spec = get_service(args.service)
+    credentials = None
+    if args.ssl_cert or args.ssl_key:
+        if not (args.ssl_cert and args.ssl_key):
+            raise RuntimeError("--ssl-cert and --ssl-key are required together.")
+        root_cert = read_file_content(args.ssl_root_cert) if args.ssl_root_cert else None
+        credentials = grpc.ssl_server_credentials(
+            [(read_file_content(args.ssl_key), read_file_content(args.ssl_cert))],
+            root_certificates=root_cert,
+            require_client_auth=root_cert is not None,
+        )
+    faults = Faults(**json.loads(args.faults)) if args.faults else None
+    capacity = Capacity(**json.loads(args.capacity)) if args.capacity else None
+    tracer = None
+    if args.trace:
+        tracer = Tracer(create_exporter(args.trace), service_name=f"{spec.name}-standin")
+    echo = EchoServicer(
+        spec,
+        first_output_delay=args.first_output_delay,
+        faults=faults,
+        capacity=capacity,
+        tracer=tracer,
+    )
+    server, port = create_server(
+        spec,
+        echo.servicer(),
+        address=f"{args.host}:{args.port}",
+        max_workers=args.max_workers,
+        credentials=credentials,
+    )
+    print(f"Stand-in {spec.name} server listening on {args.host}:{port}")
+    try:
+        server.wait_for_termination()
+    finally:
+        if tracer is not None:
+            tracer.close()
+
+
+if __name__ == "__main__":
+    main()
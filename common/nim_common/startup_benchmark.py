@@ -0,0 +1,159 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Start-up time benchmark and budget for the client command line tools.
+
+The clients are launched thousands of times from job runners, so their start-up
+cost matters. Each tool is run with --help, which must not import grpc, the
+generated protobuf modules or other heavy optional dependencies. The median wall
+time over several runs is compared against a budget.
+
+    python -m nim_common.startup_benchmark --runs 10 --budget-ms 100
+
+The exit status is non-zero when a tool exceeds the budget or imports a heavy
+module, so the benchmark can gate CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+from .services import REPO_ROOT
+
+COMMON_DIR = os.path.join(REPO_ROOT, "common")
+
+# Command lines relative to REPO_ROOT, run with --help appended
+TOOLS: List[Tuple[str, List[str]]] = [
+    ("studio_voice.py", ["studio-voice/scripts/studio_voice.py"]),
+    ("studio_voice_batch.py", ["studio-voice/scripts/studio_voice_batch.py"]),
+    ("eye-contact.py", ["eye-contact/scripts/eye-contact.py"]),
+    ("audio2face-2d.py", ["audio2face-2d/python/scripts/audio2face-2d.py"]),
+    ("nim_common.submit", ["-m", "nim_common.submit"]),
+]
+
+HEAVY_MODULES = ("grpc", "google.protobuf", "numpy", "cv2")
+
+
+def _command(arguments: List[str]) -> List[str]:
+    if arguments[0] == "-m":
+        return [sys.executable, *arguments, "--help"]
+    return [sys.executable, os.path.join(REPO_ROOT, arguments[0]), *arguments[1:], "--help"]
+
+
+def _environment() -> dict:
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [COMMON_DIR, environment.get("PYTHONPATH")])
+    )
+    return environment
+
+
+def time_command(command: List[str], runs: int, cwd: str) -> float:
+    """Function to return the median wall time in seconds of running command."""
+    durations = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(
+            command,
+            cwd=cwd,
+            env=_environment(),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        durations.append(time.perf_counter() - start_time)
+    return statistics.median(durations)
+
+
+def heavy_imports(command: List[str], cwd: str) -> List[str]:
+    """Function to list the heavy top level modules imported by command."""
+    completed = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        cwd=cwd,
+        env=_environment(),
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    found = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") < 2:
+            continue
+        module = line.rsplit("|", 1)[1].strip()
+        for heavy in HEAVY_MODULES:
+            if module == heavy or module.startswith(heavy + "."):
+                found.add(heavy)
+    return sorted(found)
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(description="Measure the start-up time of the clients.")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per tool.")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=100.0,
+        help="Maximum median start-up time in milliseconds.",
+    )
+    parser.add_argument(
+        "--cwd",
+        type=str,
+        default=os.path.expanduser("~"),
+        help="Working directory the tools are started from, to check they do not depend on it.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Benchmark entry point
+    """
+    args = parse_args()
+    baseline = time_command([sys.executable, "-c", "pass"], args.runs, args.cwd)
+    print(f"{'tool':<24}{'median ms':>12}{'over python ms':>16}  heavy imports")
+    print(f"{'python -c pass':<24}{baseline * 1000:>12.1f}{0.0:>16.1f}")
+    failures = []
+    for name, arguments in TOOLS:
+        command = _command(arguments)
+        median = time_command(command, args.runs, args.cwd)
+        heavy = heavy_imports(command, args.cwd)
+        print(
+            f"{name:<24}{median * 1000:>12.1f}{(median - baseline) * 1000:>16.1f}  "
+            f"{', '.join(heavy) or '-'}"
+        )
+        if median * 1000 > args.budget_ms:
+            failures.append(f"{name} took {median * 1000:.1f} ms, budget {args.budget_ms} ms")
+        if heavy:
+            failures.append(f"{name} imported {', '.join(heavy)} for --help")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Streaming one input file through a Maxine NIM service into an output file."""
+
+import os
+import time
+from typing import BinaryIO, Iterator, Optional, Sequence
+
+import grpc
+
+from .codec import is_data
+from .compression import choose_compression
+from .deadlines import CancelScope, call_timeout, expected_processing_time, reclaimed_time
+from .integrity import OutputVerificationError, OutputVerifier
+from .retries import call_with_retries
+from .media import media_duration
+from .services import ServiceSpec
+from .throughput import media_rates
+from .tracing import StreamSpans, Tracer, error_message
+
+DATA_CHUNKS = 64 * 1024  # bytes, input files are sent in 64KB chunks
+
+
+class StreamResult:
+    """Outcome and timings of a single streaming call.
+
+    Args:
+      service: Name of the service the call was made to
+      input_filepath: Path to input file
+      output_filepath: Path to output file
+    """
+
+    def __init__(
+        self, service: str, input_filepath: os.PathLike, output_filepath: os.PathLike
+    ) -> None:
+        self.service = service
+        self.input_filepath = input_filepath
+        self.output_filepath = output_filepath  # None when the output is not written to a file
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.input_chunks = 0
+        self.output_chunks = 0
+        self.largest_input_chunk = 0  # bytes, largest input chunk read from the file
+        self.largest_output_chunk = 0  # bytes, largest output chunk received
+        self.traffic_class = None  # tenant or priority class the call was scheduled under
+        self.queue_wait = 0.0  # seconds spent waiting for a free stream slot or admission
+        self.media_duration = None  # seconds of media in the input, None when unknown
+        self.started = None  # time.time() when the call started
+        self.upload_time = None  # seconds from call start until the last input chunk was taken
+        self.first_output = None  # seconds from call start to the first output chunk
+        self.latency = None  # seconds from call start to the end of the response stream
+        self.timeout = None  # deadline of the call in seconds, None without one
+        self.cancelled = None  # reason the call was cancelled, "deadline" when it timed out
+        self.reclaimed = None  # estimated processing seconds saved by cancelling the call
+        self.compression = None  # algorithm the upload was compressed with, None for none
+        self.compression_reason = None
+        self.bytes_saved = None  # upload bytes saved by compression, estimated from a sample
+        self.retries = 0  # calls restarted after a retryable error
+        self.hashes = None  # hex digest of the output per hash algorithm
+        self.integrity = None  # container, validity and problems found in the output
+        self.trace_id = None  # trace the call was recorded in, None when it was not traced
+        self.hedge = None  # "won" or "lost" when a hedge was sent, see nim_common.hedging
+        self.error = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def rates(self) -> dict:
+        """RTF, media seconds per second and input bytes per second of the call."""
+        return media_rates(self.media_duration, self.latency, self.input_bytes)
+
+    @property
+    def peak_buffered(self) -> int:
+        """Bytes of payload the client held at once for the stream, at most."""
+        return self.largest_input_chunk + self.largest_output_chunk
+
+    def as_dict(self) -> dict:
+        return {
+            "service": self.service,
+            "input": os.fspath(self.input_filepath),
+            "output": None if self.output_filepath is None else os.fspath(self.output_filepath),
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "input_chunks": self.input_chunks,
+            "output_chunks": self.output_chunks,
+            "peak_buffered_bytes": self.peak_buffered,
+            "traffic_class": self.traffic_class,
+            "queue_wait_s": self.queue_wait,
+            "started": self.started,
+            "upload_s": self.upload_time,
+            "first_output_s": self.first_output,
+            "latency_s": self.latency,
+            "media_s": self.media_duration,
+            **self.rates,
+            "timeout_s": self.timeout,
+            "cancelled": self.cancelled,
+            "reclaimed_s": self.reclaimed,
+            "compression": self.compression,
+            "compression_reason": self.compression_reason,
+            "bytes_saved": self.bytes_saved,
+            "retries": self.retries,
+            "hashes": self.hashes,
+            "integrity": self.integrity,
+            "hedge": self.hedge,
+            "trace_id": self.trace_id,
+            "error": self.error,
+        }
+
+
+class PreparedInput:
+    """An input file read and chunked once, for many calls with the same input.
+
+    The data requests are built once and kept as read-only objects shared by
+    every call made with the input, so that calls differing only in their
+    config do not read, chunk and encode the file again.
+
+    Args:
+      spec: Service the requests are built for
+      input_filepath: Path to input file
+      chunk_size: Size in bytes of the input chunks
+      single_message_limit: Largest input in bytes sent as a single message, 0 to always chunk
+      raw: Pre-encode the requests with spec.codec instead of building request messages
+    """
+
+    def __init__(
+        self,
+        spec: ServiceSpec,
+        input_filepath: os.PathLike,
+        chunk_size: int = DATA_CHUNKS,
+        single_message_limit: int = 0,
+        raw: bool = True,
+    ) -> None:
+        with open(input_filepath, "rb") as fd:
+            data = fd.read()
+        if len(data) <= single_message_limit:
+            chunk_size = max(single_message_limit, 1)
+        self.spec = spec
+        self.input_filepath = input_filepath
+        self.raw = raw
+        self.size = len(data)
+        try:
+            self.media_duration = media_duration(input_filepath)
+        except OSError:
+            self.media_duration = None
+        self.chunk_sizes = [
+            min(chunk_size, len(data) - offset) for offset in range(0, len(data), chunk_size)
+        ]
+        view = memoryview(data)
+        if raw:
+            encode = spec.codec.encode_data
+        else:
+
+            def encode(chunk: memoryview) -> any:
+                return spec.data_request(bytes(chunk))
+
+        self.requests = tuple(
+            encode(view[offset : offset + size])
+            for offset, size in zip(range(0, len(data), chunk_size), self.chunk_sizes)
+        )
+
+
+def generate_requests(
+    spec: ServiceSpec,
+    input_filepath: os.PathLike,
+    params: Optional[dict] = None,
+    chunk_size: int = DATA_CHUNKS,
+    single_message_limit: int = 0,
+    result: Optional[StreamResult] = None,
+    raw: bool = False,
+    upload_rate: Optional[float] = None,
+    prepared: Optional[PreparedInput] = None,
+) -> Iterator:
+    """Generator to produce the request data stream
+
+    Inputs up to single_message_limit bytes are sent as one message instead of
+    going through the chunking loop. With an upload_rate, chunks are held back
+    so the input is sent no faster than that, like a live source would. With a
+    PreparedInput, its requests are sent and the file is not read.
+
+    Args:
+      spec: Service the requests are built for
+      input_filepath: Path to input file
+      params: Parameters for the feature, sent as the first message when given
+      chunk_size: Size in bytes of the input chunks
+      single_message_limit: Largest input in bytes sent as a single message, 0 to always chunk
+      result: Optional StreamResult whose input_bytes is updated as chunks are sent
+      raw: Yield requests pre-encoded by spec.codec instead of request messages
+      upload_rate: Largest upload rate in bytes per second, None for as fast as possible
+      prepared: PreparedInput of input_filepath, built with the same raw setting
+    """
+    encode = spec.codec.encode_data if raw else spec.data_request
+    if params is not None:
+        yield spec.config_request(params)
+    if prepared is not None:
+        if prepared.raw != raw:
+            raise ValueError("The prepared input was encoded for a different codec.")
+        for request, size in zip(prepared.requests, prepared.chunk_sizes):
+            if result is not None:
+                result.input_bytes += size
+                result.input_chunks += 1
+                result.largest_input_chunk = max(result.largest_input_chunk, size)
+            yield request
+        return
+    start_time = time.perf_counter()
+    sent = 0
+    with open(input_filepath, "rb") as fd:
+        if os.fstat(fd.fileno()).st_size <= single_message_limit and not upload_rate:
+            chunk_size = single_message_limit
+        while True:
+            buffer = fd.read(chunk_size)
+            if buffer == b"":
+                break
+            if upload_rate:
+                delay = start_time + sent / upload_rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sent += len(buffer)
+            if result is not None:
+                result.input_bytes += len(buffer)
+                result.input_chunks += 1
+                result.largest_input_chunk = max(result.largest_input_chunk, len(buffer))
+            yield encode(buffer)
+
+
+def stream_into(
+    channel: any,
+    spec: ServiceSpec,
+    input_filepath: os.PathLike,
+    sink: BinaryIO,
+    params: Optional[dict] = None,
+    metadata: Optional[tuple] = None,
+    chunk_size: int = DATA_CHUNKS,
+    single_message_limit: int = 0,
+    result: Optional[StreamResult] = None,
+    timeout: Optional[float] = None,
+    deadline_rtf: Optional[float] = None,
+    scope: Optional[CancelScope] = None,
+    raw: bool = True,
+    compression: str = "auto",
+    hashes: Sequence[str] = (),
+    verify: bool = False,
+    upload_rate: Optional[float] = None,
+    prepared: Optional[PreparedInput] = None,
+    spans: Optional[StreamSpans] = None,
+) -> StreamResult:
+    """Function to stream input_filepath through the service into a writable sink.
+
+    Config echoes and keepalives are skipped, only output chunks are written.
+    gRPC errors propagate to the caller, with the timings gathered so far kept
+    in result. Hashes and the container check are computed from the chunks as
+    they are written, see nim_common.integrity; an output failing the check
+    raises OutputVerificationError once it has been written. With spans, the
+    phases of the call are traced and its traceparent is sent as metadata; the
+    caller ends the spans, see nim_common.tracing.
+
+    Args:
+      channel: gRPC channel for server client communication
+      spec: Service to call
+      input_filepath: Path to input file
+      sink: Binary file-like object the output chunks are written to
+      params: Parameters for the feature, sent as the first message when given
+      metadata: Request metadata such as NVCF credentials
+      chunk_size: Size in bytes of the input chunks
+      single_message_limit: Largest input in bytes sent as a single message, 0 to always chunk
+      result: StreamResult to fill in, a new one is created when None
+      timeout: Deadline of the call in seconds
+      deadline_rtf: Expected real-time factor, bounds the deadline to duration * RTF plus slack
+      scope: CancelScope the call is attached to, bounds the deadline to the scope's
+      raw: Encode and decode data chunks with spec.codec instead of protobuf messages
+      compression: Compression mode of the upload, see nim_common.compression
+      hashes: Names of the hash algorithms computed over the output
+      verify: Check the WAV or MP4 structure of the output
+      upload_rate: Largest upload rate in bytes per second, None for as fast as possible
+      prepared: PreparedInput of input_filepath whose requests are sent instead of the file's
+      spans: StreamSpans the phases of the call are recorded in
+    """
+    if result is None:
+        result = StreamResult(spec.name, input_filepath, None)
+    if scope is None:
+        scope = CancelScope()
+    timeout = scope.timeout(call_timeout(input_filepath, deadline_rtf, timeout))
+    result.timeout = timeout
+    if prepared is not None:
+        result.media_duration = prepared.media_duration
+    else:
+        try:
+            result.media_duration = media_duration(input_filepath)
+        except OSError:
+            pass  # reported by the upload
+    requests = generate_requests(
+        spec,
+        input_filepath,
+        params=params,
+        chunk_size=chunk_size,
+        single_message_limit=single_message_limit,
+        result=result,
+        raw=raw,
+        upload_rate=upload_rate,
+        prepared=prepared,
+    )
+
+    def upload() -> Iterator:
+        yield from requests
+        result.upload_time = time.perf_counter() - start_time
+
+    if raw:
+        call = spec.codec.call(channel)
+
+        def output(response: any) -> Optional[bytes]:
+            return response if is_data(response) else None
+
+    else:
+        call = spec.call(channel)
+
+        def output(response: any) -> Optional[bytes]:
+            if response.HasField(spec.output_field):
+                return getattr(response, spec.output_field)
+            return None
+
+    verifier = None
+    if hashes or verify:
+        verifier = OutputVerifier(hashes, container="auto" if verify else "none")
+    decision = choose_compression(input_filepath, compression)
+    result.compression = decision.algorithm
+    result.compression_reason = decision.reason
+    start_time = time.perf_counter()
+    result.started = time.time()
+    upload_requests = upload()
+    if spans is not None:
+        result.trace_id = spans.trace_id
+        metadata = spans.metadata(metadata)
+        spans.connect(channel, timeout)
+        upload_requests = spans.requests(upload_requests, config=params is not None)
+    responses = call(
+        scope.guard(upload_requests),
+        metadata=metadata,
+        timeout=timeout,
+        compression=decision.grpc_compression() if decision.algorithm else None,
+    )
+    received = responses
+    if spans is not None:
+        received = spans.responses(responses, lambda response: output(response) is not None)
+    completed = False
+    try:
+        with scope.attach(responses):
+            for response in received:
+                data = output(response)
+                if data is not None:
+                    if result.first_output is None:
+                        result.first_output = time.perf_counter() - start_time
+                    result.output_bytes += len(data)
+                    result.output_chunks += 1
+                    result.largest_output_chunk = max(result.largest_output_chunk, len(data))
+                    sink.write(data)
+                    if verifier is not None:
+                        verifier.write(data)
+        if spans is not None:
+            spans.flush(sink)
+        completed = True
+    finally:
+        responses.cancel()
+        result.latency = time.perf_counter() - start_time
+        result.bytes_saved = decision.estimated_saving(result.input_bytes)
+        if not completed:
+            if scope.reason is not None:
+                result.cancelled = scope.reason
+                expected = expected_processing_time(input_filepath, deadline_rtf)
+                result.reclaimed = reclaimed_time(expected, result.latency)
+            elif timeout is not None and result.latency >= timeout:
+                result.cancelled = "deadline"
+    if verifier is not None:
+        summary = verifier.summary()
+        result.hashes = summary["hashes"] or None
+        if verify:
+            result.integrity = {key: summary[key] for key in ("container", "valid", "problems")}
+            if not summary["valid"]:
+                raise OutputVerificationError(
+                    "Output failed verification: " + " ".join(summary["problems"])
+                )
+    return result
+
+
+def stream_file(
+    channel: any,
+    spec: ServiceSpec,
+    input_filepath: os.PathLike,
+    output_filepath: os.PathLike,
+    params: Optional[dict] = None,
+    metadata: Optional[tuple] = None,
+    chunk_size: int = DATA_CHUNKS,
+    single_message_limit: int = 0,
+    result: Optional[StreamResult] = None,
+    timeout: Optional[float] = None,
+    deadline_rtf: Optional[float] = None,
+    scope: Optional[CancelScope] = None,
+    raw: bool = True,
+    compression: str = "auto",
+    retries: int = 0,
+    hashes: Sequence[str] = (),
+    verify: bool = False,
+    upload_rate: Optional[float] = None,
+    prepared: Optional[PreparedInput] = None,
+    tracer: Optional[Tracer] = None,
+    trace_parent: any = None,
+) -> StreamResult:
+    """Function to stream input_filepath through the service and write its output file.
+
+    A call failing with a retryable error is restarted up to retries times,
+    rewriting the output file from the beginning, see nim_common.retries. With
+    a tracer, the attempts are traced under one client span.
+
+    Args:
+      channel: gRPC channel for server client communication
+      spec: Service to call
+      input_filepath: Path to input file
+      output_filepath: Path to output file
+      params: Parameters for the feature, sent as the first message when given
+      metadata: Request metadata such as NVCF credentials
+      chunk_size: Size in bytes of the input chunks
+      single_message_limit: Largest input in bytes sent as a single message, 0 to always chunk
+      result: StreamResult to fill in, a new one is created when None
+      timeout: Deadline of the call in seconds
+      deadline_rtf: Expected real-time factor, bounds the deadline to duration * RTF plus slack
+      scope: CancelScope the call is attached to, bounds the deadline to the scope's
+      raw: Encode and decode data chunks with spec.codec instead of protobuf messages
+      compression: Compression mode of the upload, see nim_common.compression
+      retries: Number of times a call failing with a retryable error is restarted
+      hashes: Names of the hash algorithms computed over the output
+      verify: Check the WAV or MP4 structure of the output
+      upload_rate: Largest upload rate in bytes per second, None for as fast as possible
+      prepared: PreparedInput of input_filepath whose requests are sent instead of the file's
+      tracer: Tracer the call is recorded by, see nim_common.tracing
+      trace_parent: Parent span or traceparent value of the call, None to start a new trace
+    """
+    if result is None:
+        result = StreamResult(spec.name, input_filepath, output_filepath)
+    spans = None
+    if tracer is not None:
+        spans = StreamSpans(tracer, spec, trace_parent)
+
+    def attempt() -> StreamResult:
+        result.input_bytes = 0
+        result.output_bytes = 0
+        result.input_chunks = 0
+        result.output_chunks = 0
+        result.upload_time = None
+        result.first_output = None
+        with open(output_filepath, "wb") as fd:
+            return stream_into(
+                channel,
+                spec,
+                input_filepath,
+                fd,
+                params=params,
+                metadata=metadata,
+                chunk_size=chunk_size,
+                single_message_limit=single_message_limit,
+                result=result,
+                timeout=timeout,
+                deadline_rtf=deadline_rtf,
+                scope=scope,
+                raw=raw,
+                compression=compression,
+                hashes=hashes,
+                verify=verify,
+                upload_rate=upload_rate,
+                prepared=prepared,
+                spans=spans,
+            )
+
+    def on_retry(number: int, error: grpc.RpcError, delay: float) -> None:
+        result.retries = number
+
+    if spans is None:
+        return call_with_retries(attempt, retries, scope=scope, on_retry=on_retry)
+    error = None
+    try:
+        return call_with_retries(attempt, retries, scope=scope, on_retry=on_retry)
+    except Exception as e:
+        error = error_message(e)
+        raise
+    finally:
+        spans.end(
+            error, {"nim.input_bytes": result.input_bytes, "nim.output_bytes": result.output_bytes}
+        )
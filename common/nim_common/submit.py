@@ -0,0 +1,322 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Thin command line shim submitting jobs to the client daemon.
+
+Only the standard library is imported, so a submission costs an interpreter
+start and a local socket round trip instead of loading grpc and the generated
+stubs and connecting to the NIM.
+
+    python -m nim_common.submit --service studio-voice --input in.wav --output out.wav
+"""
+
+import argparse
+import json
+import os
+import socket
+import stat
+import sys
+import time
+from typing import BinaryIO, Optional, Tuple
+
+# Private directory of the socket when there is no XDG_RUNTIME_DIR, created by the daemon
+SOCKET_DIR = os.path.join("/tmp", f"nim-clients-{os.getuid()}")
+# Default Unix domain socket of the daemon, per user
+DEFAULT_SOCKET = os.environ.get("NIM_CLIENTS_SOCKET") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or SOCKET_DIR, "nim-clients.sock"
+)
+
+
+def check_socket_directory(socket_path: str, create: bool = False) -> None:
+    """Function to make sure that no other user can create or replace socket_path.
+
+    Args:
+      socket_path: Path of the daemon's Unix domain socket
+      create: Create SOCKET_DIR with mode 0700 when socket_path is in it
+
+    Raises:
+      PermissionError: When the directory of socket_path belongs to another user or
+        others may write to it, as /tmp itself
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    if create and directory == SOCKET_DIR:
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(
+            f"The socket directory {directory} must belong to you and not be writable by others."
+        )
+
+
+class DaemonConnection:
+    """Minimal HTTP/1.1 client for the daemon API.
+
+    http.client pulls in the email package and ssl, which costs more than the
+    rest of the shim, so requests and responses are handled on the raw socket.
+
+    Args:
+      socket_path: Path of the daemon's Unix domain socket
+      address: host:port of the daemon, used instead of socket_path when given
+      timeout: Socket timeout in seconds
+      token: Shared secret of the daemon, sent as a bearer token
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = DEFAULT_SOCKET,
+        address: Optional[str] = None,
+        timeout: Optional[float] = None,
+        token: Optional[str] = None,
+    ) -> None:
+        self.authorization = f"Authorization: Bearer {token}\r\n" if token else ""
+        if not address:
+            # A socket another user could plant would receive the job paths
+            check_socket_directory(socket_path)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(socket_path)
+        else:
+            host, _, port = address.rpartition(":")
+            self.sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout)
+        self.reader = self.sock.makefile("rb")
+
+    def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, dict]:
+        """Function to send a request and read the status line and headers of the response."""
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n{self.authorization}"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        )
+        self.sock.sendall(head.encode() + body)
+        status = int(self.reader.readline().split(b" ", 2)[1])
+        headers = {}
+        while True:
+            line = self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    def read_body(self, headers: dict, sink: Optional[BinaryIO] = None) -> bytes:
+        """Function to read a response body, copying it to sink when given.
+
+        Raises:
+          ConnectionError: When a chunked body ends before its terminating chunk,
+            which the daemon uses to signal a failed job
+        """
+        parts = []
+        write = sink.write if sink is not None else parts.append
+        if headers.get("transfer-encoding") == "chunked":
+            while True:
+                size_line = self.reader.readline()
+                if not size_line:
+                    raise ConnectionError("Daemon closed the stream before the job completed.")
+                size = int(size_line.split(b";")[0], 16)
+                if size == 0:
+                    self.reader.readline()
+                    break
+                data = self.reader.read(size)
+                if len(data) < size:
+                    raise ConnectionError("Daemon closed the stream before the job completed.")
+                write(data)
+                self.reader.readline()
+        else:
+            write(self.reader.read(int(headers.get("content-length", 0))))
+        return b"".join(parts)
+
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+def submit(connection: DaemonConnection, job: dict, sink: BinaryIO = None) -> dict:
+    """Function to run a job on the daemon.
+
+    Args:
+      connection: Connection to the daemon
+      job: Job description, see nim_common.daemon
+      sink: Writable binary object receiving the output when job has no output path
+
+    Returns:
+      The job result reported by the daemon, or {"output_bytes": n} for streamed output.
+    """
+    status, headers = connection.request("POST", "/v1/jobs", json.dumps(job).encode())
+    if headers.get("content-type") == "application/json":
+        result = json.loads(connection.read_body(headers))
+        if status != 200:
+            raise RuntimeError(result.get("error") or f"Daemon returned {status}")
+        return result
+
+    class _Counter:
+        written = 0
+
+        def write(self, data: bytes) -> None:
+            self.written += len(data)
+            sink.write(data)
+
+    counter = _Counter()
+    connection.read_body(headers, counter)
+    return {"output_bytes": counter.written}
+
+
+def status(connection: DaemonConnection) -> dict:
+    """Function to fetch the daemon status."""
+    _, headers = connection.request("GET", "/v1/status")
+    return json.loads(connection.read_body(headers))
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(description="Submit a job to the Maxine NIM client daemon.")
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=DEFAULT_SOCKET,
+        help="Unix domain socket of the daemon, defaults to NIM_CLIENTS_SOCKET or "
+        "nim-clients.sock in XDG_RUNTIME_DIR or /tmp/nim-clients-<uid>.",
+    )
+    parser.add_argument(
+        "--url",
+        type=str,
+        help="host:port of a daemon started with --tcp, used instead of --socket.",
+    )
+    parser.add_argument(
+        "--token",
+        type=str,
+        default=os.environ.get("NIM_CLIENTS_TOKEN"),
+        help="Shared secret of the daemon, defaults to the NIM_CLIENTS_TOKEN environment variable.",
+    )
+    parser.add_argument("--status", action="store_true", help="Print the daemon status and exit.")
+    parser.add_argument(
+        "--service", type=str, choices=["studio-voice", "eye-contact", "audio2face-2d"]
+    )
+    parser.add_argument("--input", type=str, help="The path to the input file.")
+    parser.add_argument(
+        "--output", type=str, default="-", help="The path for the output file, - for stdout."
+    )
+    parser.add_argument("--target", type=str, help="IP:port overriding the daemon's target.")
+    parser.add_argument("--params", type=str, help="Feature parameters as a JSON object.")
+    parser.add_argument(
+        "--traffic-class", type=str, help="Tenant or priority class the job is queued under."
+    )
+    parser.add_argument("--timeout", type=float, help="Deadline of the job in seconds.")
+    parser.add_argument(
+        "--compression",
+        choices=["none", "auto", "sample", "gzip", "deflate"],
+        help="Compression mode of the upload, defaults to the daemon's.",
+    )
+    parser.add_argument(
+        "--deadline-rtf",
+        type=float,
+        help="Expected real-time factor, bounds the deadline to input duration * RTF.",
+    )
+    parser.add_argument(
+        "--file",
+        action="append",
+        default=[],
+        help="FIELD=PATH of a bytes parameter, e.g. portrait_image=portrait.png",
+    )
+    parser.add_argument(
+        "--hash",
+        action="append",
+        default=[],
+        help="Hash algorithm computed over the output as it is written, e.g. sha256 or xxh64. "
+        "Can be repeated.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check the WAV or MP4 structure of the output as it is written.",
+    )
+    parser.add_argument(
+        "--traceparent",
+        type=str,
+        default=os.environ.get("TRACEPARENT"),
+        help="W3C trace context the job joins when the daemon runs with --trace, defaults to "
+        "the TRACEPARENT environment variable.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Shim entry point
+    """
+    start_time = time.perf_counter()
+    args = parse_args()
+    connection = DaemonConnection(args.socket, args.url, token=args.token)
+    if args.status:
+        print(json.dumps(status(connection), indent=2))
+        return
+    if not args.service or not args.input:
+        raise RuntimeError("--service and --input are required.")
+    job = {
+        "service": args.service,
+        "input": os.path.abspath(args.input),
+        "output": None if args.output == "-" else os.path.abspath(args.output),
+    }
+    if args.target:
+        job["target"] = args.target
+    if args.traffic_class:
+        job["traffic_class"] = args.traffic_class
+    if args.timeout:
+        job["timeout_s"] = args.timeout
+    if args.deadline_rtf:
+        job["deadline_rtf"] = args.deadline_rtf
+    if args.compression:
+        job["compression"] = args.compression
+    if args.params:
+        job["params"] = json.loads(args.params)
+    if args.file:
+        job["files"] = {}
+        for value in args.file:
+            field, _, path = value.partition("=")
+            job["files"][field] = os.path.abspath(path)
+    if args.hash:
+        job["hashes"] = args.hash
+    if args.verify:
+        job["verify"] = True
+    if args.traceparent:
+        job["traceparent"] = args.traceparent
+
+    result = submit(connection, job, sys.stdout.buffer)
+    if job["output"] is not None:
+        print(
+            f"Job completed in {time.perf_counter() - start_time:.3f}s "
+            f"(queued {result['queue_wait_s']:.3f}s, stream {result['latency_s']:.3f}s, "
+            f"daemon overhead {result['daemon_overhead_s'] * 1000:.2f} ms), "
+            f"the output file {job['output']} is generated."
+        )
+        for name, digest in (result.get("hashes") or {}).items():
+            print(f"{name}: {digest}")
+        if result.get("trace_id"):
+            print(f"trace_id: {result['trace_id']}")
+        if result.get("integrity"):
+            print(f"Verified {result['integrity']['container']} output.")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
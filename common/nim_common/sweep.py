@@ -0,0 +1,406 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Parameter sweeps running many configs of a service over one shared input.
+
+The input is read and chunked once into a PreparedInput whose pre-encoded
+requests are shared read-only by every variant, so a sweep only differs
+between calls in the config message. The variants run concurrently over pooled
+channels, spread over one or more targets, and the result matrix has one row
+per variant with its parameters, timings, real-time factor, output size and
+digest, written as CSV and optionally as a JSON report.
+
+Variants are the cartesian product of the --grid values applied on top of the
+--params base config, or of every entry of a --variants file when one is given.
+Grid values are parsed as JSON when they are valid JSON and kept as strings
+otherwise, so enum values can be given by name.
+
+Sweep the gaze thresholds of eye-contact with:
+
+    python -m nim_common.sweep --service eye-contact --input video.mp4 \\
+        --target 127.0.0.1:8002 --output-dir sweep/ \\
+        --grid gaze_pitch_threshold_low=15,20,25 --grid head_yaw_threshold_high=25,30
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import grpc
+
+from .channels import SSL_MODES, ChannelConfig, ChannelPool, read_file_content
+from .dispatcher import summarize
+from .services import SERVICES, get_service
+from .streaming import DATA_CHUNKS, PreparedInput, StreamResult, stream_file, stream_into
+
+
+class _Discard:
+    """Writable object dropping the output chunks of a variant."""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+
+def parse_value(text: str) -> any:
+    """Function to parse a grid value as JSON, keeping it as a string when it is not JSON."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def expand_grid(base: dict, grid: Dict[str, Sequence]) -> List[dict]:
+    """Function to return base updated with every combination of the grid values, in order."""
+    names = list(grid)
+    return [
+        dict(base, **dict(zip(names, values)))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def variant_label(variant: dict, base: dict) -> str:
+    """Function to name a variant by the parameters it changes in base, "base" for none."""
+    changed = [
+        f"{name}={value}"
+        for name, value in variant.items()
+        if not isinstance(value, bytes) and (name not in base or base[name] != value)
+    ]
+    return ",".join(changed) or "base"
+
+
+def run_sweep(
+    channels: Sequence[grpc.Channel],
+    prepared: PreparedInput,
+    variants: List[dict],
+    labels: Optional[List[str]] = None,
+    output_dir: Optional[os.PathLike] = None,
+    concurrency: int = 16,
+    metadata: Optional[tuple] = None,
+    timeout: Optional[float] = None,
+    retries: int = 0,
+) -> List[StreamResult]:
+    """Function to run every variant on the prepared input and return the results in order.
+
+    Failed variants do not stop the sweep, their error is kept in their result.
+
+    Args:
+      channels: Channels the variants are spread over, round robin
+      prepared: Input shared by the variants, prepared for the service to call
+      variants: Feature parameters of each variant
+      labels: Name of each variant, used in the output file names
+      output_dir: Directory the outputs are written to, None to discard them
+      concurrency: Number of variants running at the same time
+      metadata: Request metadata such as NVCF credentials
+      timeout: Deadline of each call in seconds
+      retries: Number of times a variant failing with a retryable error is restarted
+    """
+    if labels is None:
+        labels = [str(index) for index in range(len(variants))]
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    spec = prepared.spec
+    extension = os.path.splitext(os.fspath(prepared.input_filepath))[1]
+    results = [StreamResult(spec.name, prepared.input_filepath, None) for _ in variants]
+
+    def run(index: int) -> None:
+        result = results[index]
+        options = dict(
+            params=variants[index] if spec.config is not None else None,
+            metadata=metadata,
+            result=result,
+            timeout=timeout,
+            raw=prepared.raw,
+            hashes=("sha256",),
+            prepared=prepared,
+        )
+        channel = channels[index % len(channels)]
+        try:
+            if output_dir is None:
+                stream_into(channel, spec, prepared.input_filepath, _Discard(), **options)
+            else:
+                slug = "".join(c if c.isalnum() or c in "=.-_" else "_" for c in labels[index])
+                result.output_filepath = os.path.join(
+                    output_dir, f"{index:03d}-{slug[:100]}{extension}"
+                )
+                stream_file(
+                    channel,
+                    spec,
+                    prepared.input_filepath,
+                    result.output_filepath,
+                    retries=retries,
+                    **options,
+                )
+        except grpc.RpcError as e:
+            result.error = f"{e.code().name}: {e.details()}"
+        except OSError as e:
+            result.error = str(e)
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        list(executor.map(run, range(len(variants))))
+    return results
+
+
+def result_matrix(
+    variants: List[dict], labels: List[str], results: List[StreamResult]
+) -> List[dict]:
+    """Function to return one row per variant with its swept parameters and its outcome.
+
+    The parameter columns are the fields whose value is not the same in every
+    variant, bytes parameters are left out.
+    """
+    fields = []
+    for variant in variants:
+        for name, value in variant.items():
+            if name not in fields and not isinstance(value, bytes):
+                fields.append(name)
+    swept = [
+        name
+        for name in fields
+        if len({json.dumps(variant.get(name), sort_keys=True) for variant in variants}) > 1
+    ]
+    rows = []
+    for variant, label, result in zip(variants, labels, results):
+        row = {"label": label, **{name: variant.get(name) for name in swept}}
+        row.update(
+            latency_s=result.latency,
+            first_output_s=result.first_output,
+            rtf=result.rates["rtf"],
+            output_bytes=result.output_bytes,
+            output_sha256=(result.hashes or {}).get("sha256"),
+            retries=result.retries,
+            output=None if result.output_filepath is None else os.fspath(result.output_filepath),
+            error=result.error,
+        )
+        rows.append(row)
+    return rows
+
+
+def write_matrix(rows: List[dict], path: os.PathLike) -> None:
+    """Function to write the result matrix as CSV, one row per variant."""
+    with open(path, "w", newline="") as fd:
+        writer = csv.DictWriter(fd, fieldnames=list(rows[0]) if rows else ["label"])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                    for key, value in row.items()
+                }
+            )
+
+
+def load_variants(path: os.PathLike) -> List[dict]:
+    """Function to read variants from a JSON list or a JSON Lines file of parameter objects."""
+    with open(path) as fd:
+        text = fd.read()
+    try:
+        variants = json.loads(text)
+    except ValueError:
+        variants = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not isinstance(variants, list) or not all(isinstance(v, dict) for v in variants):
+        raise ValueError(f"{path} must hold a list of JSON objects.")
+    return variants
+
+
+def _parse_args() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run many configs of a Maxine NIM on one input and tabulate the results."
+    )
+    parser.add_argument(
+        "--service", type=str, required=True, choices=sorted(SERVICES), help="Service to sweep."
+    )
+    parser.add_argument("--input", type=str, required=True, help="Input file shared by variants.")
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="IP:port of a server, may be repeated to spread the variants over several.",
+    )
+    parser.add_argument(
+        "--params", type=str, default="{}", help="JSON object of the base feature parameters."
+    )
+    parser.add_argument(
+        "--file",
+        action="append",
+        default=[],
+        help="FIELD=PATH of a bytes parameter, e.g. portrait_image=portrait.png",
+    )
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="FIELD=V1,V2,... values of a swept parameter, variants are all combinations.",
+    )
+    parser.add_argument(
+        "--variants",
+        type=str,
+        help="JSON list or JSON Lines file of parameter objects applied to the base, "
+        "an optional label key names the variant.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Directory of the variant outputs and matrix.csv, outputs are discarded without it.",
+    )
+    parser.add_argument("--report", type=str, help="Path of a JSON report of the sweep.")
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Number of variants running at once."
+    )
+    parser.add_argument(
+        "--channels-per-target", type=int, default=1, help="Channels opened per target."
+    )
+    parser.add_argument("--timeout", type=float, help="Deadline of each call in seconds.")
+    parser.add_argument(
+        "--retries", type=int, default=0, help="Restarts of a variant after a retryable error."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DATA_CHUNKS, help="Size in bytes of the input chunks."
+    )
+    parser.add_argument(
+        "--ssl-mode",
+        type=str,
+        default="DISABLED",
+        choices=SSL_MODES,
+        help="SSL mode of the channels, TLS without --ssl-root-cert uses the system roots.",
+    )
+    parser.add_argument("--ssl-key", type=str, help="The path to ssl private key.")
+    parser.add_argument("--ssl-cert", type=str, help="The path to ssl certificate chain.")
+    parser.add_argument("--ssl-root-cert", type=str, help="The path to ssl root certificate.")
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        default=os.environ.get("NGC_API_KEY"),
+        help="NGC API key for NVCF, defaults to the NGC_API_KEY environment variable.",
+    )
+    parser.add_argument("--function-id", type=str, help="NVCF function ID of the service.")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Sweep entry point
+    """
+    args = _parse_args()
+    spec = get_service(args.service)
+    base = json.loads(args.params)
+    for value in args.file:
+        field, _, path = value.partition("=")
+        base[field] = read_file_content(path)
+    grid = {}
+    for value in args.grid:
+        field, _, values = value.partition("=")
+        grid[field] = [parse_value(item) for item in values.split(",")]
+    entries = load_variants(args.variants) if args.variants else [{}]
+    variants, labels = [], []
+    for entry in entries:
+        label = entry.pop("label", None)
+        entry_base = dict(base, **entry)
+        for variant in expand_grid(entry_base, grid):
+            variants.append(variant)
+            if label is None:
+                labels.append(variant_label(variant, base))
+            else:
+                labels.append(f"{label},{variant_label(variant, entry_base)}" if grid else label)
+    if spec.config is None and any(variants):
+        raise RuntimeError(f"{spec.name} takes no feature parameters to sweep.")
+    metadata = None
+    if args.function_id:
+        if not args.api_key:
+            raise RuntimeError("--function-id requires --api-key or NGC_API_KEY.")
+        metadata = (
+            ("authorization", "Bearer {}".format(args.api_key)),
+            ("function-id", args.function_id),
+        )
+
+    prepared = PreparedInput(spec, args.input, chunk_size=args.chunk_size)
+    print(
+        f"Sweeping {len(variants)} variants of {spec.name} over {len(args.target)} targets, "
+        f"{prepared.size} input bytes in {len(prepared.requests)} shared chunks"
+    )
+    with ChannelPool(channels_per_target=args.channels_per_target) as pool:
+        channels = []
+        for target in args.target:
+            config = ChannelConfig(
+                target,
+                ssl_mode=args.ssl_mode,
+                ssl_root_cert=args.ssl_root_cert,
+                ssl_cert=args.ssl_cert,
+                ssl_key=args.ssl_key,
+            )
+            channels.extend(pool.get(config) for _ in range(args.channels_per_target))
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
+        results = run_sweep(
+            channels,
+            prepared,
+            variants,
+            labels=labels,
+            output_dir=args.output_dir,
+            concurrency=args.concurrency,
+            metadata=metadata,
+            timeout=args.timeout,
+            retries=args.retries,
+        )
+        wall = time.perf_counter() - start_time
+        cpu = time.process_time() - start_cpu
+
+    rows = result_matrix(variants, labels, results)
+    if args.output_dir:
+        write_matrix(rows, os.path.join(args.output_dir, "matrix.csv"))
+    for row in rows:
+        status = row["error"] or (
+            f"{row['latency_s']:.2f}s, first output {row['first_output_s']:.2f}s, "
+            f"{row['output_bytes']} bytes"
+        )
+        print(f"{row['label']}: {status}")
+    summary = summarize(results, wall)
+    failed = sum(1 for result in results if not result.ok)
+    print(
+        f"Sweep completed in {wall:.2f}s, {len(variants) / wall if wall else 0:.2f} variants/s, "
+        f"{failed} failed, client CPU {cpu:.2f}s"
+    )
+    if args.report:
+        with open(args.report, "w") as fd:
+            json.dump(
+                {
+                    "service": spec.name,
+                    "input": args.input,
+                    "input_bytes": prepared.size,
+                    "variants": len(variants),
+                    "wall_s": wall,
+                    "variants_per_s": len(variants) / wall if wall else None,
+                    "client_cpu_s": cpu,
+                    "summary": summary,
+                    "matrix": rows,
+                },
+                fd,
+                indent=2,
+            )
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Real-time factor and throughput accounting per service, target and config.
+
+The duration of each input is read from its WAV header or MP4 mvhd box, see
+nim_common.media. A call's real-time factor (RTF) is its processing seconds
+per second of media, the same measure as the deadline RTF of
+nim_common.deadlines, and its speed the inverse, media seconds processed per
+wall second. ThroughputReport aggregates finished calls per service, target
+and config, where the config is the model and mode selections of the call,
+such as model_selection=MODEL_SELECTION_PERF, as that is what GPU capacity is
+sized by.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from .media import media_duration
+
+if TYPE_CHECKING:
+    from .services import ServiceSpec
+    from .streaming import StreamResult
+
+
+def media_rates(
+    duration: Optional[float], seconds: Optional[float], input_bytes: int
+) -> Dict[str, Optional[float]]:
+    """Function to return the RTF, media seconds per second and input bytes per second.
+
+    Args:
+      duration: Seconds of media processed, None when unknown
+      seconds: Wall seconds the processing took
+      input_bytes: Size of the input in bytes
+    """
+    if not seconds or seconds <= 0:
+        return {"rtf": None, "media_s_per_s": None, "bytes_per_s": None}
+    return {
+        "rtf": seconds / duration if duration else None,
+        "media_s_per_s": duration / seconds if duration else None,
+        "bytes_per_s": input_bytes / seconds,
+    }
+
+
+def describe_rates(input_filepath: os.PathLike, seconds: float) -> Optional[str]:
+    """Function to describe the rates of processing input_filepath in seconds, None if unknown."""
+    try:
+        duration = media_duration(input_filepath)
+        input_bytes = os.path.getsize(input_filepath)
+    except OSError:
+        return None
+    rates = media_rates(duration, seconds, input_bytes)
+    if rates["rtf"] is None:
+        return None
+    return (
+        f"Processed {duration:.2f}s of media in {seconds:.2f}s, RTF {rates['rtf']:.3f} "
+        f"({rates['media_s_per_s']:.2f} media seconds per second, "
+        f"{rates['bytes_per_s'] / 1e6:.2f} MB/s)."
+    )
+
+
+def config_label(spec: "ServiceSpec", params: Optional[dict]) -> str:
+    """Function to name the model and mode selections of params, "default" without any.
+
+    The enum fields of the config message, such as model_selection, select the
+    model and the processing modes and are part of the label. Tuning values
+    and bytes fields are not.
+    """
+    if spec.config is None or not params:
+        return "default"
+    fields = getattr(spec.pb2, spec.config).DESCRIPTOR.fields_by_name
+    selections = []
+    for name in sorted(params):
+        field = fields.get(name)
+        if field is None or field.enum_type is None:
+            continue
+        value = params[name]
+        if isinstance(value, int) and value in field.enum_type.values_by_number:
+            value = field.enum_type.values_by_number[value].name
+        selections.append(f"{name}={value}")
+    return ",".join(selections) or "default"
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Function to return the q quantile of sorted values, None when there are none."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class _Group:
+    def __init__(self, window: int) -> None:
+        self.jobs = 0
+        self.failed = 0
+        self.media = 0.0  # seconds of media of the successful calls with a known duration
+        self.processing = 0.0  # seconds those calls took
+        self.input_bytes = 0
+        self.rtfs = deque(maxlen=window)  # of the most recent calls
+        self.first_start = None
+        self.last_end = None
+
+
+class ThroughputReport:
+    """Thread-safe aggregate of RTF and throughput per service, target and config.
+
+    Args:
+      window: Number of recent calls per group the RTF percentiles are taken over
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        self.window = window
+        self._groups: Dict[tuple, _Group] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self, result: "StreamResult", target: Optional[str] = None, config: str = "default"
+    ) -> None:
+        """Function to account a finished call.
+
+        Args:
+          result: StreamResult of the call
+          target: IP:port the call was made to
+          config: Label of the call's config, see config_label
+        """
+        key = (result.service, target, config)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Group(self.window)
+            group.jobs += 1
+            if not result.ok or result.latency is None:
+                group.failed += 1
+                return
+            group.input_bytes += result.input_bytes
+            if result.started is not None:
+                end = result.started + result.latency
+                if group.first_start is None or result.started < group.first_start:
+                    group.first_start = result.started
+                if group.last_end is None or end > group.last_end:
+                    group.last_end = end
+            if result.media_duration:
+                group.media += result.media_duration
+                group.processing += result.latency
+                group.rtfs.append(result.latency / result.media_duration)
+
+    def stats(self) -> List[dict]:
+        """Function to return one entry per service, target and config.
+
+        Each entry has the jobs and failures, the media seconds processed, the
+        aggregate RTF (processing seconds over media seconds) and its p50 and
+        p95 over the last window calls, and the media seconds and input bytes processed per wall
+        second from the first call's start to the last call's end, which
+        counts the calls running in parallel.
+        """
+        with self._lock:
+            entries = []
+            for (service, target, config), group in sorted(
+                self._groups.items(), key=lambda item: tuple(str(part) for part in item[0])
+            ):
+                rtfs = sorted(group.rtfs)
+                wall = None
+                if group.first_start is not None:
+                    wall = group.last_end - group.first_start
+                entries.append(
+                    {
+                        "service": service,
+                        "target": target,
+                        "config": config,
+                        "jobs": group.jobs,
+                        "failed": group.failed,
+                        "media_s": group.media,
+                        "wall_s": wall,
+                        "rtf": group.processing / group.media if group.media else None,
+                        "rtf_p50": percentile(rtfs, 0.5),
+                        "rtf_p95": percentile(rtfs, 0.95),
+                        "media_s_per_s": group.media / wall if wall else None,
+                        "bytes_per_s": group.input_bytes / wall if wall else None,
+                    }
+                )
+            return entries
@@ -0,0 +1,777 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Distributed tracing of streaming calls, with trace context sent as traceparent metadata.
+
+A Tracer records spans in the OpenTelemetry data model, without depending on
+the OpenTelemetry SDK. Each traced call gets a client span named after its
+RPC, with one child span per phase:
+
+- connect: waiting for the channel to be connected
+- config: from sending the config until its echo is received
+- upload: from the first to the last input chunk taken by gRPC
+- first_output: from the first request taken until the first output chunk
+- download: from the first output chunk to the end of the response stream
+- flush: flushing the output sink
+
+The phases of a bidirectional stream overlap, e.g. the download starts while
+the upload is still running. The trace context of the client span is sent as
+W3C traceparent metadata, so spans recorded by the server become its children.
+
+Finished spans are exported as OTLP/JSON, either appended as one line per call
+to a local file or posted to an OTLP/HTTP collector such as
+http://127.0.0.1:4318/v1/traces. A local collector stand-in and a report of
+where the time of each call went are available with:
+
+    python -m nim_common.tracing collect --port 4318 --output spans.jsonl
+    python -m nim_common.tracing report spans.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import queue
+import random
+import statistics
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Union
+
+TRACEPARENT = "traceparent"
+
+# Span kinds and status codes of the OTLP data model
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+PHASES = ("connect", "config", "upload", "first_output", "download", "flush")
+
+
+class SpanContext(NamedTuple):
+    """Identity of a span, as carried by traceparent."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+
+def format_traceparent(context: SpanContext) -> str:
+    """Function to format a span context as a W3C traceparent value."""
+    return f"00-{context.trace_id}-{context.span_id}-{'01' if context.sampled else '00'}"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Function to parse a W3C traceparent value, None when it is missing or invalid."""
+    parts = (value or "").strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    trace_id, span_id, flags = parts[1:4]
+    try:
+        if len(trace_id) != 32 or len(span_id) != 16 or len(flags) != 2:
+            return None
+        if int(trace_id, 16) == 0 or int(span_id, 16) == 0:
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return SpanContext(trace_id, span_id, sampled)
+
+
+def extract(metadata: Optional[Sequence[tuple]]) -> Optional[SpanContext]:
+    """Function to return the span context sent in gRPC metadata, None without one."""
+    for key, value in metadata or ():
+        if key == TRACEPARENT:
+            return parse_traceparent(value)
+    return None
+
+
+def error_message(error: BaseException) -> str:
+    """Function to describe an exception as the status message of a span."""
+    code = getattr(error, "code", None)
+    if callable(code) and callable(getattr(error, "details", None)):
+        return f"{code().name}: {error.details()}"  # grpc.RpcError
+    return f"{type(error).__name__}: {error}"
+
+
+def _attribute(key: str, value: any) -> dict:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+class Span:
+    """A timed operation within a trace, ended once with end().
+
+    Args:
+      tracer: Tracer the span is exported by
+      name: Name of the operation
+      context: Identity of the span
+      parent: Identity of the parent span, None for the root of a trace
+      local_parent: Whether the parent span was started by the same tracer
+      kind: One of the SPAN_KIND values
+      attributes: Initial attributes of the span
+    """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent: Optional[SpanContext],
+        local_parent: bool,
+        kind: int,
+        attributes: Optional[dict] = None,
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent = parent
+        self.local_parent = local_parent
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def traceparent(self) -> str:
+        return format_traceparent(self.context)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds from the start to the end of the span, None while it is running."""
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def end(self) -> None:
+        """Function to end the span, later calls are ignored."""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._ended(self)
+
+    def as_otlp(self) -> dict:
+        """OTLP/JSON representation of the span."""
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def otlp_request(spans: Sequence[Span], service_name: str) -> dict:
+    """Function to wrap spans into an OTLP/JSON ExportTraceServiceRequest."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", service_name)]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "nim_common"},
+                        "spans": [span.as_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """Exporter appending one OTLP/JSON request per line to a local file.
+
+    Args:
+      path: JSON lines file the spans are appended to
+    """
+
+    def __init__(self, path: os.PathLike) -> None:
+        self.path = os.fspath(path)
+        self._fd = open(self.path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, request: dict) -> None:
+        line = json.dumps(request, separators=(",", ":"))
+        with self._lock:
+            self._fd.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._fd.close()
+
+
+class OtlpHttpExporter:
+    """Exporter posting OTLP/JSON requests to a collector from a background thread.
+
+    Exports are queued, so a slow or unreachable collector never delays the
+    calls; requests that fail to be posted are counted in dropped.
+
+    Args:
+      endpoint: URL of the collector's traces endpoint, e.g. http://127.0.0.1:4318/v1/traces
+      timeout: Seconds to wait for the collector per request
+      max_queued: Requests kept while the collector is slow, newer ones are dropped beyond it
+    """
+
+    def __init__(self, endpoint: str, timeout: float = 5.0, max_queued: int = 1024) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.exported = 0
+        self.dropped = 0
+        self._queue = queue.Queue(max_queued)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            body = json.dumps(request, separators=(",", ":")).encode()
+            post = urllib.request.Request(
+                self.endpoint, body, {"Content-Type": "application/json"}, method="POST"
+            )
+            try:
+                with urllib.request.urlopen(post, timeout=self.timeout) as response:
+                    response.read()
+                self.exported += 1
+            except OSError:
+                self.dropped += 1
+
+    def export(self, request: dict) -> None:
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Function to post the queued requests and stop the background thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+def create_exporter(destination: str) -> Union[FileExporter, OtlpHttpExporter]:
+    """Function to create the exporter of an http(s) collector URL or a local file path."""
+    if destination.startswith(("http://", "https://")):
+        return OtlpHttpExporter(destination)
+    return FileExporter(destination)
+
+
+class Tracer:
+    """Thread-safe factory of spans, exporting each call's spans once its root span ends.
+
+    Args:
+      exporter: FileExporter, OtlpHttpExporter or any object with export(request) and close()
+      service_name: service.name resource attribute of the spans
+      sample: Fraction of new traces recorded, drawn at random. Unsampled traces
+        still propagate their traceparent, with the sampled flag cleared
+    """
+
+    def __init__(
+        self, exporter: any, service_name: str = "nim-client", sample: float = 1.0
+    ) -> None:
+        if not 0 <= sample <= 1:
+            raise ValueError("The sampled fraction of traces must be in [0, 1].")
+        self.exporter = exporter
+        self.service_name = service_name
+        self.sample = sample
+        self._lock = threading.Lock()
+        self._pending = {}  # trace ID to the ended spans waiting for their local root
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[Union[Span, SpanContext, str]] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict] = None,
+    ) -> Span:
+        """Function to start a span.
+
+        Args:
+          name: Name of the operation
+          parent: Span of this tracer, remote SpanContext or traceparent value, None for a new trace
+          kind: One of the SPAN_KIND values
+          attributes: Initial attributes of the span
+        """
+        if isinstance(parent, str):
+            parent = parse_traceparent(parent)
+        local_parent = isinstance(parent, Span)
+        if local_parent:
+            parent = parent.context
+        if parent is None:
+            context = SpanContext(
+                os.urandom(16).hex(), os.urandom(8).hex(), random.random() < self.sample
+            )
+        else:
+            context = SpanContext(parent.trace_id, os.urandom(8).hex(), parent.sampled)
+        return Span(self, name, context, parent, local_parent, kind, attributes)
+
+    @contextlib.contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Optional[Union[Span, SpanContext, str]] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict] = None,
+    ) -> Iterator[Span]:
+        """Context manager running its block in a span, marked as failed by an exception."""
+        span = self.start_span(name, parent, kind, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(error_message(e))
+            raise
+        finally:
+            span.end()
+
+    def _ended(self, span: Span) -> None:
+        if not span.context.sampled:
+            return
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._pending.setdefault(trace_id, [])
+            spans.append(span)
+            if span.local_parent:
+                return
+            del self._pending[trace_id]
+        self.exporter.export(otlp_request(spans, self.service_name))
+
+    def close(self) -> None:
+        """Function to export the spans whose root never ended and close the exporter."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for spans in pending.values():
+            self.exporter.export(otlp_request(spans, self.service_name))
+        self.exporter.close()
+
+    def __enter__(self) -> "Tracer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class StreamSpans:
+    """Client span of one streaming call and the spans of its phases.
+
+    Wrap the request iterator with requests() and the response iterator with
+    responses(), send metadata() with the call, and end() the spans once the
+    call is over, or run the call in a with block ending them. A retried call
+    wraps its new iterators again, restarting the phases under the same client
+    span.
+
+    Args:
+      tracer: Tracer recording the spans
+      spec: Service called
+      parent: Parent span or traceparent of the call, None to start a new trace
+      attributes: Additional attributes of the client span
+    """
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        spec: any,
+        parent: Optional[Union[Span, SpanContext, str]] = None,
+        attributes: Optional[dict] = None,
+    ) -> None:
+        self.tracer = tracer
+        self.root = tracer.start_span(
+            spec.full_method.lstrip("/"),
+            parent,
+            SPAN_KIND_CLIENT,
+            {
+                "rpc.system": "grpc",
+                "rpc.service": spec.full_method.split("/")[1],
+                "rpc.method": spec.method,
+                "nim.service": spec.name,
+                **(attributes or {}),
+            },
+        )
+        self.attempts = 0
+        self._phases = {}
+
+    @property
+    def trace_id(self) -> str:
+        return self.root.context.trace_id
+
+    def metadata(self, metadata: Optional[Sequence[tuple]] = None) -> tuple:
+        """Function to return metadata with the traceparent of the client span added."""
+        return tuple(metadata or ()) + ((TRACEPARENT, self.root.traceparent),)
+
+    def _start(self, phase: str, attempt: Optional[int] = None) -> Span:
+        attributes = {"attempt": self.attempts if attempt is None else attempt}
+        span = self.tracer.start_span(phase, self.root, attributes=attributes)
+        self._phases[phase] = span
+        return span
+
+    def _end(self, phase: str, error: Optional[str] = None) -> None:
+        span = self._phases.get(phase)
+        if span is not None and span.end_ns is None:
+            if error is not None:
+                span.set_error(error)
+            span.end()
+
+    def connect(self, channel: any, timeout: Optional[float] = None) -> str:
+        """Function to wait for the channel to connect or fail to, in the connect span.
+
+        Returns:
+          Name of the connectivity state the channel ended in.
+        """
+        import grpc
+
+        settled = threading.Event()
+        states = []
+
+        def on_state(state: grpc.ChannelConnectivity) -> None:
+            states.append(state)
+            if state is not grpc.ChannelConnectivity.CONNECTING and (
+                state is not grpc.ChannelConnectivity.IDLE
+            ):
+                settled.set()
+
+        span = self._start("connect", self.attempts + 1)  # ahead of the attempt it connects
+        channel.subscribe(on_state, try_to_connect=True)
+        try:
+            settled.wait(timeout)
+        finally:
+            channel.unsubscribe(on_state)
+        state = states[-1].name if states else "UNKNOWN"
+        span.set_attribute("state", state)
+        if state != "READY":
+            span.set_error(f"Channel {state}")
+        span.end()
+        return state
+
+    def requests(self, iterator: Iterator, config: bool = False) -> Iterator:
+        """Generator passing the requests through, timing the config and upload phases.
+
+        Args:
+          iterator: Requests of the call
+          config: Whether the first request is a config request echoed by the server
+        """
+        self.attempts += 1
+        for phase in ("config", "upload", "first_output", "download"):
+            self._end(phase, "retried")
+        self._phases = {}
+        chunks = 0
+        first = True
+        for request in iterator:
+            if first:
+                self._start("first_output")
+                if config:
+                    self._start("config")
+            if not (first and config):
+                if chunks == 0:
+                    self._start("upload")
+                chunks += 1
+            first = False
+            yield request
+        if "upload" in self._phases:
+            self._phases["upload"].set_attribute("chunks", chunks)
+            self._end("upload")
+
+    def responses(self, iterator: Iterator, is_output: callable) -> Iterator:
+        """Generator passing the responses through, timing the echo, first output and download.
+
+        Args:
+          iterator: Responses of the call
+          is_output: Function telling output chunks apart from the config echo and keepalives
+        """
+        chunks = 0
+        try:
+            for response in iterator:
+                if is_output(response):
+                    if chunks == 0:
+                        self._end("first_output")
+                        self._start("download")
+                    chunks += 1
+                elif "config" in self._phases:
+                    # The config echo is the first response that is not an output chunk
+                    self._end("config")
+                yield response
+        except Exception as e:
+            for phase in list(self._phases):
+                self._end(phase, error_message(e))
+            raise
+        if "download" in self._phases:
+            self._phases["download"].set_attribute("chunks", chunks)
+            self._end("download")
+
+    def flush(self, sink: any) -> None:
+        """Function to flush the output sink in the flush span."""
+        with self.tracer.span("flush", self.root, attributes={"attempt": self.attempts}):
+            flush = getattr(sink, "flush", None)
+            if flush is not None:
+                flush()
+
+    def end(self, error: Optional[str] = None, attributes: Optional[dict] = None) -> None:
+        """Function to end the phases still running and the client span."""
+        for phase in list(self._phases):
+            self._end(phase, error)
+        self.root.attributes.update(attributes or {})
+        self.root.set_attribute("attempts", self.attempts)
+        if error is not None:
+            self.root.set_error(error)
+        self.root.end()
+
+    def __enter__(self) -> "StreamSpans":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.end(None if exc_value is None else error_message(exc_value))
+
+
+@contextlib.contextmanager
+def traced_run(
+    destination: Optional[str], name: str, attributes: Optional[dict] = None
+) -> Iterator[Optional[Span]]:
+    """Context manager tracing a client run, yielding the root span its calls are traced under.
+
+    Args:
+      destination: OTLP/JSON lines file or OTLP/HTTP collector URL, None to not trace
+      name: Name of the root span and prefix of the service.name of the spans
+      attributes: Attributes of the root span
+
+    Yields:
+      The root span, or None when destination is None.
+    """
+    if destination is None:
+        yield None
+        return
+    with Tracer(create_exporter(destination), service_name=f"{name}-client") as tracer:
+        with tracer.span(name, attributes=attributes) as span:
+            yield span
+
+
+def _value(encoded: dict) -> any:
+    if "intValue" in encoded:
+        return int(encoded["intValue"])
+    return next(iter(encoded.values()), None)
+
+
+def load_spans(path: os.PathLike) -> List[dict]:
+    """Function to read the spans of an OTLP/JSON lines file as flat dictionaries."""
+    spans = []
+    with open(path) as fd:
+        for line in fd:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line).get("resourceSpans", []):
+                service = None
+                for attribute in resource_spans.get("resource", {}).get("attributes", []):
+                    if attribute["key"] == "service.name":
+                        service = attribute["value"].get("stringValue")
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for span in scope_spans.get("spans", []):
+                        start, end = int(span["startTimeUnixNano"]), int(span["endTimeUnixNano"])
+                        spans.append(
+                            {
+                                "service": service,
+                                "trace_id": span["traceId"],
+                                "span_id": span["spanId"],
+                                "parent_id": span.get("parentSpanId") or None,
+                                "name": span["name"],
+                                "kind": span.get("kind", SPAN_KIND_INTERNAL),
+                                "start_ns": start,
+                                "duration_s": (end - start) / 1e9,
+                                "attributes": {
+                                    a["key"]: _value(a["value"]) for a in span.get("attributes", [])
+                                },
+                                "status": span.get("status", {}).get("code", STATUS_UNSET),
+                                "status_message": span.get("status", {}).get("message"),
+                            }
+                        )
+    return spans
+
+
+def phase_report(spans: List[dict]) -> List[dict]:
+    """Function to break each client call down into its phases and server time.
+
+    Returns:
+      One dictionary per client span, with its trace ID, RPC, total seconds,
+      seconds per phase, and the seconds of the server spans that are its children.
+    """
+    children = {}
+    for span in spans:
+        children.setdefault(span["parent_id"], []).append(span)
+    calls = []
+    for span in spans:
+        if span["kind"] != SPAN_KIND_CLIENT:
+            continue
+        row = {
+            "trace_id": span["trace_id"],
+            "rpc": span["name"],
+            "total_s": span["duration_s"],
+            "error": span["status_message"] if span["status"] == STATUS_ERROR else None,
+        }
+        for child in children.get(span["span_id"], []):
+            if child["kind"] == SPAN_KIND_SERVER:
+                row["server_s"] = row.get("server_s", 0.0) + child["duration_s"]
+            elif child["name"] in PHASES:
+                # Only the last attempt of a retried call is kept
+                row[f"{child['name']}_s"] = child["duration_s"]
+        calls.append(row)
+    return calls
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.path != "/v1/traces":
+            self.send_error(404)
+            return
+        try:
+            request = json.loads(body)
+        except ValueError:
+            self.send_error(400, "Expected an OTLP/JSON request")
+            return
+        self.server.collector.add(request)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class TraceCollector:
+    """Stand-in OTLP/HTTP collector appending the received spans to a JSON lines file.
+
+    Args:
+      path: JSON lines file the received OTLP/JSON requests are appended to
+      host: Address to listen on
+      port: Port to listen on, 0 picks a free port
+    """
+
+    def __init__(self, path: os.PathLike, host: str = "127.0.0.1", port: int = 4318) -> None:
+        self.exporter = FileExporter(path)
+        self.received = 0
+        self._server = ThreadingHTTPServer((host, port), _CollectorHandler)
+        self._server.daemon_threads = True
+        self._server.collector = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/traces"
+
+    def add(self, request: dict) -> None:
+        self.exporter.export(request)
+        self.received += 1
+
+    def serve_forever(self) -> None:
+        """Function to serve in the calling thread until interrupted, then close the file."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            self.exporter.close()
+
+    def start(self) -> "TraceCollector":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self.exporter.close()
+
+    def __enter__(self) -> "TraceCollector":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def _report(path: os.PathLike) -> None:
+    calls = phase_report(load_spans(path))
+    columns = [f"{phase}_s" for phase in PHASES] + ["server_s"]
+    for call in calls:
+        phases = " ".join(
+            f"{column[:-2]} {call[column]:.3f}s" for column in columns if column in call
+        )
+        status = f" failed: {call['error']}" if call["error"] else ""
+        print(f"{call['trace_id']} {call['rpc']} {call['total_s']:.3f}s: {phases}{status}")
+    if calls:
+        medians = []
+        for column in ["total_s"] + columns:
+            values = [call[column] for call in calls if column in call]
+            if values:
+                medians.append(f"{column[:-2]} {statistics.median(values):.3f}s")
+        print(f"Median over {len(calls)} calls: {' '.join(medians)}")
+
+
+def main():
+    """
+    Tracing entry point
+    """
+    parser = argparse.ArgumentParser(description="Collect and report the spans of traced calls.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    collect = commands.add_parser("collect", help="Run a stand-in OTLP/HTTP collector.")
+    collect.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on.")
+    collect.add_argument("--port", type=int, default=4318, help="Port to listen on.")
+    collect.add_argument(
+        "--output", type=str, required=True, help="JSON lines file the spans are appended to."
+    )
+    report = commands.add_parser("report", help="Break the traced calls down into phases.")
+    report.add_argument("path", type=str, help="JSON lines file of OTLP/JSON spans.")
+    args = parser.parse_args()
+    if args.command == "report":
+        _report(args.path)
+        return
+    collector = TraceCollector(args.output, args.host, args.port)
+    print(f"Collecting spans at {collector.url} into {args.output}")
+    collector.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
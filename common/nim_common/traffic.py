@@ -0,0 +1,210 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Recording the shape of production calls for replay by nim_common.replay.
+
+A TrafficRecorder appends one JSON line per finished call: when it arrived,
+the service and target, input size, duration and chunking, the feature
+parameters, and how the call went (queue wait, upload time, time to first
+output, latency, output size and chunks, error). Bytes parameters such as the
+audio2face-2d portrait are recorded by size and digest only.
+
+With a payload directory, the inputs and bytes parameters are also copied
+there, named by their SHA-256, so a replay sends the real payloads. Without
+one, the replay needs sample inputs, see nim_common.replay.
+
+Record the daemon's jobs with:
+
+    python -m nim_common.daemon \\
+        --target studio-voice=127.0.0.1:8001 --record calls.jsonl --record-payloads payloads/
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import threading
+from typing import List, Optional
+
+from .media import media_duration
+from .streaming import StreamResult
+
+TRACE_VERSION = 1
+
+
+def _digest_file(path: os.PathLike) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fd:
+        for block in iter(lambda: fd.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TrafficRecorder:
+    """Thread-safe writer of a call trace.
+
+    Args:
+      path: JSON lines file the calls are appended to
+      payloads: Directory the inputs and bytes parameters are copied to, None to not keep them
+      sample: Fraction of the calls recorded, drawn at random
+      target: IP:port recorded for the calls that are recorded without one
+    """
+
+    def __init__(
+        self,
+        path: os.PathLike,
+        payloads: Optional[os.PathLike] = None,
+        sample: float = 1.0,
+        target: Optional[str] = None,
+    ) -> None:
+        if not 0 < sample <= 1:
+            raise ValueError("The recorded fraction of calls must be in (0, 1].")
+        self.path = os.fspath(path)
+        self.payloads = None if payloads is None else os.fspath(payloads)
+        self.sample = sample
+        self.target = target
+        self.recorded = 0
+        if self.payloads is not None:
+            os.makedirs(self.payloads, exist_ok=True)
+        self._fd = open(self.path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def _keep_file(self, path: os.PathLike) -> str:
+        """Function to copy a file into the payload directory, returns its payload name."""
+        name = _digest_file(path) + os.path.splitext(os.fspath(path))[1]
+        target = os.path.join(self.payloads, name)
+        if not os.path.exists(target):
+            # Copied under a temporary name, so a concurrent replay never sees half a payload
+            partial = f"{target}.{threading.get_ident()}.partial"
+            shutil.copyfile(path, partial)
+            os.replace(partial, target)
+        return name
+
+    def _keep_bytes(self, data: bytes) -> dict:
+        digest = hashlib.sha256(data).hexdigest()
+        entry = {"bytes": len(data), "sha256": digest}
+        if self.payloads is not None:
+            target = os.path.join(self.payloads, digest)
+            if not os.path.exists(target):
+                partial = f"{target}.{threading.get_ident()}.partial"
+                with open(partial, "wb") as fd:
+                    fd.write(data)
+                os.replace(partial, target)
+            entry["payload"] = digest
+        return entry
+
+    def _params(self, params: Optional[dict]) -> Optional[dict]:
+        if params is None:
+            return None
+        recorded = {}
+        for name, value in params.items():
+            if isinstance(value, bytes):
+                recorded[name] = self._keep_bytes(value)
+            elif isinstance(value, (bool, int, float, str)) or value is None:
+                recorded[name] = value
+            else:
+                recorded[name] = str(value)
+        return recorded
+
+    def record(
+        self,
+        result: StreamResult,
+        target: Optional[str] = None,
+        params: Optional[dict] = None,
+        chunk_size: Optional[int] = None,
+    ) -> bool:
+        """Function to append a finished call to the trace.
+
+        Args:
+          result: StreamResult of the call
+          target: IP:port the call was made to
+          params: Feature parameters the call was made with
+          chunk_size: Size in bytes of the input chunks
+
+        Returns:
+          Whether the call was sampled and recorded.
+        """
+        if self.sample < 1 and random.random() >= self.sample:
+            return False
+        input_filepath = result.input_filepath
+        try:
+            duration = media_duration(input_filepath)
+            payload = None if self.payloads is None else self._keep_file(input_filepath)
+        except OSError:
+            duration = payload = None  # the input was removed once the call finished
+        started = result.started
+        entry = {
+            "version": TRACE_VERSION,
+            "arrival": None if started is None else started - result.queue_wait,
+            "service": result.service,
+            "target": target or self.target,
+            "traffic_class": result.traffic_class,
+            "input": os.path.basename(os.fspath(input_filepath)),
+            "input_bytes": result.input_bytes,
+            "input_chunks": result.input_chunks,
+            "chunk_size": chunk_size,
+            "duration_s": duration,
+            "params": self._params(params),
+            "compression": result.compression,
+            "timeout_s": result.timeout,
+            "queue_wait_s": result.queue_wait,
+            "upload_s": result.upload_time,
+            "first_output_s": result.first_output,
+            "latency_s": result.latency,
+            "output_bytes": result.output_bytes,
+            "output_chunks": result.output_chunks,
+            "retries": result.retries,
+            "cancelled": result.cancelled,
+            "error": result.error,
+            "payload": payload,
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._fd.write(line)
+            self.recorded += 1
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._fd.close()
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_trace(path: os.PathLike) -> List[dict]:
+    """Function to read a trace, returns the calls that started, in arrival order."""
+    calls = []
+    with open(path) as fd:
+        for number, line in enumerate(fd, 1):
+            if not line.strip():
+                continue
+            try:
+                call = json.loads(line)
+            except ValueError:
+                raise ValueError(f"Line {number} of {path} is not valid JSON.") from None
+            if call.get("arrival") is not None:
+                calls.append(call)
+    calls.sort(key=lambda call: call["arrival"])
+    return calls
@@ -0,0 +1,121 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Fixtures running the stand-in servers in-process, with injectable faults."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from nim_common.services import get_service
+from nim_common.standin import Capacity, EchoServicer, Faults, create_server
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+# Sample client of each service, its arguments and the input it uploads
+CLIENTS = {
+    "studio-voice": {
+        "script": "studio-voice/scripts/studio_voice.py",
+        "input": "studio-voice/assets/studio_voice_16k_input.wav",
+        "args": ["--input", "studio-voice/assets/studio_voice_16k_input.wav"],
+    },
+    "eye-contact": {
+        "script": "eye-contact/scripts/eye-contact.py",
+        "input": "eye-contact/assets/sample_input.mp4",
+        "args": ["--input", "eye-contact/assets/sample_input.mp4"],
+    },
+    "audio2face-2d": {
+        "script": "audio2face-2d/python/scripts/audio2face-2d.py",
+        "input": "audio2face-2d/assets/sample_audio.wav",
+        "args": [
+            "--audio-input",
+            "audio2face-2d/assets/sample_audio.wav",
+            "--portrait-input",
+            "audio2face-2d/assets/sample_portrait_image.png",
+        ],
+    },
+}
+
+
+class StandIn:
+    """Stand-in server of one service, with its echo servicer for inspection."""
+
+    def __init__(
+        self,
+        service: str,
+        faults: Faults = None,
+        first_output_delay: float = 0.0,
+        capacity: Capacity = None,
+    ):
+        self.spec = get_service(service)
+        self.echo = EchoServicer(
+            self.spec, first_output_delay=first_output_delay, faults=faults, capacity=capacity
+        )
+        self.server, self.port = create_server(self.spec, self.echo.servicer())
+        self.target = f"127.0.0.1:{self.port}"
+
+    def stop(self) -> None:
+        self.server.stop(None)
+
+
+@pytest.fixture
+def standin():
+    """Factory starting stand-in servers, all stopped when the test ends."""
+    servers = []
+
+    def start(
+        service: str,
+        faults: Faults = None,
+        first_output_delay: float = 0.0,
+        capacity: Capacity = None,
+    ) -> StandIn:
+        server = StandIn(
+            service, faults=faults, first_output_delay=first_output_delay, capacity=capacity
+        )
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def input_path(service: str) -> str:
+    return os.path.join(REPO_DIR, CLIENTS[service]["input"])
+
+
+def run_client(
+    service: str, target: str, output: str, *args: str, timeout: float = 60
+) -> subprocess.CompletedProcess:
+    """Function to run the sample client of service against target."""
+    client = CLIENTS[service]
+    command = [
+        sys.executable,
+        os.path.join(REPO_DIR, client["script"]),
+        "--target",
+        target,
+        "--output",
+        output,
+        *client["args"],
+        *args,
+    ]
+    return subprocess.run(command, cwd=REPO_DIR, capture_output=True, text=True, timeout=timeout)
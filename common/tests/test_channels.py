@@ -0,0 +1,118 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import shutil
+import subprocess
+
+import grpc
+import pytest
+
+from nim_common.channels import ChannelConfig, ChannelPool, CredentialCache
+from nim_common.services import get_service
+from nim_common.standin import EchoServicer, create_server
+from nim_common.streaming import stream_file
+
+from conftest import input_path
+
+
+def _write(path, content: bytes) -> str:
+    with open(path, "wb") as file:
+        file.write(content)
+    return str(path)
+
+
+def test_credentials_built_once_and_reloaded_on_change(tmp_path):
+    root_cert = _write(tmp_path / "ca.pem", b"root certificate")
+    config = ChannelConfig("127.0.0.1:1", "TLS", ssl_root_cert=root_cert)
+    cache = CredentialCache(check_interval=0)
+    credentials = cache.get(config)
+    assert cache.get(config._replace(target="127.0.0.1:2")) is credentials
+    assert cache.stats() == {"cached": 1, "loads": 1, "reloads": 0, "hits": 1}
+
+    # A rotated file, renamed over the old one, rebuilds the credentials
+    _write(tmp_path / "new.pem", b"rotated root certificate")
+    os.replace(tmp_path / "new.pem", root_cert)
+    assert cache.get(config) is not credentials
+    assert cache.generation(config) == 1
+    assert cache.stats()["reloads"] == 1
+
+    # A file missing mid-rotation keeps the previous credentials
+    os.remove(root_cert)
+    assert cache.generation(config) == 1
+    with pytest.raises(RuntimeError):
+        cache.get(ChannelConfig("127.0.0.1:1", "MTLS", ssl_root_cert=root_cert))
+
+
+def test_pool_counts_one_handshake_for_many_jobs(standin, tmp_path):
+    server = standin("studio-voice")
+    config = ChannelConfig(server.target)
+    output = str(tmp_path / "output.wav")
+    with ChannelPool() as pool:
+        for _ in range(3):
+            stream_file(
+                pool.get(config), server.spec, input_path("studio-voice"), output, timeout=10
+            )
+        stats = pool.stats()[server.target]
+    assert stats["checkouts"] == 3
+    assert stats["handshakes"] == 1
+    assert stats["failed_handshakes"] == 0
+    # Measured from the first checkout, whether or not gRPC reported CONNECTING
+    assert stats["handshake_max_s"] > 0
+
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl is not installed")
+def test_pool_reopens_channels_when_certificates_rotate(tmp_path):
+    key, cert = str(tmp_path / "key.pem"), str(tmp_path / "cert.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-keyout", key, "-out", cert, "-subj", "/CN=localhost"]
+        + ["-addext", "subjectAltName=DNS:localhost"],
+        check=True,
+        capture_output=True,
+    )
+    with open(key, "rb") as key_file, open(cert, "rb") as cert_file:
+        pem_key, pem_cert = key_file.read(), cert_file.read()
+    spec = get_service("studio-voice")
+    server, port = create_server(
+        spec,
+        EchoServicer(spec).servicer(),
+        credentials=grpc.ssl_server_credentials([(pem_key, pem_cert)]),
+    )
+    config = ChannelConfig(f"localhost:{port}", "TLS", ssl_root_cert=cert)
+    output = str(tmp_path / "output.wav")
+    try:
+        with ChannelPool(credentials=CredentialCache(check_interval=0)) as pool:
+            channel = pool.get(config)
+            stream_file(channel, spec, input_path("studio-voice"), output, timeout=10)
+            assert pool.get(config) is channel
+            assert pool.stats()[config.target]["handshakes"] == 1
+
+            _write(tmp_path / "new.pem", pem_cert)
+            os.replace(tmp_path / "new.pem", cert)
+            rotated = pool.get(config)
+            assert rotated is not channel
+            stream_file(rotated, spec, input_path("studio-voice"), output, timeout=10)
+            stats = pool.stats()[config.target]
+            assert stats["rotations"] == 1
+            assert stats["handshakes"] == 2
+            assert stats["handshake_max_s"] > 0
+    finally:
+        server.stop(None)
@@ -0,0 +1,190 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Exit codes, retries and outputs of the sample clients against faulty stand-ins."""
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+from nim_common.media import media_duration
+from nim_common.standin import Faults
+
+from conftest import CLIENTS, REPO_DIR, input_path, run_client
+
+SERVICES = sorted(CLIENTS)
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as fd:
+        return fd.read()
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_clean_run(standin, tmp_path, service):
+    server = standin(service)
+    output = tmp_path / "output"
+    process = run_client(service, server.target, str(output))
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert read(output) == read(input_path(service))
+    assert "RTF" in process.stdout
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_mid_stream_unavailable_is_retried(standin, tmp_path, service):
+    server = standin(service, Faults(fail_after=1, fail_calls=1))
+    output = tmp_path / "output"
+    process = run_client(service, server.target, str(output))
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert "retry 1/2" in process.stdout
+    assert server.echo.calls == 2
+    # The output of the failed attempt is rewritten, not appended to
+    assert read(output) == read(input_path(service))
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_retries_exhausted_exit_non_zero(standin, tmp_path, service):
+    server = standin(service, Faults(fail_after=1))
+    process = run_client(service, server.target, str(tmp_path / "output"), "--retries", "1")
+    assert process.returncode == 1
+    assert "UNAVAILABLE" in process.stdout
+    assert server.echo.calls == 2
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_non_retryable_error_exit_non_zero(standin, tmp_path, service):
+    server = standin(service, Faults(fail_after=0, fail_code="INVALID_ARGUMENT"))
+    process = run_client(service, server.target, str(tmp_path / "output"))
+    assert process.returncode == 1
+    assert "INVALID_ARGUMENT" in process.stdout
+    assert server.echo.calls == 1
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_unreachable_server_exit_non_zero(tmp_path, service):
+    process = run_client(
+        service, "127.0.0.1:1", str(tmp_path / "output"), "--retries", "1", "--timeout", "5"
+    )
+    assert process.returncode == 1
+    assert "retry 1/1" in process.stdout
+
+
+@pytest.mark.parametrize("service", ["eye-contact", "audio2face-2d"])
+def test_missing_config_echo_keeps_first_chunk(standin, tmp_path, service):
+    server = standin(service, Faults(skip_config_echo=True))
+    output = tmp_path / "output"
+    process = run_client(service, server.target, str(output))
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert read(output) == read(input_path(service))
+
+
+@pytest.mark.parametrize("service", ["eye-contact", "audio2face-2d"])
+def test_delayed_keepalives_are_skipped(standin, tmp_path, service):
+    server = standin(service, Faults(keepalives=2, keepalive_interval=0.01))
+    output = tmp_path / "output"
+    process = run_client(service, server.target, str(output))
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert read(output) == read(input_path(service))
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_timeout_exit_non_zero(standin, tmp_path, service):
+    server = standin(service, first_output_delay=30)
+    start_time = time.monotonic()
+    process = run_client(service, server.target, str(tmp_path / "output"), "--timeout", "1")
+    assert process.returncode == 1
+    assert "deadline" in process.stdout.lower()
+    assert time.monotonic() - start_time < 15
+
+
+@pytest.mark.parametrize("service", SERVICES)
+def test_truncated_output_exit_non_zero(standin, tmp_path, service):
+    # The NIM ended the stream with OK, the container check catches the short output
+    server = standin(service, Faults(truncate_after=1))
+    output = tmp_path / "output"
+    process = run_client(service, server.target, str(output))
+    assert process.returncode == 1, process.stdout + process.stderr
+    assert "failed verification" in process.stdout
+    assert server.echo.calls == 1
+    expected = read(input_path(service))
+    assert 0 < len(read(output)) < len(expected)
+    assert expected.startswith(read(output))
+
+
+def test_batch_reports_every_clip_and_exit_non_zero_on_failure(standin, tmp_path):
+    def run_batch(target: str, *inputs: str) -> subprocess.CompletedProcess:
+        command = [
+            sys.executable,
+            os.path.join(REPO_DIR, "studio-voice/scripts/studio_voice_batch.py"),
+            "--target",
+            target,
+            "--output-dir",
+            str(tmp_path / "output"),
+            "--input",
+            *inputs,
+        ]
+        return subprocess.run(command, cwd=REPO_DIR, capture_output=True, text=True, timeout=60)
+
+    # An empty clip completes without any output chunk
+    empty = tmp_path / "empty.wav"
+    empty.write_bytes(b"")
+    process = run_batch(standin("studio-voice").target, input_path("studio-voice"), str(empty))
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert "first output n/a" in process.stdout
+    assert "Processed 2/2 clips" in process.stdout
+
+    failing = standin("studio-voice", Faults(fail_after=0))
+    process = run_batch(failing.target, input_path("studio-voice"))
+    assert process.returncode == 1
+    assert "Processed 0/1 clips" in process.stdout
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="splicing requires ffmpeg")
+def test_segmented_render_spreads_over_replicas(standin, tmp_path):
+    # The stand-ins echo the WAV segments, so the spliced output is the input audio again
+    first, second = standin("audio2face-2d"), standin("audio2face-2d")
+    output = tmp_path / "output.wav"
+    process = run_client(
+        "audio2face-2d",
+        first.target,
+        str(output),
+        "--segment-seconds",
+        "8",
+        "--replica-target",
+        second.target,
+    )
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert "Rendered 4 segments" in process.stdout
+    assert first.echo.calls == second.echo.calls == 2
+    assert media_duration(output) == pytest.approx(media_duration(input_path("audio2face-2d")))
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="splicing requires ffmpeg")
+def test_segmented_render_fails_with_a_segment(standin, tmp_path):
+    server = standin("audio2face-2d", Faults(fail_code="INVALID_ARGUMENT", fail_after=0))
+    process = run_client(
+        "audio2face-2d", server.target, str(tmp_path / "output.wav"), "--segment-seconds", "8"
+    )
+    assert process.returncode == 1
+    assert "INVALID_ARGUMENT" in process.stdout
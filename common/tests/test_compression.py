@@ -0,0 +1,98 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Per-call compression choice from the input payload."""
+
+import os
+import struct
+
+import grpc
+import pytest
+
+from nim_common.compression import choose_compression, payload_kind, sample_ratio
+from nim_common.services import get_service
+from nim_common.streaming import stream_file
+
+from conftest import input_path
+
+
+def wav(path, format_tag: int = 1, data: bytes = bytes(4096)) -> str:
+    fmt = struct.pack("<HHIIHH", format_tag, 1, 16000, 32000, 2, 16)
+    body = b"WAVE" + b"LIST" + struct.pack("<I", 3) + b"abc\0" + b"fmt " + struct.pack("<I", 16)
+    body += fmt + b"data" + struct.pack("<I", len(data)) + data
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+    return str(path)
+
+
+def test_payload_kind(tmp_path):
+    assert payload_kind(input_path("studio-voice")) == "pcm"
+    # An odd sized chunk before fmt is padded
+    assert payload_kind(wav(tmp_path / "pcm.wav")) == "pcm"
+    assert payload_kind(wav(tmp_path / "float.wav", format_tag=3)) == "pcm"
+    assert payload_kind(wav(tmp_path / "mp3.wav", format_tag=0x55)) == "wav"
+    assert payload_kind(input_path("eye-contact")) == "mp4"
+    text = tmp_path / "notes.txt"
+    text.write_text("transcript " * 100)
+    assert payload_kind(text) == "unknown"
+
+
+def test_sample_ratio(tmp_path):
+    text, noise, empty = tmp_path / "text", tmp_path / "noise", tmp_path / "empty"
+    text.write_text("transcript " * 100000)
+    noise.write_bytes(os.urandom(1024 * 1024))
+    empty.write_bytes(b"")
+    assert sample_ratio(text) < 0.1
+    assert sample_ratio(noise) > 0.99
+    assert sample_ratio(empty) is None
+
+
+def test_choose_compression(tmp_path):
+    text, noise = tmp_path / "text", tmp_path / "noise"
+    text.write_text("transcript " * 100000)
+    noise.write_bytes(os.urandom(1024 * 1024))
+
+    decision = choose_compression(input_path("studio-voice"))
+    assert (decision.algorithm, decision.reason) == ("gzip", "PCM audio")
+    assert 0 < decision.estimated_saving(1000) < 1000
+    assert choose_compression(input_path("studio-voice"), "none").algorithm is None
+    assert choose_compression(input_path("eye-contact")) == (
+        None,
+        "MP4 is already compressed",
+        None,
+    )
+    # Unknown payloads are sampled
+    assert choose_compression(text).algorithm == "gzip"
+    assert choose_compression(noise).algorithm is None
+    assert choose_compression(noise, "sample").estimated_saving(1000) == 0
+    assert choose_compression(input_path("eye-contact"), "deflate").algorithm == "deflate"
+    with pytest.raises(ValueError):
+        choose_compression(text, "brotli")
+
+
+def test_wav_upload_is_compressed_by_default(standin, tmp_path):
+    server = standin("studio-voice")
+    output = tmp_path / "output.wav"
+    with grpc.insecure_channel(server.target) as channel:
+        result = stream_file(
+            channel, get_service("studio-voice"), input_path("studio-voice"), output
+        )
+    assert result.ok and result.compression == "gzip"
+    assert result.bytes_saved > 0
+    assert output.read_bytes() == open(input_path("studio-voice"), "rb").read()
@@ -0,0 +1,188 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Who may submit jobs to the daemon, and where they may send them."""
+
+import http.client
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+from nim_common.channels import ChannelConfig, ChannelPool
+from nim_common.daemon import JobError, NimDaemon, create_server
+from nim_common.limits import LIMITERS, ConcurrencyLimits
+from nim_common.scheduling import FairScheduler
+from nim_common.submit import DaemonConnection, status
+
+from conftest import input_path
+
+SECRET = (("authorization", "Bearer SECRET"), ("function-id", "studio-voice"))
+
+
+@pytest.fixture
+def daemon(standin):
+    primary, allowed = standin("studio-voice"), standin("studio-voice")
+    with ChannelPool() as pool:
+        yield NimDaemon(
+            pool,
+            {"studio-voice": ChannelConfig(primary.target)},
+            {"studio-voice": SECRET},
+            allowed_targets=[allowed.target],
+        ), primary, allowed
+
+
+def test_credentials_only_go_to_the_configured_target(daemon, tmp_path):
+    daemon, primary, allowed = daemon
+    job = {"service": "studio-voice", "input": input_path("studio-voice")}
+    with pytest.raises(JobError) as error:
+        daemon.run_job({**job, "target": "attacker.example:443", "output": str(tmp_path / "a")})
+    assert error.value.status == 403
+
+    assert daemon.run_job({**job, "output": str(tmp_path / "b.wav")}).ok
+    assert primary.echo.metadata["authorization"] == "Bearer SECRET"
+    assert daemon.run_job({**job, "target": allowed.target, "output": str(tmp_path / "c.wav")}).ok
+    assert "authorization" not in allowed.echo.metadata
+
+
+def test_failed_channel_setup_releases_admission(tmp_path):
+    # The root certificate is missing, so every job fails after it was admitted
+    config = ChannelConfig("127.0.0.1:1", "TLS", str(tmp_path / "missing.pem"))
+    with ChannelPool() as pool:
+        daemon = NimDaemon(
+            pool,
+            {"studio-voice": config},
+            scheduler=FairScheduler([], max_in_flight=1),
+            limits=ConcurrencyLimits(lambda: LIMITERS["aimd"](initial=1, maximum=1)),
+        )
+        job = {"service": "studio-voice", "input": input_path("studio-voice")}
+        for index in range(3):
+            result = daemon.run_job({**job, "output": str(tmp_path / f"{index}.wav")})
+            assert not result.ok and "missing.pem" in result.error
+        assert daemon.scheduler.stats()["in_flight"] == 0
+        assert daemon.limits.stats()["studio-voice@127.0.0.1:1"]["in_flight"] == 0
+        assert daemon.status()["in_flight"] == 0
+
+
+def _request(port: int, method: str, body: bytes = b"", **headers) -> int:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.putrequest(method, "/v1/jobs" if method == "POST" else "/v1/status", skip_host=True)
+    for name, value in {"Content-Length": str(len(body)), **headers}.items():
+        connection.putheader(name.replace("_", "-"), value)
+    connection.endheaders(body)
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+@pytest.mark.parametrize("token", [None, "s3cret"])
+def test_http_api_refuses_requests_from_other_origins(daemon, tmp_path, token):
+    daemon, _, _ = daemon
+    server = create_server(daemon, port=0, token=token)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    job = json.dumps(
+        {
+            "service": "studio-voice",
+            "input": input_path("studio-voice"),
+            "output": str(tmp_path / "out.wav"),
+        }
+    ).encode()
+    try:
+        # A cross-site form or fetch without preflight can only send text/plain
+        auth = {} if token is None else {"Authorization": f"Bearer {token}"}
+        text = {"Host": "localhost", "Content_Type": "text/plain", **auth}
+        assert _request(port, "POST", job, **text) == 415
+        json_job = {"Host": f"localhost:{port}", "Content_Type": "application/json"}
+        if token is None:
+            # A page of a rebound domain sends its own name as Host
+            assert _request(port, "POST", job, **{**json_job, "Host": "evil.example"}) == 403
+            assert _request(port, "GET", Host="evil.example") == 403
+        else:
+            assert _request(port, "POST", job, **json_job) == 401
+            assert _request(port, "GET", Host="localhost", Authorization="Bearer wrong") == 401
+        assert _request(port, "POST", job, **json_job, **auth) == 200
+        assert _request(port, "GET", Host="[::1]", **auth) == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_malformed_jobs_are_rejected(daemon, tmp_path):
+    daemon, primary, _ = daemon
+    server = create_server(daemon, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    job = {
+        "service": "studio-voice",
+        "input": input_path("studio-voice"),
+        "output": str(tmp_path / "out.wav"),
+    }
+    malformed = [
+        {**job, "params": 5},
+        {**job, "files": ["portrait.png"]},
+        {**job, "files": {"portrait_image": 5}},
+        {**job, "input": 5},
+        {**job, "output": ["out.wav"]},
+        {**job, "service": ["studio-voice"]},
+        {**job, "target": 8001},
+        [job],
+    ]
+    headers = {"Host": "localhost", "Content_Type": "application/json"}
+    try:
+        for body in malformed:
+            assert _request(port, "POST", json.dumps(body).encode(), **headers) == 400, body
+        assert _request(port, "POST", json.dumps(job).encode(), **headers) == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert primary.echo.calls == 1
+
+
+def test_tcp_listener_on_other_addresses_needs_a_token(daemon):
+    with pytest.raises(ValueError):
+        create_server(daemon[0], host="0.0.0.0", port=0)
+
+
+def test_unix_socket_is_only_open_to_its_user(daemon, tmp_path):
+    # Another user could plant a socket in a directory that everyone can write to
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o1777)
+    with pytest.raises(PermissionError):
+        create_server(daemon[0], str(shared / "daemon.sock"))
+    with pytest.raises(PermissionError):
+        DaemonConnection(str(shared / "daemon.sock"))
+
+    private = tmp_path / "private"
+    private.mkdir(mode=0o700)
+    socket_path = str(private / "daemon.sock")
+    server = create_server(daemon[0], socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+        connection = DaemonConnection(socket_path, timeout=10)
+        assert status(connection)["in_flight"] == 0
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,66 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Metrics of nim_common.diagnostics over a loop of streams."""
+
+import io
+import json
+
+import grpc
+
+from nim_common.diagnostics import Diagnostics
+from nim_common.dispatcher import summarize
+from nim_common.streaming import stream_into
+
+from conftest import input_path
+
+
+def test_samples_and_stream_peaks(standin, tmp_path):
+    server = standin("studio-voice")
+    path = tmp_path / "diagnostics.jsonl"
+    results = []
+    with Diagnostics(interval=3600, path=path, trace=True, top=5) as diagnostics:
+        with grpc.insecure_channel(server.target) as channel:
+            for _ in range(20):
+                result = stream_into(
+                    channel,
+                    server.spec,
+                    input_path("studio-voice"),
+                    io.BytesIO(),
+                    chunk_size=16 * 1024,
+                    single_message_limit=0,
+                )
+                diagnostics.observe(result)
+                results.append(result)
+    samples = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(samples) == 2  # taken on start and on stop
+    last = samples[-1]
+    assert last == diagnostics.latest
+    assert last["streams"] == 20
+    assert last["stream_peak_buffered_bytes"] == 2 * 16 * 1024
+    assert last["threads"] >= 1
+    assert last["rss_bytes"] > 0 and last["open_fds"] > 0
+    assert len(last["tracemalloc"]["top"]) <= 5
+    assert summarize(results, 1.0)["peak_buffered_bytes"] == 2 * 16 * 1024
+
+
+def test_without_tracing():
+    diagnostics = Diagnostics()
+    assert diagnostics.sample()["tracemalloc"] is None
@@ -0,0 +1,126 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Keyframe layout and span planning of the eye-contact pre-pass."""
+
+import struct
+
+import pytest
+
+import gaze_prepass
+from gaze_prepass import (
+    NO_FACE,
+    REDIRECT,
+    Span,
+    VideoLayout,
+    merge_spans,
+    plan_spans,
+    read_video_layout,
+)
+
+from conftest import input_path
+
+
+def box(name: bytes, *children: bytes) -> bytes:
+    payload = b"".join(children)
+    return struct.pack(">I4s", 8 + len(payload), name) + payload
+
+
+def full_box(name: bytes, version: int, fmt: str, *values) -> bytes:
+    return box(name, struct.pack(">B3x" + fmt, version, *values))
+
+
+def table(name: bytes, entries: list, entry: str = "II", version: int = 0) -> bytes:
+    values = [value for row in entries for value in row]
+    return full_box(name, version, "I" + entry * len(entries), len(entries), *values)
+
+
+def write_mp4(path, ctts=None, elst=None, movie_timescale: int = 600) -> None:
+    """Function to write a moov of one video track of ten 100 ms samples, keyframes 1 and 6."""
+    stbl = [table(b"stts", [(10, 100)]), full_box(b"stss", 0, "III", 2, 1, 6)]
+    if ctts is not None:
+        stbl.append(table(b"ctts", ctts, version=1, entry="Ii"))
+    trak = []
+    if elst is not None:
+        trak.append(box(b"edts", table(b"elst", elst, entry="IiI")))
+    mdia = box(
+        b"mdia",
+        full_box(b"mdhd", 0, "IIII", 0, 0, 1000, 1000),
+        full_box(b"hdlr", 0, "I4s", 0, b"vide"),
+        box(b"minf", box(b"stbl", *stbl)),
+    )
+    trak.append(mdia)
+    moov = box(b"moov", full_box(b"mvhd", 0, "III", 0, 0, movie_timescale), box(b"trak", *trak))
+    path.write_bytes(box(b"ftyp", b"isom\0\0\0\0") + moov + box(b"mdat"))
+
+
+def test_keyframes_are_decode_times_without_offsets(tmp_path):
+    path = tmp_path / "plain.mp4"
+    write_mp4(path)
+    assert read_video_layout(path) == VideoLayout(1.0, [0.0, 0.5])
+
+
+def test_keyframes_apply_composition_offsets_and_edit_list(tmp_path):
+    # B-frames: every sample is presented 200 ms after its decode time, the second
+    # keyframe 300 ms. The edit list starts the presentation at media time 200 ms
+    # after an empty edit of 1 s in the 600 Hz movie timescale.
+    path = tmp_path / "bframes.mp4"
+    write_mp4(
+        path, ctts=[(5, 200), (1, 300), (4, 200)], elst=[(600, -1, 1 << 16), (900, 200, 1 << 16)]
+    )
+    layout = read_video_layout(path)
+    assert layout.keyframes == pytest.approx([1.0, 1.6])
+
+
+def test_merge_spans_folds_short_untouched_runs():
+    spans = [
+        Span(0.0, 4.0, True),
+        Span(4.0, 5.0, False),
+        Span(5.0, 8.0, True),
+        Span(8.0, 12.0, False),
+        Span(12.0, 12.5, True),
+    ]
+    assert merge_spans(spans, min_skip=2.0) == [
+        Span(0.0, 8.0, True),
+        Span(8.0, 12.0, False),
+        Span(12.0, 12.5, True),
+    ]
+    # A short untouched run at the start has no redirected span to join
+    assert merge_spans([Span(0.0, 1.0, False), Span(1.0, 3.0, True)], 2.0) == [
+        Span(0.0, 1.0, False),
+        Span(1.0, 3.0, True),
+    ]
+
+
+def test_plan_spans_joins_keyframe_intervals(monkeypatch):
+    cv2 = pytest.importorskip("cv2")
+    layout = VideoLayout(8.0, [0.0, 1.0, 2.0, 3.0, 4.0, 6.0])
+    monkeypatch.setattr(gaze_prepass, "read_video_layout", lambda path: layout)
+
+    class Classifier:
+        _cv2 = cv2
+        # One answer per keyframe interval, with one sample per interval
+        answers = iter([REDIRECT, REDIRECT, NO_FACE, REDIRECT, NO_FACE, NO_FACE])
+
+        def classify(self, frame) -> str:
+            return next(self.answers)
+
+    spans = plan_spans(input_path("eye-contact"), Classifier(), samples_per_interval=1)
+    assert spans == [Span(0.0, 4.0, True), Span(4.0, 8.0, False)]
@@ -0,0 +1,72 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import io
+
+import grpc
+
+from nim_common.hedging import HedgePolicy, hedged_stream
+from nim_common.services import get_service
+
+from conftest import input_path
+
+
+def test_learned_delay_and_budget():
+    policy = HedgePolicy(quantile=0.5, budget=0.1, min_samples=3)
+    for first_output in (0.3, 0.1):
+        policy.observe(first_output)
+    assert policy.delay() is None
+    policy.observe(0.2)
+    assert policy.delay() == 0.2
+    for _ in range(9):
+        policy.start()
+    assert not policy.allow()
+    policy.start()
+    assert policy.allow() and not policy.allow()
+    stats = policy.stats()
+    assert (stats["calls"], stats["hedged"], stats["budget_denied"]) == (10, 1, 2)
+
+
+def test_slow_call_is_hedged_and_loser_cancelled(standin):
+    slow = standin("studio-voice", first_output_delay=2.0)
+    fast = standin("studio-voice")
+    spec = get_service("studio-voice")
+    with open(input_path("studio-voice"), "rb") as file:
+        expected = file.read()
+    policy = HedgePolicy(delay=0.1, budget=1.0)
+    with grpc.insecure_channel(slow.target) as primary, grpc.insecure_channel(
+        fast.target
+    ) as second:
+        output = io.BytesIO()
+        result = hedged_stream(
+            [primary, second], spec, input_path("studio-voice"), output, policy, timeout=10
+        )
+        assert result.hedge == "won" and result.error is None
+        assert output.getvalue() == expected
+        assert 0.1 <= result.latency < 2.0
+
+        # A call producing output before the delay is not hedged
+        result = hedged_stream(
+            [second, primary], spec, input_path("studio-voice"), io.BytesIO(), policy, timeout=10
+        )
+        assert result.hedge is None
+    stats = policy.stats()
+    assert (stats["calls"], stats["hedged"], stats["hedge_wins"]) == (2, 1, 1)
+    assert stats["win_rate"] == 1.0
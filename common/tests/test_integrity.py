@@ -0,0 +1,138 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Streaming hashes and container checks of nim_common.integrity."""
+
+import hashlib
+import io
+import struct
+
+import grpc
+import pytest
+
+from nim_common.integrity import OutputVerificationError, OutputVerifier
+from nim_common.standin import Faults
+from nim_common.streaming import stream_file, stream_into
+
+from conftest import input_path
+
+
+def box(box_type: bytes, body: bytes = b"", large: bool = False) -> bytes:
+    if large:
+        return struct.pack(">I4sQ", 1, box_type, 16 + len(body)) + body
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def wav(data: bytes, block_align: int = 4, riff_size: int = None, data_size: int = None) -> bytes:
+    fmt = struct.pack("<HHIIHH", 1, 2, 48000, 48000 * block_align, block_align, 16)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    body += b"data" + struct.pack("<I", len(data) if data_size is None else data_size) + data
+    return b"RIFF" + struct.pack("<I", len(body) if riff_size is None else riff_size) + body
+
+
+def verify(data: bytes, chunk_size: int = 7, **kwargs) -> dict:
+    verifier = OutputVerifier(**kwargs)
+    for i in range(0, len(data), chunk_size):
+        verifier.write(data[i : i + chunk_size])
+    return verifier.summary()
+
+
+MP4 = box(b"ftyp", b"isom" * 4) + box(b"moov", box(b"mvhd", bytes(100))) + box(b"mdat", bytes(999))
+
+
+@pytest.mark.parametrize(
+    "data, container",
+    [
+        (MP4, "mp4"),
+        (box(b"ftyp", b"isom") + box(b"moov") + box(b"mdat", bytes(50), large=True), "mp4"),
+        (box(b"ftyp", b"isom") + box(b"moov") + struct.pack(">I4s", 0, b"mdat") + bytes(9), "mp4"),
+        (wav(bytes(400)), "wav"),
+        (wav(bytes(400), riff_size=0xFFFFFFFF, data_size=0xFFFFFFFF), "wav"),
+    ],
+    ids=["mp4", "mp4-64-bit-box", "mp4-open-ended-box", "wav", "streamed-wav"],
+)
+def test_valid(data, container):
+    summary = verify(data)
+    assert summary["container"] == container
+    assert summary["valid"], summary["problems"]
+
+
+@pytest.mark.parametrize(
+    "data, problem",
+    [
+        (MP4[:-10], "Truncated: the mdat chunk is missing 10 bytes."),
+        (MP4[:-1003], "Truncated: the file ends inside a chunk header."),
+        (box(b"ftyp", b"isom") + box(b"mdat"), "The file has no moov box."),
+        (box(b"ftyp", b"isom") + b"\x00\x00\x00\x04moov", "Invalid size 4 of box moov"),
+        (wav(bytes(400))[:-2], "Truncated: the data chunk is missing 2 bytes."),
+        (wav(bytes(402)), "not a whole number of 4 byte frames"),
+        (wav(bytes(400), riff_size=10), "The RIFF header declares 18 bytes"),
+        (b"\x00" * 64, "neither a WAV nor an MP4"),
+    ],
+)
+def test_invalid(data, problem):
+    summary = verify(data)
+    assert summary["valid"] is False
+    assert any(problem in p for p in summary["problems"]), summary["problems"]
+
+
+def test_hashes_match_hashlib():
+    summary = verify(MP4, chunk_size=100, hashes=("sha256", "md5"), container="none")
+    assert summary["hashes"] == {
+        "sha256": hashlib.sha256(MP4).hexdigest(),
+        "md5": hashlib.md5(MP4).hexdigest(),
+    }
+    assert summary["valid"] is None
+
+
+def test_unknown_hash():
+    with pytest.raises(ValueError):
+        OutputVerifier(("nohash",))
+
+
+def test_stream_file_hashes_and_verifies(standin, tmp_path):
+    server = standin("eye-contact")
+    output = tmp_path / "output.mp4"
+    with grpc.insecure_channel(server.target) as channel:
+        result = stream_file(
+            channel,
+            server.spec,
+            input_path("eye-contact"),
+            output,
+            single_message_limit=0,
+            hashes=("sha256",),
+            verify=True,
+        )
+    assert result.hashes == {"sha256": hashlib.sha256(output.read_bytes()).hexdigest()}
+    assert result.integrity == {"container": "mp4", "valid": True, "problems": []}
+
+
+def test_truncated_output_fails_verification(standin):
+    server = standin("studio-voice", Faults(truncate_after=2))
+    with grpc.insecure_channel(server.target) as channel:
+        with pytest.raises(OutputVerificationError, match="Truncated"):
+            stream_into(
+                channel,
+                server.spec,
+                input_path("studio-voice"),
+                io.BytesIO(),
+                single_message_limit=0,
+                verify=True,
+            )
@@ -0,0 +1,144 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from nim_common.channels import ChannelConfig, ChannelPool
+from nim_common.daemon import JobError, NimDaemon
+from nim_common.jobqueue import JobQueue, QueueWorker, directory_jobs
+from nim_common.standin import Faults
+
+from conftest import input_path
+
+
+def _inputs(tmp_path, count: int) -> str:
+    input_dir = tmp_path / "in"
+    os.makedirs(input_dir / "nested")
+    for index in range(count):
+        folder = input_dir / "nested" if index % 2 else input_dir
+        shutil.copy(input_path("studio-voice"), folder / f"clip{index}.wav")
+    return str(input_dir)
+
+
+def test_workers_share_the_queue_without_double_processing(standin, tmp_path):
+    server = standin("studio-voice")
+    jobs = directory_jobs("studio-voice", _inputs(tmp_path, 6), str(tmp_path / "out"))
+    assert JobQueue(tmp_path / "queue").enqueue(jobs) == (6, 0)
+    assert JobQueue(tmp_path / "queue").enqueue(jobs) == (0, 6)
+
+    summaries = []
+    with ChannelPool() as pool:
+        daemon = NimDaemon(pool, {"studio-voice": ChannelConfig(server.target)})
+        workers = [
+            QueueWorker(JobQueue(tmp_path / "queue"), daemon, 2, name=f"host{i}", poll=0.05)
+            for i in range(2)
+        ]
+        threads = [
+            threading.Thread(target=lambda w=w: summaries.append(w.run(until_empty=True)))
+            for w in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+
+    assert server.echo.calls == 6
+    assert sum(summary["completed"] for summary in summaries) == 6
+    status = JobQueue(tmp_path / "queue").status()
+    assert (status["pending"], status["leased"], status["done"], status["failed"]) == (0, 0, 6, 0)
+    assert set(status["workers"]) == {"host0", "host1"}
+    for record in JobQueue(tmp_path / "queue").records():
+        with open(record["output"], "rb") as file:
+            assert hashlib.sha256(file.read()).hexdigest() == record["sha256"]
+        assert record["latency"] > 0 and record["attempt"] == 1
+    assert not [name for name in os.listdir(tmp_path / "out") if name.endswith(".partial")]
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = JobQueue(tmp_path / "queue", lease=10)
+    queue.enqueue(directory_jobs("studio-voice", _inputs(tmp_path, 1), str(tmp_path / "out")))
+    stalled = queue.claim("stalled")
+    assert queue.claim("other") is None
+    assert queue.reclaim(time.time()) == 0
+    assert queue.reclaim(time.time() + 11) == 1
+
+    lease = queue.claim("other")
+    assert lease.id == stalled.id and lease.attempt == 2
+    assert not stalled.heartbeat() and not stalled.complete({})
+    assert lease.complete({"id": lease.id})
+    # A job completed before its worker died is not run again
+    queue.enqueue([lease.job])
+    assert queue.status()["done"] == 1 and queue.claim("other") is None
+
+
+def test_expired_lease_on_last_attempt_is_failed(tmp_path):
+    queue = JobQueue(tmp_path / "queue", lease=10, max_attempts=2)
+    queue.enqueue(directory_jobs("studio-voice", _inputs(tmp_path, 1), str(tmp_path / "out")))
+    queue.claim("crashed")
+    assert queue.reclaim(time.time() + 11) == 1
+    lease = queue.claim("crashed")
+    assert lease.attempt == 2
+    assert queue.reclaim(time.time() + 11) == 1
+
+    assert queue.claim("other") is None
+    status = queue.status()
+    assert status["failures"] == {lease.id: "lease expired"}
+    failed = json.loads((tmp_path / "queue" / "failed" / f"{lease.id}.json").read_text())
+    assert failed["attempts"] == 2 and failed["errors"] == ["lease expired"]
+
+
+def test_failing_job_is_retried_then_failed(standin, tmp_path):
+    server = standin("studio-voice", Faults(fail_after=0))
+    queue = JobQueue(tmp_path / "queue", max_attempts=2)
+    queue.enqueue(directory_jobs("studio-voice", _inputs(tmp_path, 1), str(tmp_path / "out")))
+    with ChannelPool() as pool:
+        daemon = NimDaemon(pool, {"studio-voice": ChannelConfig(server.target)})
+        summary = QueueWorker(queue, daemon, 1, poll=0.05).run(until_empty=True)
+    assert summary["failed"] == 2
+    status = queue.status()
+    assert (status["pending"], status["failed"]) == (0, 1)
+    assert "UNAVAILABLE" in next(iter(status["failures"].values()))
+
+
+def test_malformed_job_fails_without_stopping_the_worker(standin, tmp_path):
+    server = standin("studio-voice")
+    queue = JobQueue(tmp_path / "queue")
+    jobs = directory_jobs("studio-voice", _inputs(tmp_path, 2), str(tmp_path / "out"))
+    with pytest.raises(JobError):
+        queue.enqueue([{**jobs[0], "params": 5}])
+    queue.enqueue(jobs)
+    # An entry written by an older or foreign enqueue bypasses the check
+    lease = queue.claim("editor")
+    lease.job["params"] = 5
+    lease.fail("edited", retry=True)
+    with ChannelPool() as pool:
+        daemon = NimDaemon(pool, {"studio-voice": ChannelConfig(server.target)})
+        summary = QueueWorker(queue, daemon, 1, poll=0.05).run(until_empty=True)
+    assert (summary["completed"], summary["failed"]) == (1, 1)
+    status = queue.status()
+    assert (status["pending"], status["done"], status["failed"]) == (0, 1, 1)
+    assert "params must be a JSON object" in next(iter(status["failures"].values()))
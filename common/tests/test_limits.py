@@ -0,0 +1,150 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Adaptive concurrency limits, alone and against a stand-in with simulated capacity."""
+
+import time
+
+import grpc
+import pytest
+
+from nim_common.dispatcher import StreamDispatcher, summarize
+from nim_common.limits import AimdLimiter, ConcurrencyLimits, GradientLimiter, classify
+from nim_common.standin import Capacity
+from nim_common.streaming import StreamResult
+
+CHUNK = 16 * 1024
+CAPACITY = Capacity(slots=4, chunk_seconds=0.02, queue=4)
+
+
+def finished(error=None, cancelled=None, retries=0) -> StreamResult:
+    result = StreamResult("studio-voice", "input.wav", "output.wav")
+    result.error = error
+    result.cancelled = cancelled
+    result.retries = retries
+    return result
+
+
+def release_after(limiter, slot, seconds: float, dropped=False) -> None:
+    slot.started = time.perf_counter() - seconds
+    limiter.release(slot, dropped)
+
+
+def test_classify():
+    assert classify(finished()) is False
+    assert classify(finished(retries=1)) is True
+    assert classify(finished("RESOURCE_EXHAUSTED: busy")) is True
+    assert classify(finished("DEADLINE_EXCEEDED: late", cancelled="deadline")) is True
+    assert classify(finished("INVALID_ARGUMENT: bad config")) is None
+    assert classify(finished("CANCELLED: user", cancelled="user")) is None
+
+
+def test_aimd_grows_and_backs_off_once_per_epoch():
+    limiter = AimdLimiter(initial=4, maximum=16)
+    slots = [limiter.acquire() for _ in range(4)]
+    for slot in slots:
+        release_after(limiter, slot, 0.1)
+    # Slow start, all but the call alone in flight grow the limit
+    assert limiter.limit == 7
+    # Calls admitted together before the overload lower the limit once
+    slots = [limiter.acquire() for _ in range(7)]
+    for slot in slots:
+        release_after(limiter, slot, 0.1, dropped=True)
+    assert limiter.limit == 6
+    assert limiter.drops == 7
+    # Calls that say nothing about capacity leave the limit alone
+    release_after(limiter, limiter.acquire(), 1.0, dropped=None)
+    assert limiter.limit == 6
+    # Latency well above the baseline is overload too
+    release_after(limiter, limiter.acquire(), 0.2)
+    assert limiter.limit == 5
+    assert limiter.in_flight == 0
+
+
+def test_acquire_waits_for_the_limit():
+    limiter = GradientLimiter(initial=1, maximum=1)
+    slot = limiter.acquire()
+    assert limiter.acquire(timeout=0.05) is None
+    limiter.release(slot)
+    assert limiter.acquire(timeout=0.05) is not None
+
+
+@pytest.mark.parametrize("limiter_class", [AimdLimiter, GradientLimiter])
+def test_limit_follows_latency(limiter_class):
+    # Calls queue at the NIM above 8 in flight, their latency grows with the queue
+    limiter = limiter_class(initial=4, maximum=64)
+    for _ in range(300):
+        limit = limiter.limit
+        slots = [limiter.acquire() for _ in range(limit)]
+        for slot in slots:
+            release_after(limiter, slot, 0.1 * max(1.0, limit / 8))
+    assert 8 <= limiter.limit <= 16
+    assert limiter.baseline == pytest.approx(0.1, rel=0.1)
+    assert limiter.probes > 0
+
+
+def test_limits_are_kept_per_service_and_target():
+    limits = ConcurrencyLimits(lambda: AimdLimiter(initial=2))
+    assert limits.get("studio-voice", "a:1") is limits.get("studio-voice", "a:1")
+    assert limits.get("studio-voice", "a:1") is not limits.get("studio-voice", "b:1")
+    assert limits.get("eye-contact", "a:1") is not limits.get("studio-voice", "a:1")
+    assert set(limits.stats()) == {"studio-voice@a:1", "studio-voice@b:1", "eye-contact@a:1"}
+
+
+def run_batch(server, tmp_path, clips: int, limiter=None) -> dict:
+    source = tmp_path / "input.wav"
+    source.write_bytes(bytes(4 * CHUNK))
+    jobs = [(source, tmp_path / f"output-{index}.wav") for index in range(clips)]
+    with grpc.insecure_channel(server.target) as channel:
+        with StreamDispatcher(
+            channel,
+            server.spec,
+            max_concurrent_streams=32,
+            chunk_size=CHUNK,
+            single_message_limit=0,
+            limiter=limiter,
+        ) as dispatcher:
+            start_time = time.perf_counter()
+            results = dispatcher.run(jobs)
+            wall_time = time.perf_counter() - start_time
+    return summarize(results, wall_time)
+
+
+@pytest.mark.parametrize("limiter_class", [AimdLimiter, GradientLimiter])
+def test_limiter_converges_to_simulated_capacity(standin, tmp_path, limiter_class):
+    unlimited = standin("studio-voice", capacity=CAPACITY)
+    summary = run_batch(unlimited, tmp_path, 64)
+    # 32 streams against 4 slots and a queue of 4 mostly fail
+    assert summary["failed"] > 16
+
+    server = standin("studio-voice", capacity=CAPACITY)
+    limiter = limiter_class(initial=4, maximum=32)
+    summary = run_batch(server, tmp_path, 160, limiter)
+    assert summary["failed"] <= 16
+    # The slots are kept busy, 4 slots process 4 / (4 chunks * 0.02s) = 50 clips/s
+    assert summary["clips_per_s"] > 25
+    assert server.echo.rejected == summary["failed"]
+    # The limit keeps probing above the capacity until a rejection lowers it again, so its
+    # last value is a snapshot of that oscillation. The rejections are what the limiters
+    # react to: each one is a drop, and they keep the calls in flight near the capacity
+    assert limiter.drops == server.echo.rejected
+    assert limiter.peak_in_flight <= 2 * (CAPACITY.slots + CAPACITY.queue)
+    assert limiter.minimum <= limiter.limit <= 2 * (CAPACITY.slots + CAPACITY.queue)
+    assert server.echo.peak_active == CAPACITY.slots
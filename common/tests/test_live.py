@@ -0,0 +1,158 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Processing a growing recording in closed segments, published in order."""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+from nim_common.live import follow, process_live
+
+from conftest import run_client
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="requires ffmpeg")
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    """Fragmented MP4 of 7 seconds with a keyframe every second."""
+    path = tmp_path_factory.mktemp("live") / "recording.mp4"
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc=size=160x120:rate=30",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:sample_rate=48000",
+            "-t",
+            "7",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-g",
+            "30",
+            "-c:a",
+            "aac",
+            "-movflags",
+            "frag_keyframe+empty_moov",
+            str(path),
+        ],
+        check=True,
+    )
+    return path
+
+
+def playlist_entries(path) -> list:
+    with open(path) as fd:
+        lines = fd.read().splitlines()
+    assert lines[-1] == "#EXT-X-ENDLIST"
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def test_growing_recording_is_published_in_order(recording, tmp_path):
+    growing = tmp_path / "growing.mp4"
+    data = recording.read_bytes()
+
+    def record() -> None:
+        # Writes the recording over about a second, as a capture would
+        with open(growing, "wb") as fd:
+            for offset in range(0, len(data), len(data) // 10):
+                fd.write(data[offset : offset + len(data) // 10])
+                fd.flush()
+                time.sleep(0.1)
+
+    open(growing, "wb").close()
+    recorder = threading.Thread(target=record)
+    recorder.start()
+    rendered = []
+    published = []
+
+    def render(segment_input: str, segment_output: str, segment) -> None:
+        # Segments waiting to be published, this one included
+        rendered.append(segment.index - len(published) + 1)
+        if segment.index == 1:
+            raise RuntimeError("injected failure")
+        if segment.index == 2:
+            # Processed, but not an MP4 that can be published
+            with open(segment_output, "wb") as fd:
+                fd.write(b"not an mp4")
+            return
+        # Later segments finish first, publishing still follows the recording
+        time.sleep(0.3 if segment.index == 0 else 0.0)
+        shutil.copyfile(segment_input, segment_output)
+
+    summary = process_live(
+        follow(growing, idle_timeout=1.0, poll=0.05),
+        render,
+        tmp_path / "hls",
+        segment_seconds=2,
+        concurrency=2,
+        output_filepath=tmp_path / "output.mp4",
+        on_publish=lambda segment, timings: published.append((segment.index, timings["error"])),
+    )
+    recorder.join()
+    assert summary["segments"] == 4
+    assert summary["passthrough"] == 2 and summary["dropped"] == 0
+    assert len(rendered) == 4 and max(rendered) <= 2
+    assert [index for index, _ in published] == [0, 1, 2, 3]
+    assert published[1] == (1, "injected failure")
+    assert published[2][1].startswith("publishing failed")
+    assert published[0][1] is None and published[3][1] is None
+    assert summary["duration_s"] == pytest.approx(7.0, abs=0.1)
+    assert summary["behind_live_max_s"] >= 2
+    assert playlist_entries(summary["playlist"]) == [f"segment_{i:05d}.ts" for i in range(4)]
+    assert os.path.getsize(tmp_path / "output.mp4") > 0
+
+
+def test_client_processes_live_recording(standin, recording, tmp_path):
+    server = standin("eye-contact")
+    output = tmp_path / "output.mp4"
+    hls = tmp_path / "hls"
+    result = run_client(
+        "eye-contact",
+        server.target,
+        str(output),
+        "--input",
+        str(recording),
+        "--live",
+        "--live-idle-timeout",
+        "0.5",
+        "--live-output-dir",
+        str(hls),
+        "--segment-seconds",
+        "3",
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Processed 3 segments (7.0s), 0 published unprocessed" in result.stdout
+    assert server.echo.calls == 3
+    assert playlist_entries(hls / "live.m3u8") == [f"segment_{i:05d}.ts" for i in range(3)]
+    assert os.path.getsize(output) > 0
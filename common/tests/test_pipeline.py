@@ -0,0 +1,185 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Chaining services through nim_common.pipeline against stand-ins."""
+
+import os
+import subprocess
+import sys
+
+import grpc
+import pytest
+
+from nim_common.channels import ChannelConfig, ChannelPool
+from nim_common.pipeline import IncompleteStage, Stage, run_pipeline
+from nim_common.standin import Faults
+
+from conftest import input_path
+
+COMMON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as fd:
+        return fd.read()
+
+
+def run_main(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "nim_common.pipeline", *args],
+        cwd=COMMON_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+def test_output_streams_through_two_services(standin, tmp_path):
+    voice, avatar = standin("studio-voice"), standin("audio2face-2d")
+    output = tmp_path / "output.mp4"
+    with ChannelPool() as pool:
+        stages = run_pipeline(
+            [
+                Stage(voice.spec, pool.get(ChannelConfig(voice.target))),
+                Stage(avatar.spec, pool.get(ChannelConfig(avatar.target))),
+            ],
+            input_path("studio-voice"),
+            output,
+            buffer_chunks=2,
+        )
+    # The stand-ins echo their input, so the output is the input passed through both
+    assert read(output) == read(input_path("studio-voice"))
+    assert stages[1].input_bytes == stages[0].output_bytes == os.path.getsize(output)
+    assert stages[0].peak_buffered_chunks <= 2
+    assert all(stage.error is None for stage in stages)
+    assert stages[0].first_output <= stages[1].first_output <= stages[1].finished
+
+    process = run_main(
+        "--input",
+        input_path("studio-voice"),
+        "--output",
+        str(tmp_path / "cli.mp4"),
+        "--stage",
+        f"studio-voice={voice.target}",
+        "--stage",
+        f"audio2face-2d={avatar.target}",
+    )
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert "Pipeline completed" in process.stdout
+
+
+def test_failing_middle_stage_aborts_the_pipeline(standin, tmp_path):
+    first, middle, last = (
+        standin("studio-voice"),
+        standin("studio-voice", Faults(fail_after=1)),
+        standin("audio2face-2d"),
+    )
+    with ChannelPool() as pool:
+        stages = [
+            Stage(server.spec, pool.get(ChannelConfig(server.target)))
+            for server in (first, middle, last)
+        ]
+        with pytest.raises(grpc.RpcError) as error:
+            run_pipeline(stages, input_path("studio-voice"), tmp_path / "output.mp4")
+    assert error.value.code() == grpc.StatusCode.UNAVAILABLE
+    assert stages[1].error.startswith("UNAVAILABLE")
+    # The first stage may have sent all its output before the middle one failed
+    assert stages[0].error in (None, "aborted")
+    assert stages[2].error == "aborted"
+
+    # The last stage never produced output, the summary must still report the failure
+    process = run_main(
+        "--input",
+        input_path("studio-voice"),
+        "--output",
+        str(tmp_path / "cli.mp4"),
+        "--stage",
+        f"studio-voice={first.target}",
+        "--stage",
+        f"studio-voice={middle.target}",
+        "--stage",
+        f"audio2face-2d={last.target}",
+    )
+    assert process.returncode == 1
+    assert "Pipeline failed:" in process.stdout
+    assert "studio-voice (UNAVAILABLE: Injected fault)" in process.stdout
+    assert "Traceback" not in process.stderr
+
+
+def test_stage_ending_before_its_input_aborts_the_pipeline(standin, tmp_path):
+    # The last stage returns OK after one chunk, the first one must not block on the buffer
+    voice, avatar = standin("studio-voice"), standin("audio2face-2d", Faults(truncate_after=1))
+    # Much larger than the chunks in flight, so the first stage is still sending when cut off
+    source = tmp_path / "input.wav"
+    source.write_bytes(os.urandom(16 * 1024 * 1024))
+    with ChannelPool() as pool:
+        stages = [
+            Stage(server.spec, pool.get(ChannelConfig(server.target))) for server in (voice, avatar)
+        ]
+        with pytest.raises(IncompleteStage):
+            run_pipeline(stages, source, tmp_path / "output.mp4", buffer_chunks=2)
+    assert stages[0].error == "aborted"
+    assert stages[1].error == "the stream ended before all of its input was read"
+
+    process = run_main(
+        "--input",
+        str(source),
+        "--output",
+        str(tmp_path / "cli.mp4"),
+        "--stage",
+        f"studio-voice={voice.target}",
+        "--stage",
+        f"audio2face-2d={avatar.target}",
+        "--buffer-chunks",
+        "2",
+    )
+    assert process.returncode == 1
+    assert "audio2face-2d (the stream ended before all of its input was read)" in process.stdout
+
+
+def test_unwritable_output_exits_non_zero(standin, tmp_path):
+    voice = standin("studio-voice")
+    process = run_main(
+        "--input",
+        input_path("studio-voice"),
+        "--output",
+        str(tmp_path / "missing" / "output.wav"),
+        "--stage",
+        f"studio-voice={voice.target}",
+    )
+    assert process.returncode == 1
+    assert "Pipeline failed" in process.stdout and "No such file" in process.stdout
+    assert "Traceback" not in process.stderr
+
+
+def test_summary_of_a_stage_without_output(standin, tmp_path):
+    voice = standin("studio-voice")
+    empty = tmp_path / "empty.wav"
+    empty.write_bytes(b"")
+    process = run_main(
+        "--input",
+        str(empty),
+        "--output",
+        str(tmp_path / "output.wav"),
+        "--stage",
+        f"studio-voice={voice.target}",
+    )
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert "studio-voice: first output never" in process.stdout
@@ -0,0 +1,178 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Progressive playback of growing MP4 outputs."""
+
+import struct
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from nim_common.progressive import FragmentSplitter, GrowingOutput, ProgressiveServer
+from nim_common.standin import Faults
+
+from conftest import input_path, run_client
+
+
+def box(name: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), name) + payload
+
+
+FTYP = box(b"ftyp", b"isom\x00\x00\x02\x00")
+MOOV = box(b"moov", box(b"mvhd", bytes(100)))
+FRAGMENTED_MOOV = box(b"moov", box(b"mvhd", bytes(100)) + box(b"mvex", box(b"trex", bytes(24))))
+FRAGMENTS = [box(b"moof", bytes(40 + i)) + box(b"mdat", bytes(1000 * i)) for i in range(1, 4)]
+MDAT = box(b"mdat", bytes(5000))
+
+
+def split(data: bytes, step: int = 7) -> tuple:
+    segments = []
+    splitter = FragmentSplitter(lambda kind, segment: segments.append((kind, segment)))
+    for i in range(0, len(data), step):
+        splitter.feed(data[i : i + step])
+    return splitter, segments
+
+
+def test_fragmented_mp4_is_split_into_init_and_fragments():
+    splitter, segments = split(FTYP + FRAGMENTED_MOOV + b"".join(FRAGMENTS) + box(b"mfra"))
+    assert splitter.layout == "fragmented"
+    assert segments == [("init", FTYP + FRAGMENTED_MOOV)] + [("fragment", f) for f in FRAGMENTS]
+
+
+@pytest.mark.parametrize(
+    "data, layout",
+    [
+        (FTYP + MOOV + MDAT, "faststart"),
+        (FTYP + MDAT + MOOV, "moov-at-end"),
+        (b"RIFF\x24\x00\x00\x00WAVEfmt ", None),
+    ],
+)
+def test_layout_is_detected(data, layout):
+    splitter, segments = split(data)
+    assert splitter.layout == layout
+    assert segments == ([("init", FTYP + MOOV)] if layout == "faststart" else [])
+
+
+def get(url: str, byte_range: str = None) -> tuple:
+    request = urllib.request.Request(url)
+    if byte_range is not None:
+        request.add_header("Range", byte_range)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, b""
+
+
+@pytest.fixture
+def served(tmp_path):
+    layouts = []
+    output = GrowingOutput(tmp_path / "output.mp4", on_layout=layouts.append)
+    with ProgressiveServer(output) as server:
+        yield output, server, layouts
+
+
+def test_ranges_follow_the_growing_output(served):
+    output, server, layouts = served
+    data = FTYP + FRAGMENTED_MOOV + b"".join(FRAGMENTS)
+    url = server.url + "output.mp4"
+    with output:
+        output.write(data[:1000])
+        assert layouts == ["fragmented"]
+        assert output.playable is not None
+        status, headers, body = get(url, "bytes=0-")
+        assert status == 206
+        assert headers["Content-Range"] == "bytes 0-999/*"
+        assert body == data[:1000]
+
+        # A range past the written bytes waits for them
+        writer = threading.Timer(0.2, output.write, (data[1000:],))
+        writer.start()
+        status, headers, body = get(url, "bytes=1500-1599")
+        writer.join()
+        assert (status, body) == (206, data[1500:1600])
+
+    status, headers, body = get(url, "bytes=1000-")
+    assert headers["Content-Range"] == f"bytes 1000-{len(data) - 1}/{len(data)}"
+    assert body == data[1000:]
+    assert get(url, f"bytes={len(data)}-")[0] == 416
+    assert get(url, "bytes=-10")[2] == data[-10:]
+    # Reversed and empty ranges are unsatisfiable, not negative lengths
+    assert get(url, "bytes=10-5")[0] == 416
+    status, headers, _ = get(url, "bytes=-0")
+    assert (status, headers["Content-Range"]) == (416, f"bytes */{len(data)}")
+    assert b"<video" in get(server.url)[2]
+
+
+def test_whole_output_streams_while_it_grows(served):
+    output, server, _ = served
+    data = FTYP + MOOV + MDAT * 20
+
+    def write() -> None:
+        with output:
+            for i in range(0, len(data), 10000):
+                output.write(data[i : i + 10000])
+                time.sleep(0.01)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    status, headers, body = get(server.url + "output.mp4")
+    writer.join()
+    assert status == 200
+    assert headers["Transfer-Encoding"] == "chunked"
+    assert body == data
+    assert output.complete
+    assert server.wait_idle(linger=0.05, timeout=5)
+
+
+def test_restarted_output_drops_readers_of_the_failed_attempt(served):
+    output, server, _ = served
+    with pytest.raises(RuntimeError):
+        with output:
+            output.write(FTYP)
+            raise RuntimeError("UNAVAILABLE")
+    assert not output.complete
+    with output:
+        output.write(FTYP + MOOV)
+    assert output.generation == 2
+    assert get(server.url + "output.mp4")[2] == FTYP + MOOV
+
+
+def test_client_serves_progressive_output(standin, tmp_path):
+    server = standin("eye-contact", Faults(keepalives=1))
+    output = tmp_path / "output.mp4"
+    result = run_client(
+        "eye-contact",
+        server.target,
+        str(output),
+        "--progressive-port",
+        "0",
+        "--progressive-linger",
+        "0",
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Serving the output for progressive playback at http://127.0.0.1:" in result.stdout
+    # The sample input has its moov box after the media data
+    assert "moov box at the end" in result.stdout
+    with open(output, "rb") as fd, open(input_path("eye-contact"), "rb") as expected:
+        assert fd.read() == expected.read()
@@ -0,0 +1,144 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Weighted fair queuing and token bucket limits of the scheduler."""
+
+import collections
+import time
+
+import pytest
+
+from nim_common.scheduling import FairScheduler, TokenBucket, TrafficClass, parse_traffic_class
+
+
+def admitted_classes(scheduler: FairScheduler, count: int) -> collections.Counter:
+    tickets = [scheduler.next(timeout=0) for _ in range(count)]
+    assert None not in tickets
+    for ticket in tickets:
+        scheduler.release(ticket)
+    return collections.Counter(ticket.traffic_class for ticket in tickets)
+
+
+def test_parse_traffic_class():
+    assert parse_traffic_class("gold:3") == TrafficClass("gold", 3.0)
+    assert parse_traffic_class("bulk:1::5e7") == TrafficClass("bulk", 1.0, None, 5e7)
+    assert parse_traffic_class("batch") == TrafficClass("batch", 1.0)
+    with pytest.raises(ValueError):
+        parse_traffic_class(":1")
+    with pytest.raises(ValueError):
+        parse_traffic_class("gold:1:2:3:4")
+
+
+def test_token_bucket_refills_up_to_its_burst():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    assert TokenBucket(0.5).burst == 1.0
+    bucket = TokenBucket(rate=10, burst=5)
+    now = time.monotonic()
+    assert bucket.delay(5, now) == 0
+    bucket.take(5)
+    assert bucket.delay(1, now) == pytest.approx(0.1)
+    assert bucket.delay(1, now + 0.1) == pytest.approx(0, abs=1e-9)
+    # An idle bucket holds no more than its burst
+    assert bucket.delay(5, now + 60) == 0
+    assert bucket.tokens == 5
+    # A larger amount is admitted from a full bucket and leaves it in debt
+    assert bucket.delay(8, now + 60) == 0
+    bucket.take(8)
+    assert bucket.delay(1, now + 60) == pytest.approx(0.4)
+
+
+def test_admission_is_proportional_to_weight():
+    scheduler = FairScheduler([TrafficClass("gold", 3), TrafficClass("bronze", 1)])
+    for _ in range(20):
+        scheduler.enqueue("gold", cost=100)
+        scheduler.enqueue("bronze", cost=100)
+    assert admitted_classes(scheduler, 20) == {"gold": 15, "bronze": 5}
+
+
+def test_admission_is_proportional_to_input_bytes():
+    scheduler = FairScheduler()
+    for _ in range(20):
+        scheduler.enqueue("large", cost=300)
+        scheduler.enqueue("small", cost=100)
+    admitted_classes(scheduler, 20)
+    classes = scheduler.stats()["classes"]
+    assert classes["small"]["admitted"] == 15
+    assert classes["large"]["admitted"] == 5
+    assert classes["small"]["admitted_bytes"] == classes["large"]["admitted_bytes"]
+
+
+def test_request_rate_allows_a_burst_then_waits_for_refill():
+    scheduler = FairScheduler(requests_per_s=20)
+    for _ in range(21):
+        scheduler.enqueue()
+    admitted_classes(scheduler, 20)
+    assert scheduler.next(timeout=0) is None
+    start_time = time.monotonic()
+    assert scheduler.next(timeout=5) is not None
+    assert 0.02 < time.monotonic() - start_time < 1
+
+
+def test_class_over_its_limit_is_skipped():
+    scheduler = FairScheduler([TrafficClass("bulk", 1, requests_per_s=1)])
+    for name in ("bulk", "bulk", "interactive", "interactive"):
+        scheduler.enqueue(name)
+    assert [scheduler.next(timeout=0).traffic_class for _ in range(3)] == [
+        "bulk",
+        "interactive",
+        "interactive",
+    ]
+    assert scheduler.next(timeout=0) is None
+    assert scheduler.stats()["classes"]["bulk"]["queued"] == 1
+
+
+def test_release_withdraws_a_cancelled_ticket():
+    scheduler = FairScheduler(max_in_flight=1)
+    scheduler.enqueue()
+    running = scheduler.next(timeout=0)
+    cancelled = scheduler.enqueue()
+    scheduler.release(cancelled)
+    assert scheduler.stats()["in_flight"] == 1
+    assert scheduler.stats()["classes"]["default"]["queued"] == 0
+    scheduler.release(running)
+    scheduler.release(running)
+    assert scheduler.stats()["in_flight"] == 0
+    assert scheduler.stats()["classes"]["default"]["in_flight"] == 0
+    # Neither ticket is admitted again
+    assert scheduler.next(timeout=0) is None
+
+
+def test_interrupted_acquire_leaves_no_ticket(monkeypatch):
+    scheduler = FairScheduler(max_in_flight=1)
+    running = scheduler.acquire()
+
+    def interrupt(timeout=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scheduler._condition, "wait", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.acquire()
+    monkeypatch.undo()
+    scheduler.release(running)
+    assert scheduler.stats()["classes"]["default"]["queued"] == 0
+    with scheduler.admit() as ticket:
+        assert ticket.admitted
+        assert scheduler.stats()["in_flight"] == 1
+    assert scheduler.stats()["in_flight"] == 0
@@ -0,0 +1,107 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Cutting WAV inputs at silences and slicing per-frame tracks per segment."""
+
+import array
+import math
+import wave
+
+import pytest
+
+from nim_common.segments import plan_segments, slice_track, write_segment
+from nim_common.services import get_service
+
+RATE = 16000
+
+
+def write_wav(path, seconds: float, silences) -> None:
+    """Function to write a 440 Hz tone, silent in the (start, end) seconds of silences."""
+    samples = array.array("h")
+    for index in range(int(seconds * RATE)):
+        t = index / RATE
+        quiet = any(start <= t < end for start, end in silences)
+        samples.append(0 if quiet else int(8000 * math.sin(2 * math.pi * 440 * t)))
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+
+
+def test_cuts_fall_in_silences(tmp_path):
+    source = tmp_path / "speech.wav"
+    write_wav(source, 34.0, [(11.0, 11.6), (20.5, 21.0)])
+    segments = plan_segments(source, segment_seconds=10, search_seconds=2)
+    # The third nominal cut at about 31s leaves less than half a segment, it is merged
+    assert len(segments) == 3
+    assert [segment.at_silence for segment in segments] == [False, True, True]
+    assert 11.0 < segments[1].start / RATE < 11.6
+    assert 20.5 < segments[2].start / RATE < 21.0
+    assert segments[0].start == 0 and segments[-1].end == 34 * RATE
+    for before, after in zip(segments, segments[1:]):
+        assert before.end == after.start
+        assert before.first_video_frame + before.video_frames == after.first_video_frame
+        # Cuts are aligned to the 30 fps video frames
+        assert after.start == after.first_video_frame * RATE // 30
+
+
+def test_cut_without_silence_keeps_the_nominal_length(tmp_path):
+    source = tmp_path / "tone.wav"
+    write_wav(source, 20.0, [])
+    segments = plan_segments(source, segment_seconds=10, search_seconds=1)
+    assert len(segments) == 2 and not segments[1].at_silence
+    assert abs(segments[1].start / RATE - 10) <= 1
+
+
+def test_segments_add_up_to_the_input(tmp_path):
+    source = tmp_path / "speech.wav"
+    write_wav(source, 12.0, [(5.0, 5.5)])
+    segments = plan_segments(source, segment_seconds=5, search_seconds=1)
+    frames = b""
+    for segment in segments:
+        path = tmp_path / f"segment-{segment.index}.wav"
+        write_segment(source, segment, path)
+        with wave.open(str(path), "rb") as wav:
+            assert wav.getframerate() == RATE
+            frames += wav.readframes(wav.getnframes())
+    with wave.open(str(source), "rb") as wav:
+        assert frames == wav.readframes(wav.getnframes())
+
+
+def test_slice_track_continues_across_segments():
+    pb2 = get_service("audio2face-2d").pb2
+    track = pb2.QuaternionStream()
+    for index in range(7):
+        track.values.add(x=float(index), w=1.0)
+    first = slice_track(track, 0, 5)
+    second = slice_track(track, 5, 6)
+    assert type(second) is pb2.QuaternionStream
+    # The track loops, the second segment picks up where the first one ended
+    assert [value.x for value in first.values] == [0, 1, 2, 3, 4]
+    assert [value.x for value in second.values] == [5, 6, 0, 1, 2, 3]
+    assert len(slice_track(pb2.QuaternionStream(), 5, 6).values) == 0
+
+
+def test_non_pcm_input_is_rejected(tmp_path):
+    source = tmp_path / "input.wav"
+    source.write_bytes(b"not a wav file")
+    with pytest.raises(ValueError):
+        plan_segments(source, segment_seconds=10)
@@ -0,0 +1,96 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Soak test running thousands of streams to catch leaked channels, threads and memory.
+
+The number of streams is set with the NIM_SOAK_STREAMS environment variable.
+"""
+
+import gc
+import io
+import os
+import threading
+
+import grpc
+import pytest
+
+from nim_common.standin import Faults
+from nim_common.streaming import stream_into
+
+SOAK_STREAMS = int(os.environ.get("NIM_SOAK_STREAMS", "2000"))
+CHANNEL_STREAMS = 50  # streams sharing a channel before it is closed and a new one opened
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def client_threads() -> int:
+    # The stand-ins' worker pools grow on demand up to their max_workers, they are not leaks
+    return sum(1 for t in threading.enumerate() if not t.name.startswith("ThreadPoolExecutor"))
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as fd:
+        return int(fd.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.mark.soak
+def test_soak(standin, tmp_path):
+    # Every fifth call fails part-way, so failed and completed calls are both exercised
+    server = standin("studio-voice", Faults(fail_after=1, fail_code="UNAVAILABLE"))
+    clean = standin("studio-voice")
+    input_filepath = tmp_path / "input.wav"
+    with open(input_filepath, "wb") as fd:
+        fd.write(os.urandom(4 * 1024))
+
+    def run(streams: int) -> int:
+        failed = 0
+        for start in range(0, streams, CHANNEL_STREAMS):
+            channels = [grpc.insecure_channel(s.target) for s in (clean, server)]
+            for i in range(start, min(streams, start + CHANNEL_STREAMS)):
+                channel = channels[1] if i % 5 == 0 else channels[0]
+                try:
+                    stream_into(
+                        channel,
+                        clean.spec,
+                        input_filepath,
+                        io.BytesIO(),
+                        chunk_size=1024,
+                        single_message_limit=0,
+                    )
+                except grpc.RpcError:
+                    failed += 1
+            for channel in channels:
+                channel.close()
+        return failed
+
+    # Warm up so that thread pools, caches and allocator arenas reach their steady size
+    run(2 * CHANNEL_STREAMS)
+    gc.collect()
+    threads, fds, rss = client_threads(), open_fds(), rss_bytes()
+
+    failed = run(SOAK_STREAMS)
+
+    gc.collect()
+    assert failed == len(range(0, SOAK_STREAMS, 5))
+    assert client_threads() <= threads
+    assert open_fds() <= fds
+    assert rss_bytes() - rss < 32 * 1024 * 1024
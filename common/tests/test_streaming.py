@@ -0,0 +1,277 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Retries, timeouts and memory bounds of nim_common.streaming under injected faults."""
+
+import io
+import os
+import threading
+import time
+
+import grpc
+import pytest
+
+from nim_common.deadlines import CancelScope
+from nim_common.dispatcher import StreamDispatcher, summarize
+from nim_common.retries import backoff_delay, call_with_retries
+from nim_common.scheduling import FairScheduler
+from nim_common.standin import Faults
+from nim_common.streaming import DATA_CHUNKS, stream_file, stream_into
+
+from conftest import input_path
+
+EYE_CONTACT_PARAMS = {"temporal": 1}
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as fd:
+        return fd.read()
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as fd:
+        return int(fd.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+@pytest.fixture
+def channel_to():
+    channels = []
+
+    def connect(server) -> grpc.Channel:
+        channel = grpc.insecure_channel(server.target)
+        channels.append(channel)
+        return channel
+
+    yield connect
+    for channel in channels:
+        channel.close()
+
+
+def test_retry_rewrites_output(standin, channel_to, tmp_path):
+    server = standin("eye-contact", Faults(fail_after=3, fail_calls=2))
+    output = tmp_path / "output.mp4"
+    result = stream_file(
+        channel_to(server),
+        server.spec,
+        input_path("eye-contact"),
+        output,
+        params=EYE_CONTACT_PARAMS,
+        single_message_limit=0,
+        retries=2,
+    )
+    assert result.retries == 2
+    assert server.echo.failed == 2
+    assert read(output) == read(input_path("eye-contact"))
+    assert result.output_bytes == result.input_bytes == os.path.getsize(output)
+
+
+def test_inputs_are_chunked_unless_single_message_is_opted_in(standin, channel_to, tmp_path):
+    server = standin("studio-voice")
+    source = input_path("studio-voice")
+    chunked = stream_file(channel_to(server), server.spec, source, tmp_path / "a.wav")
+    assert chunked.input_chunks == -(-os.path.getsize(source) // DATA_CHUNKS)
+    single = stream_file(
+        channel_to(server), server.spec, source, tmp_path / "b.wav", single_message_limit=2**20
+    )
+    assert single.input_chunks == 1
+    assert read(tmp_path / "a.wav") == read(tmp_path / "b.wav") == read(source)
+
+
+def test_retries_exhausted(standin, channel_to, tmp_path):
+    server = standin("studio-voice", Faults(fail_after=1))
+    with pytest.raises(grpc.RpcError) as error:
+        stream_file(
+            channel_to(server),
+            server.spec,
+            input_path("studio-voice"),
+            tmp_path / "output.wav",
+            single_message_limit=0,
+            retries=1,
+        )
+    assert error.value.code() == grpc.StatusCode.UNAVAILABLE
+    assert server.echo.calls == 2
+
+
+def test_non_retryable_error_is_not_retried(standin, channel_to, tmp_path):
+    server = standin("studio-voice", Faults(fail_after=1, fail_code="RESOURCE_EXHAUSTED"))
+    with pytest.raises(grpc.RpcError) as error:
+        stream_file(
+            channel_to(server),
+            server.spec,
+            input_path("studio-voice"),
+            tmp_path / "output.wav",
+            single_message_limit=0,
+            retries=3,
+        )
+    assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert server.echo.calls == 1
+
+
+@pytest.mark.parametrize("raw", [True, False])
+@pytest.mark.parametrize(
+    "faults",
+    [Faults(skip_config_echo=True), Faults(keepalives=3, keepalive_interval=0.001)],
+    ids=["missing-echo", "keepalives"],
+)
+def test_output_unaffected(standin, channel_to, faults, raw):
+    server = standin("eye-contact", faults)
+    sink = io.BytesIO()
+    result = stream_into(
+        channel_to(server),
+        server.spec,
+        input_path("eye-contact"),
+        sink,
+        params=EYE_CONTACT_PARAMS,
+        single_message_limit=0,
+        raw=raw,
+    )
+    assert sink.getvalue() == read(input_path("eye-contact"))
+    assert result.output_bytes == len(sink.getvalue())
+
+
+def test_truncated_output_is_reported(standin, channel_to):
+    server = standin("eye-contact", Faults(truncate_after=2))
+    result = stream_into(
+        channel_to(server),
+        server.spec,
+        input_path("eye-contact"),
+        io.BytesIO(),
+        chunk_size=1024,
+        single_message_limit=0,
+    )
+    assert result.output_bytes == 2 * 1024
+    assert result.input_bytes > result.output_bytes
+
+
+def test_timeout_cancels_server_side(standin, channel_to):
+    server = standin("studio-voice", first_output_delay=30)
+    start_time = time.monotonic()
+    with pytest.raises(grpc.RpcError) as error:
+        stream_into(
+            channel_to(server), server.spec, input_path("studio-voice"), io.BytesIO(), timeout=0.5
+        )
+    assert error.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    assert time.monotonic() - start_time < 5
+    deadline = time.monotonic() + 5
+    while server.echo.cancelled < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.echo.cancelled == 1
+
+
+def test_cancel_interrupts_backoff():
+    scope = CancelScope()
+    calls = []
+
+    class Unavailable(grpc.RpcError):
+        def code(self):
+            return grpc.StatusCode.UNAVAILABLE
+
+    def call():
+        calls.append(time.monotonic())
+        raise Unavailable()
+
+    threading.Timer(0.2, scope.cancel).start()
+    start_time = time.monotonic()
+    with pytest.raises(Unavailable):
+        call_with_retries(call, retries=5, scope=scope, backoff=10)
+    assert len(calls) == 1
+    assert time.monotonic() - start_time < 2
+
+
+def test_backoff_is_bounded():
+    for attempt in range(20):
+        delay = backoff_delay(attempt, base=0.5, maximum=8)
+        assert 0.25 * min(16, 2**attempt) <= delay <= 8
+
+
+def test_dispatcher_counts_retries(standin, channel_to, tmp_path):
+    server = standin("studio-voice", Faults(fail_after=1, fail_calls=3))
+    with StreamDispatcher(
+        channel_to(server),
+        server.spec,
+        max_concurrent_streams=4,
+        single_message_limit=0,
+        retries=2,
+    ) as dispatcher:
+        results = dispatcher.run(
+            [(input_path("studio-voice"), tmp_path / f"{i}.wav") for i in range(6)]
+        )
+    summary = summarize(results, 1.0)
+    assert summary["failed"] == 0
+    assert summary["retries"] == 3
+
+
+def test_scheduled_call_failing_unexpectedly_fails_its_future(standin, channel_to, tmp_path):
+    server = standin("studio-voice")
+
+    class BrokenRecorder:
+        def record(self, *args, **kwargs) -> None:
+            raise RuntimeError("recorder failed")
+
+    with StreamDispatcher(
+        channel_to(server),
+        server.spec,
+        max_concurrent_streams=2,
+        scheduler=FairScheduler([]),
+        recorder=BrokenRecorder(),
+    ) as dispatcher:
+        future = dispatcher.submit(input_path("studio-voice"), tmp_path / "output.wav")
+        with pytest.raises(RuntimeError, match="recorder failed"):
+            future.result(timeout=10)
+        assert dispatcher.scheduler.stats()["in_flight"] == 0
+
+
+def test_slow_consumer_memory_is_bounded(standin, channel_to, tmp_path):
+    # The output of a consumer slower than the server is held back by HTTP/2 flow control
+    # instead of being buffered in full
+    size = 64 * 1024 * 1024
+    input_filepath = tmp_path / "input.wav"
+    with open(input_filepath, "wb") as fd:
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(size // len(chunk)):
+            fd.write(chunk)
+    server = standin("studio-voice")
+
+    class SlowSink:
+        written = 0
+
+        def write(self, data: bytes) -> None:
+            self.written += len(data)
+            time.sleep(0.0005)
+
+    baseline = rss_bytes()
+    peak = baseline
+    stop = threading.Event()
+
+    def sample() -> None:
+        nonlocal peak
+        while not stop.wait(0.01):
+            peak = max(peak, rss_bytes())
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    sink = SlowSink()
+    try:
+        stream_into(channel_to(server), server.spec, input_filepath, sink)
+    finally:
+        stop.set()
+        sampler.join()
+    assert sink.written == size
+    assert peak - baseline < size // 2
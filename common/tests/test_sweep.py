@@ -0,0 +1,104 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import csv
+import hashlib
+
+import grpc
+
+from nim_common.services import get_service
+from nim_common.streaming import PreparedInput
+from nim_common.sweep import (
+    expand_grid,
+    parse_value,
+    result_matrix,
+    run_sweep,
+    variant_label,
+    write_matrix,
+)
+
+from conftest import input_path
+
+
+def test_expand_grid_and_labels():
+    base = {"temporal": 0xFFFFFFFF, "eye_size_sensitivity": 3}
+    grid = {"eye_size_sensitivity": [2, 4], "gaze_pitch_threshold_low": [15.0, 20.0, 25.0]}
+    variants = expand_grid(base, grid)
+    assert len(variants) == 6
+    assert variants[0] == {
+        "temporal": 0xFFFFFFFF,
+        "eye_size_sensitivity": 2,
+        "gaze_pitch_threshold_low": 15.0,
+    }
+    assert (
+        variant_label(variants[-1], base) == "eye_size_sensitivity=4,gaze_pitch_threshold_low=25.0"
+    )
+    assert variant_label(base, base) == "base"
+    assert expand_grid(base, {}) == [base]
+    assert [parse_value(text) for text in ("3", "0.5", "true", "NORMAL")] == [
+        3,
+        0.5,
+        True,
+        "NORMAL",
+    ]
+
+
+def test_sweep_shares_prepared_input(standin, tmp_path):
+    server = standin("eye-contact")
+    source = input_path("eye-contact")
+    prepared = PreparedInput(
+        get_service("eye-contact"), source, chunk_size=16 * 1024, single_message_limit=0
+    )
+    assert prepared.size == sum(prepared.chunk_sizes) == len(open(source, "rb").read())
+    assert len(prepared.requests) > 1
+
+    variants = expand_grid({}, {"eye_size_sensitivity": [2, 3, 4, 5, 6, 7]})
+    labels = [variant_label(variant, {}) for variant in variants]
+    with grpc.insecure_channel(server.target) as channel:
+        results = run_sweep(
+            [channel], prepared, variants, labels=labels, output_dir=tmp_path, concurrency=3
+        )
+    assert server.echo.calls == 6
+    expected = hashlib.sha256(open(source, "rb").read()).hexdigest()
+    for result in results:
+        assert result.ok
+        assert result.input_bytes == prepared.size
+        assert result.hashes["sha256"] == expected
+        assert open(result.output_filepath, "rb").read() == open(source, "rb").read()
+
+    rows = result_matrix(variants, labels, results)
+    assert [row["eye_size_sensitivity"] for row in rows] == [2, 3, 4, 5, 6, 7]
+    assert all(row["error"] is None and row["latency_s"] > 0 for row in rows)
+    write_matrix(rows, tmp_path / "matrix.csv")
+    with open(tmp_path / "matrix.csv") as fd:
+        read = list(csv.DictReader(fd))
+    assert read[0]["label"] == "eye_size_sensitivity=2"
+    assert read[0]["output_sha256"] == expected
+
+
+def test_sweep_keeps_failed_variants(standin, tmp_path):
+    server = standin("studio-voice")
+    prepared = PreparedInput(get_service("studio-voice"), input_path("studio-voice"))
+    with grpc.insecure_channel(server.target) as channel:
+        results = run_sweep(
+            [channel, grpc.insecure_channel("127.0.0.1:1")], prepared, [{}, {}], timeout=2
+        )
+    assert results[0].ok and results[0].output_filepath is None
+    assert results[1].error.startswith("UNAVAILABLE") or "DEADLINE" in results[1].error
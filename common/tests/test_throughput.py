@@ -0,0 +1,130 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Real-time factor and throughput accounting."""
+
+import struct
+
+import grpc
+import pytest
+
+from nim_common.deadlines import call_timeout
+from nim_common.dispatcher import summarize
+from nim_common.media import media_duration
+from nim_common.services import get_service
+from nim_common.streaming import StreamResult, stream_file
+from nim_common.throughput import ThroughputReport, config_label, media_rates
+
+from conftest import input_path
+
+
+def finished(service="audio2face-2d", media=10.0, latency=2.0, started=100.0, error=None):
+    result = StreamResult(service, "input.wav", "output.mp4")
+    result.media_duration = media
+    result.latency = latency
+    result.started = started
+    result.input_bytes = 1000
+    result.error = error
+    return result
+
+
+def test_media_rates():
+    assert media_rates(10.0, 2.0, 4000) == {"rtf": 0.2, "media_s_per_s": 5.0, "bytes_per_s": 2000}
+    assert media_rates(None, 2.0, 4000)["rtf"] is None
+    assert media_rates(10.0, None, 4000)["bytes_per_s"] is None
+
+
+def _box(name: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), name) + payload
+
+
+@pytest.mark.parametrize("duration, expected", [(90000, 1.5), (0, None)])
+def test_mp4_duration_of_fragmented_input_is_unknown(tmp_path, duration, expected):
+    # Version 0 mvhd: flags, creation and modification times, timescale, duration
+    mvhd = _box(b"mvhd", struct.pack(">I2III", 0, 0, 0, 60000, duration) + bytes(80))
+    path = tmp_path / "input.mp4"
+    path.write_bytes(_box(b"ftyp", b"isom" + bytes(4)) + _box(b"moov", mvhd + _box(b"mvex")))
+    assert media_duration(path) == expected
+    # A fragmented input gets the fixed timeout rather than the slack alone
+    timeout = call_timeout(path, rtf=1.0, timeout=600)
+    assert timeout == (600 if expected is None else pytest.approx(11.5))
+
+
+def test_config_label():
+    spec = get_service("audio2face-2d")
+    pb2 = spec.pb2
+    params = {
+        "portrait_image": b"png",
+        "model_selection": pb2.ModelSelection.MODEL_SELECTION_PERF,
+        "blink_frequency": 15,
+    }
+    assert config_label(spec, params) == "model_selection=MODEL_SELECTION_PERF"
+    assert config_label(spec, {"model_selection": "MODEL_SELECTION_QUALITY"}) == (
+        "model_selection=MODEL_SELECTION_QUALITY"
+    )
+    assert config_label(spec, {"blink_frequency": 15}) == "default"
+    assert config_label(get_service("studio-voice"), None) == "default"
+
+
+def test_report_groups_by_config_and_target():
+    report = ThroughputReport()
+    # Two overlapping PERF calls, 20 media seconds over 3 wall seconds
+    report.add(finished(latency=2.0, started=100.0), "a:1", "model_selection=PERF")
+    report.add(finished(latency=2.0, started=101.0), "a:1", "model_selection=PERF")
+    report.add(finished(latency=5.0), "a:1", "model_selection=QUALITY")
+    report.add(finished(error="UNAVAILABLE: down"), "a:1", "model_selection=QUALITY")
+    report.add(finished(latency=1.0), "b:1", "model_selection=PERF")
+    stats = {(entry["target"], entry["config"]): entry for entry in report.stats()}
+    assert len(stats) == 3
+    perf = stats["a:1", "model_selection=PERF"]
+    assert perf["jobs"] == 2 and perf["failed"] == 0
+    assert perf["media_s"] == 20.0 and perf["wall_s"] == 3.0
+    assert perf["rtf"] == pytest.approx(0.2)
+    assert perf["media_s_per_s"] == pytest.approx(20.0 / 3.0)
+    quality = stats["a:1", "model_selection=QUALITY"]
+    assert quality["jobs"] == 2 and quality["failed"] == 1
+    assert quality["rtf"] == pytest.approx(0.5)
+    assert stats["b:1", "model_selection=PERF"]["rtf_p95"] == pytest.approx(0.1)
+
+
+def test_stream_result_rates(standin, tmp_path):
+    server = standin("studio-voice")
+    source = input_path("studio-voice")
+    with grpc.insecure_channel(server.target) as channel:
+        result = stream_file(channel, get_service("studio-voice"), source, tmp_path / "out.wav")
+    assert result.media_duration == pytest.approx(media_duration(source))
+    report = result.as_dict()
+    assert report["media_s"] == result.media_duration
+    assert report["rtf"] == pytest.approx(result.latency / result.media_duration)
+    summary = summarize([result, finished(error="UNAVAILABLE: down")], wall_time=2.0)
+    assert summary["media_s"] == result.media_duration
+    assert summary["media_s_per_s"] == pytest.approx(result.media_duration / 2.0)
+
+
+def test_report_percentiles_cover_the_recent_calls():
+    report = ThroughputReport(window=10)
+    for _ in range(10):
+        report.add(finished(latency=5.0), "a:1")
+    for _ in range(10):
+        report.add(finished(latency=1.0), "a:1")
+    (entry,) = report.stats()
+    assert entry["jobs"] == 20
+    assert entry["rtf"] == pytest.approx(0.3)
+    assert entry["rtf_p50"] == entry["rtf_p95"] == pytest.approx(0.1)
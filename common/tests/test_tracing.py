@@ -0,0 +1,154 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import grpc
+
+from nim_common.services import get_service
+from nim_common.standin import Faults
+from nim_common.streaming import stream_file
+from nim_common.tracing import (
+    SPAN_KIND_CLIENT,
+    SPAN_KIND_SERVER,
+    STATUS_ERROR,
+    FileExporter,
+    OtlpHttpExporter,
+    SpanContext,
+    TraceCollector,
+    Tracer,
+    format_traceparent,
+    load_spans,
+    parse_traceparent,
+    phase_report,
+)
+
+from conftest import input_path, run_client
+
+
+def test_traceparent_round_trip():
+    context = SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+    value = format_traceparent(context)
+    assert value == "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    assert parse_traceparent(value) == context
+    assert parse_traceparent(value[:-1] + "0").sampled is False
+    for invalid in (None, "", "00-abc-def-01", "ff-" + value[3:], "00-" + "0" * 32 + value[35:]):
+        assert parse_traceparent(invalid) is None
+
+
+def test_stream_spans_join_server_spans(standin, tmp_path):
+    server = standin("eye-contact", first_output_delay=0.05)
+    path = tmp_path / "spans.jsonl"
+    with Tracer(FileExporter(path)) as tracer:
+        server.echo.tracer = tracer
+        with grpc.insecure_channel(server.target) as channel:
+            result = stream_file(
+                channel,
+                get_service("eye-contact"),
+                input_path("eye-contact"),
+                tmp_path / "output.mp4",
+                params={"eye_size_sensitivity": 3},
+                single_message_limit=0,
+                tracer=tracer,
+            )
+    spans = load_spans(path)
+    client = next(span for span in spans if span["kind"] == SPAN_KIND_CLIENT)
+    assert client["trace_id"] == result.trace_id
+    assert client["name"] == "nvidia.maxine.eyecontact.v1.MaxineEyeContactService/RedirectGaze"
+    assert client["attributes"]["nim.output_bytes"] == result.output_bytes
+    phases = {span["name"]: span for span in spans if span["parent_id"] == client["span_id"]}
+    assert set(phases) == {
+        "connect",
+        "config",
+        "upload",
+        "first_output",
+        "download",
+        "flush",
+        client["name"],  # the server span, child of the client span
+    }
+    assert phases[client["name"]]["kind"] == SPAN_KIND_SERVER
+    assert phases["first_output"]["duration_s"] >= 0.05
+    assert phases["upload"]["attributes"]["chunks"] == result.input_chunks
+
+    (call,) = phase_report(spans)
+    assert call["trace_id"] == result.trace_id and call["error"] is None
+    assert call["server_s"] <= call["total_s"]
+    assert call["first_output_s"] >= 0.05
+
+
+def test_retried_attempt_keeps_its_error(standin, tmp_path):
+    server = standin("studio-voice", faults=Faults(fail_after=2, fail_calls=1))
+    path = tmp_path / "spans.jsonl"
+    with Tracer(FileExporter(path), service_name="test") as tracer:
+        with grpc.insecure_channel(server.target) as channel:
+            result = stream_file(
+                channel,
+                get_service("studio-voice"),
+                input_path("studio-voice"),
+                tmp_path / "output.wav",
+                chunk_size=8192,
+                single_message_limit=0,
+                retries=1,
+                tracer=tracer,
+            )
+    assert result.ok and result.retries == 1
+    spans = load_spans(path)
+    assert {span["trace_id"] for span in spans} == {result.trace_id}
+    failed = [span for span in spans if span["status"] == STATUS_ERROR]
+    assert failed and all(span["attributes"]["attempt"] == 1 for span in failed)
+    assert "UNAVAILABLE" in failed[0]["status_message"]
+    client = next(span for span in spans if span["kind"] == SPAN_KIND_CLIENT)
+    assert client["attributes"]["attempts"] == 2 and client["status"] != STATUS_ERROR
+
+
+def test_collector_receives_otlp_export(tmp_path):
+    with TraceCollector(tmp_path / "collected.jsonl", port=0) as collector:
+        exporter = OtlpHttpExporter(collector.url)
+        with Tracer(exporter, service_name="test") as tracer:
+            with tracer.span("job") as job:
+                with tracer.span("step", job, attributes={"size": 3}):
+                    pass
+        assert exporter.exported == 1 and exporter.dropped == 0
+        assert collector.received == 1
+    spans = load_spans(tmp_path / "collected.jsonl")
+    assert [span["name"] for span in spans] == ["step", "job"]
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
+    assert spans[0]["attributes"] == {"size": 3}
+    assert spans[0]["service"] == "test"
+
+
+def test_client_sends_traceparent(standin, tmp_path):
+    server = standin("studio-voice")
+    path = tmp_path / "server.jsonl"
+    with Tracer(FileExporter(path)) as tracer:
+        server.echo.tracer = tracer
+        completed = run_client(
+            "studio-voice",
+            server.target,
+            str(tmp_path / "output.wav"),
+            "--trace",
+            str(tmp_path / "client.jsonl"),
+        )
+    assert completed.returncode == 0, completed.stdout + completed.stderr
+    client_spans = load_spans(tmp_path / "client.jsonl")
+    (server_span,) = load_spans(path)
+    client = next(span for span in client_spans if span["kind"] == SPAN_KIND_CLIENT)
+    assert server_span["parent_id"] == client["span_id"]
+    assert server_span["trace_id"] == client["trace_id"]
+    root = next(span for span in client_spans if span["parent_id"] is None)
+    assert root["name"] == "studio-voice" and client["parent_id"] == root["span_id"]
@@ -0,0 +1,94 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Recording calls made through the dispatcher and replaying them open-loop."""
+
+import json
+import os
+import time
+
+import grpc
+
+from nim_common.dispatcher import StreamDispatcher
+from nim_common.replay import prepare_calls, replay, run_replay
+from nim_common.services import get_service
+from nim_common.standin import Capacity
+from nim_common.traffic import TrafficRecorder, load_trace
+
+from conftest import input_path
+
+
+def test_record_and_replay(standin, tmp_path):
+    server = standin("studio-voice")
+    source = input_path("studio-voice")
+    trace, payloads = tmp_path / "calls.jsonl", tmp_path / "payloads"
+    with grpc.insecure_channel(server.target) as channel:
+        with TrafficRecorder(trace, payloads, target=server.target) as recorder:
+            with StreamDispatcher(
+                channel, get_service("studio-voice"), chunk_size=64 * 1024, recorder=recorder
+            ) as dispatcher:
+                futures = []
+                for index in range(4):
+                    futures.append(dispatcher.submit(source, tmp_path / f"output-{index}.wav"))
+                    time.sleep(0.05)
+                assert all(future.result().ok for future in futures)
+
+        calls = load_trace(trace)
+        assert len(calls) == 4
+        assert [call["arrival"] for call in calls] == sorted(call["arrival"] for call in calls)
+        assert calls[-1]["arrival"] - calls[0]["arrival"] >= 0.15
+        for call in calls:
+            assert call["target"] == server.target
+            assert call["input_bytes"] == os.path.getsize(source)
+            assert call["chunk_size"] == 64 * 1024
+            assert call["duration_s"] > 0 and call["latency_s"] > 0
+            assert call["output_bytes"] == call["input_bytes"]
+        payload = payloads / calls[0]["payload"]
+        assert payload.read_bytes() == open(source, "rb").read()
+        assert len(os.listdir(payloads)) == 1  # content-addressed, stored once
+
+        replayed = prepare_calls(calls, tmp_path, payloads=payloads)
+        assert replayed[0].offset == 0 and replayed[-1].offset >= 0.15
+        assert replayed[0].input_filepath == os.fspath(payload)
+        report = replay(replayed, {"studio-voice": channel}, speed=2)
+    assert report["clips"] == 4 and report["failed"] == 0
+    assert report["offered_per_s"] > 10
+    assert report["response_p99_s"] >= report["response_p50_s"] > 0
+    assert server.echo.calls == 8
+
+
+def test_replay_finds_saturation(standin, tmp_path):
+    # One call at a time taking 50 ms, offered every 100 ms at 1x and every 25 ms at 4x
+    server = standin("studio-voice", capacity=Capacity(slots=1, chunk_seconds=0.05))
+    trace = tmp_path / "calls.jsonl"
+    with open(trace, "w") as fd:
+        for index in range(10):
+            call = {"arrival": 1000.0 + index * 0.1, "service": "studio-voice", "input_bytes": 8044}
+            fd.write(json.dumps(call) + "\n")
+    calls = prepare_calls(load_trace(trace), tmp_path)
+    assert os.path.getsize(calls[0].input_filepath) == 8044  # synthesized without payloads
+
+    with grpc.insecure_channel(server.target) as channel:
+        report = run_replay(calls, {"studio-voice": channel}, speeds=(4, 1))
+    slow, fast = report["runs"]
+    assert (slow["speed"], fast["speed"]) == (1, 4)
+    assert slow["failed"] == fast["failed"] == 0
+    assert fast["response_p99_s"] > 2 * slow["response_p99_s"]
+    assert report["saturation_speed"] == 4
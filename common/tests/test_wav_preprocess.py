@@ -0,0 +1,112 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Resampling, silence detection and silence re-insertion of the studio-voice preprocessing."""
+
+import io
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from wav_preprocess import (  # noqa: E402
+    PolyphaseResampler,
+    SilenceReinserter,
+    find_silences,
+    generate_preprocessed_wav,
+    plan_preprocessing,
+    read_wav_info,
+)
+
+RATE = 16000
+
+
+def write_wav(path, samples, rate: int = RATE, channels: int = 1) -> None:
+    with wave.open(str(path), "wb") as sink:
+        sink.setnchannels(channels)
+        sink.setsampwidth(2)
+        sink.setframerate(rate)
+        sink.writeframes((np.asarray(samples) * 32767).astype("<i2").tobytes())
+
+
+def tone(seconds: float, rate: int = RATE, frequency: float = 440.0):
+    t = np.arange(int(seconds * rate)) / rate
+    return 0.5 * np.sin(2 * np.pi * frequency * t)
+
+
+def tone_gap_tone(tmp_path):
+    # 1s tone, 2s of silence, 1s tone
+    path = tmp_path / "input.wav"
+    write_wav(path, np.concatenate((tone(1), np.zeros(2 * RATE), tone(1))))
+    return path
+
+
+def test_resampled_length_and_rate():
+    resampler = PolyphaseResampler(48000, RATE)
+    source = tone(1.0, rate=48000, frequency=1000.0).astype(np.float32)
+    # Any chunking gives the same output as a single piece
+    chunks = [resampler.process(chunk) for chunk in np.array_split(source, 7)]
+    output = np.concatenate(chunks + [resampler.flush()])
+    assert len(output) == resampler.output_length(len(source)) == RATE
+    whole = PolyphaseResampler(48000, RATE)
+    assert np.allclose(output, np.concatenate((whole.process(source), whole.flush())), atol=1e-6)
+    # The 1 kHz tone is still at 1 kHz, with its amplitude, at the new rate
+    spectrum = np.abs(np.fft.rfft(output[1000:-1000]))
+    assert np.argmax(spectrum) * RATE / len(output[1000:-1000]) == pytest.approx(1000, abs=2)
+    assert np.max(np.abs(output[1000:-1000])) == pytest.approx(0.5, abs=0.02)
+
+
+def test_find_silences_of_a_tone_with_a_gap(tmp_path):
+    path = tone_gap_tone(tmp_path)
+    # The run of silent frames is shortened by keep on both sides
+    assert find_silences(path, min_silence=1.0, keep=0.1) == [(RATE + 1600, 3 * RATE - 1600)]
+    assert find_silences(path, min_silence=2.5) == []
+
+
+def test_plan_matches_the_generated_upload(tmp_path):
+    path = tmp_path / "stereo.wav"
+    write_wav(path, np.repeat(tone(2.0, rate=48000), 2), rate=48000, channels=2)
+    plan = plan_preprocessing(path, model_rate=RATE)
+    upload = b"".join(generate_preprocessed_wav(plan))
+    assert len(upload) == plan.upload_size
+    info = read_wav_info(io.BytesIO(upload))
+    assert (info.channels, info.sample_rate, info.num_frames) == (1, RATE, 2 * RATE)
+
+
+def test_trimmed_silence_is_reinserted(tmp_path):
+    path = tone_gap_tone(tmp_path)
+    plan = plan_preprocessing(path, trim_silence=True, min_silence=1.0)
+    assert plan.removed_seconds == pytest.approx(1.8)
+    upload = b"".join(generate_preprocessed_wav(plan))
+    assert read_wav_info(io.BytesIO(upload)).num_frames == 4 * RATE - int(1.8 * RATE)
+
+    # The stand-in for the NIM returns the upload as is, in uneven chunks
+    output = tmp_path / "output.wav"
+    with open(output, "wb") as fd:
+        reinserter = SilenceReinserter(fd, plan)
+        for offset in range(0, len(upload), 1001):
+            reinserter.write(upload[offset : offset + 1001])
+        reinserter.close()
+    with open(output, "rb") as fd:
+        info = read_wav_info(fd)
+    assert info.num_frames == 4 * RATE
+    with wave.open(str(output), "rb") as restored, wave.open(str(path), "rb") as original:
+        assert restored.readframes(4 * RATE) == original.readframes(4 * RATE)
@@ -19,17 +19,33 @@
 # DEALINGS IN THE SOFTWARE.
 
 import argparse
+import contextlib
 import os
 import sys
 import time
-from typing import Iterator
+from typing import Callable, Iterator
 
-import grpc
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INTERFACES_DIR = os.path.join(SCRIPT_DIR, "../interfaces")
+sys.path.append(os.path.join(SCRIPT_DIR, "../../common"))
 
-sys.path.append(os.path.join(os.getcwd(), "../interfaces"))
-# Importing gRPC compiler auto-generated maxine eyecontact library
-import eyecontact_pb2  # noqa: E402
-import eyecontact_pb2_grpc  # noqa: E402
+# grpc and the generated modules are imported by load_dependencies() on first use, so that
+# --help and argument errors return without paying for them.
+grpc = None
+eyecontact_pb2 = None
+eyecontact_pb2_grpc = None
+
+
+def load_dependencies() -> None:
+    """Function to import grpc and the gRPC compiler auto-generated maxine eyecontact library."""
+    global grpc, eyecontact_pb2, eyecontact_pb2_grpc
+    if eyecontact_pb2_grpc is not None:
+        return
+    if INTERFACES_DIR not in sys.path:
+        sys.path.append(INTERFACES_DIR)
+    import grpc
+    import eyecontact_pb2
+    import eyecontact_pb2_grpc
 
 
 def parse_args() -> None:
@@ -56,19 +72,19 @@ def parse_args() -> None:
     parser.add_argument(
         "--ssl-key",
         type=str,
-        default="../ssl_key/ssl_key_client.pem",
+        default=os.path.join(SCRIPT_DIR, "../ssl_key/ssl_key_client.pem"),
         help="The path to ssl private key.",
     )
     parser.add_argument(
         "--ssl-cert",
         type=str,
-        default="../ssl_key/ssl_cert_client.pem",
+        default=os.path.join(SCRIPT_DIR, "../ssl_key/ssl_cert_client.pem"),
         help="The path to ssl certificate chain.",
     )
     parser.add_argument(
         "--ssl-root-cert",
         type=str,
-        default="../ssl_key/ssl_ca_cert.pem",
+        default=os.path.join(SCRIPT_DIR, "../ssl_key/ssl_ca_cert.pem"),
         help="The path to ssl root certificate.",
     )
     parser.add_argument(
@@ -81,7 +97,7 @@ def parse_args() -> None:
     parser.add_argument(
         "--input",
         type=str,
-        default="../assets/sample_input.mp4",
+        default=os.path.join(SCRIPT_DIR, "../assets/sample_input.mp4"),
         help="The path to the input video file.",
     )
     parser.add_argument(
@@ -101,19 +117,111 @@ def parse_args() -> None:
         type=str,
         help="NVCF function ID for the service, utilized when using TRY API ignored otherwise",
     )
+    parser.add_argument(
+        "--prepass",
+        action="store_true",
+        help="Flag to analyze the input on the client and send only the keyframe intervals "
+        "showing a face to the server. Requires opencv-python and ffmpeg.",
+    )
+    parser.add_argument(
+        "--prepass-skip-frontal",
+        action="store_true",
+        help="Flag to also skip intervals whose gaze already looks frontal, used with --prepass.",
+    )
+    parser.add_argument(
+        "--prepass-samples",
+        type=int,
+        default=2,
+        help="Number of frames sampled per keyframe interval, used with --prepass.",
+    )
+    parser.add_argument(
+        "--prepass-min-skip",
+        type=float,
+        default=2.0,
+        help="Minimum duration in seconds of an interval left untouched, used with --prepass.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Deadline of the job in seconds, requests still running when it expires are "
+        "cancelled.",
+    )
+    parser.add_argument(
+        "--deadline-rtf",
+        type=float,
+        help="Expected real-time factor of the NIM. The deadline is set to the input duration "
+        "times this factor plus slack, bounded by --timeout.",
+    )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        default="auto",
+        choices=["none", "auto", "sample", "gzip", "deflate"],
+        help="Compression of the upload. auto, the default, uses gzip for PCM WAV and none for "
+        "MP4, sample compresses the start of the input and uses gzip when it saves enough, none "
+        "saves the CPU on a local network.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Number of times the request is restarted when the NIM is unavailable.",
+    )
+    parser.add_argument(
+        "--progressive-port",
+        type=int,
+        help="Serve the output over local HTTP on this port while it is written, so playback "
+        "of a fragmented or faststart MP4 starts before the job completes. 0 picks a free port.",
+    )
+    parser.add_argument(
+        "--progressive-linger",
+        type=float,
+        default=5.0,
+        help="Seconds the progressive server keeps running after the output is complete and "
+        "the last request ended.",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Process --input as a live recording: a fragmented MP4 file that is still being "
+        "written, or - to read one from standard input. Closed segments are processed as the "
+        "recording grows and published in order to an HLS playlist. Requires ffmpeg.",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        default=2.0,
+        help="Nominal duration in seconds of a live segment, segments end at a keyframe.",
+    )
+    parser.add_argument(
+        "--segment-concurrency",
+        type=int,
+        default=4,
+        help="Number of live segments processed at the same time, used with --live.",
+    )
+    parser.add_argument(
+        "--live-output-dir",
+        type=str,
+        default="live",
+        help="Directory of the HLS playlist live.m3u8 of the processed segments, used with --live.",
+    )
+    parser.add_argument(
+        "--live-idle-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds without growth of the input after which the recording is taken to have "
+        "ended, used with --live.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Record the phases of the request as spans into this OTLP/JSON lines file, or post "
+        "them to this OTLP/HTTP collector URL. The trace context is sent to the NIM as "
+        "traceparent metadata.",
+    )
     return parser.parse_args()
 
 
-def read_file_content(file_path: os.PathLike) -> None:
-    """Function to read file content as bytes.
-
-    Args:
-      file_path: Path to input file
-    """
-    with open(file_path, "rb") as file:
-        return file.read()
-
-
 def generate_request_for_inference(
     input_filepath: os.PathLike = "input.mp4", params: dict = {}
 ) -> any:
@@ -137,20 +245,30 @@ def generate_request_for_inference(
 
 
 def write_output_file_from_response(
-    response_iter: Iterator[eyecontact_pb2.RedirectGazeResponse],
+    response_iter: Iterator["eyecontact_pb2.RedirectGazeResponse"],
     output_filepath: os.PathLike = "output.mp4",
+    output: any = None,
+    spans: any = None,
+    verifier: any = None,
 ) -> None:
     """Function to write the output file from the incoming gRPC data stream.
 
     Args:
       response_iter: Responses from the server to write into output file
       output_filepath: Path to output file
+      output: nim_common.progressive.GrowingOutput of output_filepath, for progressive playback
+      spans: nim_common.tracing.StreamSpans recording the flush of the output file
+      verifier: nim_common.integrity.OutputVerifier checking the video returned by the NIM
     """
     print(f"Writing output in {output_filepath}")
-    with open(output_filepath, "wb") as fd:
+    with open(output_filepath, "wb") if output is None else output as fd:
         for response in response_iter:
             if response.HasField("video_file_data"):
                 fd.write(response.video_file_data)
+                if verifier is not None:
+                    verifier.write(response.video_file_data)
+        if spans is not None:
+            spans.flush(fd)
 
 
 def process_request(
@@ -159,6 +277,12 @@ def process_request(
     params: dict,
     output_filepath: os.PathLike,
     request_metadata: dict = None,
+    scope: any = None,
+    deadline_rtf: float = None,
+    compression: str = "auto",
+    retries: int = 2,
+    output: any = None,
+    trace: any = None,
 ) -> None:
     """Function to process gRPC request
 
@@ -168,25 +292,197 @@ def process_request(
       params: Parameters to control the feature
       output_filepath: Path to output file
       request_metadata: Credentials to process preview request
+      scope: nim_common.deadlines.CancelScope of the job, bounds the deadline of the request
+      deadline_rtf: Expected real-time factor, used to report the reclaimed processing time
+      compression: Compression mode of the upload, see nim_common.compression
+      retries: Number of times the request is restarted when the NIM is unavailable
+      output: nim_common.progressive.GrowingOutput of output_filepath, for progressive playback
+      trace: nim_common.tracing.Span the request is traced under, not traced when None
     """
-    try:
+    load_dependencies()
+    from nim_common.compression import choose_compression
+    from nim_common.deadlines import CancelScope, cancellation_summary, expected_processing_time
+    from nim_common.integrity import OutputVerifier
+    from nim_common.retries import call_with_retries
+    from nim_common.throughput import describe_rates
+
+    if scope is None:
+        scope = CancelScope()
+    spans = None
+    if trace is not None:
+        from nim_common.services import get_service
+        from nim_common.tracing import StreamSpans
+
+        spans = StreamSpans(trace.tracer, get_service("eye-contact"), trace)
+    decision = choose_compression(input_filepath, compression)
+    if decision.algorithm:
+        print(f"Compressing the upload with {decision.algorithm} ({decision.reason}).")
+    start_time = time.time()
+
+    def attempt() -> None:
+        # A retry restarts the upload and rewrites the output from the beginning
         stub = eyecontact_pb2_grpc.MaxineEyeContactServiceStub(channel)
-        start_time = time.time()
+        requests = generate_request_for_inference(input_filepath=input_filepath, params=params)
+        metadata = request_metadata
+        if spans is not None:
+            # Sends the traceparent of the request so that the server's spans join the trace
+            spans.connect(channel, scope.remaining())
+            requests = spans.requests(requests, config=bool(params))
+            metadata = spans.metadata(request_metadata)
         responses = stub.RedirectGaze(
-            generate_request_for_inference(input_filepath=input_filepath, params=params),
-            metadata=request_metadata,
+            scope.guard(requests),
+            metadata=metadata,
+            timeout=scope.remaining(),
+            compression=decision.grpc_compression(),
         )
-        if params:
-            _ = next(responses)  # Skip echo response if params are provided
+        received = responses
+        if spans is not None:
+            received = spans.responses(responses, lambda r: r.HasField("video_file_data"))
+        # A stream the NIM ended early still completes with OK, only the MP4 boxes tell
+        verifier = OutputVerifier(hashes=(), container="mp4")
+        try:
+            with scope.attach(responses):
+                # The config echo and keepalives are skipped by the writer
+                write_output_file_from_response(
+                    response_iter=received,
+                    output_filepath=output_filepath,
+                    output=output,
+                    spans=spans,
+                    verifier=verifier,
+                )
+        finally:
+            # Releases the call at once when the output could not be written
+            responses.cancel()
+        verifier.verify()
+
+    def on_retry(number: int, error: grpc.RpcError, delay: float) -> None:
+        print(f"{error.code().name}: {error.details()}, retry {number}/{retries} in {delay:.1f}s.")
 
-        write_output_file_from_response(response_iter=responses, output_filepath=output_filepath)
+    try:
+        with spans or contextlib.nullcontext():
+            call_with_retries(attempt, retries, scope=scope, on_retry=on_retry)
         end_time = time.time()
         print(
             f"Function invocation completed in {end_time-start_time:.2f}s,"
             f" the output file {output_filepath} is generated."
         )
+        rates = describe_rates(input_filepath, end_time - start_time)
+        if rates is not None:
+            print(rates)
+        if decision.algorithm:
+            saved = decision.estimated_saving(os.path.getsize(input_filepath)) or 0
+            print(f"Compression saved about {saved / 1e6:.2f} MB of upload.")
+    except grpc.RpcError as e:
+        message = cancellation_summary(
+            scope,
+            e.code().name,
+            time.time() - start_time,
+            expected_processing_time(input_filepath, deadline_rtf),
+        )
+        print(f"An error occurred: {e}" if message is None else message)
+        raise SystemExit(1)
     except Exception as e:
         print(f"An error occurred: {e}")
+        raise SystemExit(1)
+
+
+def run_progressive(
+    redirect: Callable,
+    input_filepath: os.PathLike,
+    output_filepath: os.PathLike,
+    port: int,
+    linger: float,
+) -> None:
+    """Function to run the request while serving the growing output over local HTTP.
+
+    Args:
+      redirect: Function running the request, called with the input, output path and output
+      input_filepath: Path to input file
+      output_filepath: Path to output file
+      port: Port of the progressive playback server, 0 picks a free port
+      linger: Seconds to keep serving once the output is complete and the last request ended
+    """
+    from nim_common.progressive import GrowingOutput, ProgressiveServer
+
+    def on_layout(layout: str) -> None:
+        if layout == "moov-at-end":
+            print("The output has its moov box at the end, playback starts once it completes.")
+        else:
+            print(f"The output is a {layout} MP4, playback can start now.")
+
+    output = GrowingOutput(output_filepath, on_layout=on_layout)
+    with ProgressiveServer(output, port=port) as server:
+        print(f"Serving the output for progressive playback at {server.url}")
+        redirect(input_filepath, output_filepath, output)
+        if output.first_write is not None:
+            print(
+                f"First output after {output.first_write:.2f}s, "
+                f"playable after {output.playable:.2f}s."
+            )
+        server.wait_idle(linger)
+
+
+def run_live(
+    redirect: Callable,
+    input_filepath: str,
+    output_filepath: os.PathLike,
+    args: argparse.Namespace,
+    scope: any,
+) -> None:
+    """Function to process a live recording segment by segment as it grows.
+
+    Args:
+      redirect: Function running the request, called with the segment's input and output path
+      input_filepath: Path to the growing fragmented MP4 recording, - for standard input
+      output_filepath: Path of the MP4 file the processed segments are spliced into at the end
+      args: Parsed command-line arguments
+      scope: nim_common.deadlines.CancelScope of the job
+    """
+    from nim_common.deadlines import call_timeout
+    from nim_common.live import follow, process_live, read_pipe
+
+    if input_filepath == "-":
+        source = read_pipe(sys.stdin.buffer)
+    else:
+        source = follow(input_filepath, scope=scope, idle_timeout=args.live_idle_timeout)
+
+    def render(segment_input: str, segment_output: str, segment: any) -> None:
+        # Each segment gets its own deadline, the recording as a whole has none
+        segment_scope = scope.child(call_timeout(segment_input, args.deadline_rtf, args.timeout))
+        try:
+            redirect(segment_input, segment_output, scope=segment_scope)
+        except SystemExit:
+            raise RuntimeError(f"segment {segment.index} failed")
+        finally:
+            segment_scope.close()
+
+    def on_publish(segment: any, timings: dict) -> None:
+        status = "unprocessed" if timings["error"] else "published"
+        print(
+            f"Segment {segment.index} ({segment.start:.2f}s-{segment.end:.2f}s) {status}, "
+            f"{timings['behind_live_s']:.2f}s behind live."
+        )
+
+    print(f"Publishing the processed segments to {os.path.join(args.live_output_dir, 'live.m3u8')}")
+    summary = process_live(
+        source,
+        render,
+        args.live_output_dir,
+        segment_seconds=args.segment_seconds,
+        concurrency=args.segment_concurrency,
+        output_filepath=output_filepath,
+        scope=scope,
+        on_publish=on_publish,
+    )
+    if summary["segments"]:
+        print(
+            f"Processed {summary['segments']} segments ({summary['duration_s']:.1f}s), "
+            f"{summary['passthrough']} published unprocessed, "
+            f"{summary['behind_live_mean_s']:.2f}s behind live on average. "
+            f"The output file {output_filepath} is generated."
+        )
+    else:
+        print("The recording ended before a segment was complete.")
 
 
 def main():
@@ -196,45 +492,110 @@ def main():
     args = parse_args()
     input_filepath = args.input
     output_filepath = args.output
-    if os.path.isfile(input_filepath):
+    if args.live and input_filepath == "-":
+        print("Reading a live recording from standard input.")
+    elif os.path.isfile(input_filepath):
         print(f"The file '{input_filepath}' exists. Proceeding with processing.")
     else:
         raise FileNotFoundError(f"The file '{input_filepath}' does not exist. Exiting.")
 
+    load_dependencies()
+
     params = {}
     # Supply params as shown below, refer to the docs for more info.
     # params = {"eye_size_sensitivity": 4, "detect_closure": 1 }
 
-    # Check ssl-mode and create channel_credentials for that mode
+    from nim_common.deadlines import CancelScope, call_timeout, cancel_on_signals
+    from nim_common.tracing import traced_run
+
+    # One scope for the whole job, SIGINT and SIGTERM cancel the request in flight so that
+    # the NIM stops processing an abandoned job
+    if args.live:
+        # A live recording has no known duration, each segment gets its own deadline
+        scope = CancelScope()
+    else:
+        scope = CancelScope(call_timeout(input_filepath, args.deadline_rtf, args.timeout))
+
+    if args.progressive_port is not None and args.prepass:
+        raise RuntimeError("--progressive-port cannot be combined with --prepass.")
+    if args.live and (args.prepass or args.progressive_port is not None):
+        raise RuntimeError("--live cannot be combined with --prepass or --progressive-port.")
+
+    def run(channel: any, request_metadata: dict = None) -> None:
+        """Send the whole input, or only the spans selected by the pre-pass, over channel."""
+
+        def redirect(
+            span_input: os.PathLike,
+            span_output: os.PathLike,
+            output: any = None,
+            scope: any = scope,
+        ) -> None:
+            process_request(
+                channel=channel,
+                input_filepath=span_input,
+                params=params,
+                output_filepath=span_output,
+                request_metadata=request_metadata,
+                scope=scope,
+                deadline_rtf=args.deadline_rtf,
+                compression=args.compression,
+                retries=args.retries,
+                output=output,
+                trace=trace,
+            )
+
+        job = {
+            "nim.input": input_filepath,
+            "nim.prepass": bool(args.prepass),
+            "nim.live": bool(args.live),
+        }
+        with cancel_on_signals(scope), traced_run(args.trace, "eye-contact", job) as trace:
+            if args.live:
+                run_live(redirect, input_filepath, output_filepath, args, scope)
+            elif args.prepass:
+                # Imported on demand so that OpenCV is only required for the pre-pass
+                from gaze_prepass import run_with_prepass
+
+                run_with_prepass(
+                    input_filepath,
+                    output_filepath,
+                    redirect,
+                    detect_frontal=args.prepass_skip_frontal,
+                    samples_per_interval=args.prepass_samples,
+                    min_skip=args.prepass_min_skip,
+                )
+            elif args.progressive_port is not None:
+                run_progressive(
+                    redirect,
+                    input_filepath,
+                    output_filepath,
+                    args.progressive_port,
+                    args.progressive_linger,
+                )
+            else:
+                redirect(input_filepath, output_filepath)
+
+    # Check ssl-mode and create the channel credentials for that mode
     if args.ssl_mode != "DISABLED":
-        channel_credentials = ""
+        from nim_common.channels import ChannelConfig, channel_credentials
+
         if args.ssl_mode == "MTLS":
             if not (args.ssl_key and args.ssl_cert and args.ssl_root_cert):
                 raise RuntimeError(
                     "If --ssl-mode is MTLS, --ssl-key, --ssl-cert and --ssl-root-cert are required."
                 )
-            private_key = read_file_content(args.ssl_key)
-            certificate_chain = read_file_content(args.ssl_cert)
-            root_certificates = read_file_content(args.ssl_root_cert)
-            channel_credentials = grpc.ssl_channel_credentials(
-                root_certificates=root_certificates,
-                private_key=private_key,
-                certificate_chain=certificate_chain,
+        elif not (args.ssl_root_cert):
+            raise RuntimeError("If --ssl-mode is TLS, --ssl-root-cert is required.")
+        # Credentials are read and built once per set of PEM files, see nim_common.channels
+        credentials = channel_credentials(
+            ChannelConfig(
+                args.target, args.ssl_mode, args.ssl_root_cert, args.ssl_cert, args.ssl_key
             )
-        else:
-            if not (args.ssl_root_cert):
-                raise RuntimeError("If --ssl-mode is TLS, --ssl-root-cert is required.")
-            root_certificates = read_file_content(args.ssl_root_cert)
-            channel_credentials = grpc.ssl_channel_credentials(root_certificates=root_certificates)
+        )
 
         # Establish secure channel when ssl-mode is MTLS/TLS
-        with grpc.secure_channel(target=args.target, credentials=channel_credentials) as channel:
-            process_request(
-                channel=channel,
-                input_filepath=input_filepath,
-                output_filepath=output_filepath,
-                params=params,
-            )
+        with grpc.secure_channel(target=args.target, credentials=credentials) as channel:
+            run(channel)
 
     elif args.preview_mode:
         if not args.api_key or not args.function_id:
@@ -250,22 +611,11 @@ def main():
         with grpc.secure_channel(
             target=args.target, credentials=grpc.ssl_channel_credentials()
         ) as channel:
-            process_request(
-                channel=channel,
-                input_filepath=input_filepath,
-                params=params,
-                output_filepath=output_filepath,
-                request_metadata=request_metadata,
-            )
+            run(channel, request_metadata=request_metadata)
     else:
         # Establish insecure channel when ssl-mode is DISABLED
         with grpc.insecure_channel(target=args.target) as channel:
-            process_request(
-                channel=channel,
-                input_filepath=input_filepath,
-                params=params,
-                output_filepath=output_filepath,
-            )
+            run(channel)
 
 
 if __name__ == "__main__":
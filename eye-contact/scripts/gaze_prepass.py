@@ -0,0 +1,415 @@
+# Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Client-side pre-pass that sends only the parts of a video that need gaze redirection.
+
+The keyframe layout is read from the MP4 sample tables without decoding. A few
+frames of every keyframe interval are then sampled with OpenCV and checked for a
+face, and optionally for an already frontal gaze. Intervals that need redirection
+are cut out at keyframes with ffmpeg stream copy, sent through RedirectGaze, and
+spliced back between the untouched intervals without re-encoding them.
+
+Frame sampling requires opencv-python and cutting/splicing requires the ffmpeg
+executable on PATH.
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional
+
+from nim_common.segments import splice
+
+NO_FACE = "no-face"
+FRONTAL = "frontal"
+REDIRECT = "redirect"
+
+
+class VideoLayout(NamedTuple):
+    """Timing of the video track of an MP4 file.
+
+    Attributes:
+      duration: Duration of the video track in seconds
+      keyframes: Presentation start times of the sync samples in seconds, on the
+        timeline of the edit list as players and ffmpeg -ss see it
+    """
+
+    duration: float
+    keyframes: List[float]
+
+
+class Span(NamedTuple):
+    """Time range of the input and whether it is sent through RedirectGaze."""
+
+    start: float
+    end: float
+    redirect: bool
+
+
+def _read_boxes(data: bytes, offset: int = 0, end: Optional[int] = None) -> Dict[bytes, list]:
+    """Function to index the child boxes of an in-memory MP4 box body by type."""
+    end = len(data) if end is None else end
+    boxes = {}
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset : offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8 : offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            break
+        boxes.setdefault(box_type, []).append((offset + header, offset + size))
+        offset += size
+    return boxes
+
+
+def _find_moov(fd: BinaryIO) -> bytes:
+    """Function to read the moov box of an MP4 file, skipping over the media data."""
+    fd.seek(0, os.SEEK_END)
+    file_size = fd.tell()
+    offset = 0
+    while offset + 8 <= file_size:
+        fd.seek(offset)
+        size, box_type = struct.unpack(">I4s", fd.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", fd.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - offset
+        if box_type == b"moov":
+            fd.seek(offset + header)
+            return fd.read(size - header)
+        if size < header:
+            break
+        offset += size
+    raise ValueError("MP4 file has no moov box.")
+
+
+def _edit_offset(moov: bytes, trak: Dict[bytes, list], timescale: int) -> float:
+    """Function to return the seconds the edit list adds to the media times of a track.
+
+    Leading empty edits delay the presentation, and the media time of the first
+    edit that is not empty is where the presentation starts in the media, e.g.
+    the decode delay of B-frames.
+    """
+    if b"edts" not in trak:
+        return 0.0
+    edts = _read_boxes(moov, *trak[b"edts"][0])
+    if b"elst" not in edts:
+        return 0.0
+    movie_timescale = 0
+    mvhd = _read_boxes(moov).get(b"mvhd")
+    if mvhd:
+        mvhd_start, _ = mvhd[0]
+        offset = mvhd_start + (20 if moov[mvhd_start] == 1 else 12)
+        (movie_timescale,) = struct.unpack(">I", moov[offset : offset + 4])
+    elst_start, _ = edts[b"elst"][0]
+    version = moov[elst_start]
+    (count,) = struct.unpack(">I", moov[elst_start + 4 : elst_start + 8])
+    entry = ">QqI" if version == 1 else ">IiI"
+    size = struct.calcsize(entry)
+    delay = 0.0
+    for index in range(count):
+        position = elst_start + 8 + index * size
+        segment_duration, media_time, _ = struct.unpack(entry, moov[position : position + size])
+        if media_time == -1:
+            delay += segment_duration / movie_timescale if movie_timescale else 0.0
+            continue
+        return delay - media_time / timescale
+    return delay
+
+
+def read_video_layout(input_filepath: os.PathLike) -> VideoLayout:
+    """Function to read the video track timing from the MP4 sample tables.
+
+    The presentation time of a sample is its stts decode time plus its ctts
+    composition offset, shifted by the edit list.
+
+    Args:
+      input_filepath: Path to input MP4 file
+    """
+    with open(input_filepath, "rb") as fd:
+        moov = _find_moov(fd)
+    for trak_start, trak_end in _read_boxes(moov).get(b"trak", []):
+        trak = _read_boxes(moov, trak_start, trak_end)
+        mdia = trak[b"mdia"][0]
+        mdia_boxes = _read_boxes(moov, *mdia)
+        hdlr_start, _ = mdia_boxes[b"hdlr"][0]
+        if moov[hdlr_start + 8 : hdlr_start + 12] != b"vide":
+            continue
+        mdhd_start, _ = mdia_boxes[b"mdhd"][0]
+        if moov[mdhd_start] == 1:
+            timescale, duration = struct.unpack(">IQ", moov[mdhd_start + 20 : mdhd_start + 32])
+        else:
+            timescale, duration = struct.unpack(">II", moov[mdhd_start + 12 : mdhd_start + 20])
+        minf = _read_boxes(moov, *mdia_boxes[b"minf"][0])
+        stbl = _read_boxes(moov, *minf[b"stbl"][0])
+
+        # Decode time of every sample from the run-length coded stts table
+        stts_start, _ = stbl[b"stts"][0]
+        (count,) = struct.unpack(">I", moov[stts_start + 4 : stts_start + 8])
+        times = []
+        time = 0
+        for index in range(count):
+            position = stts_start + 8 + index * 8
+            sample_count, delta = struct.unpack(">II", moov[position : position + 8])
+            times.extend(
+                range(time, time + sample_count * delta, delta) if delta else [time] * sample_count
+            )
+            time += sample_count * delta
+
+        # Composition offsets of B-frame streams, signed in version 1
+        if b"ctts" in stbl:
+            ctts_start, _ = stbl[b"ctts"][0]
+            entry = ">Ii" if moov[ctts_start] == 1 else ">II"
+            (count,) = struct.unpack(">I", moov[ctts_start + 4 : ctts_start + 8])
+            index = 0
+            for number in range(count):
+                position = ctts_start + 8 + number * 8
+                sample_count, offset = struct.unpack(entry, moov[position : position + 8])
+                for sample in range(index, min(index + sample_count, len(times))):
+                    times[sample] += offset
+                index += sample_count
+        shift = _edit_offset(moov, trak, timescale)
+
+        if b"stss" in stbl:
+            stss_start, _ = stbl[b"stss"][0]
+            (count,) = struct.unpack(">I", moov[stss_start + 4 : stss_start + 8])
+            sync = struct.unpack(f">{count}I", moov[stss_start + 8 : stss_start + 8 + 4 * count])
+            keyframes = [times[number - 1] for number in sync if number <= len(times)]
+        else:
+            # Every sample is a sync sample when the table is absent
+            keyframes = times
+        keyframes = sorted(max(value / timescale + shift, 0.0) for value in keyframes)
+        if not keyframes:
+            # Fragmented files keep their samples in moof boxes, treat them as one interval
+            keyframes = [0.0]
+        return VideoLayout(duration=duration / timescale, keyframes=keyframes)
+    raise ValueError("MP4 file has no video track.")
+
+
+class FrameClassifier:
+    """Cheap per-frame check for a visible face and an already frontal gaze.
+
+    Uses the OpenCV Haar cascades for faces and eyes on a downscaled grayscale
+    frame. The gaze test locates the darkest blob of each detected eye and treats
+    the gaze as frontal when both pupils sit near the middle of their eye boxes.
+
+    Args:
+      detect_frontal: Classify frames with a centered gaze as FRONTAL
+      frontal_tolerance: Maximum pupil offset from the eye center, as a fraction of the eye width
+      analysis_width: Width in pixels frames are downscaled to before detection
+    """
+
+    def __init__(
+        self,
+        detect_frontal: bool = False,
+        frontal_tolerance: float = 0.12,
+        analysis_width: int = 480,
+    ) -> None:
+        import cv2
+
+        self._cv2 = cv2
+        self._faces = cv2.CascadeClassifier(
+            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        )
+        self._profiles = cv2.CascadeClassifier(
+            cv2.data.haarcascades + "haarcascade_profileface.xml"
+        )
+        self._eyes = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_eye.xml")
+        self.detect_frontal = detect_frontal
+        self.frontal_tolerance = frontal_tolerance
+        self.analysis_width = analysis_width
+
+    def classify(self, frame) -> str:
+        """Function to classify a decoded BGR frame as NO_FACE, FRONTAL or REDIRECT."""
+        cv2 = self._cv2
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if gray.shape[1] > self.analysis_width:
+            height = int(gray.shape[0] * self.analysis_width / gray.shape[1])
+            gray = cv2.resize(gray, (self.analysis_width, height), interpolation=cv2.INTER_AREA)
+        faces = self._faces.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=5, minSize=(32, 32)
+        )
+        if len(faces) == 0:
+            profiles = self._profiles.detectMultiScale(gray, 1.1, 5, minSize=(32, 32))
+            return REDIRECT if len(profiles) else NO_FACE
+        if not self.detect_frontal:
+            return REDIRECT
+        x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
+        face = gray[y : y + h // 2, x : x + w]
+        eyes = self._eyes.detectMultiScale(face, scaleFactor=1.1, minNeighbors=5)
+        if len(eyes) < 2:
+            return REDIRECT
+        for ex, ey, ew, eh in sorted(eyes, key=lambda eye: -eye[2] * eye[3])[:2]:
+            eye = cv2.GaussianBlur(face[ey : ey + eh, ex : ex + ew], (5, 5), 0)
+            _, _, (px, py), _ = cv2.minMaxLoc(eye)
+            if (
+                abs(px / ew - 0.5) > self.frontal_tolerance
+                or abs(py / eh - 0.5) > self.frontal_tolerance
+            ):
+                return REDIRECT
+        return FRONTAL
+
+
+def plan_spans(
+    input_filepath: os.PathLike,
+    classifier: FrameClassifier,
+    samples_per_interval: int = 2,
+    min_skip: float = 2.0,
+) -> List[Span]:
+    """Function to decide which keyframe intervals of the input need redirection.
+
+    Args:
+      input_filepath: Path to input MP4 file
+      classifier: Per-frame classifier
+      samples_per_interval: Frames decoded per keyframe interval
+      min_skip: Untouched runs shorter than this many seconds are redirected anyway,
+        which avoids splitting the input into many tiny requests
+    """
+    cv2 = classifier._cv2
+    layout = read_video_layout(input_filepath)
+    boundaries = layout.keyframes + [layout.duration]
+    capture = cv2.VideoCapture(os.fspath(input_filepath))
+    if not capture.isOpened():
+        raise RuntimeError(f"OpenCV cannot decode '{input_filepath}'.")
+    spans = []
+    try:
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            if end <= start:
+                continue
+            redirect = False
+            for sample in range(samples_per_interval):
+                capture.set(
+                    cv2.CAP_PROP_POS_MSEC,
+                    1000.0 * (start + (end - start) * sample / samples_per_interval),
+                )
+                ok, frame = capture.read()
+                if ok and classifier.classify(frame) == REDIRECT:
+                    redirect = True
+                    break
+            if spans and spans[-1].redirect == redirect:
+                spans[-1] = spans[-1]._replace(end=end)
+            else:
+                spans.append(Span(start, end, redirect))
+    finally:
+        capture.release()
+    return merge_spans(spans, min_skip)
+
+
+def merge_spans(spans: List[Span], min_skip: float) -> List[Span]:
+    """Function to fold untouched spans shorter than min_skip seconds that follow a
+    redirected span into it, and join neighbouring spans of the same kind."""
+    merged = []
+    for span in spans:
+        if (
+            not span.redirect
+            and span.end - span.start < min_skip
+            and merged
+            and merged[-1].redirect
+        ):
+            span = span._replace(redirect=True)
+        if merged and merged[-1].redirect == span.redirect:
+            merged[-1] = merged[-1]._replace(end=span.end)
+        else:
+            merged.append(span)
+    return merged
+
+
+def _ffmpeg(*args: str) -> None:
+    subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args], check=True)
+
+
+def cut_span(
+    input_filepath: os.PathLike, span: Span, output_filepath: os.PathLike, last: bool
+) -> None:
+    """Function to stream-copy a keyframe-aligned span of the input into its own MP4."""
+    args = ["-ss", f"{span.start:.6f}", "-i", os.fspath(input_filepath)]
+    if not last:
+        args += ["-t", f"{span.end - span.start:.6f}"]
+    _ffmpeg(
+        *args,
+        "-map",
+        "0",
+        "-c",
+        "copy",
+        "-avoid_negative_ts",
+        "make_zero",
+        os.fspath(output_filepath),
+    )
+
+
+def run_with_prepass(
+    input_filepath: os.PathLike,
+    output_filepath: os.PathLike,
+    redirect: Callable[[str, str], None],
+    detect_frontal: bool = False,
+    samples_per_interval: int = 2,
+    min_skip: float = 2.0,
+) -> List[Span]:
+    """Function to redirect gaze only in the spans of the input that need it.
+
+    Args:
+      input_filepath: Path to input MP4 file
+      output_filepath: Path to output MP4 file
+      redirect: Callable sending an MP4 file through RedirectGaze, called with the
+        input and output paths of a span
+      detect_frontal: Also skip spans whose gaze is already frontal
+      samples_per_interval: Frames decoded per keyframe interval
+      min_skip: Minimum duration in seconds of a skipped span
+
+    Returns:
+      The spans of the input and whether each one was redirected.
+    """
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("The eye-contact pre-pass requires ffmpeg on PATH.")
+    classifier = FrameClassifier(detect_frontal=detect_frontal)
+    spans = plan_spans(input_filepath, classifier, samples_per_interval, min_skip)
+    redirected = sum(span.end - span.start for span in spans if span.redirect)
+    print(
+        f"Pre-pass: {len(spans)} spans, {redirected:.2f}s of "
+        f"{spans[-1].end if spans else 0.0:.2f}s need gaze redirection."
+    )
+    if not any(span.redirect for span in spans):
+        shutil.copyfile(input_filepath, output_filepath)
+        return spans
+    if all(span.redirect for span in spans):
+        redirect(os.fspath(input_filepath), os.fspath(output_filepath))
+        return spans
+
+    with tempfile.TemporaryDirectory(prefix="eye-contact-") as workdir:
+        segments = []
+        for index, span in enumerate(spans):
+            segment = os.path.join(workdir, f"span_{index:05d}.mp4")
+            cut_span(input_filepath, span, segment, last=index == len(spans) - 1)
+            if span.redirect:
+                redirected_segment = os.path.join(workdir, f"span_{index:05d}_redirected.mp4")
+                redirect(segment, redirected_segment)
+                if not os.path.isfile(redirected_segment):
+                    raise RuntimeError(f"RedirectGaze produced no output for span {index}.")
+                segment = redirected_segment
+            segments.append(segment)
+        splice(segments, output_filepath)
+    return spans
@@ -0,0 +1,255 @@
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Benchmark of the studio-voice micro-batch dispatcher against a local stand-in server.
+
+Short clips are cut from the packaged sample and processed with one channel
+per clip, as the single-file client does, and with the shared-channel
+dispatcher at each requested concurrency. Optionally the single-file client
+is also launched as a process per clip to include interpreter start-up.
+"""
+
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import grpc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../common"))
+from nim_common import StreamDispatcher, get_service, stream_file, summarize  # noqa: E402
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+COMMON_DIR = os.path.join(SCRIPT_DIR, "../../common")
+
+
+def start_standin(first_output_delay: float, max_workers: int) -> tuple:
+    """Function to run the stand-in server in its own process, so it does not share our GIL."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "nim_common.standin",
+            "--service",
+            "studio-voice",
+            "--port",
+            str(port),
+            "--first-output-delay",
+            str(first_output_delay),
+            "--max-workers",
+            str(max_workers),
+        ],
+        cwd=COMMON_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    target = f"127.0.0.1:{port}"
+    with grpc.insecure_channel(target) as channel:
+        grpc.channel_ready_future(channel).result(timeout=30)
+    return server, target
+
+
+def make_clips(source_filepath: os.PathLike, clip_dir: str, count: int, seed: int = 0) -> list:
+    """Function to cut count clips of 1 to 3 seconds out of the source wav file."""
+    rng = random.Random(seed)
+    with wave.open(source_filepath, "rb") as source:
+        params = source.getparams()
+        frames = source.readframes(params.nframes)
+    frame_size = params.sampwidth * params.nchannels
+    clips = []
+    for index in range(count):
+        length = int(rng.uniform(1.0, 3.0) * params.framerate)
+        start = rng.randrange(0, max(params.nframes - length, 1))
+        clip = os.path.join(clip_dir, f"clip_{index:05d}.wav")
+        with wave.open(clip, "wb") as sink:
+            sink.setparams(params)
+            sink.writeframes(frames[start * frame_size : (start + length) * frame_size])
+        clips.append(clip)
+    return clips
+
+
+def bench_channel_per_clip(target: str, clips: list, output_dir: str) -> dict:
+    """Function to process the clips one after another, opening a channel for each."""
+    spec = get_service("studio-voice")
+    results = []
+    start_time = time.perf_counter()
+    for clip in clips:
+        with grpc.insecure_channel(target) as channel:
+            results.append(
+                stream_file(
+                    channel,
+                    spec,
+                    clip,
+                    os.path.join(output_dir, os.path.basename(clip)),
+                    single_message_limit=0,
+                )
+            )
+    return summarize(results, time.perf_counter() - start_time)
+
+
+def bench_dispatcher(
+    target: str, clips: list, output_dir: str, concurrency: int, single_message_limit: int = 0
+) -> dict:
+    """Function to process the clips over one shared channel with the dispatcher.
+
+    Clips up to single_message_limit bytes are uploaded as a single message.
+    """
+    jobs = [(clip, os.path.join(output_dir, os.path.basename(clip))) for clip in clips]
+    with grpc.insecure_channel(target) as channel:
+        start_time = time.perf_counter()
+        with StreamDispatcher(
+            channel,
+            get_service("studio-voice"),
+            max_concurrent_streams=concurrency,
+            single_message_limit=single_message_limit,
+        ) as dispatcher:
+            results = dispatcher.run(jobs)
+        return summarize(results, time.perf_counter() - start_time)
+
+
+def bench_process_per_clip(target: str, clips: list, output_dir: str) -> dict:
+    """Function to launch the single-file client as a new process for each clip."""
+    start_time = time.perf_counter()
+    for clip in clips:
+        subprocess.run(
+            [
+                sys.executable,
+                os.path.join(SCRIPT_DIR, "studio_voice.py"),
+                "--target",
+                target,
+                "--input",
+                clip,
+                "--output",
+                os.path.join(output_dir, os.path.basename(clip)),
+            ],
+            cwd=SCRIPT_DIR,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    wall_time = time.perf_counter() - start_time
+    return {
+        "clips": len(clips),
+        "failed": 0,
+        "wall_s": wall_time,
+        "clips_per_s": len(clips) / wall_time,
+        "latency_mean_s": wall_time / len(clips),
+    }
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the studio-voice batch dispatcher.")
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=os.path.join(SCRIPT_DIR, "../assets/studio_voice_48k_input.wav"),
+        help="The wav file short clips are cut from.",
+    )
+    parser.add_argument("--clips", type=int, default=200, help="Number of clips to process.")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 8, 32],
+        help="Dispatcher concurrency levels to measure.",
+    )
+    parser.add_argument(
+        "--first-output-delay",
+        type=float,
+        default=0.0,
+        help="Simulated server processing time in seconds before the first output chunk.",
+    )
+    parser.add_argument(
+        "--process-clips",
+        type=int,
+        default=0,
+        help="Also launch studio_voice.py as a process for this many clips.",
+    )
+    parser.add_argument(
+        "--single-message-limit",
+        type=int,
+        default=3 * 1024 * 1024,
+        help="Also run the dispatcher with clips up to this many bytes sent as a single "
+        "message, 0 to skip.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Benchmark entry point
+    """
+    args = parse_args()
+    server, target = start_standin(args.first_output_delay, max(args.concurrency) + 4)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="studio-voice-bench-") as workdir:
+            clip_dir = os.path.join(workdir, "clips")
+            output_dir = os.path.join(workdir, "output")
+            os.makedirs(clip_dir)
+            os.makedirs(output_dir)
+            clips = make_clips(args.source, clip_dir, args.clips)
+            if args.process_clips:
+                rows.append(
+                    (
+                        "process per clip",
+                        bench_process_per_clip(target, clips[: args.process_clips], output_dir),
+                    )
+                )
+            rows.append(("channel per clip", bench_channel_per_clip(target, clips, output_dir)))
+            for concurrency in args.concurrency:
+                rows.append(
+                    (
+                        f"dispatcher x{concurrency}",
+                        bench_dispatcher(target, clips, output_dir, concurrency),
+                    )
+                )
+                if args.single_message_limit:
+                    rows.append(
+                        (
+                            f"single message x{concurrency}",
+                            bench_dispatcher(
+                                target, clips, output_dir, concurrency, args.single_message_limit
+                            ),
+                        )
+                    )
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'mode':<20}{'clips':>8}{'clips/s':>12}{'mean latency ms':>18}{'wall s':>10}")
+    for name, summary in rows:
+        print(
+            f"{name:<20}{summary['clips']:>8}{summary['clips_per_s']:>12.1f}"
+            f"{summary['latency_mean_s'] * 1000:>18.2f}{summary['wall_s']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
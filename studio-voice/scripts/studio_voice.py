@@ -19,25 +19,61 @@
 # DEALINGS IN THE SOFTWARE.
 
 import argparse
+import contextlib
 
 import os
 import sys
-import grpc
 import time
 from typing import Iterator
 
-sys.path.append(os.path.join(os.getcwd(), "../interfaces/studio_voice"))
-# Importing gRPC compiler auto-generated maxine studiovoice library
-import studiovoice_pb2, studiovoice_pb2_grpc  # noqa: E402
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+INTERFACES_DIR = os.path.join(SCRIPT_DIR, "../interfaces/studio_voice")
+sys.path.append(os.path.join(SCRIPT_DIR, "../../common"))
 
+# grpc and the generated modules are imported by load_dependencies() on first use, so that
+# --help and argument errors return without paying for them.
+grpc = None
+studiovoice_pb2 = None
+studiovoice_pb2_grpc = None
 
-def generate_request_for_inference(input_filepath: os.PathLike) -> None:
+
+def load_dependencies() -> None:
+    """Function to import grpc and the gRPC compiler auto-generated maxine studiovoice library."""
+    global grpc, studiovoice_pb2, studiovoice_pb2_grpc
+    if studiovoice_pb2_grpc is not None:
+        return
+    if INTERFACES_DIR not in sys.path:
+        sys.path.append(INTERFACES_DIR)
+    import grpc
+    import studiovoice_pb2
+    import studiovoice_pb2_grpc
+
+
+def generate_request_for_inference(
+    input_filepath: os.PathLike, preprocess_plan: any = None
+) -> None:
     """Generator to produce the request data stream
 
     Args:
       input_filepath: Path to input file
+      preprocess_plan: Optional wav_preprocess.PreprocessPlan applied while streaming
     """
     DATA_CHUNKS = 64 * 1024  # bytes, we send the wav file in 64KB chunks
+    if preprocess_plan is not None:
+        from wav_preprocess import generate_preprocessed_wav
+
+        # Consumed from the front in place, instead of copying the rest of the buffer per chunk
+        buffer = bytearray()
+        for data in generate_preprocessed_wav(preprocess_plan):
+            buffer += data
+            while len(buffer) >= DATA_CHUNKS:
+                yield studiovoice_pb2.EnhanceAudioRequest(
+                    audio_stream_data=bytes(buffer[:DATA_CHUNKS])
+                )
+                del buffer[:DATA_CHUNKS]
+        if buffer:
+            yield studiovoice_pb2.EnhanceAudioRequest(audio_stream_data=bytes(buffer))
+        return
     with open(input_filepath, "rb") as fd:
         while True:
             buffer = fd.read(DATA_CHUNKS)
@@ -47,18 +83,37 @@ def generate_request_for_inference(input_filepath: os.PathLike) -> None:
 
 
 def write_output_file_from_response(
-    response_iter: Iterator[studiovoice_pb2.EnhanceAudioResponse], output_filepath: os.PathLike
+    response_iter: Iterator["studiovoice_pb2.EnhanceAudioResponse"],
+    output_filepath: os.PathLike,
+    preprocess_plan: any = None,
+    spans: any = None,
+    verifier: any = None,
 ) -> None:
     """Function to write the output file from the incoming gRPC data stream.
 
     Args:
       response_iter: Responses from the server to write into output file
       output_filepath: Path to output file
+      preprocess_plan: Optional wav_preprocess.PreprocessPlan whose removed silences
+        are re-inserted into the output
+      spans: nim_common.tracing.StreamSpans recording the flush of the output file
+      verifier: nim_common.integrity.OutputVerifier checking the audio returned by the NIM
     """
     with open(output_filepath, "wb") as fd:
+        sink = fd
+        if preprocess_plan is not None:
+            from wav_preprocess import SilenceReinserter
+
+            sink = SilenceReinserter(fd, preprocess_plan)
         for response in response_iter:
             if response.HasField("audio_stream_data"):
-                fd.write(response.audio_stream_data)
+                sink.write(response.audio_stream_data)
+                if verifier is not None:
+                    verifier.write(response.audio_stream_data)
+        if sink is not fd:
+            sink.close()
+        if spans is not None:
+            spans.flush(fd)
 
 
 def parse_args() -> None:
@@ -85,7 +140,7 @@ def parse_args() -> None:
     parser.add_argument(
         "--input",
         type=str,
-        default="../assets/studio_voice_48k_input.wav",
+        default=os.path.join(SCRIPT_DIR, "../assets/studio_voice_48k_input.wav"),
         help="The path to the input audio file.",
     )
     parser.add_argument(
@@ -105,6 +160,75 @@ def parse_args() -> None:
         type=str,
         help="NVCF function ID for the service, utilized when using TRY API ignored otherwise",
     )
+    parser.add_argument(
+        "--preprocess",
+        action="store_true",
+        help="Flag to downmix to mono and resample to --model-rate on the client before upload. "
+        "Requires numpy.",
+    )
+    parser.add_argument(
+        "--model-rate",
+        type=int,
+        default=48000,
+        choices=[16000, 48000],
+        help="Sample rate of the studio-voice model, used with --preprocess.",
+    )
+    parser.add_argument(
+        "--trim-silence",
+        action="store_true",
+        help="Flag to remove long silences before upload, used with --preprocess.",
+    )
+    parser.add_argument(
+        "--min-silence",
+        type=float,
+        default=1.0,
+        help="Minimum duration in seconds of a silence removed by --trim-silence.",
+    )
+    parser.add_argument(
+        "--silence-threshold",
+        type=float,
+        default=-50.0,
+        help="Level in dBFS below which audio is considered silent by --trim-silence.",
+    )
+    parser.add_argument(
+        "--reinsert-silence",
+        action="store_true",
+        help="Flag to re-insert the silences removed by --trim-silence into the output "
+        "so that it stays aligned with the input.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Deadline of the request in seconds, the request is cancelled when it expires.",
+    )
+    parser.add_argument(
+        "--deadline-rtf",
+        type=float,
+        help="Expected real-time factor of the NIM. The deadline is set to the input duration "
+        "times this factor plus slack, bounded by --timeout.",
+    )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        default="auto",
+        choices=["none", "auto", "sample", "gzip", "deflate"],
+        help="Compression of the upload. auto, the default, uses gzip for PCM WAV and none for "
+        "MP4, sample compresses the start of the input and uses gzip when it saves enough, none "
+        "saves the CPU on a local network.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Number of times the request is restarted when the NIM is unavailable.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Record the phases of the request as spans into this OTLP/JSON lines file, or post "
+        "them to this OTLP/HTTP collector URL. The trace context is sent to the NIM as "
+        "traceparent metadata.",
+    )
     return parser.parse_args()
 
 
@@ -113,6 +237,13 @@ def process_request(
     input_filepath: os.PathLike,
     output_filepath: os.PathLike,
     request_metadata: dict = None,
+    preprocess_plan: any = None,
+    reinsert_silence: bool = False,
+    timeout: float = None,
+    deadline_rtf: float = None,
+    compression: str = "auto",
+    retries: int = 2,
+    trace: any = None,
 ) -> None:
     """Function to process gRPC request
 
@@ -121,25 +252,112 @@ def process_request(
       input_filepath: Path to input file
       output_filepath: Path to output file
       request_metadata: Credentials to process request
+      preprocess_plan: Optional wav_preprocess.PreprocessPlan applied to the upload
+      reinsert_silence: Re-insert the silences removed by preprocess_plan into the output
+      timeout: Deadline of the request in seconds
+      deadline_rtf: Expected real-time factor, bounds the deadline to duration * RTF plus slack
+      compression: Compression mode of the upload, see nim_common.compression
+      retries: Number of times the request is restarted when the NIM is unavailable
+      trace: nim_common.tracing.Span the request is traced under, not traced when None
     """
-    try:
+    load_dependencies()
+    from nim_common.compression import choose_compression
+    from nim_common.deadlines import (
+        CancelScope,
+        call_timeout,
+        cancel_on_signals,
+        cancellation_summary,
+        expected_processing_time,
+    )
+    from nim_common.integrity import OutputVerifier
+    from nim_common.retries import call_with_retries
+    from nim_common.throughput import describe_rates
+
+    # SIGINT and SIGTERM cancel the call, so the NIM stops processing an abandoned request
+    scope = CancelScope(call_timeout(input_filepath, deadline_rtf, timeout))
+    decision = choose_compression(input_filepath, compression)
+    if decision.algorithm:
+        print(f"Compressing the upload with {decision.algorithm} ({decision.reason}).")
+    spans = None
+    if trace is not None:
+        from nim_common.services import get_service
+        from nim_common.tracing import StreamSpans
+
+        spans = StreamSpans(trace.tracer, get_service("studio-voice"), trace)
+    start_time = time.time()
+
+    def attempt() -> None:
+        # A retry restarts the upload and rewrites the output from the beginning
         stub = studiovoice_pb2_grpc.MaxineStudioVoiceStub(channel)
-        start_time = time.time()
+        requests = generate_request_for_inference(
+            input_filepath=input_filepath, preprocess_plan=preprocess_plan
+        )
+        metadata = request_metadata
+        if spans is not None:
+            # Sends the traceparent of the request so that the server's spans join the trace
+            spans.connect(channel, scope.remaining())
+            requests = spans.requests(requests)
+            metadata = spans.metadata(request_metadata)
 
         responses = stub.EnhanceAudio(
-            generate_request_for_inference(input_filepath=input_filepath),
-            metadata=request_metadata,
+            scope.guard(requests),
+            metadata=metadata,
+            timeout=scope.remaining(),
+            compression=decision.grpc_compression(),
         )
+        received = responses
+        if spans is not None:
+            received = spans.responses(responses, lambda r: r.HasField("audio_stream_data"))
+        # A stream the NIM ended early still completes with OK, only the WAV header tells
+        verifier = OutputVerifier(hashes=(), container="wav")
+
+        try:
+            with scope.attach(responses):
+                write_output_file_from_response(
+                    response_iter=received,
+                    output_filepath=output_filepath,
+                    preprocess_plan=preprocess_plan if reinsert_silence else None,
+                    spans=spans,
+                    verifier=verifier,
+                )
+        finally:
+            # Releases the call at once when the output could not be written
+            responses.cancel()
+        verifier.verify()
+
+    def on_retry(number: int, error: grpc.RpcError, delay: float) -> None:
+        print(f"{error.code().name}: {error.details()}, retry {number}/{retries} in {delay:.1f}s.")
 
-        write_output_file_from_response(response_iter=responses, output_filepath=output_filepath)
+    try:
+        with cancel_on_signals(scope), spans or contextlib.nullcontext():
+            call_with_retries(attempt, retries, scope=scope, on_retry=on_retry)
 
         end_time = time.time()
         print(
             f"Function invocation completed in {end_time-start_time:.2f}s, "
             "the output file is generated."
         )
-    except BaseException as e:
+        rates = describe_rates(input_filepath, end_time - start_time)
+        if rates is not None:
+            print(rates)
+        if decision.algorithm:
+            upload_size = (
+                preprocess_plan.upload_size if preprocess_plan else os.path.getsize(input_filepath)
+            )
+            saved = decision.estimated_saving(upload_size) or 0
+            print(f"Compression saved about {saved / 1e6:.2f} MB of upload.")
+    except grpc.RpcError as e:
+        message = cancellation_summary(
+            scope,
+            e.code().name,
+            time.time() - start_time,
+            expected_processing_time(input_filepath, deadline_rtf),
+        )
+        print(e if message is None else message)
+        raise SystemExit(1)
+    except Exception as e:
         print(e)
+        raise SystemExit(1)
 
 
 def main():
@@ -154,31 +372,66 @@ def main():
     else:
         raise FileNotFoundError(f"The file '{input_filepath}' does not exist. Exiting.")
 
-    if args.use_ssl:
-        if not args.api_key or not args.function_id:
-            raise RuntimeError(
-                "If --use-ssl is specified, both --api-key and --function-id are required."
-            )
-        request_metadata = (
-            ("authorization", "Bearer {}".format(args.api_key)),
-            ("function-id", args.function_id),
+    preprocess_plan = None
+    if args.preprocess:
+        # Imported on demand so that numpy is only required for preprocessing
+        from wav_preprocess import plan_preprocessing
+
+        preprocess_plan = plan_preprocessing(
+            input_filepath,
+            model_rate=args.model_rate,
+            trim_silence=args.trim_silence,
+            threshold_db=args.silence_threshold,
+            min_silence=args.min_silence,
         )
-        with grpc.secure_channel(
-            target=args.target, credentials=grpc.ssl_channel_credentials()
-        ) as channel:
-            process_request(
-                channel=channel,
-                input_filepath=input_filepath,
-                output_filepath=output_filepath,
-                request_metadata=request_metadata,
-            )
-    else:
-        with grpc.insecure_channel(target=args.target) as channel:
-            process_request(
-                channel=channel,
-                input_filepath=input_filepath,
-                output_filepath=output_filepath,
+        print(preprocess_plan.describe())
+    elif args.trim_silence or args.reinsert_silence:
+        raise RuntimeError("--trim-silence and --reinsert-silence require --preprocess.")
+
+    load_dependencies()
+    from nim_common.tracing import traced_run
+
+    job = {"nim.input": input_filepath, "nim.preprocess": bool(args.preprocess)}
+    with traced_run(args.trace, "studio-voice", job) as trace:
+        if args.use_ssl:
+            if not args.api_key or not args.function_id:
+                raise RuntimeError(
+                    "If --use-ssl is specified, both --api-key and --function-id are required."
+                )
+            request_metadata = (
+                ("authorization", "Bearer {}".format(args.api_key)),
+                ("function-id", args.function_id),
             )
+            with grpc.secure_channel(
+                target=args.target, credentials=grpc.ssl_channel_credentials()
+            ) as channel:
+                process_request(
+                    channel=channel,
+                    input_filepath=input_filepath,
+                    output_filepath=output_filepath,
+                    request_metadata=request_metadata,
+                    preprocess_plan=preprocess_plan,
+                    reinsert_silence=args.reinsert_silence,
+                    timeout=args.timeout,
+                    deadline_rtf=args.deadline_rtf,
+                    compression=args.compression,
+                    retries=args.retries,
+                    trace=trace,
+                )
+        else:
+            with grpc.insecure_channel(target=args.target) as channel:
+                process_request(
+                    channel=channel,
+                    input_filepath=input_filepath,
+                    output_filepath=output_filepath,
+                    preprocess_plan=preprocess_plan,
+                    reinsert_silence=args.reinsert_silence,
+                    timeout=args.timeout,
+                    deadline_rtf=args.deadline_rtf,
+                    compression=args.compression,
+                    retries=args.retries,
+                    trace=trace,
+                )
 
 
 if __name__ == "__main__":
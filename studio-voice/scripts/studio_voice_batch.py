@@ -0,0 +1,359 @@
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../common"))
+
+
+def collect_inputs(inputs: list) -> list:
+    """Function to expand input files and directories into a list of wav files.
+
+    Args:
+      inputs: Paths to wav files or to directories containing wav files
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.wav"))))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"The file '{path}' does not exist. Exiting.")
+    return files
+
+
+def parse_args() -> None:
+    """
+    Parse command-line arguments using argparse.
+    """
+    parser = argparse.ArgumentParser(
+        description="Process many short wav audio files concurrently over one gRPC connection "
+        "and apply studio-voice."
+    )
+    parser.add_argument(
+        "--use-ssl",
+        action="store_true",
+        help="Flag to control if SSL/TLS encryption should be used. "
+        "When running preview SSL must be used.",
+    )
+    parser.add_argument(
+        "--target",
+        type=str,
+        default="127.0.0.1:8001",
+        help="IP:port of gRPC service, when hosted locally. "
+        "Use grpc.nvcf.nvidia.com:443 when hosted on NVCF.",
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Paths to input audio files or directories of wav files.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="studio_voice_batch_output",
+        help="Directory for the output audio files, named after the inputs.",
+    )
+    parser.add_argument(
+        "--max-concurrent-streams",
+        type=int,
+        default=32,
+        help="Maximum number of EnhanceAudio streams in flight on the shared connection.",
+    )
+    parser.add_argument(
+        "--adaptive-concurrency",
+        choices=["aimd", "gradient"],
+        help="Adapt the streams in flight to the latency and errors of the NIM, up to "
+        "--max-concurrent-streams.",
+    )
+    parser.add_argument(
+        "--single-message-limit",
+        type=int,
+        default=3 * 1024 * 1024,
+        help="Inputs up to this many bytes are sent as a single message.",
+    )
+    parser.add_argument(
+        "--requests-per-s",
+        type=float,
+        help="Optional limit of EnhanceAudio streams started per second.",
+    )
+    parser.add_argument(
+        "--bytes-per-s",
+        type=float,
+        help="Optional limit of input bytes admitted per second.",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        help="Optional path of a JSON report with per-clip timings and the batch summary.",
+    )
+    parser.add_argument(
+        "--record",
+        type=str,
+        help="Optional file the arrival, size and timings of every call are appended to as JSON "
+        "lines, for replay with nim_common.replay.",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Optional OTLP/JSON lines file, or OTLP/HTTP collector URL, the phases of every "
+        "call are recorded to as spans, see nim_common.tracing.",
+    )
+    parser.add_argument(
+        "--hedge-target",
+        type=str,
+        help="Optional IP:port of a second studio-voice target. A clip without output after "
+        "the hedge delay is also sent there and the first copy to complete wins.",
+    )
+    parser.add_argument(
+        "--hedge-delay",
+        type=float,
+        help="Seconds without output before a clip is hedged. Learned from the recent first "
+        "output times when not set.",
+    )
+    parser.add_argument(
+        "--hedge-quantile",
+        type=float,
+        default=0.95,
+        help="Quantile of the recent first output times used as the learned hedge delay.",
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=0.05,
+        help="Largest fraction of the clips that are hedged.",
+    )
+    parser.add_argument(
+        "--api-key",
+        type=str,
+        help="NGC API key required for authentication, "
+        "utilized when using TRY API ignored otherwise",
+    )
+    parser.add_argument(
+        "--function-id",
+        type=str,
+        help="NVCF function ID for the service, utilized when using TRY API ignored otherwise",
+    )
+    return parser.parse_args()
+
+
+def process_batch(
+    channel: any,
+    input_filepaths: list,
+    output_dir: os.PathLike,
+    max_concurrent_streams: int,
+    single_message_limit: int,
+    request_metadata: tuple = None,
+    requests_per_s: float = None,
+    bytes_per_s: float = None,
+    adaptive_concurrency: str = None,
+    record: os.PathLike = None,
+    target: str = None,
+    trace: str = None,
+    hedge_channel: any = None,
+    hedge_delay: float = None,
+    hedge_quantile: float = 0.95,
+    hedge_budget: float = 0.05,
+) -> dict:
+    """Function to enhance all inputs over channel and print per-clip timings
+
+    Args:
+      channel: gRPC channel for server client communication
+      input_filepaths: Paths to input files
+      output_dir: Directory for the output files
+      max_concurrent_streams: Maximum number of streams in flight
+      single_message_limit: Largest input in bytes sent as a single message
+      request_metadata: Credentials to process request
+      requests_per_s: Optional limit of streams started per second
+      bytes_per_s: Optional limit of input bytes admitted per second
+      adaptive_concurrency: Optional adaptive limit algorithm, "aimd" or "gradient"
+      record: Optional path of the call trace, see nim_common.traffic
+      target: IP:port of the service, recorded in the call trace and throughput report
+      trace: Optional OTLP/JSON lines file or collector URL of the spans, see nim_common.tracing
+      hedge_channel: Optional channel to a second target slow clips are hedged on
+      hedge_delay: Seconds without output before a clip is hedged, learned when None
+      hedge_quantile: Quantile of the first output times used as the learned hedge delay
+      hedge_budget: Largest fraction of the clips that are hedged
+    """
+    from nim_common import FairScheduler, StreamDispatcher, get_service, summarize
+    from nim_common.hedging import HedgePolicy
+    from nim_common.limits import LIMITERS
+    from nim_common.throughput import ThroughputReport
+    from nim_common.tracing import Tracer, create_exporter
+    from nim_common.traffic import TrafficRecorder
+
+    scheduler = None
+    if requests_per_s or bytes_per_s:
+        scheduler = FairScheduler(requests_per_s=requests_per_s, bytes_per_s=bytes_per_s)
+    limiter = None
+    if adaptive_concurrency:
+        limiter = LIMITERS[adaptive_concurrency](
+            initial=min(4, max_concurrent_streams), maximum=max_concurrent_streams
+        )
+
+    hedging = None
+    if hedge_channel is not None:
+        hedging = HedgePolicy(hedge_delay, quantile=hedge_quantile, budget=hedge_budget)
+    recorder = None if record is None else TrafficRecorder(record, target=target)
+    tracer = None if trace is None else Tracer(create_exporter(trace), "studio-voice-batch")
+
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [
+        (input_filepath, os.path.join(output_dir, os.path.basename(input_filepath)))
+        for input_filepath in input_filepaths
+    ]
+    with StreamDispatcher(
+        channel,
+        get_service("studio-voice"),
+        max_concurrent_streams=max_concurrent_streams,
+        metadata=request_metadata,
+        single_message_limit=single_message_limit,
+        scheduler=scheduler,
+        limiter=limiter,
+        recorder=recorder,
+        tracer=tracer,
+        hedge_channel=hedge_channel,
+        hedging=hedging,
+    ) as dispatcher:
+        connect_time = dispatcher.wait_for_ready()
+        start_time = time.perf_counter()
+        results = dispatcher.run(jobs)
+        wall_time = time.perf_counter() - start_time
+    if recorder is not None:
+        recorder.close()
+    if tracer is not None:
+        tracer.close()
+
+    for result in results:
+        if result.ok:
+            print(
+                f"{result.input_filepath}: {result.latency * 1000:.1f} ms "
+                f"(queued {result.queue_wait * 1000:.1f} ms, "
+                f"first output {_milliseconds(result.first_output)})"
+            )
+        else:
+            print(f"{result.input_filepath}: failed, {result.error}")
+    summary = summarize(results, wall_time)
+    summary["connect_s"] = connect_time
+    summary["connect_per_clip_s"] = connect_time / max(len(results), 1)
+    print(
+        f"Processed {summary['clips'] - summary['failed']}/{summary['clips']} clips in "
+        f"{wall_time:.2f}s ({summary['clips_per_s'] or 0:.1f} clips/s), connection setup "
+        f"{connect_time * 1000:.1f} ms amortized to {summary['connect_per_clip_s'] * 1000:.2f} "
+        "ms per clip."
+    )
+    if summary["rtf"] is not None:
+        print(
+            f"Enhanced {summary['media_s']:.1f}s of audio at RTF {summary['rtf']:.3f} per stream, "
+            f"{summary['media_s_per_s']:.1f} audio seconds and "
+            f"{summary['bytes_per_s'] / 1e6:.2f} MB per second over all streams."
+        )
+    throughput = ThroughputReport()
+    for result in results:
+        throughput.add(result, target)
+    summary["throughput"] = throughput.stats()
+    if scheduler is not None:
+        summary["scheduler"] = scheduler.stats()
+    if limiter is not None:
+        summary["concurrency"] = limiter.stats()
+        print(
+            f"Adaptive concurrency settled at {summary['concurrency']['limit']} streams, "
+            f"peak {summary['concurrency']['peak_in_flight']} in flight."
+        )
+    if hedging is not None:
+        summary["hedging"] = hedging.stats()
+        print(
+            f"Hedged {summary['hedging']['hedged']}/{summary['hedging']['calls']} clips, "
+            f"the hedge won {summary['hedging']['hedge_wins']}, p99 latency "
+            f"{(summary['hedging']['latency_p99_s'] or 0) * 1000:.1f} ms."
+        )
+    return {"summary": summary, "clips": [result.as_dict() for result in results]}
+
+
+def _milliseconds(seconds: float) -> str:
+    return "n/a" if seconds is None else f"{seconds * 1000:.1f} ms"
+
+
+def main():
+    """
+    Main client function
+    """
+    args = parse_args()
+    input_filepaths = collect_inputs(args.input)
+    print(f"Processing {len(input_filepaths)} files.")
+    import grpc
+
+    options = dict(
+        input_filepaths=input_filepaths,
+        output_dir=args.output_dir,
+        max_concurrent_streams=args.max_concurrent_streams,
+        single_message_limit=args.single_message_limit,
+        requests_per_s=args.requests_per_s,
+        bytes_per_s=args.bytes_per_s,
+        adaptive_concurrency=args.adaptive_concurrency,
+        record=args.record,
+        target=args.target,
+        trace=args.trace,
+        hedge_delay=args.hedge_delay,
+        hedge_quantile=args.hedge_quantile,
+        hedge_budget=args.hedge_budget,
+    )
+    if args.use_ssl:
+        if not args.api_key or not args.function_id:
+            raise RuntimeError(
+                "If --use-ssl is specified, both --api-key and --function-id are required."
+            )
+        options["request_metadata"] = (
+            ("authorization", "Bearer {}".format(args.api_key)),
+            ("function-id", args.function_id),
+        )
+    with contextlib.ExitStack() as stack:
+
+        def open_channel(target: str) -> any:
+            if args.use_ssl:
+                channel = grpc.secure_channel(
+                    target=target, credentials=grpc.ssl_channel_credentials()
+                )
+            else:
+                channel = grpc.insecure_channel(target=target)
+            return stack.enter_context(channel)
+
+        if args.hedge_target:
+            options["hedge_channel"] = open_channel(args.hedge_target)
+        report = process_batch(channel=open_channel(args.target), **options)
+
+    if args.report:
+        with open(args.report, "w") as fd:
+            json.dump(report, fd, indent=2)
+    if report["summary"]["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
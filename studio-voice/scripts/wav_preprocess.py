@@ -0,0 +1,552 @@
+# Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+"""Client-side WAV preprocessing for the Studio Voice client.
+
+The input file is read in chunks, downmixed to mono, resampled to the model
+sample rate with a polyphase FIR filter and, optionally, stripped of long
+silences before it is uploaded. Memory use does not depend on the input length.
+The removed silences are recorded so they can be re-inserted into the enhanced
+output to keep it aligned with the original recording.
+"""
+
+import math
+import os
+import struct
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+CHUNK_FRAMES = 32 * 1024  # input frames processed per step
+
+
+class WavInfo:
+    """Layout of a RIFF/WAVE file as read from its header.
+
+    Args:
+      format_tag: WAVE format tag, PCM or IEEE float
+      channels: Number of interleaved channels
+      sample_rate: Frames per second
+      bits_per_sample: Bits per sample of a single channel
+      data_offset: Byte offset of the first sample in the file
+      data_size: Size of the sample data in bytes
+    """
+
+    def __init__(
+        self,
+        format_tag: int,
+        channels: int,
+        sample_rate: int,
+        bits_per_sample: int,
+        data_offset: int,
+        data_size: int,
+    ) -> None:
+        self.format_tag = format_tag
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+        self.data_offset = data_offset
+        self.data_size = data_size
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.bits_per_sample // 8
+
+    @property
+    def num_frames(self) -> int:
+        return self.data_size // self.block_align
+
+    @property
+    def duration(self) -> float:
+        return self.num_frames / self.sample_rate
+
+
+def read_wav_info(fd: BinaryIO) -> WavInfo:
+    """Function to parse the WAV header and leave the file positioned at the samples.
+
+    Args:
+      fd: Binary file object positioned at the start of the RIFF header
+    """
+    riff = fd.read(12)
+    if len(riff) < 12 or riff[0:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("Input is not a RIFF/WAVE file.")
+    fmt = None
+    while True:
+        header = fd.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk.")
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            body = fd.read(chunk_size + (chunk_size & 1))
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # The first two bytes of the sub-format GUID hold the actual format tag
+                format_tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes the fmt chunk.")
+            info = WavInfo(*fmt, data_offset=fd.tell(), data_size=chunk_size)
+            if info.format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                raise ValueError(f"Unsupported WAV format tag {info.format_tag:#06x}.")
+            if info.bits_per_sample not in (8, 16, 24, 32):
+                raise ValueError(f"Unsupported WAV sample width {info.bits_per_sample} bits.")
+            return info
+        else:
+            fd.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def wav_header(
+    sample_rate: int, channels: int, num_frames: int, bits_per_sample: int = 16
+) -> bytes:
+    """Function to build a canonical 44 byte PCM WAV header.
+
+    Args:
+      sample_rate: Frames per second
+      channels: Number of interleaved channels
+      num_frames: Number of frames in the data chunk
+      bits_per_sample: Bits per sample of a single channel
+    """
+    block_align = channels * bits_per_sample // 8
+    data_size = num_frames * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        WAVE_FORMAT_PCM,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits_per_sample,
+        b"data",
+        data_size,
+    )
+
+
+def decode_frames(raw: bytes, info: WavInfo) -> np.ndarray:
+    """Function to convert raw sample bytes into float32 frames in [-1, 1].
+
+    Args:
+      raw: Sample bytes, a whole number of frames
+      info: Layout of the WAV file the bytes come from
+    """
+    bits = info.bits_per_sample
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = np.frombuffer(raw, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+    elif bits == 8:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif bits == 16:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif bits == 24:
+        triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+        values = np.where(values >= 1 << 23, values - (1 << 24), values)
+        samples = values.astype(np.float32) / float(1 << 23)
+    else:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / float(1 << 31)
+    return samples.reshape(-1, info.channels)
+
+
+def iter_mono_chunks(
+    input_filepath: os.PathLike, chunk_frames: int = CHUNK_FRAMES
+) -> Iterator[np.ndarray]:
+    """Generator to read a WAV file chunk by chunk, downmixed to mono float32.
+
+    Args:
+      input_filepath: Path to input WAV file
+      chunk_frames: Number of frames per chunk
+    """
+    with open(input_filepath, "rb") as fd:
+        info = read_wav_info(fd)
+        remaining = info.num_frames * info.block_align
+        while remaining > 0:
+            raw = fd.read(min(chunk_frames * info.block_align, remaining))
+            raw = raw[: len(raw) - len(raw) % info.block_align]
+            if not raw:
+                break
+            remaining -= len(raw)
+            yield decode_frames(raw, info).mean(axis=1, dtype=np.float32)
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """Function to convert float samples in [-1, 1] into little-endian 16-bit PCM."""
+    return (np.clip(samples, -1.0, 32767.0 / 32768.0) * 32768.0).astype("<i2").tobytes()
+
+
+class PolyphaseResampler:
+    """Streaming rational resampler built from a windowed-sinc polyphase filter bank.
+
+    Only the output samples are ever computed: each one is the dot product of a
+    single filter phase with the most recent input samples, so the cost does not
+    depend on the intermediate upsampled rate. Feeding the input in any chunking
+    yields the same output as resampling it in one piece.
+
+    Args:
+      in_rate: Input sample rate
+      out_rate: Output sample rate
+      half_width: Half length of the filter in input/output periods
+      beta: Kaiser window shape parameter
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, half_width: int = 10, beta: float = 5.0):
+        g = math.gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        factor = max(self.up, self.down)
+        self.delay = half_width * factor
+        n = np.arange(2 * self.delay + 1, dtype=np.float64) - self.delay
+        taps = np.sinc(n / factor) * np.kaiser(len(n), beta)
+        taps *= self.up / taps.sum()
+        self.phase_len = -(-len(taps) // self.up)
+        taps = np.pad(taps, (0, self.phase_len * self.up - len(taps)))
+        # bank[p, k] is the tap applied to input sample n_hi - k for output phase p
+        self.bank = taps.reshape(self.phase_len, self.up).T.astype(np.float32)
+        self._buffer = np.zeros(self.phase_len - 1, dtype=np.float32)
+        self._buffer_start = -(self.phase_len - 1)
+        self._num_in = 0
+        self._next_out = 0
+
+    def output_length(self, num_in: int) -> int:
+        """Number of output samples produced for num_in input samples."""
+        return -(-num_in * self.up // self.down)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Function to resample the next chunk of the input.
+
+        Args:
+          samples: Mono float32 input samples
+        """
+        self._buffer = np.concatenate((self._buffer, samples.astype(np.float32, copy=False)))
+        self._num_in += len(samples)
+        return self._emit(self._num_in - 1, None)
+
+    def flush(self) -> np.ndarray:
+        """Function to emit the output samples still held back by the filter delay."""
+        total = self.output_length(self._num_in)
+        if total == 0:
+            return np.zeros(0, dtype=np.float32)
+        last_needed = ((total - 1) * self.down + self.delay) // self.up
+        padding = last_needed - (self._num_in - 1)
+        if padding > 0:
+            self._buffer = np.concatenate((self._buffer, np.zeros(padding, dtype=np.float32)))
+        return self._emit(last_needed, total)
+
+    def _emit(self, last_available: int, limit: Optional[int]) -> np.ndarray:
+        end = (last_available * self.up + self.up - 1 - self.delay) // self.down + 1
+        if limit is not None:
+            end = min(end, limit)
+        if end <= self._next_out:
+            return np.zeros(0, dtype=np.float32)
+        t = np.arange(self._next_out, end, dtype=np.int64) * self.down + self.delay
+        newest = t // self.up - self._buffer_start
+        window = self._buffer[newest[:, None] - np.arange(self.phase_len)[None, :]]
+        output = np.einsum("ij,ij->i", self.bank[t % self.up], window)
+        self._next_out = end
+        consumed = (end * self.down + self.delay) // self.up - (self.phase_len - 1)
+        consumed -= self._buffer_start
+        if consumed > 0:
+            self._buffer = self._buffer[consumed:]
+            self._buffer_start += consumed
+        return output
+
+
+def find_silences(
+    input_filepath: os.PathLike,
+    threshold_db: float = -50.0,
+    min_silence: float = 1.0,
+    keep: float = 0.1,
+    frame_duration: float = 0.02,
+) -> List[Tuple[int, int]]:
+    """Function to locate long silences in a WAV file.
+
+    The file is scanned in fixed frames; a frame is silent when its RMS level is
+    below threshold_db. Runs of silent frames of at least min_silence seconds are
+    reported, shortened by keep seconds on both sides so speech onsets and decays
+    are preserved.
+
+    Args:
+      input_filepath: Path to input WAV file
+      threshold_db: Level in dBFS below which a frame is silent
+      min_silence: Minimum duration in seconds of a reported silence
+      keep: Seconds of silence left untouched at each side of a reported silence
+      frame_duration: Analysis frame length in seconds
+
+    Returns:
+      Sorted list of (start, end) frame ranges in the input sample rate.
+    """
+    with open(input_filepath, "rb") as fd:
+        info = read_wav_info(fd)
+    frame = max(1, int(round(frame_duration * info.sample_rate)))
+    chunk_frames = max(1, CHUNK_FRAMES // frame) * frame
+    threshold = 10.0 ** (threshold_db / 20.0)
+    min_frames = int(round(min_silence * info.sample_rate))
+    keep_frames = int(round(keep * info.sample_rate))
+
+    silences = []
+    run_start = None
+    position = 0
+
+    def close_run(run_end: int) -> None:
+        start = 0 if run_start == 0 else run_start + keep_frames
+        end = run_end if run_end == info.num_frames else run_end - keep_frames
+        if run_end - run_start >= min_frames and end > start:
+            silences.append((start, end))
+
+    for samples in iter_mono_chunks(input_filepath, chunk_frames):
+        count = -(-len(samples) // frame)
+        padded = np.pad(samples, (0, count * frame - len(samples)))
+        rms = np.sqrt(np.mean(np.square(padded.reshape(count, frame)), axis=1))
+        silent = rms < threshold
+        # Frame indices where the silent/non-silent state changes within this chunk
+        edges = np.flatnonzero(np.diff(silent.astype(np.int8))) + 1
+        for index in np.concatenate(([0], edges)):
+            if silent[index] and run_start is None:
+                run_start = position + int(index) * frame
+            elif not silent[index] and run_start is not None:
+                close_run(position + int(index) * frame)
+                run_start = None
+        position += len(samples)
+    if run_start is not None:
+        close_run(position)
+    return silences
+
+
+class PreprocessPlan:
+    """Description of the preprocessed upload derived from the input file.
+
+    Args:
+      input_filepath: Path to input WAV file
+      info: Layout of the input file
+      model_rate: Sample rate of the uploaded audio
+      silences: Frame ranges of the input removed before upload
+    """
+
+    def __init__(
+        self,
+        input_filepath: os.PathLike,
+        info: WavInfo,
+        model_rate: int,
+        silences: List[Tuple[int, int]],
+    ) -> None:
+        self.input_filepath = input_filepath
+        self.info = info
+        self.model_rate = model_rate
+        self.silences = silences
+        self.kept_frames = info.num_frames - sum(end - start for start, end in silences)
+        if model_rate == info.sample_rate:
+            self.output_frames = self.kept_frames
+        else:
+            resampler = PolyphaseResampler(info.sample_rate, model_rate)
+            self.output_frames = resampler.output_length(self.kept_frames)
+
+    @property
+    def upload_size(self) -> int:
+        return 44 + 2 * self.output_frames
+
+    @property
+    def removed_seconds(self) -> float:
+        return (self.info.num_frames - self.kept_frames) / self.info.sample_rate
+
+    def describe(self) -> str:
+        info = self.info
+        return (
+            f"Preprocessed {info.channels} ch {info.sample_rate} Hz {info.bits_per_sample}-bit "
+            f"into mono {self.model_rate} Hz 16-bit, removed {self.removed_seconds:.2f}s of "
+            f"silence, uploading {self.upload_size} bytes instead of "
+            f"{info.data_offset + info.data_size} bytes."
+        )
+
+
+def plan_preprocessing(
+    input_filepath: os.PathLike,
+    model_rate: Optional[int] = None,
+    trim_silence: bool = False,
+    threshold_db: float = -50.0,
+    min_silence: float = 1.0,
+) -> PreprocessPlan:
+    """Function to inspect the input and decide what will be uploaded.
+
+    Args:
+      input_filepath: Path to input WAV file
+      model_rate: Sample rate expected by the model, the input rate is kept when None
+      trim_silence: Remove silences longer than min_silence seconds
+      threshold_db: Level in dBFS below which audio is considered silent
+      min_silence: Minimum duration in seconds of a removed silence
+    """
+    with open(input_filepath, "rb") as fd:
+        info = read_wav_info(fd)
+    silences = []
+    if trim_silence:
+        silences = find_silences(input_filepath, threshold_db=threshold_db, min_silence=min_silence)
+    return PreprocessPlan(input_filepath, info, model_rate or info.sample_rate, silences)
+
+
+def generate_preprocessed_wav(plan: PreprocessPlan) -> Iterator[bytes]:
+    """Generator to produce the preprocessed WAV file as a stream of byte chunks.
+
+    Args:
+      plan: Plan returned by plan_preprocessing
+    """
+    yield wav_header(plan.model_rate, 1, plan.output_frames)
+    resampler = None
+    if plan.model_rate != plan.info.sample_rate:
+        resampler = PolyphaseResampler(plan.info.sample_rate, plan.model_rate)
+    silences = iter(plan.silences)
+    silence = next(silences, None)
+    position = 0
+    for samples in iter_mono_chunks(plan.input_filepath):
+        chunk_end = position + len(samples)
+        keep = np.ones(len(samples), dtype=bool)
+        while silence is not None and silence[0] < chunk_end:
+            keep[max(silence[0] - position, 0) : silence[1] - position] = False
+            if silence[1] > chunk_end:
+                break
+            silence = next(silences, None)
+        position = chunk_end
+        samples = samples[keep]
+        if resampler is not None:
+            samples = resampler.process(samples)
+        if len(samples):
+            yield to_pcm16(samples)
+    if resampler is not None:
+        tail = resampler.flush()
+        if len(tail):
+            yield to_pcm16(tail)
+
+
+class SilenceReinserter:
+    """File writer re-inserting the silences removed by preprocessing into the output WAV.
+
+    The enhanced audio is written through as it arrives; zero samples are spliced
+    in where silences were removed and the RIFF sizes are patched on close.
+
+    Args:
+      fd: Binary file object opened for writing, must be seekable
+      plan: Plan used to preprocess the uploaded audio
+    """
+
+    def __init__(self, fd: BinaryIO, plan: PreprocessPlan) -> None:
+        self._fd = fd
+        self._plan = plan
+        self._pending = b""
+        self._info = None
+        self._insertions = []
+        self._position = 0
+        self._data_size = 0
+        self._data_size_offset = 0
+
+    def _parse_header(self) -> bool:
+        data = self._pending
+        if len(data) < 12:
+            return False
+        if data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+            raise ValueError("Enhanced output is not a RIFF/WAVE stream.")
+        offset = 12
+        fmt = None
+        while offset + 8 <= len(data):
+            chunk_id, chunk_size = struct.unpack("<4sI", data[offset : offset + 8])
+            if chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("Enhanced output has no fmt chunk.")
+                self._info = WavInfo(*fmt, data_offset=offset + 8, data_size=0)
+                self._data_size_offset = offset + 4
+                self._fd.write(data[: offset + 8])
+                self._pending = data[offset + 8 :]
+                self._schedule(self._info.sample_rate)
+                return True
+            end = offset + 8 + chunk_size + (chunk_size & 1)
+            if end > len(data):
+                return False
+            if chunk_id == b"fmt ":
+                format_tag, channels, sample_rate, _, _, bits = struct.unpack(
+                    "<HHIIHH", data[offset + 8 : offset + 24]
+                )
+                fmt = (format_tag, channels, sample_rate, bits)
+            offset = end
+        return False
+
+    def _schedule(self, output_rate: int) -> None:
+        scale = output_rate / self._plan.info.sample_rate
+        removed = 0
+        for start, end in self._plan.silences:
+            at = int(round((start - removed) * scale))
+            self._insertions.append((at, int(round((end - start) * scale))))
+            removed += end - start
+        self._insertions.reverse()
+
+    def _write_silence(self, frames: int) -> None:
+        fill = b"\x80" if self._info.bits_per_sample == 8 else b"\x00"
+        block = fill * (self._info.block_align * min(frames, CHUNK_FRAMES))
+        while frames > 0:
+            count = min(frames, CHUNK_FRAMES)
+            self._fd.write(block[: count * self._info.block_align])
+            self._data_size += count * self._info.block_align
+            frames -= count
+
+    def _write_frames(self, final: bool) -> None:
+        block_align = self._info.block_align
+        data = self._pending
+        usable = len(data) - len(data) % block_align
+        offset = 0
+        while (
+            self._insertions
+            and self._insertions[-1][0] <= self._position + (usable - offset) // block_align
+        ):
+            at, length = self._insertions.pop()
+            count = max(at - self._position, 0) * block_align
+            self._fd.write(data[offset : offset + count])
+            self._data_size += count
+            self._position += count // block_align
+            offset += count
+            self._write_silence(length)
+        self._fd.write(data[offset:usable])
+        self._data_size += usable - offset
+        self._position += (usable - offset) // block_align
+        self._pending = data[usable:]
+        if final:
+            while self._insertions:
+                self._write_silence(self._insertions.pop()[1])
+
+    def write(self, data: bytes) -> None:
+        """Function to write the next chunk of the enhanced output."""
+        self._pending += data
+        if self._info is None and not self._parse_header():
+            return
+        self._write_frames(final=False)
+
+    def close(self) -> None:
+        """Function to write the trailing silences and patch the WAV sizes."""
+        if self._info is None:
+            raise ValueError("Enhanced output ended before the WAV data chunk.")
+        self._write_frames(final=True)
+        end = self._fd.tell()
+        self._fd.seek(4)
+        self._fd.write(struct.pack("<I", end - 8))
+        self._fd.seek(self._data_size_offset)
+        self._fd.write(struct.pack("<I", self._data_size))
+        self._fd.seek(end)